@@ -0,0 +1,223 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Micro-benchmarks of the common operations on L{Deferred}s, so that changes to
+their implementation can be compared.
+
+Run with the names of benchmarks to run only those, otherwise all are run.
+Each reports the number of operations per second, the best of several runs.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
+
+benchmarks = []
+
+def benchmark(function):
+    """
+    Register a benchmark: a function which performs one operation.
+    """
+    benchmarks.append(function)
+    return function
+
+
+
+def identity(result):
+    return result
+
+
+
+@benchmark
+def succeed():
+    """
+    Make an already fired L{Deferred} with L{defer.succeed}.
+    """
+    defer.succeed(None)
+
+
+
+@benchmark
+def callbackUnfired():
+    """
+    Add one callback to a L{Deferred}, then fire it.
+    """
+    d = defer.Deferred()
+    d.addCallback(identity)
+    d.callback(None)
+
+
+
+@benchmark
+def addCallbackFired():
+    """
+    Add one callback to an already fired L{Deferred}.
+    """
+    defer.succeed(None).addCallback(identity)
+
+
+
+@benchmark
+def addCallbacks10():
+    """
+    Fire a L{Deferred} with ten callbacks.
+    """
+    d = defer.Deferred()
+    for i in range(10):
+        d.addCallback(identity)
+    d.callback(None)
+
+
+
+@benchmark
+def addCallbacks1000():
+    """
+    Fire a L{Deferred} with a thousand callbacks.
+    """
+    d = defer.Deferred()
+    for i in range(1000):
+        d.addCallback(identity)
+    d.callback(None)
+
+
+
+@benchmark
+def mixedChain():
+    """
+    Fire a L{Deferred} with callbacks and errbacks which pass along a failure
+    and then handle it.
+    """
+    d = defer.Deferred()
+    d.addCallback(identity)
+    d.addErrback(identity)
+    d.addCallback(identity)
+    d.addErrback(lambda reason: None)
+    d.addBoth(identity)
+    d.errback(Failure(ZeroDivisionError()))
+
+
+
+@benchmark
+def chained():
+    """
+    Fire a L{Deferred} whose callback returns another, unfired, L{Deferred}.
+    """
+    inner = defer.Deferred()
+    outer = defer.Deferred()
+    outer.addCallback(lambda ignored: inner)
+    outer.addCallback(identity)
+    outer.callback(None)
+    inner.callback(None)
+
+
+
+@benchmark
+def inlineCallbacks():
+    """
+    Run an L{defer.inlineCallbacks} function which yields ten fired
+    L{Deferred}s.
+    """
+    _inlineFired()
+
+
+@defer.inlineCallbacks
+def _inlineFired():
+    for i in range(10):
+        yield defer.succeed(i)
+    defer.returnValue(None)
+
+
+
+@benchmark
+def inlineCallbacksUnfired():
+    """
+    Run an L{defer.inlineCallbacks} function which yields ten L{Deferred}s
+    which are fired after they are yielded.
+    """
+    pending = []
+    d = _inlineUnfired(pending)
+    while pending:
+        pending.pop().callback(None)
+
+
+@defer.inlineCallbacks
+def _inlineUnfired(pending):
+    for i in range(10):
+        d = defer.Deferred()
+        pending.append(d)
+        yield d
+    defer.returnValue(None)
+
+
+
+@benchmark
+def deferredList():
+    """
+    Make a L{defer.DeferredList} of ten L{Deferred}s, then fire them.
+    """
+    ds = [defer.Deferred() for i in range(10)]
+    defer.DeferredList(ds)
+    for d in ds:
+        d.callback(None)
+
+
+
+@benchmark
+def gatherResults():
+    """
+    Gather the results of ten fired L{Deferred}s with
+    L{defer.gatherResults}.
+    """
+    defer.gatherResults([defer.succeed(i) for i in range(10)])
+
+
+
+@benchmark
+def parallel():
+    """
+    Call a function returning an unfired L{Deferred} for a hundred elements,
+    ten at a time, with L{defer.parallel}.
+    """
+    pending = []
+    def call(element):
+        d = defer.Deferred()
+        pending.append(d)
+        return d
+    defer.parallel(range(100), call, concurrency=10)
+    while pending:
+        pending.pop(0).callback(None)
+
+
+
+def run(function, repeat=5, duration=0.2):
+    """
+    Time a benchmark.
+
+    @return: The number of operations per second in the fastest run.
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < duration / 10:
+        number *= 2
+    number *= 10
+    best = min(timer.repeat(repeat, number))
+    return number / best
+
+
+
+def main(names):
+    for function in benchmarks:
+        if names and function.__name__ not in names:
+            continue
+        print("%-24s %12.0f ops/sec" % (function.__name__, run(function)))
+
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
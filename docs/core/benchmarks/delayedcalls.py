@@ -0,0 +1,81 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Compare the cost of maintaining many delayed calls with each of the
+L{twisted.internet.interfaces.ITimerStore} implementations.
+
+The workload models a server with many idle connection timeouts: the calls are
+created, each is reset to a later time a few times (as L{TimeoutMixin} does
+when data arrives), some are reset sooner, and finally most are cancelled.
+"""
+
+from __future__ import print_function
+
+import random
+
+from timer import timeit
+
+from twisted.internet.base import (
+    ReactorBase, HeapTimerStore, TimingWheelTimerStore)
+
+
+class BenchmarkReactor(ReactorBase):
+    """
+    A reactor which does no I/O and whose time only moves when told to.
+    """
+    now = 0.0
+
+    def installWaker(self):
+        pass
+
+
+    def seconds(self):
+        return self.now
+
+
+
+def churn(storeFactory, count, timeout=60.0):
+    """
+    Create C{count} delayed calls and reset, reschedule and cancel them while
+    time moves forward.
+    """
+    reactor = BenchmarkReactor()
+    reactor.installTimerStore(storeFactory())
+    rand = random.Random(count)
+    calls = [reactor.callLater(timeout, lambda: None) for i in range(count)]
+    reactor.runUntilCurrent()
+    for step in range(10):
+        reactor.now += 0.5
+        for call in rand.sample(calls, count // 2):
+            if call.active():
+                call.reset(timeout)
+        for call in rand.sample(calls, count // 100):
+            if call.active():
+                call.reset(rand.random() * timeout)
+        reactor.timeout()
+        reactor.runUntilCurrent()
+    for call in calls:
+        if call.active():
+            call.cancel()
+    reactor.runUntilCurrent()
+
+
+
+stores = [
+    ("heap", HeapTimerStore),
+    ("timing wheel", TimingWheelTimerStore),
+    ]
+
+
+
+def main():
+    for count in [1000, 10000, 30000]:
+        for name, factory in stores:
+            print("%d delayed calls, %s:" % (count, name),
+                  timeit(churn, 1, factory, count))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how fast L{Deferred}s pass along failures which are then trapped, as
+expected errors like timeouts and lost connections are, with and without
+L{Failure.lazyFrames}.
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionDone
+from twisted.python.failure import Failure
+
+
+
+def raiser(result):
+    """
+    A callback which fails.
+    """
+    raise ConnectionDone()
+
+
+
+def passthrough(result):
+    """
+    A callback which is skipped, since the result is a failure.
+    """
+    return result
+
+
+
+def trap(reason):
+    """
+    An errback which handles the failure.
+    """
+    reason.trap(ConnectionDone)
+
+
+
+def nested(depth, function, *args):
+    """
+    Call C{function} with C{depth} more frames on the stack, as if called by
+    application code some way below the reactor.
+    """
+    if depth:
+        return nested(depth - 1, function, *args)
+    return function(*args)
+
+
+
+def errbackChain(length):
+    """
+    Fire a L{Deferred} whose first callback fails, followed by C{length}
+    callbacks and an errback trapping the failure.
+    """
+    d = Deferred()
+    d.addCallback(raiser)
+    for i in range(length):
+        d.addCallback(passthrough)
+    d.addErrback(trap)
+    d.callback(None)
+
+
+
+def loggedErrbackChain(length):
+    """
+    Like L{errbackChain}, but format the traceback of the failure, as an
+    errback logging it would.
+    """
+    d = Deferred()
+    d.addCallback(raiser)
+    for i in range(length):
+        d.addCallback(passthrough)
+    d.addErrback(Failure.getTraceback)
+    d.callback(None)
+
+
+
+def main(iterations=20000, depth=20, length=5):
+    for name, benchmark in [("trapped", errbackChain),
+                            ("formatted", loggedErrbackChain)]:
+        for lazy in [False, True]:
+            Failure.lazyFrames = lazy
+            start = time.time()
+            for i in range(iterations):
+                nested(depth, benchmark, length)
+            elapsed = time.time() - start
+            print("%-10s lazyFrames=%-5s %8.0f chains/sec" % (
+                name, lazy, iterations / elapsed))
+    Failure.lazyFrames = False
+
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,112 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the cost of each C{yield} in an L{inlineCallbacks} function, for
+L{Deferred}s which have already fired, ones which fire later, ones which have
+failed and values which are not L{Deferred}s, and the cost of an
+L{inlineCallbacks} function calling another.
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.internet.defer import (
+    Deferred, inlineCallbacks, returnValue, succeed, fail)
+
+
+
+@inlineCallbacks
+def yieldFired(count):
+    for i in range(count):
+        yield succeed(i)
+
+
+
+@inlineCallbacks
+def yieldFailed(count):
+    for i in range(count):
+        try:
+            yield fail(ZeroDivisionError())
+        except ZeroDivisionError:
+            pass
+
+
+
+@inlineCallbacks
+def yieldValue(count):
+    for i in range(count):
+        yield i
+
+
+
+@inlineCallbacks
+def yieldUnfired(count, pending):
+    for i in range(count):
+        d = Deferred()
+        pending.append(d)
+        yield d
+
+
+
+@inlineCallbacks
+def leaf():
+    yield succeed(None)
+    returnValue(None)
+
+
+
+@inlineCallbacks
+def yieldNested(count):
+    for i in range(count):
+        yield leaf()
+
+
+
+def fired(count):
+    yieldFired(count)
+
+
+
+def failed(count):
+    yieldFailed(count)
+
+
+
+def value(count):
+    yieldValue(count)
+
+
+
+def unfired(count):
+    pending = []
+    yieldUnfired(count, pending)
+    while pending:
+        pending.pop().callback(None)
+
+
+
+def nested(count):
+    yieldNested(count)
+
+
+
+def main(count=100000):
+    for name, benchmark in [("fired", fired), ("failed", failed),
+                            ("value", value), ("unfired", unfired),
+                            ("nested", nested)]:
+        best = None
+        for i in range(5):
+            start = time.time()
+            benchmark(count)
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        print("%-8s %8.3f usec/yield" % (name, best / count * 1e6))
+
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
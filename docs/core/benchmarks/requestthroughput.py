@@ -0,0 +1,84 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many requests per second a L{twisted.web.server.Site} can serve,
+and how large each request object is, using L{twisted.web.server.Request} and
+L{twisted.web.server.SlimRequest} as its request factory.
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.test.proto_helpers import StringTransport
+from twisted.web.resource import Resource
+from twisted.web.server import Site, Request, SlimRequest
+
+
+REQUEST = (
+    b"GET /hello?name=world HTTP/1.1\r\n"
+    b"Host: www.example.com\r\n"
+    b"User-Agent: benchmark/1.0\r\n"
+    b"Accept: */*\r\n"
+    b"\r\n")
+
+
+
+class Hello(Resource):
+    """
+    A leaf resource with a small, fixed response.
+    """
+    isLeaf = True
+
+    def render_GET(self, request):
+        return b"Hello, world."
+
+
+
+def requestSize(request):
+    """
+    Get the number of bytes taken up by a request object and its attribute
+    dictionary, not counting the objects its attributes refer to.
+    """
+    return sys.getsizeof(request) + sys.getsizeof(request.__dict__)
+
+
+
+def benchmark(requestFactory, count=50000, pipelined=10):
+    requests = []
+
+    class RecordingRequest(requestFactory):
+        def process(self):
+            if not requests:
+                requests.append(self)
+            return requestFactory.process(self)
+
+    site = Site(Hello(), requestFactory=RecordingRequest)
+    site.startFactory()
+    transport = StringTransport()
+    channel = site.buildProtocol(None)
+    channel.makeConnection(transport)
+
+    data = REQUEST * pipelined
+    before = time.time()
+    for i in range(count // pipelined):
+        channel.dataReceived(data)
+        transport.clear()
+    after = time.time()
+    site.stopFactory()
+
+    print("%-12s %10.0f requests/sec %6d bytes/request" % (
+        requestFactory.__name__, count / (after - before),
+        requestSize(requests[0])))
+
+
+
+def main():
+    for requestFactory in (Request, SlimRequest):
+        benchmark(requestFactory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many times per second a large L{twisted.web.template} page can be
+flattened, with and without its static parts compiled ahead of time.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.web.template import (
+    Element, Tag, XMLString, renderer, flattenString)
+
+
+ROW = """
+      <tr class="row">
+        <td class="name"><a href="/items/">An item</a></td>
+        <td class="description">A fairly long description of an item, with
+          <em>some</em> emphasis &amp; an entity or two &lt;here&gt;.</td>
+        <td class="price"><span class="currency">$</span>10.00</td>
+      </tr>"""
+
+PAGE = """
+<html xmlns:t="http://twistedmatrix.com/ns/twisted.web.template/0.1">
+  <head>
+    <title t:render="title" />
+    <link rel="stylesheet" href="/static/site.css" />
+  </head>
+  <body>
+    <div class="header"><h1 t:render="title" /></div>
+    <ul class="nav" t:render="navigation">
+      <li><a><t:attr name="href"><t:slot name="href" /></t:attr>
+        <t:slot name="label" /></a></li>
+    </ul>
+    <table class="items">%s
+    </table>
+    <div class="footer">Copyright &#169; Twisted Matrix Laboratories</div>
+  </body>
+</html>
+""" % (ROW * 200,)
+
+
+
+class Page(Element):
+    """
+    A page with a large static table and a few renderers and slots.
+    """
+    loader = XMLString(PAGE)
+
+    @renderer
+    def title(self, request, tag):
+        return tag("Items")
+
+
+    @renderer
+    def navigation(self, request, tag):
+        [item] = [child for child in tag.children if isinstance(child, Tag)]
+        tag.children = [
+            item.clone().fillSlots(href="/%d" % (i,), label="Page %d" % (i,))
+            for i in range(5)]
+        return tag
+
+
+
+class UncompiledPage(Page):
+    """
+    The same page, flattened from the document as it was loaded.
+    """
+    def render(self, request):
+        return self.loader.load()
+
+
+
+def benchmark(name, elementFactory, count=500):
+    results = []
+    before = time.time()
+    for i in range(count):
+        flattenString(None, elementFactory()).addCallback(results.append)
+    after = time.time()
+    assert len(results) == count
+
+    print("%-10s %8d bytes %10.1f pages/sec" % (
+        name, len(results[0]), count / (after - before)))
+
+
+
+def main():
+    benchmark("uncompiled", UncompiledPage)
+    benchmark("compiled", Page)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,7 @@ Helper stuff for benchmarks.
 
 import gc
 gc.disable()
-print 'Disabled GC'
+print('Disabled GC')
 
 def timeit(func, iter = 1000, *args, **kwargs):
     """
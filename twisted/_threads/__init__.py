@@ -10,7 +10,7 @@ from __future__ import absolute_import, division, print_function
 
 from ._threadworker import ThreadWorker, LockWorker
 from ._ithreads import IWorker, AlreadyQuit
-from ._team import Team
+from ._team import Team, Statistics
 from ._memory import createMemoryWorker
 from ._pool import pool
 
@@ -20,6 +20,7 @@ __all__ = [
     "IWorker",
     "AlreadyQuit",
     "Team",
+    "Statistics",
     "createMemoryWorker",
     "pool",
 ]
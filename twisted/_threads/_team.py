@@ -9,7 +9,10 @@ workers.
 
 from __future__ import absolute_import, division, print_function
 
+from bisect import bisect_left
 from collections import deque
+from time import time
+
 from zope.interface import implementer
 
 from . import IWorker
@@ -31,13 +34,42 @@ class Statistics(object):
         which have not yet been sent to a worker to be performed because not
         enough workers are available.
     @type backloggedWorkCount: L{int}
+
+    @ivar backloggedWorkByPriority: The number of backlogged work items at
+        each priority which has any.
+    @type backloggedWorkByPriority: L{dict} mapping L{int} to L{int}
+
+    @ivar oldestBackloggedWorkAge: How long, in seconds, the work item which
+        has been backlogged longest has been waiting, or C{0} if there is no
+        backlogged work.
+    @type oldestBackloggedWorkAge: L{float}
+
+    @ivar completedWorkCount: The number of work items which workers have
+        performed.
+    @type completedWorkCount: L{int}
+
+    @ivar waitTimeHistogram: How long work items waited between being passed
+        to L{Team.do} and being sent to a worker, as a list of C{(limit,
+        count)} pairs.  Each C{count} is the number of work items which
+        waited at most C{limit} seconds, but longer than the previous
+        C{limit}.  The C{limit} of the last pair is C{None}, counting the
+        work items which waited longer than all of L{Team.waitTimeLimits}.
+    @type waitTimeHistogram: L{list} of 2-L{tuple}s
     """
 
     def __init__(self, idleWorkerCount, busyWorkerCount,
-                 backloggedWorkCount):
+                 backloggedWorkCount, backloggedWorkByPriority=None,
+                 oldestBackloggedWorkAge=0, completedWorkCount=0,
+                 waitTimeHistogram=()):
         self.idleWorkerCount = idleWorkerCount
         self.busyWorkerCount = busyWorkerCount
         self.backloggedWorkCount = backloggedWorkCount
+        if backloggedWorkByPriority is None:
+            backloggedWorkByPriority = {}
+        self.backloggedWorkByPriority = backloggedWorkByPriority
+        self.oldestBackloggedWorkAge = oldestBackloggedWorkAge
+        self.completedWorkCount = completedWorkCount
+        self.waitTimeHistogram = list(waitTimeHistogram)
 
 
 
@@ -58,12 +90,41 @@ class Team(object):
     @ivar _logException: a 0-argument callable called in an exception context
         when there is an unhandled error from a task passed to L{Team.do}
 
-    @ivar _idle: a L{set} of idle workers.
+    @ivar _clock: a 0-argument callable returning the current time in
+        seconds, used to measure how long work waits for a worker and how long
+        workers have been idle.
+
+    @ivar waitTimeLimits: The upper limits, in seconds, of the buckets of
+        L{Statistics.waitTimeHistogram}.
+
+    @ivar _idle: a L{list} of idle workers, the one which became idle most
+        recently last, so that it is the next one given work and the others
+        can be quit by L{Team.trimIdle} if they stay idle.
+
+    @ivar _idleSince: a L{dict} mapping each idle worker to the time it became
+        idle.
 
     @ivar _busyCount: the number of workers currently busy.
 
-    @ivar _pending: a C{deque} of tasks - that is, 0-argument callables passed
-        to L{Team.do} - that are outstanding.
+    @ivar _pending: a L{dict} mapping each priority passed to L{Team.do} to a
+        C{deque} of C{(time, task)} pairs for the tasks - that is, 0-argument
+        callables passed to L{Team.do} - with that priority that are
+        outstanding, and when they were passed to L{Team.do}.
+
+    @ivar _pendingCount: the total number of outstanding tasks in
+        C{_pending}.
+
+    @ivar _backlog: a 2-L{tuple} of a L{dict} mapping each priority in
+        C{_pending} to the number of tasks with that priority, and the time
+        the oldest task in C{_pending} was passed to L{Team.do} or C{None}.
+        It is replaced, never changed, by the coordinator whenever
+        C{_pending} changes, so that L{Team.statistics} can read it from any
+        thread.
+
+    @ivar _completedCount: the number of tasks performed by workers.
+
+    @ivar _waitCounts: a L{list} of the number of tasks in each bucket of
+        L{Statistics.waitTimeHistogram}.
 
     @ivar _shouldQuitCoordinator: A flag indicating that the coordinator should
         be quit at the next available opportunity.  Unlike L{Team._quit}, this
@@ -73,7 +134,9 @@ class Team(object):
         next available opportunity; set in the coordinator.
     """
 
-    def __init__(self, coordinator, createWorker, logException):
+    waitTimeLimits = (0.001, 0.01, 0.1, 1.0, 10.0)
+
+    def __init__(self, coordinator, createWorker, logException, clock=time):
         """
         @param coordinator: an L{IExclusiveWorker} which will coordinate access
             to resources on this L{Team}; that is to say, an
@@ -87,16 +150,25 @@ class Team(object):
 
         @param logException: A 0-argument callable called in an exception
             context when the work passed to C{do} raises an exception.
+
+        @param clock: A 0-argument callable returning the current time in
+            seconds.
         """
         self._quit = Quit()
         self._coordinator = coordinator
         self._createWorker = createWorker
         self._logException = logException
+        self._clock = clock
 
         # Don't touch these except from the coordinator.
-        self._idle = set()
+        self._idle = []
+        self._idleSince = {}
         self._busyCount = 0
-        self._pending = deque()
+        self._pending = {}
+        self._pendingCount = 0
+        self._backlog = ({}, None)
+        self._completedCount = 0
+        self._waitCounts = [0] * (len(self.waitTimeLimits) + 1)
         self._shouldQuitCoordinator = False
         self._toShrink = 0
 
@@ -107,7 +179,16 @@ class Team(object):
 
         @return: a L{Statistics} describing the current state of this L{Team}.
         """
-        return Statistics(len(self._idle), self._busyCount, len(self._pending))
+        backlog, oldest = self._backlog
+        if oldest is None:
+            oldestAge = 0
+        else:
+            oldestAge = max(self._clock() - oldest, 0)
+        histogram = list(zip(self.waitTimeLimits + (None,),
+                             self._waitCounts))
+        return Statistics(len(self._idle), self._busyCount,
+                          self._pendingCount, dict(backlog), oldestAge,
+                          self._completedCount, histogram)
 
 
     def grow(self, n):
@@ -149,24 +230,78 @@ class Team(object):
             n = len(self._idle) + self._busyCount
         for x in range(n):
             if self._idle:
-                self._idle.pop().quit()
+                self._popIdle().quit()
             else:
                 self._toShrink += 1
         if self._shouldQuitCoordinator and self._busyCount == 0:
             self._coordinator.quit()
 
 
-    def do(self, task):
+    def trimIdle(self, maximumIdleTime, minimumWorkers=0):
+        """
+        Quit the workers which have been idle for at least C{maximumIdleTime}
+        seconds, but keep at least C{minimumWorkers} workers.
+
+        @param maximumIdleTime: How long, in seconds, a worker may stay idle.
+        @type maximumIdleTime: L{float}
+
+        @param minimumWorkers: The number of workers, busy or idle, below
+            which no more will be quit.
+        @type minimumWorkers: L{int}
+        """
+        self._quit.check()
+        self._coordinator.do(
+            lambda: self._trimIdlers(maximumIdleTime, minimumWorkers))
+
+
+    def _trimIdlers(self, maximumIdleTime, minimumWorkers):
+        """
+        The implementation of C{trimIdle}, performed by the coordinator
+        worker.
+
+        @param maximumIdleTime: see L{Team.trimIdle}
+        @param minimumWorkers: see L{Team.trimIdle}
+        """
+        now = self._clock()
+        while (self._idle and
+               len(self._idle) + self._busyCount > minimumWorkers and
+               now - self._idleSince[self._idle[0]] >= maximumIdleTime):
+            # The worker which has been idle longest is first.
+            worker = self._idle.pop(0)
+            del self._idleSince[worker]
+            worker.quit()
+
+
+    def _popIdle(self):
+        """
+        Take the idle worker which became idle most recently.
+
+        @return: the worker, which is no longer idle.
+        @rtype: L{IWorker}
+        """
+        worker = self._idle.pop()
+        del self._idleSince[worker]
+        return worker
+
+
+    def do(self, task, priority=0):
         """
         Perform some work in a worker created by C{createWorker}.
 
         @param task: the callable to run
+
+        @param priority: If no worker is available for C{task} straight away,
+            it will be performed before any waiting work with a lower
+            priority.
+        @type priority: L{int}
         """
         self._quit.check()
-        self._coordinator.do(lambda: self._coordinateThisTask(task))
+        enqueued = self._clock()
+        self._coordinator.do(
+            lambda: self._coordinateThisTask(task, priority, enqueued))
 
 
-    def _coordinateThisTask(self, task):
+    def _coordinateThisTask(self, task, priority=0, enqueued=None):
         """
         Select a worker to dispatch to, either an idle one or a new one, and
         perform it.
@@ -175,14 +310,29 @@ class Team(object):
 
         @param task: the task to dispatch
         @type task: 0-argument callable
+
+        @param priority: the priority the task was given to L{Team.do}
+        @type priority: L{int}
+
+        @param enqueued: the time the task was given to L{Team.do}, or C{None}
+            to not count it in L{Statistics.waitTimeHistogram}
+        @type enqueued: L{float}
         """
-        worker = (self._idle.pop() if self._idle
+        worker = (self._popIdle() if self._idle
                   else self._createWorker())
         if worker is None:
             # The createWorker method may return None if we're out of resources
             # to create workers.
-            self._pending.append(task)
+            tasks = self._pending.get(priority)
+            if tasks is None:
+                tasks = self._pending[priority] = deque()
+            tasks.append((enqueued, task))
+            self._pendingCount += 1
+            self._updateBacklog()
             return
+        if enqueued is not None:
+            waited = self._clock() - enqueued
+            self._waitCounts[bisect_left(self.waitTimeLimits, waited)] += 1
         self._busyCount += 1
         @worker.do
         def doWork():
@@ -194,9 +344,45 @@ class Team(object):
             @self._coordinator.do
             def idleAndPending():
                 self._busyCount -= 1
+                self._completedCount += 1
                 self._recycleWorker(worker)
 
 
+    def _popPending(self):
+        """
+        Take the task which has been waiting longest among those with the
+        highest priority.
+
+        @return: the task, its priority and when it was passed to L{Team.do}
+        @rtype: 3-L{tuple} of (0-argument callable, L{int}, L{float})
+        """
+        priority = max(self._pending)
+        tasks = self._pending[priority]
+        enqueued, task = tasks.popleft()
+        if not tasks:
+            del self._pending[priority]
+        self._pendingCount -= 1
+        self._updateBacklog()
+        return task, priority, enqueued
+
+
+    def _updateBacklog(self):
+        """
+        Record the number of tasks at each priority in C{_pending} and the
+        time the oldest of them was passed to L{Team.do} as C{_backlog}.
+
+        This method should run on the coordinator worker.
+        """
+        backlog = {}
+        oldest = None
+        for priority, tasks in self._pending.items():
+            backlog[priority] = len(tasks)
+            enqueued = tasks[0][0]
+            if enqueued is not None and (oldest is None or enqueued < oldest):
+                oldest = enqueued
+        self._backlog = (backlog, oldest)
+
+
     def _recycleWorker(self, worker):
         """
         Called only from coordinator.
@@ -206,16 +392,18 @@ class Team(object):
         @param worker: a worker created by C{createWorker} and now idle.
         @type worker: L{IWorker}
         """
-        self._idle.add(worker)
+        self._idle.append(worker)
+        self._idleSince[worker] = self._clock()
         if self._pending:
-            # Re-try the first enqueued thing.
+            # Re-try the first enqueued thing of the highest priority.
             # (Explicitly do _not_ honor _quit.)
-            self._coordinateThisTask(self._pending.popleft())
+            self._coordinateThisTask(*self._popPending())
         elif self._shouldQuitCoordinator:
             self._quitIdlers()
         elif self._toShrink > 0:
             self._toShrink -= 1
             self._idle.remove(worker)
+            del self._idleSince[worker]
             worker.quit()
 
 
@@ -7,6 +7,8 @@ Tests for L{twisted._threads._team}.
 
 from __future__ import absolute_import, division, print_function
 
+from collections import deque
+
 from twisted.trial.unittest import SynchronousTestCase
 
 from twisted.python.context import call, get
@@ -76,7 +78,9 @@ class TeamTests(SynchronousTestCase):
         self.failures = []
         def logException():
             self.failures.append(Failure())
-        self.team = Team(coordinator, createWorker, logException)
+        self.now = 0.0
+        self.team = Team(coordinator, createWorker, logException,
+                         lambda: self.now)
 
 
     def coordinate(self):
@@ -288,3 +292,160 @@ class TeamTests(SynchronousTestCase):
         self.team.shrink(7)
         self.performAllOutstandingWork()
         self.assertEqual(len(self.allUnquitWorkers), 3)
+
+
+    def test_priority(self):
+        """
+        Backlogged work passed to L{Team.do} with a higher priority is
+        performed before backlogged work with a lower priority, and work with
+        the same priority is performed in the order it was given.
+        """
+        self.noMoreWorkers = lambda: len(self.allWorkersEver) >= 1
+        done = []
+        self.team.do(lambda: done.append("first"))
+        self.team.do(lambda: done.append("low"))
+        self.team.do(lambda: done.append("high"), 5)
+        self.team.do(lambda: done.append("high again"), 5)
+        self.team.do(lambda: done.append("negative"), -1)
+        self.coordinate()
+        self.assertEqual(self.team.statistics().backloggedWorkByPriority,
+                         {-1: 1, 0: 1, 5: 2})
+        self.performAllOutstandingWork()
+        self.assertEqual(
+            done, ["first", "high", "high again", "low", "negative"])
+        self.assertEqual(self.team.statistics().backloggedWorkByPriority, {})
+
+
+    def test_statisticsWhilePendingChanges(self):
+        """
+        L{Team.statistics} may be called from any thread, so it reports the
+        backlog as last recorded by the coordinator rather than reading the
+        backlogged work, which the coordinator may be changing at the same
+        time.
+        """
+        class EmptiedDeque(deque):
+            """
+            A deque emptied by another thread as soon as it is found not to
+            be empty.
+            """
+            def __len__(self):
+                length = deque.__len__(self)
+                self.clear()
+                return length
+
+        self.noMoreWorkers = lambda: len(self.allWorkersEver) >= 1
+        self.team.do(list)
+        self.team.do(list, 3)
+        self.coordinate()
+        self.team._pending[3] = EmptiedDeque(self.team._pending[3])
+        stats = self.team.statistics()
+        self.assertEqual(stats.backloggedWorkByPriority, {3: 1})
+
+
+    def test_initialWaitStatistics(self):
+        """
+        Before any work is done, L{Team.statistics} reports no backlogged
+        work, no completed work and no waits.
+        """
+        stats = self.team.statistics()
+        self.assertEqual(stats.backloggedWorkByPriority, {})
+        self.assertEqual(stats.oldestBackloggedWorkAge, 0)
+        self.assertEqual(stats.completedWorkCount, 0)
+        self.assertEqual(
+            stats.waitTimeHistogram,
+            [(limit, 0) for limit in Team.waitTimeLimits + (None,)])
+
+
+    def test_waitStatistics(self):
+        """
+        L{Team.statistics} reports how long the oldest backlogged work has
+        been waiting, how much work has been completed, and a histogram of
+        how long work waited before a worker started on it.
+        """
+        self.noMoreWorkers = lambda: len(self.allWorkersEver) >= 1
+        self.team.do(list)
+        self.coordinate()
+        self.now = 1.0
+        self.team.do(list)
+        self.now = 3.0
+        self.team.do(list)
+        self.coordinate()
+        stats = self.team.statistics()
+        self.assertEqual(stats.backloggedWorkCount, 2)
+        self.assertEqual(stats.oldestBackloggedWorkAge, 2.0)
+
+        self.now = 3.5
+        self.performAllOutstandingWork()
+        stats = self.team.statistics()
+        self.assertEqual(stats.backloggedWorkCount, 0)
+        self.assertEqual(stats.oldestBackloggedWorkAge, 0)
+        self.assertEqual(stats.completedWorkCount, 3)
+        # One task started straight away, one after 0.5 seconds and one after
+        # 2.5 seconds.
+        self.assertEqual(stats.waitTimeHistogram,
+                         [(0.001, 1), (0.01, 0), (0.1, 0), (1.0, 1),
+                          (10.0, 1), (None, 0)])
+
+
+    def test_trimIdle(self):
+        """
+        L{Team.trimIdle} quits the workers which have been idle for at least
+        the given time, the longest idle first, but leaves the given minimum
+        number of workers.
+        """
+        self.team.grow(2)
+        self.coordinate()
+        self.now = 10.0
+        self.team.grow(2)
+        self.coordinate()
+        self.now = 15.0
+
+        self.team.trimIdle(10)
+        self.coordinate()
+        self.assertEqual(self.allUnquitWorkers, self.allWorkersEver[2:])
+
+        self.now = 20.0
+        self.team.trimIdle(10, 1)
+        self.coordinate()
+        self.assertEqual(self.allUnquitWorkers, self.allWorkersEver[3:])
+        self.assertEqual(self.team.statistics().idleWorkerCount, 1)
+
+
+    def test_trimIdleKeepsBusy(self):
+        """
+        L{Team.trimIdle} does not quit busy workers, and workers which become
+        idle again are only quit once they have been idle for the given time.
+        """
+        self.team.do(list)
+        self.team.do(list)
+        self.coordinate()
+        self.now = 20.0
+        self.team.trimIdle(10)
+        self.coordinate()
+        self.assertEqual(len(self.allUnquitWorkers), 2)
+        self.performAllOutstandingWork()
+        self.team.trimIdle(10)
+        self.coordinate()
+        self.assertEqual(len(self.allUnquitWorkers), 2)
+        self.now = 30.0
+        self.team.trimIdle(10)
+        self.coordinate()
+        self.assertEqual(self.allUnquitWorkers, [])
+
+
+    def test_idleWorkerReuse(self):
+        """
+        L{Team.do} gives work to the worker which became idle most recently,
+        so that the others stay idle and can be quit by L{Team.trimIdle}.
+        """
+        self.team.grow(2)
+        self.coordinate()
+        self.team.do(list)
+        self.performAllOutstandingWork()
+        self.now = 10.0
+        self.team.do(list)
+        self.performAllOutstandingWork()
+        self.team.trimIdle(10)
+        self.coordinate()
+        self.assertEqual(len(self.allUnquitWorkers), 1)
+        self.assertEqual(len(self.allWorkersEver), 2)
@@ -8,6 +8,8 @@ Support for generic select()able objects.
 
 from __future__ import division, absolute_import
 
+import os
+from collections import deque
 from socket import AF_INET6, inet_pton, error
 
 from zope.interface import implementer
@@ -16,6 +18,7 @@ from zope.interface import implementer
 from twisted.python.compat import _PY3, unicode, lazyByteSlice
 from twisted.python import reflect, failure
 from twisted.internet import interfaces, main
+from twisted.internet.defer import Deferred
 
 if _PY3:
     def _concatenate(bObj, offset, bArray):
@@ -31,6 +34,47 @@ else:
         return buffer(bObj, offset) + b"".join(bArray)
 
 
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX < 1:
+    # POSIX only guarantees this many.
+    _IOV_MAX = 16
+
+
+
+class _FileRegion(object):
+    """
+    Part of a file queued to be written to a L{FileDescriptor} along with its
+    other data.
+
+    @ivar fileno: The file descriptor of the file.
+    @type fileno: L{int}
+
+    @ivar offset: The offset of the start of the region in the file.
+    @type offset: L{int}
+
+    @ivar count: The number of bytes in the region.
+    @type count: L{int}
+
+    @ivar deferred: Fired with C{None} once the whole region has been written,
+        or with a failure if the connection is lost first.
+    @type deferred: L{Deferred}
+    """
+
+    def __init__(self, fileno, offset, count):
+        self.fileno = fileno
+        self.offset = offset
+        self.count = count
+        self.deferred = Deferred()
+
+
+    def __len__(self):
+        return self.count
+
+
+
 class _ConsumerMixin(object):
     """
     L{IConsumer} implementations can mix this in to get C{registerProducer} and
@@ -164,14 +208,33 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
     This is an abstract superclass of all objects which may be notified when
     they are readable or writable; e.g. they have a file-descriptor that is
     valid to be passed to select(2).
+
+    Data written to a descriptor is queued in C{_tempDataBuffer}.  By default
+    it is joined into C{dataBuffer} before being passed to L{writeSomeData}.
+    A subclass which sets C{_vectoredWrites} to C{True} instead has the queued
+    chunks passed, unjoined, to its C{_writeSomeVectors} method; C{offset}
+    then refers to the first chunk in the queue rather than to C{dataBuffer}.
+    Such a subclass may also queue L{_FileRegion}s, which are written in turn
+    by its C{_writeSomeFile} method.
+
+    @ivar bytesCopied: The number of bytes which have been copied into new
+        buffers in order to be written.
+    @type bytesCopied: L{int}
+
+    @ivar writeCalls: The number of calls made to L{writeSomeData} or
+        C{_writeSomeVectors}.
+    @type writeCalls: L{int}
     """
     connected = 0
     disconnected = 0
     disconnecting = 0
     _writeDisconnecting = False
     _writeDisconnected = False
+    _vectoredWrites = False
     dataBuffer = b""
     offset = 0
+    bytesCopied = 0
+    writeCalls = 0
 
     SEND_LIMIT = 128*1024
 
@@ -184,7 +247,7 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
         if not reactor:
             from twisted.internet import reactor
         self.reactor = reactor
-        self._tempDataBuffer = [] # will be added to dataBuffer in doWrite
+        self._tempDataBuffer = deque() # will be added to dataBuffer in doWrite
         self._tempDataLen = 0
 
 
@@ -205,6 +268,11 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
             self.producer = None
         self.stopReading()
         self.stopWriting()
+        if self._vectoredWrites:
+            for chunk in list(self._tempDataBuffer):
+                if (isinstance(chunk, _FileRegion) and
+                        not chunk.deferred.called):
+                    chunk.deferred.errback(reason)
 
 
     def writeSomeData(self, data):
@@ -231,29 +299,190 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
         raise NotImplementedError("%s does not implement doRead" %
                                   reflect.qual(self.__class__))
 
-    def doWrite(self):
+    def _writeSomeVectors(self, vectors):
         """
-        Called when data can be written.
+        Write as much as possible of the given chunks of data, immediately and
+        in order.
 
-        @return: C{None} on success, an exception or a negative integer on
-            failure.
+        This is only called if C{_vectoredWrites} is C{True}.  As with
+        L{writeSomeData}, the number of bytes written or an exception is
+        returned.
 
-        @see: L{twisted.internet.interfaces.IWriteDescriptor.doWrite}.
+        @param vectors: The chunks to write.
+        @type vectors: L{list} of L{bytes} or L{memoryview}
+        """
+        raise NotImplementedError("%s does not implement _writeSomeVectors" %
+                                  reflect.qual(self.__class__))
+
+
+    def _writeSomeFile(self, fileno, offset, count):
+        """
+        Write as much as possible of part of a file, immediately.
+
+        This is only called for L{_FileRegion}s queued by subclasses which
+        support them.  As with L{writeSomeData}, the number of bytes written
+        or an exception is returned.  If the file ends before any of the
+        given part of it could be written, as it does when the file has been
+        truncated since the part was queued, an L{EOFError} is returned.
+
+        @param fileno: The file descriptor of the file.
+        @type fileno: L{int}
+
+        @param offset: The offset in the file of the first byte to write.
+        @type offset: L{int}
+
+        @param count: The number of bytes to write.
+        @type count: L{int}
+        """
+        raise NotImplementedError("%s does not implement _writeSomeFile" %
+                                  reflect.qual(self.__class__))
+
+
+    def _writeFileRegion(self, region):
+        """
+        Queue part of a file to be written after the data which has already
+        been written, as with L{write}.
+
+        This is only possible for subclasses which set C{_vectoredWrites} and
+        implement L{_writeSomeFile}.
+
+        @type region: L{_FileRegion}
+
+        @return: The L{Deferred} of C{region}.
+        """
+        if not self.connected or self._writeDisconnected:
+            region.deferred.errback(failure.Failure(main.CONNECTION_LOST))
+        elif not region.count:
+            region.deferred.callback(None)
+        else:
+            self._tempDataBuffer.append(region)
+            self._tempDataLen += region.count
+            self._maybePauseProducer()
+            self.startWriting()
+        return region.deferred
+
+
+    def _doWriteData(self):
+        """
+        Join the queued data into C{dataBuffer} if it is running low, and
+        write as much of it as possible with L{writeSomeData}.
+
+        @return: The result of L{writeSomeData}.
         """
         if len(self.dataBuffer) - self.offset < self.SEND_LIMIT:
             # If there is currently less than SEND_LIMIT bytes left to send
             # in the string, extend it with the array data.
+            joining = len(self._tempDataBuffer) + (
+                len(self.dataBuffer) > self.offset)
             self.dataBuffer = _concatenate(
                 self.dataBuffer, self.offset, self._tempDataBuffer)
+            if joining > 1:
+                self.bytesCopied += len(self.dataBuffer)
             self.offset = 0
-            self._tempDataBuffer = []
+            self._tempDataBuffer = deque()
             self._tempDataLen = 0
 
         # Send as much data as you can.
+        self.writeCalls += 1
         if self.offset:
+            if _PY3:
+                self.bytesCopied += len(self.dataBuffer) - self.offset
             l = self.writeSomeData(lazyByteSlice(self.dataBuffer, self.offset))
         else:
             l = self.writeSomeData(self.dataBuffer)
+        if not isinstance(l, Exception) and l > 0:
+            self.offset += l
+        return l
+
+
+    def _doWriteVectors(self):
+        """
+        Write as much as possible of the queued chunks with
+        C{_writeSomeVectors}, without joining them, and discard the chunks
+        which were completely written.
+
+        @return: The result of C{_writeSomeVectors}.
+        """
+        chunks = self._tempDataBuffer
+        if chunks and isinstance(chunks[0], _FileRegion):
+            return self._doWriteFileRegion(chunks[0])
+        vectors = []
+        size = 0
+        offset = self.offset
+        for chunk in chunks:
+            if isinstance(chunk, _FileRegion):
+                break
+            if offset:
+                chunk = memoryview(chunk)[offset:]
+                offset = 0
+            if size + len(chunk) > self.SEND_LIMIT:
+                chunk = memoryview(chunk)[:self.SEND_LIMIT - size]
+            vectors.append(chunk)
+            size += len(chunk)
+            if size >= self.SEND_LIMIT or len(vectors) >= _IOV_MAX:
+                break
+
+        self.writeCalls += 1
+        l = self._writeSomeVectors(vectors)
+        if isinstance(l, Exception) or l < 0:
+            return l
+        self._consumeChunks(l)
+        return l
+
+
+    def _doWriteFileRegion(self, region):
+        """
+        Write as much as possible of the L{_FileRegion} at the front of the
+        queue with C{_writeSomeFile}, and fire its L{Deferred} if all of it
+        has been written.
+
+        If the file turns out to be shorter than the region, the region's
+        L{Deferred} fails with the L{EOFError} from C{_writeSomeFile} and the
+        connection is lost, as the rest of the region can never be written.
+
+        @return: The result of C{_writeSomeFile}, or L{main.CONNECTION_LOST}
+            if the file was too short.
+        """
+        self.writeCalls += 1
+        l = self._writeSomeFile(region.fileno, region.offset + self.offset,
+                                region.count - self.offset)
+        if isinstance(l, EOFError):
+            region.deferred.errback(failure.Failure(l))
+            return main.CONNECTION_LOST
+        if isinstance(l, Exception) or l < 0:
+            return l
+        self._consumeChunks(l)
+        if not (self._tempDataBuffer and self._tempDataBuffer[0] is region):
+            region.deferred.callback(None)
+        return l
+
+
+    def _consumeChunks(self, l):
+        """
+        Account for C{l} bytes of the queued chunks having been written,
+        discarding the chunks which were completely written.
+        """
+        chunks = self._tempDataBuffer
+        self._tempDataLen -= l
+        sent = self.offset + l
+        while chunks and sent >= len(chunks[0]):
+            sent -= len(chunks.popleft())
+        self.offset = sent
+
+
+    def doWrite(self):
+        """
+        Called when data can be written.
+
+        @return: C{None} on success, an exception or a negative integer on
+            failure.
+
+        @see: L{twisted.internet.interfaces.IWriteDescriptor.doWrite}.
+        """
+        if self._vectoredWrites:
+            l = self._doWriteVectors()
+        else:
+            l = self._doWriteData()
 
         # There is no writeSomeData implementation in Twisted which returns
         # < 0, but the documentation for writeSomeData used to claim negative
@@ -261,7 +490,6 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
         # although it may be worth deprecating and removing at some point.
         if isinstance(l, Exception) or l < 0:
             return l
-        self.offset += l
         # If there is nothing left to send,
         if self.offset == len(self.dataBuffer) and not self._tempDataLen:
             self.dataBuffer = b""
@@ -349,6 +577,11 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
         if not self.connected or self._writeDisconnected:
             return
         if data:
+            if self._vectoredWrites and type(data) is not bytes:
+                # The queue holds on to what it is given, so it must not be
+                # something which could change before it is written.
+                data = bytes(data)
+                self.bytesCopied += len(data)
             self._tempDataBuffer.append(data)
             self._tempDataLen += len(data)
             self._maybePauseProducer()
@@ -365,7 +598,8 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
                 fd.write(chunk)
 
         It may have a more efficient implementation at a later time or in a
-        different reactor.
+        different reactor.  Descriptors which support vectored writes send the
+        chunks without joining them together first.
 
         As with the C{write()} method, if a buffer size limit is reached and a
         streaming producer is registered, it will be paused until the buffered
@@ -376,7 +610,14 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
                 raise TypeError("Data must not be unicode")
         if not self.connected or not iovec or self._writeDisconnected:
             return
-        self._tempDataBuffer.extend(iovec)
+        if self._vectoredWrites:
+            for i in iovec:
+                if type(i) is not bytes:
+                    i = bytes(i)
+                    self.bytesCopied += len(i)
+                self._tempDataBuffer.append(i)
+        else:
+            self._tempDataBuffer.extend(iovec)
         for i in iovec:
             self._tempDataLen += len(i)
         self._maybePauseProducer()
@@ -11,15 +11,16 @@ from __future__ import division, absolute_import
 import socket # needed only for sync-dns
 from zope.interface import implementer, classImplements
 
+import math
 import sys
 import warnings
-from heapq import heappush, heappop, heapify
 
 import traceback
 
 from twisted.internet.interfaces import IReactorCore, IReactorTime, IReactorThreads
 from twisted.internet.interfaces import IResolverSimple, IReactorPluggableResolver
 from twisted.internet.interfaces import IConnector, IDelayedCall
+from twisted.internet.interfaces import ITimerStore, IReactorPluggableTimerStore
 from twisted.internet import fdesc, main, error, abstract, defer, threads
 from twisted.python import log, failure, reflect
 from twisted.python.compat import unicode, iteritems
@@ -38,6 +39,8 @@ class DelayedCall:
     # an exception occurs while the function is being run
     debug = False
     _str = None
+    # The position of this call in the heap of a HeapTimerStore, if any.
+    _heapIndex = None
 
     def __init__(self, time, func, args, kw, cancel, reset,
                  seconds=runtimeSeconds):
@@ -210,6 +213,510 @@ class DelayedCall:
 
 
 
+@implementer(ITimerStore)
+class HeapTimerStore(object):
+    """
+    A L{ITimerStore} which keeps delayed calls in a binary heap ordered by
+    their scheduled time.
+
+    Each call records its own position in the heap, so that cancelling a call
+    or moving it sooner takes logarithmic time and cancelled calls are removed
+    from the heap immediately.
+
+    @ivar _heap: The heap of L{DelayedCall} instances.  The C{_heapIndex}
+        attribute of each is its index in this list.
+    @type _heap: L{list}
+    """
+
+    def __init__(self):
+        self._heap = []
+
+
+    def __len__(self):
+        return len(self._heap)
+
+
+    def _siftUp(self, index):
+        """
+        Move the call at a given index towards the root of the heap until its
+        parent is not scheduled later than it is.
+
+        @param index: The index of the call to move.
+        @type index: L{int}
+        """
+        heap = self._heap
+        call = heap[index]
+        time = call.time
+        while index:
+            parentIndex = (index - 1) >> 1
+            parent = heap[parentIndex]
+            if parent.time <= time:
+                break
+            heap[index] = parent
+            parent._heapIndex = index
+            index = parentIndex
+        heap[index] = call
+        call._heapIndex = index
+
+
+    def _siftDown(self, index):
+        """
+        Move the call at a given index away from the root of the heap until
+        neither of its children is scheduled earlier than it is.
+
+        @param index: The index of the call to move.
+        @type index: L{int}
+        """
+        heap = self._heap
+        size = len(heap)
+        call = heap[index]
+        time = call.time
+        while True:
+            childIndex = 2 * index + 1
+            if childIndex >= size:
+                break
+            child = heap[childIndex]
+            rightIndex = childIndex + 1
+            if rightIndex < size and heap[rightIndex].time < child.time:
+                childIndex = rightIndex
+                child = heap[rightIndex]
+            if time <= child.time:
+                break
+            heap[index] = child
+            child._heapIndex = index
+            index = childIndex
+        heap[index] = call
+        call._heapIndex = index
+
+
+    def _indexOf(self, call):
+        """
+        Find the position of a call in the heap.
+
+        @param call: The call to find.
+        @type call: L{DelayedCall}
+
+        @return: The index of C{call}, or L{None} if it is not in the heap.
+        """
+        index = call._heapIndex
+        if (index is not None and index < len(self._heap) and
+                self._heap[index] is call):
+            return index
+        return None
+
+
+    def _removeAt(self, index):
+        """
+        Remove the call at a given index from the heap.
+
+        @param index: The index of the call to remove.
+        @type index: L{int}
+
+        @return: The removed call.
+        @rtype: L{DelayedCall}
+        """
+        heap = self._heap
+        call = heap[index]
+        last = heap.pop()
+        if last is not call:
+            heap[index] = last
+            last._heapIndex = index
+            if index and heap[(index - 1) >> 1].time > last.time:
+                self._siftUp(index)
+            else:
+                self._siftDown(index)
+        call._heapIndex = None
+        return call
+
+
+    def add(self, call):
+        """
+        See L{ITimerStore.add}.
+        """
+        self._heap.append(call)
+        self._siftUp(len(self._heap) - 1)
+
+
+    def remove(self, call):
+        """
+        See L{ITimerStore.remove}.
+        """
+        index = self._indexOf(call)
+        if index is not None:
+            self._removeAt(index)
+
+
+    def moveSooner(self, call):
+        """
+        See L{ITimerStore.moveSooner}.
+        """
+        index = self._indexOf(call)
+        if index is not None:
+            self._siftUp(index)
+
+
+    def nextTime(self):
+        """
+        See L{ITimerStore.nextTime}.
+        """
+        if not self._heap:
+            return None
+        return self._heap[0].time
+
+
+    def popDue(self, now):
+        """
+        See L{ITimerStore.popDue}.
+        """
+        heap = self._heap
+        while heap and (heap[0].time <= now):
+            call = self._removeAt(0)
+            if call.delayed_time > 0:
+                call.activate_delay()
+                self.add(call)
+                continue
+            return call
+        return None
+
+
+    def getDelayedCalls(self):
+        """
+        See L{ITimerStore.getDelayedCalls}.
+        """
+        return list(self._heap)
+
+
+
+@implementer(ITimerStore)
+class TimingWheelTimerStore(object):
+    """
+    A L{ITimerStore} which keeps delayed calls in a hierarchical timing wheel.
+
+    Time is divided into ticks of C{resolution} seconds, and each call is
+    filed under the first tick which is not earlier than its scheduled time.
+    Calls due within the next 256 ticks are kept in a slot of the innermost
+    wheel for that exact tick; calls further in the future are kept in one of
+    four coarser wheels of 64 slots each, and are moved ("cascaded") towards
+    the innermost wheel as their time approaches.  Adding, cancelling and
+    rescheduling a call are therefore constant time operations, regardless
+    of how many calls are pending.
+
+    The price paid for this is precision: a call may run up to C{resolution}
+    seconds after its scheduled time, and calls due in the same tick are only
+    ordered amongst themselves, not against calls due in other ticks which
+    are run in the same reactor iteration.  Calls are never run early.
+
+    @ivar resolution: The length of a tick, in seconds.
+    @type resolution: L{float}
+
+    @ivar _wheels: The wheels, innermost first.  Each is a L{list} of slots,
+        and each slot is a L{set} of L{DelayedCall} instances.
+
+    @ivar _counts: The number of calls in each of C{_wheels}.
+
+    @ivar _locations: A L{dict} mapping every call in C{_wheels} to a
+        two-L{tuple} of the index of its wheel and its slot in that wheel.
+
+    @ivar _current: The earliest tick which has not yet been processed, or
+        L{None} if no call has been added yet.
+
+    @ivar _due: Calls whose tick has been processed but which have not been
+        returned by L{popDue} yet, ordered latest first.
+
+    @ivar _dueSet: The members of C{_due} which have not been removed.
+
+    @ivar _nextTick: The earliest tick of any call in C{_wheels}, or L{None}
+        if that needs to be recomputed.
+    """
+
+    _INNER_BITS = 8
+    _OUTER_BITS = 6
+    _OUTER_WHEELS = 4
+
+    def __init__(self, resolution=0.01):
+        """
+        @param resolution: The length of a tick, in seconds.
+        @type resolution: L{float}
+        """
+        self.resolution = resolution
+        self._shifts = [self._INNER_BITS + self._OUTER_BITS * i
+                        for i in range(self._OUTER_WHEELS + 1)]
+        self._wheels = [[set() for i in range(1 << self._INNER_BITS)]]
+        for i in range(self._OUTER_WHEELS):
+            self._wheels.append(
+                [set() for j in range(1 << self._OUTER_BITS)])
+        self._counts = [0] * len(self._wheels)
+        self._locations = {}
+        self._current = None
+        self._due = []
+        self._dueSet = set()
+        self._nextTick = None
+
+
+    def __len__(self):
+        return len(self._locations) + len(self._dueSet)
+
+
+    def _tickFor(self, time):
+        """
+        Find the first tick which is not earlier than a given time.
+
+        @param time: A time in seconds since the epoch.
+        @type time: L{float}
+
+        @rtype: L{int}
+        """
+        return int(math.ceil(time / self.resolution))
+
+
+    def _tickAt(self, time):
+        """
+        Find the last tick which has started at a given time.
+
+        Ticks are reported by L{nextTime} as C{tick * resolution}, which may
+        not divide back into C{tick} exactly, so a time which has reached the
+        reported start of a tick is always counted as being within it.
+
+        @param time: A time in seconds since the epoch.
+        @type time: L{float}
+
+        @rtype: L{int}
+        """
+        tick = int(math.floor(time / self.resolution))
+        if (tick + 1) * self.resolution <= time:
+            tick += 1
+        return tick
+
+
+    def _place(self, call):
+        """
+        File a call in the slot appropriate for its scheduled time, relative
+        to C{_current}.
+
+        @param call: The call to file.
+        @type call: L{DelayedCall}
+
+        @return: The tick the call will be run in.
+        @rtype: L{int}
+        """
+        current = self._current
+        tick = max(self._tickFor(call.time), current)
+        delta = tick - current
+        shifts = self._shifts
+        if delta < (1 << shifts[0]):
+            level = 0
+            index = tick & ((1 << shifts[0]) - 1)
+        else:
+            level = 1
+            while level < len(shifts) - 1 and delta >= (1 << shifts[level]):
+                level += 1
+            if delta >= (1 << shifts[level]):
+                # Beyond the range of the outermost wheel.  File the call in
+                # the furthest slot; it will be filed again, closer to where
+                # it belongs, when that slot is cascaded.
+                tick = current + (1 << shifts[level]) - 1
+            index = (tick >> shifts[level - 1]) & ((1 << self._OUTER_BITS) - 1)
+        self._wheels[level][index].add(call)
+        self._counts[level] += 1
+        self._locations[call] = (level, index)
+        return tick
+
+
+    def _unplace(self, call):
+        """
+        Remove a call from the wheels, if it is there.
+
+        @param call: The call to remove.
+        @type call: L{DelayedCall}
+
+        @return: C{True} if the call was removed, otherwise C{False}.
+        """
+        location = self._locations.pop(call, None)
+        if location is None:
+            return False
+        level, index = location
+        self._wheels[level][index].discard(call)
+        self._counts[level] -= 1
+        self._nextTick = None
+        return True
+
+
+    def add(self, call):
+        """
+        See L{ITimerStore.add}.
+        """
+        if self._current is None:
+            self._current = self._tickAt(call.seconds())
+        tick = self._place(call)
+        if self._nextTick is not None and tick < self._nextTick:
+            self._nextTick = tick
+
+
+    def remove(self, call):
+        """
+        See L{ITimerStore.remove}.
+        """
+        if not self._unplace(call):
+            self._dueSet.discard(call)
+
+
+    def moveSooner(self, call):
+        """
+        See L{ITimerStore.moveSooner}.
+        """
+        if self._unplace(call):
+            self.add(call)
+
+
+    def nextTime(self):
+        """
+        See L{ITimerStore.nextTime}.
+        """
+        if self._dueSet:
+            return min(call.time for call in self._dueSet)
+        if not self._locations:
+            return None
+        if self._nextTick is None:
+            self._nextTick = self._earliestTick()
+        return self._nextTick * self.resolution
+
+
+    def _earliestTick(self):
+        """
+        Find the earliest tick of any call in the wheels.
+
+        Within each wheel, slots are visited in the order in which they will
+        be processed, so only the first non-empty slot of each wheel needs to
+        be examined.
+
+        @rtype: L{int}
+        """
+        current = self._current
+        earliest = None
+        inner = self._wheels[0]
+        if self._counts[0]:
+            mask = len(inner) - 1
+            for offset in range(len(inner)):
+                if inner[(current + offset) & mask]:
+                    earliest = current + offset
+                    break
+        for level in range(1, len(self._wheels)):
+            if not self._counts[level]:
+                continue
+            wheel = self._wheels[level]
+            mask = len(wheel) - 1
+            shift = self._shifts[level - 1]
+            start = (current + (1 << shift) - 1) >> shift
+            for offset in range(len(wheel)):
+                slot = wheel[(start + offset) & mask]
+                if slot:
+                    tick = max(min(self._tickFor(call.time) for call in slot),
+                               current)
+                    if earliest is None or tick < earliest:
+                        earliest = tick
+                    break
+        return earliest
+
+
+    def _cascade(self, tick):
+        """
+        Re-file the calls in every outer wheel slot which becomes due at a
+        tick.
+
+        @param tick: A tick which is a multiple of the size of the innermost
+            wheel.
+        @type tick: L{int}
+        """
+        for level in range(1, len(self._wheels)):
+            index = ((tick >> self._shifts[level - 1]) &
+                     ((1 << self._OUTER_BITS) - 1))
+            slot = self._wheels[level][index]
+            if slot:
+                self._wheels[level][index] = set()
+                self._counts[level] -= len(slot)
+                for call in slot:
+                    self._place(call)
+            if index:
+                break
+
+
+    def _advance(self, now):
+        """
+        Process every tick up to and including the one containing C{now},
+        moving the calls filed under them to C{_due}.
+
+        @param now: The current time, in seconds since the epoch.
+        @type now: L{float}
+        """
+        if self._current is None:
+            return
+        last = self._tickAt(now)
+        inner = self._wheels[0]
+        mask = len(inner) - 1
+        counts = self._counts
+        shifts = self._shifts
+        due = []
+        while self._current <= last:
+            tick = self._current
+            if not tick & mask:
+                self._cascade(tick)
+            index = tick & mask
+            self._current = tick + 1
+            slot = inner[index]
+            if slot:
+                inner[index] = set()
+                counts[0] -= len(slot)
+                for call in slot:
+                    del self._locations[call]
+                due.extend(slot)
+
+            if not counts[0]:
+                # Nothing can become due before the next tick at which a
+                # non-empty wheel will be cascaded, so skip straight to it.
+                for level in range(1, len(counts)):
+                    if counts[level]:
+                        shift = shifts[level - 1]
+                        self._current = min(
+                            ((tick >> shift) + 1) << shift, last + 1)
+                        break
+                else:
+                    self._current = last + 1
+        if due:
+            self._nextTick = None
+            due.sort(reverse=True)
+            self._due.extend(due)
+            self._dueSet.update(due)
+
+
+    def popDue(self, now):
+        """
+        See L{ITimerStore.popDue}.
+        """
+        if not self._dueSet:
+            del self._due[:]
+            self._advance(now)
+        while self._due:
+            call = self._due.pop()
+            if call not in self._dueSet:
+                continue
+            self._dueSet.remove(call)
+            if call.delayed_time > 0:
+                call.activate_delay()
+                self.add(call)
+                continue
+            return call
+        return None
+
+
+    def getDelayedCalls(self):
+        """
+        See L{ITimerStore.getDelayedCalls}.
+        """
+        return [x for x in list(self._locations) + list(self._dueSet)
+                if not x.cancelled]
+
+
+
 @implementer(IResolverSimple)
 class ThreadedResolver(object):
     """
@@ -221,8 +728,16 @@ class ThreadedResolver(object):
     @ivar reactor: The reactor the threadpool of which will be used to call
         L{socket.gethostbyname} and the I/O thread of which the result will be
         delivered.
+
+    @ivar lookupPriority: The priority, as for
+        L{twisted.python.threadpool.ThreadPool.lane}, of the calls to
+        L{socket.gethostbyname}, so that when all the threads are busy they
+        are started before other work given to the threadpool.
+    @type lookupPriority: L{int}
     """
 
+    lookupPriority = 10
+
     def __init__(self, reactor):
         self.reactor = reactor
         self._runningQueries = {}
@@ -267,9 +782,12 @@ class ThreadedResolver(object):
         else:
             timeoutDelay = 60
         userDeferred = defer.Deferred()
+        threadpool = self.reactor.getThreadPool()
+        lane = getattr(threadpool, "lane", None)
+        if lane is not None:
+            threadpool = lane(self.lookupPriority)
         lookupDeferred = threads.deferToThreadPool(
-            self.reactor, self.reactor.getThreadPool(),
-            socket.gethostbyname, name)
+            self.reactor, threadpool, socket.gethostbyname, name)
         cancelCall = self.reactor.callLater(
             timeoutDelay, self._cleanup, name, lookupDeferred)
         self._runningQueries[lookupDeferred] = (userDeferred, cancelCall)
@@ -433,7 +951,8 @@ class _ThreePhaseEvent(object):
 
 
 
-@implementer(IReactorCore, IReactorTime, IReactorPluggableResolver)
+@implementer(IReactorCore, IReactorTime, IReactorPluggableResolver,
+             IReactorPluggableTimerStore)
 class ReactorBase(object):
     """
     Default base class for Reactors.
@@ -475,9 +994,8 @@ class ReactorBase(object):
     def __init__(self):
         self.threadCallQueue = []
         self._eventTriggers = {}
-        self._pendingTimedCalls = []
+        self._timers = HeapTimerStore()
         self._newTimedCalls = []
-        self._cancellations = 0
         self.running = False
         self._started = False
         self._justStopped = False
@@ -512,6 +1030,17 @@ class ReactorBase(object):
         self.resolver = resolver
         return oldResolver
 
+    def installTimerStore(self, store):
+        """
+        See L{IReactorPluggableTimerStore.installTimerStore}.
+        """
+        assert ITimerStore.providedBy(store)
+        oldStore = self._timers
+        self._timers = store
+        for call in oldStore.getDelayedCalls():
+            store.add(call)
+        return oldStore
+
     def wakeUp(self):
         """
         Wake up the event loop.
@@ -714,27 +1243,10 @@ class ReactorBase(object):
         return tple
 
     def _moveCallLaterSooner(self, tple):
-        # Linear time find: slow.
-        heap = self._pendingTimedCalls
-        try:
-            pos = heap.index(tple)
-
-            # Move elt up the heap until it rests at the right place.
-            elt = heap[pos]
-            while pos != 0:
-                parent = (pos-1) // 2
-                if heap[parent] <= elt:
-                    break
-                # move parent down
-                heap[pos] = heap[parent]
-                pos = parent
-            heap[pos] = elt
-        except ValueError:
-            # element was not found in heap - oh well...
-            pass
+        self._timers.moveSooner(tple)
 
     def _cancelCallLater(self, tple):
-        self._cancellations+=1
+        self._timers.remove(tple)
 
 
     def getDelayedCalls(self):
@@ -742,15 +1254,14 @@ class ReactorBase(object):
         They are returned in no particular order.
         This method is not efficient -- it is really only meant for
         test cases."""
-        return [x for x in (self._pendingTimedCalls + self._newTimedCalls) if not x.cancelled]
+        return (self._timers.getDelayedCalls() +
+                [x for x in self._newTimedCalls if not x.cancelled])
 
     def _insertNewDelayedCalls(self):
         for call in self._newTimedCalls:
-            if call.cancelled:
-                self._cancellations-=1
-            else:
+            if not call.cancelled:
                 call.activate_delay()
-                heappush(self._pendingTimedCalls, call)
+                self._timers.add(call)
         self._newTimedCalls = []
 
 
@@ -766,10 +1277,11 @@ class ReactorBase(object):
         # insert new delayed calls to make sure to include them in timeout value
         self._insertNewDelayedCalls()
 
-        if not self._pendingTimedCalls:
+        nextTime = self._timers.nextTime()
+        if nextTime is None:
             return None
 
-        delay = self._pendingTimedCalls[0].time - self.seconds()
+        delay = nextTime - self.seconds()
 
         # Pick a somewhat arbitrary maximum possible value for the timeout.
         # This value is 2 ** 31 / 1000, which is the number of seconds which can
@@ -809,16 +1321,10 @@ class ReactorBase(object):
         self._insertNewDelayedCalls()
 
         now = self.seconds()
-        while self._pendingTimedCalls and (self._pendingTimedCalls[0].time <= now):
-            call = heappop(self._pendingTimedCalls)
-            if call.cancelled:
-                self._cancellations-=1
-                continue
-
-            if call.delayed_time > 0:
-                call.activate_delay()
-                heappush(self._pendingTimedCalls, call)
-                continue
+        while True:
+            call = self._timers.popDue(now)
+            if call is None:
+                break
 
             try:
                 call.called = 1
@@ -834,14 +1340,6 @@ class ReactorBase(object):
                     e += "\n"
                     log.msg(e)
 
-
-        if (self._cancellations > 50 and
-             self._cancellations > len(self._pendingTimedCalls) >> 1):
-            self._cancellations = 0
-            self._pendingTimedCalls = [x for x in self._pendingTimedCalls
-                                       if not x.cancelled]
-            heapify(self._pendingTimedCalls)
-
         if self._justStopped:
             self._justStopped = False
             self.fireSystemEvent("shutdown")
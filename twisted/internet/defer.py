@@ -85,7 +85,13 @@ def succeed(result):
     @rtype: L{Deferred}
     """
     d = Deferred()
-    d.callback(result)
+    if d.debug or isinstance(result, failure.Failure):
+        d.callback(result)
+    else:
+        # There are no callbacks to run yet, so just record the result.
+        assert not isinstance(result, Deferred)
+        d.called = True
+        d.result = result
     return d
 
 
@@ -192,6 +198,11 @@ def getDebugging():
 _NO_RESULT = object()
 _CONTINUE = object()
 
+# The half of a callback pair added by addCallback or addErrback which just
+# passes the result along.  It is shared rather than built for every pair, and
+# _runCallbacks skips it without making a call.
+_PASSTHRU = (passthru, None, None)
+
 
 
 class Deferred:
@@ -298,9 +309,12 @@ class Deferred:
         """
         assert callable(callback)
         assert errback is None or callable(errback)
-        cbs = ((callback, callbackArgs, callbackKeywords),
-               (errback or (passthru), errbackArgs, errbackKeywords))
-        self.callbacks.append(cbs)
+        if errback is None:
+            errbackPair = _PASSTHRU
+        else:
+            errbackPair = (errback, errbackArgs, errbackKeywords)
+        self.callbacks.append(
+            ((callback, callbackArgs, callbackKeywords), errbackPair))
 
         if self.called:
             self._runCallbacks()
@@ -313,8 +327,11 @@ class Deferred:
 
         See L{addCallbacks}.
         """
-        return self.addCallbacks(callback, callbackArgs=args,
-                                 callbackKeywords=kw)
+        assert callable(callback)
+        self.callbacks.append(((callback, args, kw), _PASSTHRU))
+        if self.called:
+            self._runCallbacks()
+        return self
 
 
     def addErrback(self, errback, *args, **kw):
@@ -323,9 +340,11 @@ class Deferred:
 
         See L{addCallbacks}.
         """
-        return self.addCallbacks(passthru, errback,
-                                 errbackArgs=args,
-                                 errbackKeywords=kw)
+        assert callable(errback)
+        self.callbacks.append((_PASSTHRU, (errback, args, kw)))
+        if self.called:
+            self._runCallbacks()
+        return self
 
 
     def addBoth(self, callback, *args, **kw):
@@ -526,6 +545,12 @@ class Deferred:
         The loop will terminate before processing all of the callbacks if a
         C{Deferred} without a result is encountered.
 
+        Callbacks are read from C{self.callbacks} by position and the ones
+        which have been run are removed all at once when the loop stops,
+        rather than one at a time from the front of the list.  The
+        pass-through halves added by L{addCallback} and L{addErrback} are
+        skipped without being called.
+
         If a C{Deferred} I{with} a result is encountered, that result is taken
         and the loop proceeds.
 
@@ -546,6 +571,7 @@ class Deferred:
         # and then that second Deferred being fired.  ie, if ever had _chainedTo
         # set to something other than None, you might end up on this stack.
         chain = [self]
+        Failure = failure.Failure
 
         while chain:
             current = chain[-1]
@@ -558,12 +584,16 @@ class Deferred:
 
             finished = True
             current._chainedTo = None
-            while current.callbacks:
-                item = current.callbacks.pop(0)
+            callbacks = current.callbacks
+            index = 0
+            while index < len(callbacks):
+                item = callbacks[index]
+                index += 1
                 callback, args, kw = item[
-                    isinstance(current.result, failure.Failure)]
-                args = args or ()
-                kw = kw or {}
+                    isinstance(current.result, Failure)]
+
+                if callback is passthru and not args and not kw:
+                    continue
 
                 # Avoid recursion if we can.
                 if callback is _CONTINUE:
@@ -585,7 +615,11 @@ class Deferred:
                 try:
                     current._runningCallbacks = True
                     try:
-                        current.result = callback(current.result, *args, **kw)
+                        if args or kw:
+                            current.result = callback(
+                                current.result, *(args or ()), **(kw or {}))
+                        else:
+                            current.result = callback(current.result)
                         if current.result is current:
                             warnAboutFunction(
                                 callback,
@@ -598,7 +632,7 @@ class Deferred:
                 except:
                     # Including full frame information in the Failure is quite
                     # expensive, so we avoid it unless self.debug is set.
-                    current.result = failure.Failure(captureVars=self.debug)
+                    current.result = Failure(captureVars=self.debug)
                 else:
                     if isinstance(current.result, Deferred):
                         # The result is another Deferred.  If it has a result,
@@ -622,12 +656,16 @@ class Deferred:
                                 current.result._debugInfo.failResult = None
                             current.result = resultResult
 
+            # Forget the callbacks which have been run, whether the loop ran
+            # out of them or stopped to wait on another Deferred.
+            del callbacks[:index]
+
             if finished:
                 # As much of the callback chain - perhaps all of it - as can be
                 # processed right now has been.  The current Deferred is waiting on
                 # another Deferred or for more callbacks.  Before finishing with it,
                 # make sure its _debugInfo is in the proper state.
-                if isinstance(current.result, failure.Failure):
+                if isinstance(current.result, Failure):
                     # Stash the Failure in the _debugInfo for unhandled error
                     # reporting.
                     current.result.cleanFailure()
@@ -927,6 +965,219 @@ def gatherResults(deferredList, consumeErrors=False):
 
 
 
+class _ParallelMap(object):
+    """
+    The state of a call to L{parallel}.
+
+    @ivar deferred: The L{Deferred} returned by L{parallel}.
+
+    @ivar _iterator: The iterator over the elements still to be passed to
+        C{_f}.
+    @ivar _inFlight: A C{dict} mapping the index of each element whose call
+        to C{_f} has not finished to the L{Deferred} for that call.
+    @ivar _buffered: A C{dict} mapping the index of each element whose result
+        is waiting for the results of earlier elements to be delivered, when
+        C{_ordered} is true, to that result.
+    @ivar _taken: The number of elements taken from C{_iterator}.
+    @ivar _delivered: The number of results delivered.
+    @ivar _exhausted: C{True} once C{_iterator} has run out of elements.
+    @ivar _finished: C{True} once C{deferred} has fired or been cancelled.
+    @ivar _pumping: C{True} while L{_pump} is running, so that results
+        arriving synchronously do not make it recurse.
+    """
+
+    def __init__(self, iterable, f, concurrency, ordered, handleResult):
+        self._iterator = iter(iterable)
+        self._f = f
+        self._concurrency = concurrency
+        self._ordered = ordered
+        self._handleResult = handleResult
+        if handleResult is None:
+            self._results = []
+        else:
+            self._results = None
+        self._inFlight = {}
+        self._buffered = {}
+        self._taken = 0
+        self._delivered = 0
+        self._exhausted = False
+        self._finished = False
+        self._pumping = False
+        self.deferred = Deferred(self._cancel)
+
+
+    def _pump(self):
+        """
+        Start calls for elements of the iterable until C{_concurrency} results
+        are pending or the iterable is exhausted, then fire C{deferred} if
+        everything is done.
+        """
+        if self._pumping:
+            return
+        self._pumping = True
+        try:
+            while (not self._finished and not self._exhausted and
+                   len(self._inFlight) + len(self._buffered) <
+                   self._concurrency):
+                index = self._taken
+                try:
+                    element = next(self._iterator)
+                except StopIteration:
+                    self._exhausted = True
+                    break
+                except:
+                    self._fail(failure.Failure(), index)
+                    break
+                self._taken += 1
+                d = maybeDeferred(self._f, element)
+                self._inFlight[index] = d
+                d.addBoth(self._completed, index)
+        finally:
+            self._pumping = False
+
+        if (self._exhausted and not self._finished and not self._inFlight and
+                not self._buffered):
+            self._finished = True
+            self.deferred.callback(self._results)
+
+
+    def _completed(self, result, index):
+        """
+        Deliver the result of the call for the element at C{index}, or the
+        results it was holding up, then start more calls.
+        """
+        self._inFlight.pop(index, None)
+        if self._finished:
+            # The remaining calls were cancelled; consume their errors.
+            return None
+        if isinstance(result, failure.Failure):
+            self._fail(result, index)
+            return None
+        if self._ordered:
+            self._buffered[index] = result
+            while self._delivered in self._buffered:
+                if not self._deliver(self._delivered,
+                                     self._buffered.pop(self._delivered)):
+                    return None
+        elif not self._deliver(index, result):
+            return None
+        self._pump()
+        return None
+
+
+    def _deliver(self, index, result):
+        """
+        Pass the result for the element at C{index} to C{_handleResult} or add
+        it to C{_results}.
+
+        @return: C{False} if delivering it finished C{deferred}, because
+            C{_handleResult} raised an exception or cancelled it, C{True}
+            otherwise.
+        """
+        self._delivered += 1
+        if self._handleResult is None:
+            self._results.append(result)
+            return True
+        try:
+            self._handleResult(result)
+        except:
+            self._fail(failure.Failure(), index)
+            return False
+        return not self._finished
+
+
+    def _stop(self):
+        """
+        Stop taking elements from the iterable and cancel the calls which have
+        not finished.
+        """
+        self._finished = True
+        self._buffered.clear()
+        self._results = None
+        inFlight = list(self._inFlight.values())
+        self._inFlight.clear()
+        for d in inFlight:
+            d.cancel()
+
+
+    def _fail(self, reason, index):
+        """
+        Give up after a failure, firing C{deferred} with a L{FirstError}.
+        """
+        self._stop()
+        self.deferred.errback(FirstError(reason, index))
+
+
+    def _cancel(self, deferred):
+        """
+        Cancel the calls which have not finished when C{deferred} is
+        cancelled.  L{Deferred.cancel} then fails it with
+        L{CancelledError}.
+        """
+        self._stop()
+
+
+
+def parallel(iterable, f, concurrency=10, ordered=True, handleResult=None):
+    """
+    Call a function, which may return a L{Deferred}, with each element of an
+    iterable, with at most a given number of calls unfinished at once.
+
+    Elements are only taken from C{iterable} when there is room to start a
+    call for them, so it may be a generator over far more work than could
+    sensibly be started at once.  If C{handleResult} is given, results are
+    passed to it as they become available instead of being kept in a list.
+    For example, to fetch a large number of URLs, ten at a time, and save
+    each page as it arrives::
+
+        d = parallel(urls, getPage, concurrency=10, handleResult=savePage)
+
+    If a call fails, or C{iterable} or C{handleResult} raises an exception, no
+    more calls are started, the calls which have not finished are cancelled,
+    and the returned L{Deferred} fails with a L{FirstError} wrapping the
+    failure.  Cancelling the returned L{Deferred} likewise cancels the
+    unfinished calls and takes no more elements from C{iterable}.
+
+    @param iterable: The elements to pass to C{f}.
+
+    @param f: A callable taking one element, returning a result or a
+        L{Deferred} which fires with one.
+
+    @param concurrency: The largest number of calls to C{f} which may be
+        unfinished at once.  When C{ordered} is true, results which are
+        waiting for earlier ones count towards this too, so that no more than
+        this many results are ever held.
+    @type concurrency: C{int}
+
+    @param ordered: If true, results are delivered in the order of the
+        elements they came from.  Otherwise, they are delivered as soon as
+        they are available, and a slow call does not hold up the rest.
+    @type ordered: C{bool}
+
+    @param handleResult: A callable called with each result, or C{None} to
+        collect the results into a C{list}.
+
+    @raise ValueError: If C{concurrency} is less than 1.
+
+    @return: A L{Deferred} which fires with the C{list} of results, or with
+        C{None} if C{handleResult} is given, once every element has been
+        processed.  If it fails with a L{FirstError}, its C{index} is the
+        position in C{iterable} of the element whose call failed, or of the
+        element C{iterable} or C{handleResult} was handling when it raised
+        an exception.
+    @rtype: L{Deferred}
+
+    @since: 16.2
+    """
+    if concurrency < 1:
+        raise ValueError("parallel requires concurrency >= 1")
+    parallelMap = _ParallelMap(iterable, f, concurrency, ordered,
+                               handleResult)
+    parallelMap._pump()
+    return parallelMap.deferred
+
+
+
 # Constants for use with DeferredList
 
 SUCCESS = True
@@ -1176,14 +1427,18 @@ def _inlineCallbacks(result, g, deferred):
 
         if isinstance(result, Deferred):
             # a deferred was yielded, get the result.
-            def gotResult(r):
-                if waiting[0]:
-                    waiting[0] = False
-                    waiting[1] = r
-                else:
-                    _inlineCallbacks(r, g, deferred)
-
-            result.addBoth(gotResult)
+            if (result.called and not result.paused and not result.callbacks
+                    and not result._runningCallbacks):
+                # It already has one, so take it directly, leaving None behind
+                # just as _gotResultInlineCallbacks would.
+                deferredResult = result.result
+                result.result = None
+                if result._debugInfo is not None:
+                    result._debugInfo.failResult = None
+                result = deferredResult
+                continue
+
+            result.addBoth(_gotResultInlineCallbacks, waiting, g, deferred)
             if waiting[0]:
                 # Haven't called back yet, set flag so that we get reinvoked
                 # and return from the loop
@@ -1191,10 +1446,10 @@ def _inlineCallbacks(result, g, deferred):
                 return deferred
 
             result = waiting[1]
-            # Reset waiting to initial values for next loop.  gotResult uses
-            # waiting, but this isn't a problem because gotResult is only
-            # executed once, and if it hasn't been executed yet, the return
-            # branch above would have been taken.
+            # Reset waiting to initial values for next loop.
+            # _gotResultInlineCallbacks uses waiting, but this isn't a problem
+            # because it is only executed once, and if it hasn't been executed
+            # yet, the return branch above would have been taken.
 
 
             waiting[0] = True
@@ -1205,6 +1460,31 @@ def _inlineCallbacks(result, g, deferred):
 
 
 
+def _gotResultInlineCallbacks(r, waiting, g, deferred):
+    """
+    Resume the generator of an L{inlineCallbacks} function with the result of
+    a L{Deferred} it yielded.
+
+    If the L{Deferred} fired while L{_inlineCallbacks} was still adding this
+    callback, just hand the result back to its loop through C{waiting},
+    rather than recursing.
+
+    @param r: The result of the yielded L{Deferred}.
+    @param waiting: A two-element C{list}: a flag which is C{True} while
+        L{_inlineCallbacks} is still adding this callback, and the result once
+        it has been handed back.
+    @param g: The generator.
+    @param deferred: The L{Deferred} returned by the L{inlineCallbacks}
+        function.
+    """
+    if waiting[0]:
+        waiting[0] = False
+        waiting[1] = r
+    else:
+        _inlineCallbacks(r, g, deferred)
+
+
+
 def inlineCallbacks(f):
     """
     inlineCallbacks helps you write L{Deferred}-using code that looks like a
@@ -1388,7 +1668,7 @@ class DeferredSemaphore(_ConcurrencyPrimitive):
     A semaphore for event driven systems.
 
     If you are looking into this as a means of limiting parallelism, you might
-    find L{twisted.internet.task.Cooperator} more useful.
+    find L{parallel} or L{twisted.internet.task.Cooperator} more useful.
 
     @ivar limit: At most this many users may acquire this semaphore at
         once.
@@ -1652,7 +1932,7 @@ class DeferredFilesystemLock(lockfile.FilesystemLock):
 
 __all__ = ["Deferred", "DeferredList", "succeed", "fail", "FAILURE", "SUCCESS",
            "AlreadyCalledError", "TimeoutError", "gatherResults",
-           "maybeDeferred",
+           "maybeDeferred", "parallel",
            "waitForDeferred", "deferredGenerator", "inlineCallbacks",
            "returnValue",
            "DeferredLock", "DeferredSemaphore", "DeferredQueue",
@@ -26,6 +26,7 @@ from zope.interface import implementer, directlyProvides
 from twisted.internet import interfaces, defer, error, fdesc, threads
 from twisted.internet.abstract import isIPv6Address
 from twisted.internet.address import _ProcessAddress, HostnameAddress
+from twisted.internet.tcp import _resolveIPv6
 from twisted.internet.interfaces import (
     IStreamServerEndpointStringParser,
     IStreamClientEndpointStringParserWithReactor)
@@ -437,9 +438,13 @@ class ProcessEndpoint(object):
 class _TCPServerEndpoint(object):
     """
     A TCP server endpoint interface
+
+    @ivar _addressFamily: The address family of the sockets created when
+        C{reusePort} is set.
     """
+    _addressFamily = AF_INET
 
-    def __init__(self, reactor, port, backlog, interface):
+    def __init__(self, reactor, port, backlog, interface, reusePort=False):
         """
         @param reactor: An L{IReactorTCP} provider.
 
@@ -451,11 +456,23 @@ class _TCPServerEndpoint(object):
 
         @param interface: The hostname to bind to
         @type interface: str
+
+        @param reusePort: If C{True}, listen on a socket with C{SO_REUSEPORT}
+            set, so that several processes can listen on the same port and
+            have the kernel distribute incoming connections between them.  The
+            reactor must then also provide L{interfaces.IReactorSocket}.
+        @type reusePort: bool
+
+        @raise ValueError: If C{reusePort} is set on a platform without
+            C{SO_REUSEPORT}.
         """
+        if reusePort and getattr(socket, "SO_REUSEPORT", None) is None:
+            raise ValueError("SO_REUSEPORT is not supported on this platform")
         self._reactor = reactor
         self._port = port
         self._backlog = backlog
         self._interface = interface
+        self._reusePort = reusePort
 
 
     def listen(self, protocolFactory):
@@ -463,6 +480,8 @@ class _TCPServerEndpoint(object):
         Implement L{IStreamServerEndpoint.listen} to listen on a TCP
         socket
         """
+        if self._reusePort:
+            return defer.execute(self._listenReusePort, protocolFactory)
         return defer.execute(self._reactor.listenTCP,
                              self._port,
                              protocolFactory,
@@ -470,12 +489,42 @@ class _TCPServerEndpoint(object):
                              interface=self._interface)
 
 
+    def _listenReusePort(self, protocolFactory):
+        """
+        Bind a listening socket with C{SO_REUSEPORT} set and hand it over to
+        the reactor with L{interfaces.IReactorSocket.adoptStreamPort}.
+
+        @return: The L{interfaces.IListeningPort} the reactor created.
+
+        @raise CannotListenError: If the socket could not be bound.
+        """
+        skt = socket.socket(self._addressFamily, socket.SOCK_STREAM)
+        try:
+            try:
+                if self._addressFamily == AF_INET6:
+                    addr = _resolveIPv6(self._interface, self._port)
+                else:
+                    addr = (self._interface, self._port)
+                skt.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                skt.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                skt.bind(addr)
+                skt.listen(self._backlog)
+            except socket.error as e:
+                raise error.CannotListenError(self._interface, self._port, e)
+            fdesc.setNonBlocking(skt.fileno())
+            return self._reactor.adoptStreamPort(
+                skt.fileno(), self._addressFamily, protocolFactory)
+        finally:
+            skt.close()
+
+
 
 class TCP4ServerEndpoint(_TCPServerEndpoint):
     """
     Implements TCP server endpoint with an IPv4 configuration
     """
-    def __init__(self, reactor, port, backlog=50, interface=''):
+    def __init__(self, reactor, port, backlog=50, interface='',
+                 reusePort=False):
         """
         @param reactor: An L{IReactorTCP} provider.
 
@@ -487,8 +536,13 @@ class TCP4ServerEndpoint(_TCPServerEndpoint):
 
         @param interface: The hostname to bind to, defaults to '' (all)
         @type interface: str
+
+        @param reusePort: If C{True}, listen with C{SO_REUSEPORT} set.  See
+            L{_TCPServerEndpoint.__init__}.
+        @type reusePort: bool
         """
-        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface)
+        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface,
+                                    reusePort)
 
 
 
@@ -496,7 +550,10 @@ class TCP6ServerEndpoint(_TCPServerEndpoint):
     """
     Implements TCP server endpoint with an IPv6 configuration
     """
-    def __init__(self, reactor, port, backlog=50, interface='::'):
+    _addressFamily = AF_INET6
+
+    def __init__(self, reactor, port, backlog=50, interface='::',
+                 reusePort=False):
         """
         @param reactor: An L{IReactorTCP} provider.
 
@@ -508,8 +565,13 @@ class TCP6ServerEndpoint(_TCPServerEndpoint):
 
         @param interface: The hostname to bind to, defaults to '' (all)
         @type interface: str
+
+        @param reusePort: If C{True}, listen with C{SO_REUSEPORT} set.  See
+            L{_TCPServerEndpoint.__init__}.
+        @type reusePort: bool
         """
-        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface)
+        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface,
+                                    reusePort)
 
 
 
@@ -1023,7 +1085,7 @@ class AdoptedStreamServerEndpoint(object):
 
 
 
-def _parseTCP(factory, port, interface="", backlog=50):
+def _parseTCP(factory, port, interface="", backlog=50, reusePort=False):
     """
     Internal parser function for L{_parseServer} to convert the string
     arguments for a TCP(IPv4) stream endpoint into the structured arguments.
@@ -1041,12 +1103,19 @@ def _parseTCP(factory, port, interface="", backlog=50):
     @param backlog: the length of the listen queue
     @type backlog: C{str}
 
+    @param reusePort: C{"1"} to listen with C{SO_REUSEPORT} set.  This is
+        only supported by L{TCP4ServerEndpoint}, not by
+        L{IReactorTCP.listenTCP}, so it is omitted from the result unless set.
+    @type reusePort: C{str}
+
     @return: a 2-tuple of (args, kwargs), describing  the parameters to
         L{IReactorTCP.listenTCP} (or, modulo argument 2, the factory, arguments
         to L{TCP4ServerEndpoint}.
     """
-    return (int(port), factory), {'interface': interface,
-                                  'backlog': int(backlog)}
+    kw = {'interface': interface, 'backlog': int(backlog)}
+    if int(reusePort):
+        kw['reusePort'] = True
+    return (int(port), factory), kw
 
 
 
@@ -1253,7 +1322,8 @@ class _TCP6ServerParser(object):
     """
     prefix = "tcp6"     # Used in _parseServer to identify the plugin with the endpoint type
 
-    def _parseServer(self, reactor, port, backlog=50, interface='::'):
+    def _parseServer(self, reactor, port, backlog=50, interface='::',
+                     reusePort=False):
         """
         Internal parser function for L{_parseServer} to convert the string
         arguments into structured arguments for the L{TCP6ServerEndpoint}
@@ -1268,10 +1338,15 @@ class _TCP6ServerParser(object):
 
         @param interface: The hostname to bind to
         @type interface: str
+
+        @param reusePort: C{"1"} to listen with C{SO_REUSEPORT} set.
+        @type reusePort: str
         """
         port = int(port)
         backlog = int(backlog)
-        return TCP6ServerEndpoint(reactor, port, backlog, interface)
+        reusePort = bool(int(reusePort))
+        return TCP6ServerEndpoint(reactor, port, backlog, interface,
+                                  reusePort)
 
 
     def parseStreamServer(self, reactor, *args, **kwargs):
@@ -1475,6 +1550,12 @@ def serverFromString(reactor, description):
 
         serverFromString(reactor, "tcp:80:interface=127.0.0.1")
 
+    Several processes may share one TCP port, with the kernel balancing
+    incoming connections between them, by having each listen with
+    C{SO_REUSEPORT} (where the platform supports it)::
+
+        serverFromString(reactor, "tcp:80:reusePort=1")
+
     SSL server endpoints may be specified with the 'ssl' prefix, and the
     private key and certificate files may be specified by the C{privateKey} and
     C{certKey} arguments::
@@ -1429,6 +1429,98 @@ class IReactorPluggableResolver(Interface):
         """
 
 
+class ITimerStore(Interface):
+    """
+    A collection of pending L{IDelayedCall} providers, used by a reactor to
+    keep track of which of its delayed calls are due to run.
+
+    A timer store is only concerned with ordering calls by the time at which
+    they are scheduled; it never runs them itself.
+    """
+
+    def add(call):
+        """
+        Begin tracking a delayed call.
+
+        @param call: The call to track.
+        @type call: L{twisted.internet.base.DelayedCall}
+        """
+
+
+    def remove(call):
+        """
+        Stop tracking a delayed call because it has been cancelled.
+
+        It is not an error to remove a call which is not being tracked.
+
+        @param call: The call to stop tracking.
+        @type call: L{twisted.internet.base.DelayedCall}
+        """
+
+
+    def moveSooner(call):
+        """
+        Note that the scheduled time of a tracked call has moved earlier.
+
+        It is not an error to pass a call which is not being tracked.
+
+        @param call: The call which has been rescheduled.
+        @type call: L{twisted.internet.base.DelayedCall}
+        """
+
+
+    def nextTime():
+        """
+        Determine when the reactor next needs to service this store.
+
+        @return: The time, in seconds since the epoch, at or before which the
+            earliest tracked call should be run, or L{None} if no calls are
+            being tracked.
+        @rtype: L{float} or L{None}
+        """
+
+
+    def popDue(now):
+        """
+        Stop tracking and return one call which is due to be run.
+
+        @param now: The current time, in seconds since the epoch.
+        @type now: L{float}
+
+        @return: A call which is neither cancelled nor scheduled for later
+            than C{now}, or L{None} if there are no such calls.
+        @rtype: L{twisted.internet.base.DelayedCall} or L{None}
+        """
+
+
+    def getDelayedCalls():
+        """
+        Retrieve all of the tracked calls which have not been cancelled.
+
+        @return: The calls, in no particular order.
+        @rtype: L{list} of L{twisted.internet.base.DelayedCall}
+        """
+
+
+class IReactorPluggableTimerStore(Interface):
+    """
+    A reactor with a pluggable store for its delayed calls.
+    """
+
+    def installTimerStore(store):
+        """
+        Set the store used to keep track of pending delayed calls.
+
+        Any calls pending in the previously installed store are moved to the
+        new one.
+
+        @type store: An object implementing the L{ITimerStore} interface.
+        @param store: The new store to use.
+
+        @return: The previously installed store.
+        """
+
+
 class IReactorDaemonize(Interface):
     """
     A reactor which provides hooks that need to be called before and after
@@ -1845,6 +1937,32 @@ class IProtocol(Interface):
         """
 
 
+
+class IBufferProtocol(IProtocol):
+    """
+    A protocol which can consume received data as a view of a buffer owned by
+    the transport.
+
+    Transports which support it (currently TCP) read into a reusable buffer
+    with C{recv_into} and deliver a view of it to L{bufferReceived} instead of
+    allocating a new byte string for every read and calling C{dataReceived}.
+    Transports which do not support it call C{dataReceived} as usual, so
+    providers must implement both methods.
+    """
+
+    def bufferReceived(data):
+        """
+        Called whenever data is received.
+
+        @param data: The received bytes.  The buffer behind this view is
+            reused for the next read, so it is only valid until this method
+            returns; anything which must be kept has to be copied out of it
+            (for example by concatenating it to a byte string).
+        @type data: C{memoryview}
+        """
+
+
+
 class IProcessProtocol(Interface):
     """
     Interface for process-related event handlers.
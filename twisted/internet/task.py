@@ -10,6 +10,7 @@ from __future__ import division, absolute_import
 
 __metaclass__ = type
 
+import math
 import sys
 import time
 import warnings
@@ -23,8 +24,9 @@ from twisted.python.failure import Failure
 from twisted.python.versions import Version
 
 from twisted.internet import base, defer
-from twisted.internet.interfaces import IReactorTime
+from twisted.internet.interfaces import IReactorTime, IDelayedCall
 from twisted.internet.error import ReactorNotRunning
+from twisted.internet.error import AlreadyCalled, AlreadyCancelled
 
 
 class LoopingCall:
@@ -292,6 +294,253 @@ class LoopingCall:
 
 
 
+@implementer(IDelayedCall)
+class _CoarseDelayedCall(object):
+    """
+    A call scheduled by a L{TimeoutGroup}.
+
+    @ivar time: The time, in seconds since the epoch, at which this call is
+        scheduled to be made.  It may be made up to the slack of its group
+        later than this.
+
+    @ivar _bucket: The L{_TimeoutBucket} this call is filed in, or L{None} if
+        it is not filed in one.
+    """
+    cancelled = called = False
+    _bucket = None
+
+    def __init__(self, group, time, func, args, kw):
+        self._group = group
+        self.time = time
+        self.func, self.args, self.kw = func, args, kw
+
+
+    def getTime(self):
+        """
+        See L{IDelayedCall.getTime}.
+        """
+        return self.time
+
+
+    def _checkActive(self):
+        """
+        @raise AlreadyCancelled: If this call has been cancelled.
+        @raise AlreadyCalled: If this call has already been made.
+        """
+        if self.cancelled:
+            raise AlreadyCancelled()
+        elif self.called:
+            raise AlreadyCalled()
+
+
+    def cancel(self):
+        """
+        See L{IDelayedCall.cancel}.
+        """
+        self._checkActive()
+        self._group._unfile(self)
+        self.cancelled = True
+        del self.func, self.args, self.kw
+
+
+    def reset(self, secondsFromNow):
+        """
+        See L{IDelayedCall.reset}.
+        """
+        self._checkActive()
+        self._group._reschedule(
+            self, self._group._getClock().seconds() + secondsFromNow)
+
+
+    def delay(self, secondsLater):
+        """
+        See L{IDelayedCall.delay}.
+        """
+        self._checkActive()
+        self._group._reschedule(self, self.time + secondsLater)
+
+
+    def active(self):
+        """
+        See L{IDelayedCall.active}.
+        """
+        return not (self.cancelled or self.called)
+
+
+
+class _TimeoutBucket(object):
+    """
+    The calls of a L{TimeoutGroup} which are due in the same slack window.
+
+    @ivar key: The index of the slack window.
+    @ivar delayedCall: The L{IDelayedCall} which will run the calls.
+    @ivar calls: A L{set} of L{_CoarseDelayedCall}.
+    """
+    def __init__(self, key):
+        self.key = key
+        self.delayedCall = None
+        self.calls = set()
+
+
+
+class TimeoutGroup(object):
+    """
+    A scheduler for large numbers of calls, such as connection timeouts, which
+    do not need to be made at a precise time.
+
+    Time is divided into windows of C{slack} seconds, and every call due in
+    the same window is made by a single delayed call at the end of that
+    window.  However many calls are scheduled, the clock only has one delayed
+    call for each window in which some are due.
+
+    Rescheduling a call to a later time, as is typically done with a timeout
+    each time data is received, only records the new time; the call is moved
+    to its new window when its old one ends.
+
+    @ivar slack: The length of a window, in seconds; also the longest a call
+        may be made after its scheduled time.
+    @type slack: L{float}
+
+    @ivar clock: A provider of L{IReactorTime}, or L{None} to use the global
+        reactor.
+
+    @ivar _buckets: A L{dict} mapping the index of each window in which calls
+        are due to its L{_TimeoutBucket}.
+    """
+
+    def __init__(self, slack=1.0, clock=None):
+        """
+        @param slack: See C{slack}.
+        @param clock: See C{clock}.
+        """
+        self.slack = slack
+        self.clock = clock
+        self._buckets = {}
+
+
+    def _getClock(self):
+        """
+        @return: The L{IReactorTime} provider to schedule the windows with.
+        """
+        if self.clock is None:
+            from twisted.internet import reactor
+            return reactor
+        return self.clock
+
+
+    def callLater(self, delay, f, *args, **kw):
+        """
+        Call a function after a delay of at least C{delay} seconds and at most
+        C{delay + slack} seconds.
+
+        @param delay: The number of seconds to wait.
+        @param f: The function to call.
+        @param args: The positional arguments to call C{f} with.
+        @param kw: The keyword arguments to call C{f} with.
+
+        @return: A provider of L{IDelayedCall} which can be used to cancel or
+            reschedule the call.
+        """
+        call = _CoarseDelayedCall(
+            self, self._getClock().seconds() + delay, f, args, kw)
+        self._file(call)
+        return call
+
+
+    def getDelayedCalls(self):
+        """
+        @return: A L{list} of every scheduled call which has not yet been made
+            or cancelled.
+        """
+        return [call for bucket in self._buckets.values()
+                for call in bucket.calls]
+
+
+    def _windowFor(self, time):
+        """
+        @param time: A time, in seconds since the epoch.
+
+        @return: The index of the first window which ends no earlier than
+            C{time}.
+        @rtype: L{int}
+        """
+        return int(math.ceil(time / self.slack))
+
+
+    def _file(self, call):
+        """
+        Add a call to the bucket for the window it is due in.
+
+        @param call: The L{_CoarseDelayedCall} to file.
+        """
+        key = self._windowFor(call.time)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            clock = self._getClock()
+            bucket = self._buckets[key] = _TimeoutBucket(key)
+            bucket.delayedCall = clock.callLater(
+                max(0, key * self.slack - clock.seconds()), self._fire, bucket)
+        bucket.calls.add(call)
+        call._bucket = bucket
+
+
+    def _unfile(self, call):
+        """
+        Remove a call from its bucket, discarding the bucket if it is left
+        empty.
+
+        @param call: The L{_CoarseDelayedCall} to remove.
+        """
+        bucket = call._bucket
+        call._bucket = None
+        if bucket is None:
+            return
+        bucket.calls.discard(call)
+        if not bucket.calls and self._buckets.get(bucket.key) is bucket:
+            del self._buckets[bucket.key]
+            bucket.delayedCall.cancel()
+
+
+    def _reschedule(self, call, time):
+        """
+        Change the time at which a call is scheduled, moving it to an earlier
+        window immediately if necessary.
+
+        @param call: The L{_CoarseDelayedCall} to reschedule.
+        @param time: The new time, in seconds since the epoch.
+        """
+        call.time = time
+        if call._bucket is None or self._windowFor(time) < call._bucket.key:
+            self._unfile(call)
+            self._file(call)
+
+
+    def _fire(self, bucket):
+        """
+        Make the calls which are due at the end of a window, and move those
+        which have been rescheduled to a later time to their new window.
+
+        @param bucket: The L{_TimeoutBucket} for the window.
+        """
+        if self._buckets.get(bucket.key) is bucket:
+            del self._buckets[bucket.key]
+        for call in sorted(bucket.calls, key=lambda call: call.time):
+            if call._bucket is not bucket:
+                # Cancelled or rescheduled by an earlier call.
+                continue
+            call._bucket = None
+            if self._windowFor(call.time) > bucket.key:
+                self._file(call)
+                continue
+            call.called = True
+            try:
+                call.func(*call.args, **call.kw)
+            except:
+                log.err(None, "Unhandled error in timeout group call")
+        bucket.calls.clear()
+
+
+
 class SchedulerError(Exception):
     """
     The operation could not be completed because the scheduler or one of its
@@ -938,7 +1187,7 @@ def react(main, argv=(), _reactor=None):
 
 
 __all__ = [
-    'LoopingCall',
+    'LoopingCall', 'TimeoutGroup',
 
     'Clock',
 
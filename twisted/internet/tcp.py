@@ -11,6 +11,7 @@ End users shouldn't use this module directly - use the reactor APIs instead.
 from __future__ import division, absolute_import
 
 # System Imports
+import os
 import types
 import socket
 import sys
@@ -93,6 +94,9 @@ from twisted.internet.protocol import Protocol
 # Not all platforms have, or support, this flag.
 _AI_NUMERICSERV = getattr(socket, "AI_NUMERICSERV", 0)
 
+# Only available on Python 3.3 and newer, on some platforms.
+_sendfile = getattr(os, "sendfile", None)
+
 
 # The type for service names passed to socket.getservbyname:
 if _PY3:
@@ -102,6 +106,57 @@ else:
 
 
 
+class _ReceiveBufferPool(object):
+    """
+    A pool of reusable C{bytearray}s for reading into with C{recv_into}.
+
+    Data read into one of these buffers is handed to the protocol
+    synchronously, so a buffer is only in use for the duration of a single
+    C{doRead} and a handful of them is enough for any number of connections.
+
+    @ivar _free: The buffers which are not currently in use.
+    @type _free: C{list} of C{bytearray}
+
+    @ivar _maxFree: The largest number of unused buffers to keep around.
+    @type _maxFree: C{int}
+    """
+
+    def __init__(self, maxFree=4):
+        self._free = []
+        self._maxFree = maxFree
+
+
+    def acquire(self, size):
+        """
+        Get a buffer from the pool, allocating a new one if necessary.
+
+        @param size: The minimum size of the buffer.
+        @type size: C{int}
+
+        @rtype: C{bytearray}
+        """
+        while self._free:
+            buf = self._free.pop()
+            if len(buf) >= size:
+                return buf
+        return bytearray(size)
+
+
+    def release(self, buf):
+        """
+        Return a buffer obtained from L{acquire} to the pool.
+
+        @type buf: C{bytearray}
+        """
+        if len(self._free) < self._maxFree:
+            self._free.append(buf)
+
+
+
+_receiveBuffers = _ReceiveBufferPool()
+
+
+
 class _SocketCloser(object):
     """
     @ivar _shouldShutdown: Set to C{True} if C{shutdown} should be called
@@ -174,7 +229,21 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
 
     @ivar logstr: prefix used when logging events related to this connection.
     @type logstr: C{str}
+
+    @ivar _vectoredWrites: C{True} if the socket supports C{sendmsg}, in which
+        case buffered data is sent with L{_writeSomeVectors}.
+
+    @ivar _readInto: C{True} if the socket supports C{recv_into}, in which
+        case data for a protocol providing L{interfaces.IBufferProtocol} is
+        read with L{_doReadInto}.
+
+    @ivar _sendFileSupported: Whether connections of this type may write
+        files with L{_sendFile}.  They do so only if the platform has
+        C{os.sendfile} and the socket supports vectored writes, and only until
+        TLS is started.
+    @type _sendFileSupported: C{bool}
     """
+    _sendFileSupported = True
 
 
     def __init__(self, skt, protocol, reactor=None):
@@ -183,6 +252,8 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         self.socket.setblocking(0)
         self.fileno = skt.fileno
         self.protocol = protocol
+        self._vectoredWrites = getattr(skt, "sendmsg", None) is not None
+        self._readInto = getattr(skt, "recv_into", None) is not None
 
 
     def getHandle(self):
@@ -197,7 +268,13 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         calls self.dataReceived(data) to process it.  If the connection is not
         lost through an error in the physical recv(), this function will return
         the result of the dataReceived call.
+
+        If the protocol provides L{interfaces.IBufferProtocol}, the data is
+        read with L{_doReadInto} instead.
         """
+        if (self._readInto and
+                interfaces.IBufferProtocol.providedBy(self.protocol)):
+            return self._doReadInto()
         try:
             data = self.socket.recv(self.bufferSize)
         except socket.error as se:
@@ -209,6 +286,88 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         return self._dataReceived(data)
 
 
+    def _sendFile(self, fileObject, offset, count):
+        """
+        Queue part of a file to be written with C{sendfile}, as if it had been
+        read and passed to C{write}: after any data already written, and
+        before any data written afterwards.
+
+        This is a private capability of concrete connections rather than an
+        interface, because wrappers such as those in
+        L{twisted.protocols.policies} copy the interfaces provided by the
+        transport they wrap and forward attributes they don't define to it.
+        Users should look it up on the class of the transport.
+
+        @param fileObject: A file opened for reading, which has a C{fileno}
+            method.  It must not be closed or changed until the returned
+            L{Deferred} fires.
+
+        @param offset: The offset in the file of the first byte to write.
+        @type offset: C{int}
+
+        @param count: The number of bytes to write.
+        @type count: C{int}
+
+        @return: A L{Deferred} which fires with C{None} once all of the bytes
+            have been written, or fails if the connection is lost first; or
+            C{None} if this connection can't write files, in which case
+            nothing is queued.
+        """
+        if not (self._sendFileSupported and self._vectoredWrites and
+                _sendfile is not None) or self.TLS:
+            return None
+        region = abstract._FileRegion(fileObject.fileno(), offset, count)
+        return self._writeFileRegion(region)
+
+
+    def _writeSomeFile(self, fileno, offset, count):
+        """
+        Write as much as possible of part of a file to this connection with
+        C{sendfile}.
+
+        @see: L{abstract.FileDescriptor._writeSomeFile}
+        """
+        try:
+            sent = untilConcludes(
+                _sendfile, self.socket.fileno(), fileno, offset, count)
+        except (socket.error, OSError) as se:
+            if se.args[0] in (EWOULDBLOCK, ENOBUFS):
+                return 0
+            else:
+                return main.CONNECTION_LOST
+        if not sent and count:
+            # sendfile fails with EWOULDBLOCK if the socket is full, so
+            # writing nothing means the file ends before offset.
+            return EOFError(
+                "File ended %d bytes before the end of the part of it being "
+                "written" % (count,))
+        return sent
+
+
+    def _doReadInto(self):
+        """
+        Read up to C{self.bufferSize} bytes into a pooled buffer and pass a
+        view of them to the protocol's C{bufferReceived}.
+
+        The buffer goes back to the pool as soon as C{bufferReceived} returns,
+        so no byte string is allocated for the data read.
+        """
+        buf = _receiveBuffers.acquire(self.bufferSize)
+        try:
+            try:
+                count = self.socket.recv_into(buf, self.bufferSize)
+            except socket.error as se:
+                if se.args[0] == EWOULDBLOCK:
+                    return
+                else:
+                    return main.CONNECTION_LOST
+            if not count:
+                return main.CONNECTION_DONE
+            self.protocol.bufferReceived(memoryview(buf)[:count])
+        finally:
+            _receiveBuffers.release(buf)
+
+
     def _dataReceived(self, data):
         if not data:
             return main.CONNECTION_DONE
@@ -246,6 +405,23 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
                 return main.CONNECTION_LOST
 
 
+    def _writeSomeVectors(self, vectors):
+        """
+        Write as much as possible of the given chunks of data to this TCP
+        connection with a single call to C{sendmsg}.
+
+        If the connection is lost, an exception is returned.  Otherwise, the
+        number of bytes successfully written is returned.
+        """
+        try:
+            return untilConcludes(self.socket.sendmsg, vectors)
+        except socket.error as se:
+            if se.args[0] in (EWOULDBLOCK, ENOBUFS):
+                return 0
+            else:
+                return main.CONNECTION_LOST
+
+
     def _closeWriteConnection(self):
         try:
             self.socket.shutdown(1)
@@ -892,6 +1068,17 @@ class Port(base.BasePort, _SocketCloser):
         was created and initialized outside of the reactor and will be used to
         listen for connections (instead of a new socket being created by this
         L{Port}).
+
+    @ivar numberAccepts: The number of connections L{doRead} will try to
+        accept before returning to the reactor.  It adapts to the rate at which
+        connections arrive: it grows when every attempt succeeds and shrinks
+        to the number actually accepted when the backlog runs dry, but always
+        stays between 1 and L{maxAccepts}.
+    @type numberAccepts: C{int}
+
+    @ivar maxAccepts: The upper bound on L{numberAccepts}, which keeps a
+        flood of new connections from starving the reactor's other work.
+    @type maxAccepts: C{int}
     """
 
     socketType = socket.SOCK_STREAM
@@ -900,6 +1087,7 @@ class Port(base.BasePort, _SocketCloser):
     sessionno = 0
     interface = ''
     backlog = 50
+    maxAccepts = 1000
 
     _type = 'TCP'
 
@@ -1003,7 +1191,7 @@ class Port(base.BasePort, _SocketCloser):
         self.connected = True
         self.socket = skt
         self.fileno = self.socket.fileno
-        self.numberAccepts = 100
+        self.numberAccepts = min(100, self.maxAccepts)
 
         self.startReading()
 
@@ -1035,7 +1223,7 @@ class Port(base.BasePort, _SocketCloser):
                     skt, addr = self.socket.accept()
                 except socket.error as e:
                     if e.args[0] in (EWOULDBLOCK, EAGAIN):
-                        self.numberAccepts = i
+                        self.numberAccepts = max(i, 1)
                         break
                     elif e.args[0] == EPERM:
                         # Netfilter on Linux may have rejected the
@@ -1073,7 +1261,8 @@ class Port(base.BasePort, _SocketCloser):
                 transport = self.transport(skt, protocol, addr, self, s, self.reactor)
                 protocol.makeConnection(transport)
             else:
-                self.numberAccepts = self.numberAccepts+20
+                self.numberAccepts = min(
+                    self.numberAccepts + 20, self.maxAccepts)
         except:
             # Note that in TLS mode, this will possibly catch SSL.Errors
             # raised by self.socket.accept()
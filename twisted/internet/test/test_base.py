@@ -12,11 +12,14 @@ except ImportError:
     from queue import Queue
 
 from zope.interface import implementer
+from zope.interface.verify import verifyObject
 
 from twisted.python.threadpool import ThreadPool
 from twisted.internet.interfaces import IReactorTime, IReactorThreads
+from twisted.internet.interfaces import ITimerStore, IReactorPluggableTimerStore
 from twisted.internet.error import DNSLookupError
-from twisted.internet.base import ThreadedResolver, DelayedCall
+from twisted.internet.base import ThreadedResolver, DelayedCall, ReactorBase
+from twisted.internet.base import HeapTimerStore, TimingWheelTimerStore
 from twisted.internet.task import Clock
 from twisted.trial.unittest import TestCase
 
@@ -155,6 +158,34 @@ class ThreadedResolverTests(TestCase):
         result.put(IOError("The I/O was errorful"))
 
 
+    def test_lookupPriority(self):
+        """
+        L{ThreadedResolver.getHostByName} calls L{socket.gethostbyname} in a
+        lane of the reactor's threadpool with
+        L{ThreadedResolver.lookupPriority}.
+        """
+        reactor = FakeReactor()
+        self.addCleanup(reactor._stop)
+        self.patch(socket, 'gethostbyname', lambda name: "10.0.0.17")
+
+        lanes = []
+        realLane = reactor._threadpool.lane
+        def lane(priority):
+            lanes.append(priority)
+            return realLane(priority)
+        reactor._threadpool.lane = lane
+
+        resolvedTo = []
+        resolver = ThreadedResolver(reactor)
+        d = resolver.getHostByName("foo.bar.example.com", (30,))
+        d.addCallback(resolvedTo.append)
+        reactor._runThreadCalls()
+
+        self.assertEqual(lanes, [ThreadedResolver.lookupPriority])
+        self.assertEqual(resolvedTo, ["10.0.0.17"])
+        reactor._clock.advance(31)
+
+
 
 def nothing():
     """
@@ -270,3 +301,345 @@ class DelayedCallTests(TestCase):
         self.assertTrue(self.zero != self.one)
         self.assertFalse(self.zero != self.zero)
         self.assertFalse(self.one != self.one)
+
+
+
+class TimerStoreReactor(ReactorBase):
+    """
+    A reactor which does no I/O and whose notion of time only changes when
+    L{TimerStoreReactor.advance} is called.
+
+    @ivar now: The current time, in seconds since the epoch.
+    """
+    now = 1000.0
+
+    def installWaker(self):
+        """
+        There is nothing to wake up.
+        """
+
+
+    def seconds(self):
+        """
+        @return: C{self.now}.
+        """
+        return self.now
+
+
+    def advance(self, amount):
+        """
+        Move time forward and run any delayed calls which became due.
+
+        @param amount: The number of seconds to move forward.
+        """
+        self.now += amount
+        self.runUntilCurrent()
+
+
+
+class TimerStoreTestsMixin(object):
+    """
+    Tests for the behaviour of a L{ReactorBase} using an L{ITimerStore}.
+
+    Subclasses must define C{createStore}, returning a new store, and
+    C{precision}, the number of seconds by which the store may delay calls.
+    """
+    def setUp(self):
+        self.reactor = TimerStoreReactor()
+        self.store = self.createStore()
+        self.reactor.installTimerStore(self.store)
+
+
+    def test_interface(self):
+        """
+        The store provides L{ITimerStore}.
+        """
+        self.assertTrue(verifyObject(ITimerStore, self.store))
+
+
+    def test_notEarly(self):
+        """
+        A delayed call does not run before its scheduled time, and runs no
+        later than C{precision} seconds after it.
+        """
+        called = []
+        self.reactor.callLater(1, called.append, 1)
+        self.reactor.runUntilCurrent()
+        self.reactor.advance(0.999)
+        self.assertEqual(called, [])
+        self.reactor.advance(0.001 + self.precision)
+        self.assertEqual(called, [1])
+
+
+    def test_order(self):
+        """
+        Delayed calls which become due in the same iteration run in the
+        order of their scheduled times.
+        """
+        called = []
+        for delay in [5, 1, 300, 3, 70, 2]:
+            self.reactor.callLater(delay, called.append, delay)
+        self.reactor.advance(1000)
+        self.assertEqual(called, [1, 2, 3, 5, 70, 300])
+
+
+    def test_timeout(self):
+        """
+        L{ReactorBase.timeout} is at least the delay until the earliest
+        delayed call, and no more than C{precision} seconds more.
+        """
+        self.assertIdentical(self.reactor.timeout(), None)
+        self.reactor.callLater(20, lambda: None)
+        self.reactor.callLater(7, lambda: None)
+        timeout = self.reactor.timeout()
+        self.assertTrue(7 <= timeout <= 7 + self.precision, timeout)
+
+
+    def test_cancel(self):
+        """
+        A cancelled delayed call does not run, and is no longer returned by
+        L{ReactorBase.getDelayedCalls}.
+        """
+        called = []
+        call = self.reactor.callLater(1, called.append, 1)
+        other = self.reactor.callLater(2, called.append, 2)
+        self.reactor.runUntilCurrent()
+        call.cancel()
+        self.assertEqual(self.reactor.getDelayedCalls(), [other])
+        self.reactor.advance(3)
+        self.assertEqual(called, [2])
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+
+    def test_cancelRemoves(self):
+        """
+        Cancelling a delayed call removes it from the store immediately.
+        """
+        calls = [self.reactor.callLater(i, lambda: None)
+                 for i in range(1, 5000, 10)]
+        self.reactor.runUntilCurrent()
+        self.assertEqual(len(self.store), len(calls))
+        for call in calls:
+            call.cancel()
+        self.assertEqual(len(self.store), 0)
+        self.assertIdentical(self.reactor.timeout(), None)
+
+
+    def test_cancelBeforeInsertion(self):
+        """
+        A delayed call cancelled before the reactor has iterated does not
+        run.
+        """
+        called = []
+        self.reactor.callLater(1, called.append, 1).cancel()
+        self.reactor.advance(3)
+        self.assertEqual(called, [])
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+
+    def test_cancelDuringIteration(self):
+        """
+        A delayed call cancelled by another delayed call which runs in the
+        same iteration does not run.
+        """
+        called = []
+        second = []
+        self.reactor.callLater(1, lambda: second[0].cancel())
+        second.append(self.reactor.callLater(2, called.append, 2))
+        self.reactor.advance(3)
+        self.assertEqual(called, [])
+
+
+    def test_resetSooner(self):
+        """
+        A delayed call which is reset to an earlier time runs at that time.
+        """
+        called = []
+        call = self.reactor.callLater(100, called.append, 1)
+        self.reactor.runUntilCurrent()
+        call.reset(2)
+        self.reactor.advance(2 + self.precision)
+        self.assertEqual(called, [1])
+
+
+    def test_resetLater(self):
+        """
+        A delayed call which is reset to a later time does not run at its
+        original time.
+        """
+        called = []
+        call = self.reactor.callLater(2, called.append, 1)
+        self.reactor.runUntilCurrent()
+        self.reactor.advance(1)
+        call.reset(2)
+        self.reactor.advance(1 + self.precision)
+        self.assertEqual(called, [])
+        self.reactor.advance(1)
+        self.assertEqual(called, [1])
+
+
+    def test_resetDuringIteration(self):
+        """
+        A delayed call which is reset by another delayed call running in the
+        same iteration runs at its new time.
+        """
+        called = []
+        second = []
+        self.reactor.callLater(1, lambda: second[0].reset(10))
+        second.append(self.reactor.callLater(2, called.append, 2))
+        self.reactor.advance(3)
+        self.assertEqual(called, [])
+        self.reactor.advance(10)
+        self.assertEqual(called, [2])
+
+
+    def test_distantCall(self):
+        """
+        A delayed call scheduled far in the future is kept, and does not
+        prevent earlier calls from running.
+        """
+        called = []
+        distant = self.reactor.callLater(2 ** 128 + 1, called.append, 0)
+        self.reactor.callLater(1, called.append, 1)
+        self.reactor.advance(2)
+        self.assertEqual(called, [1])
+        self.assertEqual(self.reactor.getDelayedCalls(), [distant])
+
+
+    def test_manyCalls(self):
+        """
+        Many delayed calls spread over a long period of time all run, in
+        order, and only once they are due.
+        """
+        called = []
+        delays = [(i * 7919) % 100000 / 10.0 for i in range(2000)]
+        for delay in delays:
+            self.reactor.callLater(delay, called.append, delay)
+        expected = sorted(delays)
+        elapsed = 0
+        while elapsed < 10001:
+            self.reactor.advance(37.5)
+            elapsed += 37.5
+            self.assertEqual(called, expected[:len(called)])
+            self.assertTrue(not called or called[-1] <= elapsed)
+            if len(called) < len(expected):
+                self.assertTrue(
+                    expected[len(called)] > elapsed - self.precision)
+        self.assertEqual(called, expected)
+
+
+    def test_installTimerStore(self):
+        """
+        L{ReactorBase.installTimerStore} returns the previously installed
+        store, and moves the pending delayed calls to the new store.
+        """
+        called = []
+        self.reactor.callLater(1, called.append, 1)
+        self.reactor.runUntilCurrent()
+        newStore = HeapTimerStore()
+        self.assertIdentical(
+            self.reactor.installTimerStore(newStore), self.store)
+        self.assertEqual(len(newStore), 1)
+        self.reactor.advance(2)
+        self.assertEqual(called, [1])
+
+
+
+class HeapTimerStoreTests(TimerStoreTestsMixin, TestCase):
+    """
+    Tests for L{HeapTimerStore}.
+    """
+    precision = 0
+
+    def createStore(self):
+        return HeapTimerStore()
+
+
+    def test_heapOrder(self):
+        """
+        After any sequence of insertions, cancellations and reschedulings,
+        every call in the heap is scheduled no earlier than its parent and
+        knows its own position.
+        """
+        calls = [self.reactor.callLater(1 + (i * 37) % 101, lambda: None)
+                 for i in range(300)]
+        self.reactor.runUntilCurrent()
+        for i, call in enumerate(calls):
+            if i % 3 == 0:
+                call.cancel()
+            elif i % 3 == 1:
+                call.reset((i * 13) % 50)
+        self.reactor.advance(10)
+        heap = self.store._heap
+        self.assertEqual(len(heap), len(self.reactor.getDelayedCalls()))
+        for index, call in enumerate(heap):
+            self.assertEqual(call._heapIndex, index)
+            if index:
+                self.assertTrue(heap[(index - 1) // 2].time <= call.time)
+
+
+    def test_default(self):
+        """
+        L{ReactorBase} uses a L{HeapTimerStore} by default.
+        """
+        reactor = TimerStoreReactor()
+        self.assertTrue(verifyObject(IReactorPluggableTimerStore, reactor))
+        self.assertIsInstance(
+            reactor.installTimerStore(HeapTimerStore()), HeapTimerStore)
+
+
+
+class TimingWheelTimerStoreTests(TimerStoreTestsMixin, TestCase):
+    """
+    Tests for L{TimingWheelTimerStore}.
+    """
+    precision = 0.25
+
+    def createStore(self):
+        return TimingWheelTimerStore(resolution=self.precision)
+
+
+    def test_timeoutAfterCancel(self):
+        """
+        Cancelling the earliest delayed call makes L{ReactorBase.timeout}
+        reflect the next earliest one, even if it is filed in an outer wheel.
+        """
+        first = self.reactor.callLater(1, lambda: None)
+        self.reactor.callLater(1000, lambda: None)
+        self.reactor.runUntilCurrent()
+        first.cancel()
+        timeout = self.reactor.timeout()
+        self.assertTrue(1000 <= timeout <= 1000 + self.precision, timeout)
+
+
+    def test_resolution(self):
+        """
+        Delayed calls scheduled within the same tick run together, at the end
+        of that tick.
+        """
+        called = []
+        self.reactor.now = 1000.0
+        self.reactor.callLater(0.05, called.append, 1)
+        self.reactor.callLater(0.1, called.append, 2)
+        self.reactor.runUntilCurrent()
+        self.assertEqual(self.reactor.timeout(), 0.25)
+        self.reactor.advance(0.2)
+        self.assertEqual(called, [])
+        self.reactor.advance(0.05)
+        self.assertEqual(called, [1, 2])
+
+
+    def test_inexactResolution(self):
+        """
+        A delayed call runs once the time reported by L{ReactorBase.timeout}
+        has passed, even if the resolution cannot be represented exactly.
+        """
+        self.store = TimingWheelTimerStore(resolution=0.01)
+        self.reactor.installTimerStore(self.store)
+        called = []
+        self.reactor.now = 0
+        self.reactor.callLater(0.29, called.append, 1)
+        self.reactor.runUntilCurrent()
+        self.reactor.advance(self.reactor.timeout())
+        self.assertEqual(called, [1])
+        self.assertIsNone(self.reactor.timeout())
@@ -1453,6 +1453,82 @@ class TCP6EndpointsTests(EndpointTestCaseMixin, unittest.TestCase):
 
 
 
+class TCPReusePortTests(unittest.TestCase):
+    """
+    Tests for TCP server endpoints created with C{reusePort=True}.
+    """
+    if getattr(socket, "SO_REUSEPORT", None) is None:
+        skip = "SO_REUSEPORT is not supported on this platform"
+
+    def listen(self, port, endpointType=endpoints.TCP4ServerEndpoint,
+               interface="127.0.0.1"):
+        """
+        Listen on C{port} with C{SO_REUSEPORT} set, stopping again when the
+        test is over.
+
+        @return: A L{Deferred} which fires with the listening port.
+        """
+        endpoint = endpointType(
+            reactor, port, interface=interface, reusePort=True)
+        d = endpoint.listen(Factory.forProtocol(Protocol))
+        def listened(listeningPort):
+            self.addCleanup(listeningPort.stopListening)
+            return listeningPort
+        return d.addCallback(listened)
+
+
+    def test_sharePort(self):
+        """
+        Several endpoints created with C{reusePort=True} may listen on the same
+        port at the same time.
+        """
+        d = self.listen(0)
+        def listenAgain(first):
+            port = first.getHost().port
+            d = self.listen(port)
+            d.addCallback(
+                lambda second: self.assertEqual(second.getHost().port, port))
+            return d
+        return d.addCallback(listenAgain)
+
+
+    def test_sharePortIPv6(self):
+        """
+        L{endpoints.TCP6ServerEndpoint} also accepts C{reusePort=True}.
+        """
+        if not socket.has_ipv6:
+            raise unittest.SkipTest("IPv6 is not available")
+        d = self.listen(0, endpoints.TCP6ServerEndpoint, "::1")
+        def listenAgain(first):
+            self.assertIsInstance(first.getHost(), IPv6Address)
+            return self.listen(first.getHost().port,
+                               endpoints.TCP6ServerEndpoint, "::1")
+        return d.addCallback(listenAgain)
+
+
+    def test_cannotListen(self):
+        """
+        If the socket cannot be bound, the L{Deferred} returned by C{listen}
+        fails with L{error.CannotListenError}.
+        """
+        endpoint = endpoints.TCP4ServerEndpoint(
+            reactor, 0, interface="256.0.0.0", reusePort=True)
+        d = endpoint.listen(Factory.forProtocol(Protocol))
+        return self.assertFailure(d, error.CannotListenError)
+
+
+    def test_unsupported(self):
+        """
+        Creating an endpoint with C{reusePort=True} raises L{ValueError} on
+        platforms without C{SO_REUSEPORT}.
+        """
+        self.patch(socket, "SO_REUSEPORT", None)
+        self.assertRaises(
+            ValueError, endpoints.TCP4ServerEndpoint, reactor, 0,
+            reusePort=True)
+
+
+
 class TCP6EndpointNameResolutionTests(ClientEndpointTestCaseMixin,
                                       unittest.TestCase):
     """
@@ -2490,6 +2566,22 @@ class ServerStringTests(unittest.TestCase):
         self.assertEqual(server._port, 1234)
         self.assertEqual(server._backlog, 12)
         self.assertEqual(server._interface, "10.0.0.1")
+        self.assertFalse(server._reusePort)
+
+
+    def test_tcpReusePort(self):
+        """
+        When passed a TCP strports description with C{reusePort=1},
+        L{endpoints.serverFromString} returns a L{TCP4ServerEndpoint} which
+        listens with C{SO_REUSEPORT} set.
+        """
+        if getattr(socket, "SO_REUSEPORT", None) is None:
+            raise unittest.SkipTest(
+                "SO_REUSEPORT is not supported on this platform")
+        server = endpoints.serverFromString(object(), "tcp:1234:reusePort=1")
+        self.assertIsInstance(server, endpoints.TCP4ServerEndpoint)
+        self.assertEqual(server._port, 1234)
+        self.assertTrue(server._reusePort)
 
 
     def test_ssl(self):
@@ -3274,6 +3366,20 @@ class TCP6ServerEndpointPluginTests(unittest.TestCase):
         self.assertEqual(ep._port, 8080)
         self.assertEqual(ep._backlog, 12)
         self.assertEqual(ep._interface, '::1')
+        self.assertFalse(ep._reusePort)
+
+
+    def test_stringDescriptionReusePort(self):
+        """
+        L{serverFromString} passes C{reusePort=1} in a 'tcp6' endpoint string
+        description on to the L{TCP6ServerEndpoint}.
+        """
+        if getattr(socket, "SO_REUSEPORT", None) is None:
+            raise unittest.SkipTest(
+                "SO_REUSEPORT is not supported on this platform")
+        ep = endpoints.serverFromString(
+            MemoryReactor(), "tcp6:8080:reusePort=1")
+        self.assertTrue(ep._reusePort)
 
 
 
@@ -9,8 +9,11 @@ from __future__ import division, absolute_import
 
 from zope.interface.verify import verifyClass
 
-from twisted.internet.abstract import FileDescriptor
+from twisted.internet import main
+from twisted.internet.abstract import FileDescriptor, _FileRegion
+from twisted.internet.error import ConnectionDone
 from twisted.internet.interfaces import IPushProducer
+from twisted.python.failure import Failure
 from twisted.trial.unittest import SynchronousTestCase
 
 
@@ -33,6 +36,10 @@ class MemoryFile(FileDescriptor):
         self._freeSpace = 0
 
 
+    def stopReading(self):
+        pass
+
+
     def startWriting(self):
         pass
 
@@ -97,3 +104,239 @@ class WriteDescriptorTests(SynchronousTestCase):
         descriptor = MemoryFile()
         descriptor.write(b"hello, world")
         self.assertIs(None, descriptor.doWrite())
+
+
+
+class VectoredMemoryFile(MemoryFile):
+    """
+    A L{MemoryFile} which accepts writes as lists of chunks through
+    C{_writeSomeVectors}.
+
+    @ivar _vectors: A C{list} of the C{list}s of chunks passed to
+        C{_writeSomeVectors}, each converted to C{bytes}.
+    """
+    _vectoredWrites = True
+
+    def __init__(self):
+        MemoryFile.__init__(self)
+        self._vectors = []
+
+
+    def _writeSomeVectors(self, vectors):
+        """
+        Record C{vectors} and accept at most C{self._freeSpace} bytes of them.
+
+        @return: A C{int} indicating how many bytes were accepted.
+        """
+        self._vectors.append(
+            [memoryview(vector).tobytes() for vector in vectors])
+        return self.writeSomeData(b"".join(self._vectors[-1]))
+
+
+
+class FileRegionMemoryFile(VectoredMemoryFile):
+    """
+    A L{VectoredMemoryFile} which also writes L{_FileRegion}s, reading the
+    contents of their files from memory.
+
+    @ivar _files: A C{dict} mapping file descriptors to the C{bytes} of the
+        files they refer to.
+    """
+
+    def __init__(self):
+        VectoredMemoryFile.__init__(self)
+        self._files = {}
+
+
+    def _writeSomeFile(self, fileno, offset, count):
+        """
+        Accept at most C{self._freeSpace} bytes of the given part of a file.
+
+        @return: A C{int} indicating how many bytes were accepted, or an
+            L{EOFError} if the file ends before C{offset}.
+        """
+        data = self._files[fileno][offset:offset + count]
+        if not data:
+            return EOFError()
+        return self.writeSomeData(data)
+
+
+
+class VectoredWriteTests(SynchronousTestCase):
+    """
+    Tests for L{FileDescriptor.doWrite} when C{_vectoredWrites} is set.
+    """
+    def test_writeSequenceNotJoined(self):
+        """
+        Chunks passed to L{FileDescriptor.writeSequence} and
+        L{FileDescriptor.write} are passed to C{_writeSomeVectors} in a single
+        call without being copied.
+        """
+        descriptor = VectoredMemoryFile()
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"hello", b", "])
+        descriptor.write(b"world")
+        descriptor.doWrite()
+        self.assertEqual(descriptor._vectors, [[b"hello", b", ", b"world"]])
+        self.assertEqual(descriptor._written, [b"hello, world"])
+        self.assertEqual(descriptor.bytesCopied, 0)
+        self.assertEqual(descriptor.writeCalls, 1)
+        self.assertEqual(len(descriptor._tempDataBuffer), 0)
+        self.assertEqual(descriptor._tempDataLen, 0)
+
+
+    def test_partialWrite(self):
+        """
+        When only part of the queued data is written, the next call to
+        C{_writeSomeVectors} starts where the previous one stopped.
+        """
+        descriptor = VectoredMemoryFile()
+        descriptor.writeSequence([b"abc", b"def", b"ghi"])
+        descriptor._freeSpace = 4
+        descriptor.doWrite()
+        descriptor._freeSpace = 100
+        descriptor.doWrite()
+        self.assertEqual(
+            descriptor._vectors,
+            [[b"abc", b"def", b"ghi"], [b"ef", b"ghi"]])
+        self.assertEqual(b"".join(descriptor._written), b"abcdefghi")
+        self.assertEqual(descriptor.bytesCopied, 0)
+        self.assertEqual(descriptor.offset, 0)
+
+
+    def test_sendLimit(self):
+        """
+        No more than C{SEND_LIMIT} bytes are passed to C{_writeSomeVectors}
+        at once.
+        """
+        descriptor = VectoredMemoryFile()
+        descriptor.SEND_LIMIT = 5
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"abc", b"def", b"ghi"])
+        descriptor.doWrite()
+        self.assertEqual(descriptor._vectors, [[b"abc", b"de"]])
+        descriptor.doWrite()
+        self.assertEqual(descriptor._vectors[1], [b"f", b"ghi"])
+
+
+    def test_mutableDataCopied(self):
+        """
+        Data which is not C{bytes} is copied when it is written, so changing
+        it afterwards does not change what is sent.
+        """
+        descriptor = VectoredMemoryFile()
+        descriptor._freeSpace = 100
+        data = bytearray(b"abc")
+        descriptor.write(data)
+        data[:] = b"xyz"
+        descriptor.doWrite()
+        self.assertEqual(descriptor._written, [b"abc"])
+        self.assertEqual(descriptor.bytesCopied, 3)
+
+
+    def test_joinedWritesCopied(self):
+        """
+        Without C{_vectoredWrites}, the bytes joined together before being
+        written are counted in C{bytesCopied}.
+        """
+        descriptor = MemoryFile()
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"hello", b", ", b"world"])
+        descriptor.doWrite()
+        self.assertEqual(descriptor._written, [b"hello, world"])
+        self.assertEqual(descriptor.bytesCopied, 12)
+        self.assertEqual(descriptor.writeCalls, 1)
+
+
+
+class FileRegionTests(SynchronousTestCase):
+    """
+    Tests for L{FileDescriptor._writeFileRegion}.
+    """
+    def setUp(self):
+        self.descriptor = FileRegionMemoryFile()
+        self.descriptor._files[7] = b"0123456789"
+
+
+    def test_writtenInOrder(self):
+        """
+        A L{_FileRegion} is written after the data written before it and
+        before the data written after it, and its L{Deferred} fires once all
+        of it has been written.
+        """
+        descriptor = self.descriptor
+        descriptor.write(b"head")
+        d = descriptor._writeFileRegion(_FileRegion(7, 2, 5))
+        descriptor.write(b"tail")
+        descriptor._freeSpace = 100
+        descriptor.doWrite()
+        self.assertNoResult(d)
+        descriptor.doWrite()
+        self.assertIs(self.successResultOf(d), None)
+        descriptor.doWrite()
+        self.assertEqual(b"".join(descriptor._written), b"head23456tail")
+        self.assertEqual(descriptor._tempDataLen, 0)
+
+
+    def test_partialWrite(self):
+        """
+        When only part of a L{_FileRegion} is written, the rest of it is
+        written by the next call to L{FileDescriptor.doWrite}.
+        """
+        descriptor = self.descriptor
+        d = descriptor._writeFileRegion(_FileRegion(7, 2, 5))
+        descriptor._freeSpace = 3
+        descriptor.doWrite()
+        self.assertNoResult(d)
+        descriptor._freeSpace = 100
+        descriptor.doWrite()
+        self.assertIs(self.successResultOf(d), None)
+        self.assertEqual(descriptor._written, [b"234", b"56"])
+        self.assertEqual(descriptor.offset, 0)
+
+
+    def test_empty(self):
+        """
+        The L{Deferred} of an empty L{_FileRegion} fires immediately.
+        """
+        d = self.descriptor._writeFileRegion(_FileRegion(7, 0, 0))
+        self.assertIs(self.successResultOf(d), None)
+        self.assertEqual(len(self.descriptor._tempDataBuffer), 0)
+
+
+    def test_notConnected(self):
+        """
+        The L{Deferred} of a L{_FileRegion} written to a disconnected
+        L{FileDescriptor} fails.
+        """
+        self.descriptor.connected = False
+        d = self.descriptor._writeFileRegion(_FileRegion(7, 0, 5))
+        self.failureResultOf(d)
+
+
+    def test_fileTruncated(self):
+        """
+        If the file of a L{_FileRegion} ends before all of the region has
+        been written, the region's L{Deferred} fails with L{EOFError} and
+        L{FileDescriptor.doWrite} reports that the connection was lost.
+        """
+        descriptor = self.descriptor
+        d = descriptor._writeFileRegion(_FileRegion(7, 2, 5))
+        descriptor._freeSpace = 3
+        descriptor.doWrite()
+        descriptor._files[7] = b"01234"
+        descriptor._freeSpace = 100
+        self.assertEqual(descriptor.doWrite(), main.CONNECTION_LOST)
+        self.failureResultOf(d, EOFError)
+        descriptor.connectionLost(Failure(main.CONNECTION_LOST))
+
+
+    def test_connectionLost(self):
+        """
+        The L{Deferred} of a L{_FileRegion} which has not been completely
+        written when the connection is lost fails with the reason the
+        connection was lost.
+        """
+        d = self.descriptor._writeFileRegion(_FileRegion(7, 0, 5))
+        self.descriptor.connectionLost(Failure(ConnectionDone()))
+        self.failureResultOf(d, ConnectionDone)
@@ -36,14 +36,16 @@ from twisted.internet.test.reactormixins import (
 from twisted.internet.interfaces import (
     ILoggingContext, IConnector, IReactorFDSet, IReactorSocket, IReactorTCP,
     IResolverSimple, ITLSTransport)
+from twisted.internet import main
 from twisted.internet.address import IPv4Address, IPv6Address
 from twisted.internet.defer import (
     Deferred, DeferredList, maybeDeferred, gatherResults, succeed, fail)
 from twisted.internet.endpoints import TCP4ServerEndpoint, TCP4ClientEndpoint
 from twisted.internet.protocol import ServerFactory, ClientFactory, Protocol
 from twisted.internet.interfaces import (
-    IPushProducer, IPullProducer, IHalfCloseableProtocol)
-from twisted.internet.tcp import Connection, Server, _resolveIPv6
+    IBufferProtocol, IPushProducer, IPullProducer, IHalfCloseableProtocol)
+from twisted.internet.tcp import (
+    Connection, Port, Server, _resolveIPv6, _sendfile)
 from twisted.internet.test.test_core import ObjectModelIntegrationMixin
 from twisted.test.test_tcp import MyClientFactory, MyServerFactory
 from twisted.test.test_tcp import ClosingFactory, ClientStartStopFactory
@@ -379,6 +381,285 @@ class TCPConnectionTests(TestCase):
         test_tlsAfterStartTLS.skip = "No SSL support available"
 
 
+    def test_noVectoredWritesWithoutSendmsg(self):
+        """
+        A L{Connection} whose socket has no C{sendmsg} method joins its
+        buffered data and writes it with C{send}.
+        """
+        skt = FakeSocket(b"")
+        conn = Connection(skt, FakeProtocol(), reactor=_FakeFDSetReactor())
+        conn.connected = True
+        self.assertFalse(conn._vectoredWrites)
+        conn.writeSequence([b"foo", b"bar"])
+        conn.doWrite()
+        self.assertEqual([bytes(data) for data in skt.sendBuffer], [b"foobar"])
+
+
+    def test_vectoredWrites(self):
+        """
+        A L{Connection} whose socket has a C{sendmsg} method writes all of its
+        buffered chunks with a single call to it, without joining them.
+        """
+        sent = []
+        skt = FakeSocket(b"")
+        def sendmsg(buffers):
+            sent.append(list(buffers))
+            return sum(len(b) for b in buffers)
+        skt.sendmsg = sendmsg
+        conn = Connection(skt, FakeProtocol(), reactor=_FakeFDSetReactor())
+        conn.connected = True
+        self.assertTrue(conn._vectoredWrites)
+        conn.writeSequence([b"foo", b"bar"])
+        conn.write(b"baz")
+        conn.doWrite()
+        self.assertEqual(sent, [[b"foo", b"bar", b"baz"]])
+        self.assertEqual(skt.sendBuffer, [])
+        self.assertEqual(conn.bytesCopied, 0)
+
+
+    def _readIntoSocket(self, data):
+        """
+        Make a L{FakeSocket} which also supports C{recv_into}.
+
+        @param data: The bytes each read returns.
+        """
+        skt = FakeSocket(data)
+        skt.readBuffers = []
+        def recv_into(buf, size):
+            skt.readBuffers.append(buf)
+            buf[:len(skt.data)] = skt.data
+            return len(skt.data)
+        skt.recv_into = recv_into
+        return skt
+
+
+    def test_readIntoBufferProtocol(self):
+        """
+        A L{Connection} whose socket has a C{recv_into} method reads into a
+        reused buffer and passes a view of the data read to the
+        C{bufferReceived} method of a protocol providing L{IBufferProtocol}.
+        """
+        received = []
+        @implementer(IBufferProtocol)
+        class BufferProtocol(Protocol):
+            def bufferReceived(self, data):
+                received.append(data)
+                self.copy = data.tobytes()
+
+        protocol = BufferProtocol()
+        skt = self._readIntoSocket(b"someData")
+        conn = Connection(skt, protocol)
+        self.assertTrue(conn._readInto)
+        self.assertIsNone(conn.doRead())
+        conn.doRead()
+        self.assertIsInstance(received[0], memoryview)
+        self.assertEqual(protocol.copy, b"someData")
+        self.assertIs(skt.readBuffers[0], skt.readBuffers[1])
+
+
+    def test_readIntoConnectionDone(self):
+        """
+        When C{recv_into} reads nothing, L{Connection.doRead} reports that the
+        connection is done without calling C{bufferReceived}.
+        """
+        received = []
+        @implementer(IBufferProtocol)
+        class BufferProtocol(Protocol):
+            def bufferReceived(self, data):
+                received.append(data)
+
+        conn = Connection(self._readIntoSocket(b""), BufferProtocol())
+        self.assertEqual(conn.doRead(), main.CONNECTION_DONE)
+        self.assertEqual(received, [])
+
+
+    def test_classicProtocolReceivesBytes(self):
+        """
+        A protocol which does not provide L{IBufferProtocol} is passed
+        C{bytes} from C{recv} even if the socket supports C{recv_into}.
+        """
+        received = []
+        protocol = Protocol()
+        protocol.dataReceived = received.append
+        conn = Connection(self._readIntoSocket(b"someData"), protocol)
+        conn.doRead()
+        self.assertEqual(received, [b"someData"])
+
+
+    def _sendFileConnection(self):
+        """
+        Make a connected L{Connection} over one end of a socket pair, and a
+        temporary file to send over it.
+
+        @return: A C{tuple} of the L{Connection}, the other end of the socket
+            pair and the file, opened for reading.
+        """
+        if _sendfile is None:
+            raise SkipTest("os.sendfile is not available")
+        ours, theirs = socket.socketpair()
+        self.addCleanup(ours.close)
+        self.addCleanup(theirs.close)
+        conn = Connection(ours, FakeProtocol(), reactor=_FakeFDSetReactor())
+        conn.connected = True
+        path = self.mktemp()
+        with open(path, "wb") as f:
+            f.write(b"0123456789")
+        fileObject = open(path, "rb")
+        self.addCleanup(fileObject.close)
+        return conn, theirs, fileObject
+
+
+    def test_sendFile(self):
+        """
+        L{Connection._sendFile} writes part of a file to the socket in order
+        with the data written around it, and the L{Deferred} it returns fires
+        once the file has been sent.
+        """
+        conn, theirs, fileObject = self._sendFileConnection()
+        conn.write(b"head")
+        d = conn._sendFile(fileObject, 2, 5)
+        conn.write(b"tail")
+        self.assertNoResult(d)
+        while conn._tempDataBuffer:
+            conn.doWrite()
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(theirs.recv(100), b"head23456tail")
+
+
+    def test_sendFileConnectionLost(self):
+        """
+        The L{Deferred} returned by L{Connection._sendFile} fails if the
+        connection is lost before the file has been sent.
+        """
+        conn, theirs, fileObject = self._sendFileConnection()
+        d = conn._sendFile(fileObject, 0, 10)
+        conn.connectionLost(Failure(main.CONNECTION_LOST))
+        self.failureResultOf(d, ConnectionLost)
+
+
+    def test_sendFileTruncated(self):
+        """
+        If the file is truncated after part of it has been queued by
+        L{Connection._sendFile}, the L{Deferred} returned fails with
+        L{EOFError} once the end of the file is reached, and
+        L{Connection.doWrite} reports that the connection was lost rather
+        than trying to write the rest of it again.
+        """
+        conn, theirs, fileObject = self._sendFileConnection()
+        d = conn._sendFile(fileObject, 2, 5)
+        with open(fileObject.name, "r+b") as f:
+            f.truncate(4)
+        self.assertIsNone(conn.doWrite())
+        self.assertEqual(conn.doWrite(), main.CONNECTION_LOST)
+        self.failureResultOf(d, EOFError)
+        self.assertEqual(theirs.recv(100), b"23")
+
+
+    def test_noSendFileWithoutVectoredWrites(self):
+        """
+        A L{Connection} whose socket has no C{sendmsg} method does not write
+        files with C{sendfile}: L{Connection._sendFile} returns C{None}.
+        """
+        conn = Connection(FakeSocket(b""), FakeProtocol())
+        self.assertIsNone(conn._sendFile(object(), 0, 10))
+
+
+    def test_noSendFileAfterTLS(self):
+        """
+        Once TLS has been started on a L{Connection},
+        L{Connection._sendFile} returns C{None} and queues nothing, so that a
+        file is never written unencrypted.
+        """
+        conn, theirs, fileObject = self._sendFileConnection()
+        conn.TLS = True
+        self.assertIsNone(conn._sendFile(fileObject, 0, 10))
+        self.assertEqual(conn._tempDataLen, 0)
+        self.assertEqual(len(conn._tempDataBuffer), 0)
+
+
+
+class FakeListeningSocket(object):
+    """
+    A fake for a listening L{socket.socket} which accepts a fixed number of
+    connections and then reports that it would block.
+
+    @ivar pending: The number of connections left to accept.
+    @ivar accepted: The number of connections accepted so far.
+    """
+    def __init__(self, pending):
+        self.pending = pending
+        self.accepted = 0
+
+
+    def accept(self):
+        if not self.pending:
+            raise socket.error(errno.EWOULDBLOCK, "would block")
+        self.pending -= 1
+        self.accepted += 1
+        return socket.socket(), ("127.0.0.1", 1234)
+
+
+
+class PortAcceptTests(TestCase):
+    """
+    Tests for how many connections L{Port.doRead} accepts at a time.
+    """
+    if platform.getType() != "posix":
+        skip = "Only POSIX ports accept more than one connection at a time."
+
+    def portWithPending(self, pending):
+        """
+        Create a L{Port} whose socket has C{pending} connections waiting, for
+        which its factory refuses to build protocols.
+        """
+        factory = ServerFactory()
+        factory.buildProtocol = lambda addr: None
+        port = Port(0, factory)
+        port.socket = FakeListeningSocket(pending)
+        port.numberAccepts = 100
+        return port
+
+
+    def test_acceptsUpToNumberAccepts(self):
+        """
+        L{Port.doRead} accepts at most C{numberAccepts} connections, and
+        accepts more the next time if that many were waiting.
+        """
+        port = self.portWithPending(1000)
+        port.numberAccepts = 10
+        port.doRead()
+        self.assertEqual(port.socket.accepted, 10)
+        self.assertEqual(port.numberAccepts, 30)
+
+
+    def test_maxAccepts(self):
+        """
+        L{Port.numberAccepts} never grows beyond L{Port.maxAccepts}.
+        """
+        port = self.portWithPending(1000)
+        port.maxAccepts = 25
+        port.numberAccepts = 20
+        port.doRead()
+        self.assertEqual(port.numberAccepts, 25)
+        port.doRead()
+        self.assertEqual(port.socket.accepted, 45)
+        self.assertEqual(port.numberAccepts, 25)
+
+
+    def test_shrinksToAccepted(self):
+        """
+        When fewer connections are waiting than L{Port.doRead} tries to
+        accept, C{numberAccepts} shrinks to the number which were, but not
+        below one.
+        """
+        port = self.portWithPending(3)
+        port.doRead()
+        self.assertEqual(port.socket.accepted, 3)
+        self.assertEqual(port.numberAccepts, 3)
+        port.doRead()
+        self.assertEqual(port.numberAccepts, 1)
+
+
 
 class TCPCreator(EndpointCreator):
     """
@@ -152,6 +152,19 @@ class _SendmsgMixin(object):
             return result
 
 
+    def _writeSomeVectors(self, vectors):
+        """
+        Send as much of C{vectors} as possible.  If there are file descriptors
+        pending, the chunks are joined and sent with L{writeSomeData}, since
+        each file descriptor must be sent along with a byte of data.
+        """
+        if self._sendmsgQueue:
+            data = b"".join(vectors)
+            self.bytesCopied += len(data)
+            return self.writeSomeData(data)
+        return self._writeSomeDataBase._writeSomeVectors(self, vectors)
+
+
     def doRead(self):
         """
         Calls L{IFileDescriptorReceiver.fileDescriptorReceived} and
@@ -208,6 +221,9 @@ else:
 class Server(_SendmsgMixin, tcp.Server):
 
     _writeSomeDataBase = tcp.Server
+    # File descriptors queued with sendFileDescriptor must accompany the
+    # following data, which sendfile cannot arrange.
+    _sendFileSupported = False
 
     def __init__(self, sock, protocol, client, server, sessionno, reactor):
         _SendmsgMixin.__init__(self)
@@ -339,6 +355,7 @@ class Client(_SendmsgMixin, tcp.BaseClient):
     addressFamily = socket.AF_UNIX
     socketType = socket.SOCK_STREAM
     _writeSomeDataBase = tcp.BaseClient
+    _sendFileSupported = False
 
     def __init__(self, filename, connector, reactor=None, checkPID = 0):
         _SendmsgMixin.__init__(self)
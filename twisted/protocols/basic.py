@@ -516,6 +516,10 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
 
     This is useful for line-oriented protocols such as IRC, HTTP, POP, etc.
 
+    Subclasses which do not override L{dataReceived} may declare
+    L{interfaces.IBufferProtocol} to have TCP transports deliver data to
+    L{bufferReceived} without allocating a byte string for every read.
+
     @cvar delimiter: The line-ending delimiter to use. By default this is
                      C{b'\\r\\n'}.
     @cvar MAX_LENGTH: The maximum length of a line to allow (If a
@@ -582,6 +586,20 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
             self._busyReceiving = False
 
 
+    def bufferReceived(self, data):
+        """
+        Translate data read into a transport-owned buffer into lines.
+
+        The data is copied onto the end of the line buffer before this
+        returns, so nothing refers to the transport's buffer afterwards.
+
+        @see: L{interfaces.IBufferProtocol.bufferReceived}
+        """
+        if not _PY3:
+            data = data.tobytes()
+        LineReceiver.dataReceived(self, data)
+
+
     def setLineMode(self, extra=b''):
         """
         Sets the line-mode of this receiver.
@@ -682,6 +700,10 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
     """
     Generic class for length prefixed protocols.
 
+    Subclasses which do not override L{dataReceived} may declare
+    L{interfaces.IBufferProtocol} to have TCP transports deliver data to
+    L{bufferReceived} without allocating a byte string for every read.
+
     @ivar _unprocessed: bytes received, but not yet broken up into messages /
         sent to stringReceived.  _compatibilityOffset must be updated when this
         value is updated so that the C{recvd} attribute can be generated
@@ -782,6 +804,22 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
         self._compatibilityOffset = 0
 
 
+    def bufferReceived(self, data):
+        """
+        Convert int prefixed strings read into a transport-owned buffer into
+        calls to stringReceived.
+
+        The data is copied onto the end of the parse buffer before any
+        strings are parsed, so nothing refers to the transport's buffer
+        afterwards.
+
+        @see: L{interfaces.IBufferProtocol.bufferReceived}
+        """
+        if not _PY3:
+            data = data.tobytes()
+        IntNStringReceiver.dataReceived(self, data)
+
+
     def sendString(self, string):
         """
         Send a prefixed string to the other end of the connection.
@@ -674,15 +674,27 @@ class TimeoutMixin:
     default, closes the connection.
 
     @cvar timeOut: The number of seconds after which to timeout the connection.
+
+    @cvar timeoutGroup: A L{twisted.internet.task.TimeoutGroup} to schedule
+        the timeout with, or C{None} to schedule it directly with the reactor.
+        Sharing a group between many connections greatly reduces the number of
+        delayed calls the reactor has to keep track of, in exchange for
+        timeouts being less precise.
     """
     timeOut = None
+    timeoutGroup = None
 
     __timeoutCall = None
 
     def callLater(self, period, func):
         """
         Wrapper around L{reactor.callLater} for test purpose.
+
+        If C{timeoutGroup} is set,
+        L{twisted.internet.task.TimeoutGroup.callLater} is used instead.
         """
+        if self.timeoutGroup is not None:
+            return self.timeoutGroup.callLater(period, func)
         from twisted.internet import reactor
         return reactor.callLater(period, func)
 
@@ -193,6 +193,25 @@ a'''
             self.assertEqual(self.output, a.received)
 
 
+    def test_bufferReceived(self):
+        """
+        L{basic.LineReceiver.bufferReceived} parses lines out of views of a
+        buffer and copies what it keeps, so the buffer may be overwritten as
+        soon as it returns.
+        """
+        for packet_size in range(1, 10):
+            t = proto_helpers.StringIOWithoutClosing()
+            a = LineTester()
+            a.makeConnection(protocol.FileWrapper(t))
+            buf = bytearray(packet_size)
+            for i in range(len(self.buffer) // packet_size + 1):
+                s = self.buffer[i * packet_size:(i + 1) * packet_size]
+                buf[:len(s)] = s
+                a.bufferReceived(memoryview(buf)[:len(s)])
+                buf[:] = b"x" * packet_size
+            self.assertEqual(self.output, a.received)
+
+
     pauseBuf = b'twiddle1\ntwiddle2\npause\ntwiddle3\n'
 
     pauseOutput1 = [b'twiddle1', b'twiddle2', b'pause']
@@ -962,6 +981,30 @@ class RecvdAttributeMixin(object):
 
 
 
+class BufferReceivedMixin(object):
+    """
+    Mixin defining tests for L{IntNStringReceiver.bufferReceived}, to be
+    combined with L{IntNTestCaseMixin} on a L{TestCase} subclass.
+    """
+
+    def test_bufferReceived(self):
+        """
+        C{bufferReceived} parses strings out of views of a buffer and copies
+        what it keeps, so the buffer may be overwritten as soon as it returns.
+        """
+        r = self.getProtocol()
+        data = b"".join([struct.pack(r.structFormat, len(s)) + s
+                         for s in self.strings])
+        buf = bytearray(3)
+        for i in range(0, len(data), len(buf)):
+            chunk = data[i:i + len(buf)]
+            buf[:len(chunk)] = chunk
+            r.bufferReceived(memoryview(buf)[:len(chunk)])
+            buf[:] = b"xxx"
+        self.assertEqual(r.received, self.strings)
+
+
+
 class TestInt32(TestMixin, basic.Int32StringReceiver):
     """
     A L{basic.Int32StringReceiver} storing received strings in an array.
@@ -972,7 +1015,7 @@ class TestInt32(TestMixin, basic.Int32StringReceiver):
 
 
 class Int32Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
-                 RecvdAttributeMixin):
+                 RecvdAttributeMixin, BufferReceivedMixin):
     """
     Test case for int32-prefixed protocol
     """
@@ -1003,7 +1046,7 @@ class TestInt16(TestMixin, basic.Int16StringReceiver):
 
 
 class Int16Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
-                 RecvdAttributeMixin):
+                 RecvdAttributeMixin, BufferReceivedMixin):
     """
     Test case for int16-prefixed protocol
     """
@@ -1062,7 +1105,7 @@ class TestInt8(TestMixin, basic.Int8StringReceiver):
 
 
 class Int8Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
-                RecvdAttributeMixin):
+                RecvdAttributeMixin, BufferReceivedMixin):
     """
     Test case for int8-prefixed protocol
     """
@@ -142,6 +142,93 @@ class _Code(object):
         self.co_filename = filename
 
 
+
+def _frameVars(f):
+    """
+    Copy the locals and globals of a frame, for a L{Failure} capturing them.
+
+    @return: The items of the locals and of the globals, excluding
+        C{__builtins__}.
+    """
+    localz = f.f_locals.copy()
+    if f.f_locals is f.f_globals:
+        globalz = {}
+    else:
+        globalz = f.f_globals.copy()
+    for d in globalz, localz:
+        if "__builtins__" in d:
+            del d["__builtins__"]
+    return list(localz.items()), list(globalz.items())
+
+
+
+def _captureFrames(f, tb, captureVars):
+    """
+    Describe the frames of a stack and a traceback, as kept by L{Failure}.
+
+    @param f: The innermost frame of the stack, or C{None}.
+
+    @param tb: The traceback, or C{None}.
+
+    @param captureVars: Whether to capture the locals and globals of each
+        frame.
+
+    @return: The stack, innermost last, and the frames of the traceback,
+        innermost first, each a list of (funcName, fileName, lineNumber,
+        localsItems, globalsItems) tuples.
+    """
+    # Keeps the *full* stack.  Formerly in spread.pb.print_excFullStack:
+    #
+    #   The need for this function arises from the fact that several
+    #   PB classes have the peculiar habit of discarding exceptions
+    #   with bareword "except:"s.  This premature exception
+    #   catching means tracebacks generated here don't tend to show
+    #   what called upon the PB object.
+    stack = []
+    localz = globalz = ()
+    while f:
+        if captureVars:
+            localz, globalz = _frameVars(f)
+        stack.append((
+            f.f_code.co_name,
+            f.f_code.co_filename,
+            f.f_lineno,
+            localz,
+            globalz,
+            ))
+        f = f.f_back
+    stack.reverse()
+
+    frames = []
+    while tb is not None:
+        f = tb.tb_frame
+        if captureVars:
+            localz, globalz = _frameVars(f)
+        frames.append((
+            f.f_code.co_name,
+            f.f_code.co_filename,
+            tb.tb_lineno,
+            localz,
+            globalz,
+            ))
+        tb = tb.tb_next
+    return stack, frames
+
+
+
+def _parentsOf(exceptionType):
+    """
+    Get the names of an exception type and its bases, as kept by L{Failure}.
+
+    @return: The fully qualified names of C{exceptionType} and its bases, if
+        it is an L{Exception} subclass, otherwise a list of C{exceptionType}.
+    @rtype: L{list}
+    """
+    if inspect.isclass(exceptionType) and issubclass(exceptionType, Exception):
+        return list(map(reflect.qual, getmro(exceptionType)))
+    return [exceptionType]
+
+
 class Failure:
     """
     A basic abstraction for an error that has occurred.
@@ -159,10 +246,26 @@ class Failure:
     @ivar type: The exception's class.
     @ivar stack: list of frames, innermost last, excluding C{Failure.__init__}.
     @ivar frames: list of frames, innermost first.
+
+    @cvar lazyFrames: If set, failures which don't capture locals and globals
+        keep only the traceback and the frame they were created in, and
+        compute C{stack}, C{frames} and C{parents} when those are first
+        used.  Failures which are trapped and discarded, as most expected
+        errors passing through L{Deferred<twisted.internet.defer.Deferred>}s
+        are, then never pay for describing every frame.  The line numbers in
+        C{stack} are those of the frames when it is computed, which is
+        usually the same as when the failure was created, since the frames
+        are still waiting for their calls to return.  L{cleanFailure},
+        pickling and formatting a traceback all compute them.
+    @type lazyFrames: L{bool}
+
+    @ivar _pendingFrames: For a failure created with C{lazyFrames} whose
+        C{stack} and C{frames} have not been used yet, the innermost frame of
+        the stack and the traceback to compute them from.
     """
 
     pickled = 0
-    stack = None
+    lazyFrames = False
 
     # The opcode of "yield" in Python bytecode. We need this in _findFailure in
     # order to identify whether an exception was thrown by a
@@ -231,9 +334,6 @@ class Failure:
             elif _PY3:
                 tb = self.value.__traceback__
 
-        frames = self.frames = []
-        stack = self.stack = []
-
         # added 2003-06-23 by Chris Armstrong. Yes, I actually have a
         # use case where I need this traceback object, and I've made
         # sure that it'll be cleaned up.
@@ -253,65 +353,43 @@ class Failure:
             f = f.f_back
             stackOffset -= 1
 
-        # Keeps the *full* stack.  Formerly in spread.pb.print_excFullStack:
-        #
-        #   The need for this function arises from the fact that several
-        #   PB classes have the peculiar habit of discarding exceptions
-        #   with bareword "except:"s.  This premature exception
-        #   catching means tracebacks generated here don't tend to show
-        #   what called upon the PB object.
-
-        while f:
-            if captureVars:
-                localz = f.f_locals.copy()
-                if f.f_locals is f.f_globals:
-                    globalz = {}
-                else:
-                    globalz = f.f_globals.copy()
-                for d in globalz, localz:
-                    if "__builtins__" in d:
-                        del d["__builtins__"]
-                localz = localz.items()
-                globalz = globalz.items()
-            else:
-                localz = globalz = ()
-            stack.insert(0, (
-                f.f_code.co_name,
-                f.f_code.co_filename,
-                f.f_lineno,
-                localz,
-                globalz,
-                ))
-            f = f.f_back
+        if self.lazyFrames and not captureVars:
+            self._pendingFrames = (f, tb)
+            return
 
-        while tb is not None:
-            f = tb.tb_frame
-            if captureVars:
-                localz = f.f_locals.copy()
-                if f.f_locals is f.f_globals:
-                    globalz = {}
-                else:
-                    globalz = f.f_globals.copy()
-                for d in globalz, localz:
-                    if "__builtins__" in d:
-                        del d["__builtins__"]
-                localz = list(localz.items())
-                globalz = list(globalz.items())
-            else:
-                localz = globalz = ()
-            frames.append((
-                f.f_code.co_name,
-                f.f_code.co_filename,
-                tb.tb_lineno,
-                localz,
-                globalz,
-                ))
-            tb = tb.tb_next
-        if inspect.isclass(self.type) and issubclass(self.type, Exception):
-            parentCs = getmro(self.type)
-            self.parents = list(map(reflect.qual, parentCs))
-        else:
-            self.parents = [self.type]
+        self.stack, self.frames = _captureFrames(f, tb, captureVars)
+        self.parents = _parentsOf(self.type)
+
+
+    def __getattr__(self, name):
+        """
+        Compute C{stack}, C{frames} and C{parents} for a failure created with
+        C{lazyFrames} when they are first used.
+        """
+        if '_pendingFrames' in self.__dict__:
+            if name == 'parents':
+                self.parents = _parentsOf(self.type)
+                return self.parents
+            if name in ('stack', 'frames'):
+                self._computeFrames()
+                return self.__dict__[name]
+        elif name == 'stack':
+            # Failures which were not created by __init__ may have no stack.
+            return None
+        raise AttributeError(name)
+
+
+    def _computeFrames(self):
+        """
+        Compute C{stack}, C{frames} and C{parents} for a failure created with
+        C{lazyFrames}, if they have not been computed yet.
+        """
+        pending = self.__dict__.pop('_pendingFrames', None)
+        if pending is not None:
+            if 'parents' not in self.__dict__:
+                self.parents = _parentsOf(self.type)
+            self.stack, self.frames = _captureFrames(pending[0], pending[1],
+                                                     False)
 
     def trap(self, *errorTypes):
         """Trap this failure if its type is in a predetermined list.
@@ -460,6 +538,7 @@ class Failure:
         """
         if self.pickled:
             return self.__dict__
+        self._computeFrames()
         c = self.__dict__.copy()
 
         c['frames'] = [
@@ -33,6 +33,14 @@ class ThreadPool:
     @ivar threads: List of workers currently running in this thread pool.
     @type threads: L{list}
 
+    @ivar idleTimeout: If not C{None}, the number of seconds after which idle
+        threads beyond L{ThreadPool.min} are stopped.  Threads are started
+        when there is work for them and no idle thread to do it, up to
+        L{ThreadPool.max}; with this set, they are stopped again once the work
+        has gone away.  Idle threads are checked for whenever work is given to
+        the pool.
+    @type idleTimeout: L{float} or L{None}
+
     @ivar _pool: A hook for testing.
     @type _pool: callable compatible with L{_pool}
     """
@@ -42,6 +50,7 @@ class ThreadPool:
     started = False
     workers = 0
     name = None
+    idleTimeout = None
 
     threadFactory = threading.Thread
     currentThread = staticmethod(threading.currentThread)
@@ -69,6 +78,9 @@ class ThreadPool:
 
         def trackingThreadFactory(*a, **kw):
             thread = self.threadFactory(*a, name=self._generateName(), **kw)
+            if self.idleTimeout is not None:
+                # Threads come and go, so forget the ones which have gone.
+                self.threads = [t for t in self.threads if t.is_alive()]
             self.threads.append(thread)
             return thread
 
@@ -143,6 +155,39 @@ class ThreadPool:
                                 # attribute name.
 
 
+    def statistics(self):
+        """
+        Gather information on the current activity of this L{ThreadPool}: how
+        many threads are busy and idle, how much work is waiting for a thread
+        at each priority and for how long, and how long work has waited for
+        a thread so far.
+
+        @return: The statistics of the L{twisted._threads.Team} behind this
+            L{ThreadPool}.
+        @rtype: L{twisted._threads.Statistics}
+        """
+        return self._team.statistics()
+
+
+    def lane(self, priority):
+        """
+        Get an object for giving work to this L{ThreadPool} with the given
+        priority.  When all its threads are busy, work given with a higher
+        priority is started before work given with a lower one, so that, for
+        example, quick name lookups need not wait behind slow database
+        queries.  Work given to the L{ThreadPool} itself has a priority of
+        C{0}.
+
+        @param priority: The priority of work given to the returned object.
+        @type priority: L{int}
+
+        @return: An object with the C{callInThread} and
+            C{callInThreadWithCallback} methods of L{ThreadPool}, which may be
+            passed to L{twisted.internet.threads.deferToThreadPool}.
+        """
+        return _ThreadPoolLane(self, priority)
+
+
     def start(self):
         """
         Start the threadpool.
@@ -237,6 +282,20 @@ class ThreadPool:
 
         @param kw: keyword arguments to be passed to C{func}
         """
+        self._callInThreadWithCallback(0, onResult, func, args, kw)
+
+
+    def _callInThreadWithCallback(self, priority, onResult, func, args, kw):
+        """
+        Implement L{ThreadPool.callInThreadWithCallback} for work with the
+        given priority.
+
+        @param priority: see L{ThreadPool.lane}
+        @param onResult: see L{ThreadPool.callInThreadWithCallback}
+        @param func: see L{ThreadPool.callInThreadWithCallback}
+        @param args: the positional arguments to be passed to C{func}
+        @param kw: the keyword arguments to be passed to C{func}
+        """
         if self.joined:
             return
         ctx = context.theContextTracker.currentContext().contexts[-1]
@@ -262,7 +321,9 @@ class ThreadPool:
         inContext.theWork = lambda: context.call(ctx, func, *args, **kw)
         inContext.onResult = onResult
 
-        self._team.do(inContext)
+        self._team.do(inContext, priority)
+        if self.idleTimeout is not None:
+            self._team.trimIdle(self.idleTimeout, self.min)
 
 
     def stop(self):
@@ -315,3 +376,35 @@ class ThreadPool:
         log.msg('workers: %s' % (self.working,))
         log.msg('total: %s'   % (self.threads,))
 
+
+
+class _ThreadPoolLane(object):
+    """
+    Work given to a L{ThreadPool} with a particular priority; see
+    L{ThreadPool.lane}.
+
+    @ivar _threadpool: The L{ThreadPool} to give work to.
+
+    @ivar _priority: The priority to give it with.
+    @type _priority: L{int}
+    """
+
+    def __init__(self, threadpool, priority):
+        self._threadpool = threadpool
+        self._priority = priority
+
+
+    def callInThread(self, func, *args, **kw):
+        """
+        See L{ThreadPool.callInThread}.
+        """
+        self._threadpool._callInThreadWithCallback(
+            self._priority, None, func, args, kw)
+
+
+    def callInThreadWithCallback(self, onResult, func, *args, **kw):
+        """
+        See L{ThreadPool.callInThreadWithCallback}.
+        """
+        self._threadpool._callInThreadWithCallback(
+            self._priority, onResult, func, args, kw)
@@ -6,13 +6,16 @@ from __future__ import absolute_import, division, print_function
 
 import errno
 import os
+import signal
 import sys
+import time
 
 from twisted.python import log, logfile, usage
 from twisted.python.compat import intToBytes
 from twisted.python.util import (
     switchUID, uidFromString, gidFromString, untilConcludes)
 from twisted.application import app, service
+from twisted.internet import fdesc
 from twisted.internet.interfaces import IReactorDaemonize
 from twisted import copyright, logger
 from twisted.python.runtime import platformType
@@ -23,6 +26,16 @@ if platformType == "win32":
     raise ImportError("_twistd_unix doesn't work on Windows.")
 
 
+# Set in the environment of the processes started by twistd --workers, to the
+# index of each worker.
+_WORKER_ENVIRONMENT_VARIABLE = "TWISTD_WORKER"
+
+# Set in the environment of the processes started by twistd --workers, to the
+# file descriptor each worker reports its startup status on.
+_WORKER_STATUS_ENVIRONMENT_VARIABLE = "TWISTD_WORKER_STATUS"
+
+
+
 def _umask(value):
     return int(value, 8)
 
@@ -53,6 +66,11 @@ class ServerOptions(app.ServerOptions):
                      ['gid', 'g', None, "The gid to run as.", gidFromString],
                      ['umask', None, None,
                       "The (octal) file creation mask to apply.", _umask],
+                     ['workers', None, 1,
+                      "Run this many copies of the application, each in its "
+                      "own process with its own reactor.  Use "
+                      "tcp:PORT:reusePort=1 endpoints to have them share "
+                      "listening ports.", int],
                     ]
 
     compData = usage.Completions(
@@ -76,6 +94,47 @@ class ServerOptions(app.ServerOptions):
         app.ServerOptions.postOptions(self)
         if self['pidfile']:
             self['pidfile'] = os.path.abspath(self['pidfile'])
+        if self['workers'] < 1:
+            raise usage.UsageError("--workers must be at least 1")
+        if self['workers'] > 1:
+            if self['chroot'] is not None:
+                raise usage.UsageError(
+                    "--workers cannot be combined with --chroot")
+            if self['logfile'] == '-' and not (self['nodaemon'] or
+                                               self['debug']):
+                raise usage.UsageError("Daemons cannot log to stdout")
+        worker = os.environ.get(_WORKER_ENVIRONMENT_VARIABLE)
+        if worker is not None:
+            self._configureWorker(int(worker))
+
+
+    def _configureWorker(self, index):
+        """
+        Adjust the options of a process started by C{twistd --workers}.
+
+        The supervising process takes care of daemonizing and of the pidfile,
+        so workers do neither; instead they report whether the application
+        started on the status pipe they were given, as a daemonized twistd
+        would.  Each worker logs to its own file, named after the file the
+        supervisor would have logged to with the worker's index added (for
+        example C{twistd-1.log}).
+
+        @param index: The index of this worker, starting from 1.
+        @type index: C{int}
+        """
+        daemon = not (self['nodaemon'] or self['debug'])
+        if self['logfile'] is None and daemon and not self['syslog']:
+            self['logfile'] = 'twistd.log'
+        if self['logfile'] not in (None, '-'):
+            base, ext = os.path.splitext(self['logfile'])
+            self['logfile'] = '%s-%d%s' % (base, index, ext)
+        self['nodaemon'] = True
+        self['pidfile'] = ''
+        self['workers'] = 1
+        statusPipe = os.environ.get(_WORKER_STATUS_ENVIRONMENT_VARIABLE)
+        if statusPipe is not None:
+            self['statusPipe'] = int(statusPipe)
+            fdesc._setCloseOnExec(self['statusPipe'])
 
 
 def checkPID(pidfile):
@@ -186,6 +245,174 @@ class UnixApplicationRunner(app.ApplicationRunner):
     """
     loggerFactory = UnixAppLogger
 
+    # The number of seconds to wait before restarting a worker which exited
+    # unexpectedly.
+    workerRestartDelay = 1.0
+
+    def run(self):
+        """
+        Run the application, or if more than one worker was requested with
+        C{--workers}, supervise that many processes which each run it.
+        """
+        if self.config.get('workers', 1) > 1:
+            self.runWorkers()
+        else:
+            app.ApplicationRunner.run(self)
+
+
+    def runWorkers(self):
+        """
+        Start C{self.config['workers']} worker processes and supervise them
+        until they exit.
+
+        Each worker runs twistd again with the same arguments, so it loads the
+        application and runs a reactor of its own; nothing is forked from this
+        process after a reactor may have been created.  This process
+        daemonizes and writes the pidfile as twistd normally would, but only
+        reports that it has started once every worker has started its
+        application.  If any worker fails to start, the others are stopped and
+        the failure is reported instead.
+
+        Once started, C{SIGINT}, C{SIGTERM}, C{SIGHUP} and C{SIGUSR1} are
+        passed on to the workers.  A worker which exits with an error or is
+        killed by a signal is restarted after C{workerRestartDelay} seconds,
+        unless it was asked to stop with C{SIGINT} or C{SIGTERM}; a worker
+        which exits cleanly is not.  Since twistd does not handle C{SIGHUP},
+        it restarts the workers, while C{SIGUSR1} makes them reopen their log
+        files.  This process exits once all of the workers have.
+        """
+        pidfile = self.config['pidfile']
+        checkPID(pidfile)
+        daemon = not (self.config['nodaemon'] or self.config['debug'])
+        umask = self.config['umask']
+        if daemon and umask is None:
+            umask = 0o077
+        if umask is not None:
+            os.umask(umask)
+        statusPipe = None
+        if daemon:
+            from twisted.internet import reactor
+            statusPipe = self.daemonize(reactor)
+        if pidfile:
+            with open(pidfile, 'wb') as f:
+                f.write(intToBytes(os.getpid()))
+
+        workers = {}
+        stopping = []
+
+        def forwardSignal(signum, frame):
+            if signum in (signal.SIGINT, signal.SIGTERM):
+                stopping.append(signum)
+            for pid in list(workers):
+                try:
+                    os.kill(pid, signum)
+                except OSError as e:
+                    if e.errno != errno.ESRCH:
+                        raise
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP,
+                       signal.SIGUSR1):
+            signal.signal(signum, forwardSignal)
+
+        readyPipes = []
+        for index in range(1, self.config['workers'] + 1):
+            pid, readyPipe = self.spawnWorker(index)
+            workers[pid] = index
+            readyPipes.append((index, readyPipe))
+        failure = None
+        for index, readyPipe in readyPipes:
+            error = self._waitForWorker(readyPipe)
+            if error is not None and failure is None:
+                failure = "worker %d: %s" % (index, error)
+        if failure is not None:
+            forwardSignal(signal.SIGTERM, None)
+
+        if statusPipe is not None:
+            if failure is None:
+                untilConcludes(os.write, statusPipe, b"0")
+            else:
+                untilConcludes(os.write, statusPipe,
+                               b"1 " + failure[:98].encode('charmap'))
+            untilConcludes(os.close, statusPipe)
+        self._superviseWorkers(workers, stopping)
+        self.removePID(pidfile)
+        if failure is not None:
+            raise SystemExit("An error has occurred: %r" % (failure,))
+
+
+    def _superviseWorkers(self, workers, stopping):
+        """
+        Wait for the workers to exit, restarting those which exit
+        unexpectedly.
+
+        @param workers: A C{dict} mapping the PID of each running worker to
+            its index.  Restarted workers are added to it.
+
+        @param stopping: A C{list} which is not empty once the workers have
+            been asked to stop, and so should not be restarted.
+        """
+        while workers:
+            pid, status = untilConcludes(os.waitpid, -1, 0)
+            index = workers.pop(pid, None)
+            if index is None or stopping or not status:
+                continue
+            time.sleep(self.workerRestartDelay)
+            if stopping:
+                continue
+            pid, readyPipe = self.spawnWorker(index)
+            workers[pid] = index
+            self._waitForWorker(readyPipe)
+
+
+    def _waitForWorker(self, readyPipe):
+        """
+        Wait for a worker to report whether it started its application.
+
+        @param readyPipe: The file descriptor of the reading end of the
+            worker's status pipe.  It is closed.
+        @type readyPipe: C{int}
+
+        @return: L{None} if the worker started, otherwise a description of
+            why it did not.
+        @rtype: C{str} or L{None}
+        """
+        data = untilConcludes(os.read, readyPipe, 100)
+        untilConcludes(os.close, readyPipe)
+        if data == b"0":
+            return None
+        if not data:
+            return "exited during startup"
+        return data[2:].decode('charmap')
+
+
+    def spawnWorker(self, index):
+        """
+        Start a worker process running twistd with the same arguments as this
+        one.
+
+        @param index: The index of the worker, starting from 1.
+        @type index: C{int}
+
+        @return: The PID of the new process and the file descriptor of a pipe
+            on which it will report whether it started its application.
+        @rtype: 2-C{tuple} of C{int}
+        """
+        readyPipe, statusPipe = os.pipe()
+        fdesc._setCloseOnExec(readyPipe)
+        fdesc._unsetCloseOnExec(statusPipe)
+        env = os.environ.copy()
+        env[_WORKER_ENVIRONMENT_VARIABLE] = str(index)
+        env[_WORKER_STATUS_ENVIRONMENT_VARIABLE] = str(statusPipe)
+        exe = os.path.realpath(sys.executable)
+        try:
+            pid = os.spawnve(os.P_NOWAIT, exe, [exe] + sys.argv, env)
+        except:
+            os.close(readyPipe)
+            raise
+        finally:
+            os.close(statusPipe)
+        return pid, readyPipe
+
+
     def preApplication(self):
         """
         Do pre-application-creation setup.
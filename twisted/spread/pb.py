@@ -412,7 +412,10 @@ class CopyableFailure(failure.Failure, Copyable):
         Collect state related to the exception which occurred, discarding
         state which cannot reasonably be serialized.
         """
+        # Make sure attributes which are computed when first used are present.
+        self.parents
         state = self.__dict__.copy()
+        state.pop('_pendingFrames', None)
         state['tb'] = None
         state['frames'] = []
         state['stack'] = []
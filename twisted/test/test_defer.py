@@ -1421,6 +1421,87 @@ class DeferredTests(unittest.SynchronousTestCase, ImmediateFailureMixin):
             "Python 3 support to be fixed in #5949")
 
 
+    def test_callbacksForgottenAfterRunning(self):
+        """
+        Once a L{Deferred} has run its callbacks, they are removed from its
+        C{callbacks} list.
+        """
+        d = defer.Deferred()
+        for i in range(10):
+            d.addCallback(lambda result: result + 1)
+        d.callback(0)
+        self.assertEqual(self.successResultOf(d), 10)
+        self.assertEqual(d.callbacks, [])
+
+
+    def test_callbacksRemainWhileWaiting(self):
+        """
+        When a callback returns a L{Deferred} without a result, the callbacks
+        of the outer L{Deferred} which have not run yet stay in its
+        C{callbacks} list until the inner L{Deferred} fires.
+        """
+        inner = defer.Deferred()
+        outer = defer.Deferred()
+        outer.addCallback(lambda result: inner)
+        outer.addCallback(self._callback)
+        outer.callback(None)
+        self.assertEqual(len(outer.callbacks), 1)
+        self.assertIsNone(self.callbackResults)
+        inner.callback("hello")
+        self.assertEqual(self.callbackResults, (("hello",), {}))
+        self.assertEqual(outer.callbacks, [])
+
+
+    def test_callbackAddedWhileRunning(self):
+        """
+        A callback added by another callback of the same L{Deferred} runs
+        after the callbacks which were already added.
+        """
+        calls = []
+        d = defer.Deferred()
+        def first(result):
+            calls.append("first")
+            d.addCallback(lambda result: calls.append("added"))
+            return result
+        d.addCallback(first)
+        d.addCallback(lambda result: calls.append("second"))
+        d.callback(None)
+        self.assertEqual(calls, ["first", "second", "added"])
+        self.assertEqual(d.callbacks, [])
+
+
+    def test_errbackSkippedWithArguments(self):
+        """
+        An errback added with L{Deferred.addErrback} and arguments is not
+        called with a successful result, and a callback added with
+        L{Deferred.addCallback} and arguments is not called with a failure.
+        """
+        d = defer.Deferred()
+        d.addErrback(self._errback, "extra", key="value")
+        d.addCallback(self._callback, "world")
+        d.callback("hello")
+        self.assertIsNone(self.errbackResults)
+        self.assertEqual(self.callbackResults, (("hello", "world"), {}))
+
+        d = defer.Deferred()
+        d.addCallback(self._callback2, "world")
+        d.addErrback(self._errback, "extra", key="value")
+        d.errback(GenericError())
+        self.assertIsNone(self.callback2Results)
+        self.assertEqual(self.errbackResults[0][1:], ("extra",))
+        self.assertEqual(self.errbackResults[1], {"key": "value"})
+
+
+    def test_succeedWithFailure(self):
+        """
+        L{defer.succeed} given a L{Failure} makes a L{Deferred} which has
+        failed with it, as calling L{Deferred.callback} with it would.
+        """
+        f = failure.Failure(GenericError())
+        d = defer.succeed(f)
+        self.assertIs(self.failureResultOf(d, GenericError), f)
+
+
 
 class FirstErrorTests(unittest.SynchronousTestCase):
     """
@@ -1490,6 +1571,212 @@ class FirstErrorTests(unittest.SynchronousTestCase):
 
 
 
+class ParallelTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{defer.parallel}.
+    """
+
+    def setUp(self):
+        self.taken = []
+        self.pending = {}
+        self.cancelled = []
+
+
+    def elements(self, count):
+        """
+        Generate the integers below C{count}, recording in C{self.taken} each
+        one taken.
+        """
+        for i in range(count):
+            self.taken.append(i)
+            yield i
+
+
+    def slow(self, element):
+        """
+        Return a L{Deferred} which is fired by the test, keeping it in
+        C{self.pending}, and recording C{element} in C{self.cancelled} if it
+        is cancelled.
+        """
+        d = self.pending[element] = defer.Deferred(
+            lambda d: self.cancelled.append(element))
+        return d
+
+
+    def test_synchronous(self):
+        """
+        L{defer.parallel} calls the function with each element and fires with
+        a list of the results in order, accepting functions which return
+        values or L{Deferred}s.
+        """
+        d = defer.parallel(range(5), lambda x: x * 2)
+        self.assertEqual(self.successResultOf(d), [0, 2, 4, 6, 8])
+        d = defer.parallel(range(5), lambda x: defer.succeed(x * 2))
+        self.assertEqual(self.successResultOf(d), [0, 2, 4, 6, 8])
+
+
+    def test_empty(self):
+        """
+        L{defer.parallel} with an empty iterable fires with an empty list.
+        """
+        self.assertEqual(
+            self.successResultOf(defer.parallel([], lambda x: x)), [])
+
+
+    def test_concurrencyLimit(self):
+        """
+        L{defer.parallel} only takes an element from the iterable when fewer
+        than C{concurrency} calls are unfinished.
+        """
+        d = defer.parallel(self.elements(10), self.slow, concurrency=3,
+                           ordered=False)
+        self.assertEqual(self.taken, [0, 1, 2])
+        self.pending.pop(1).callback("one")
+        self.assertEqual(self.taken, [0, 1, 2, 3])
+        self.assertEqual(sorted(self.pending), [0, 2, 3])
+        self.assertNoResult(d)
+        while self.pending:
+            self.pending.pop(min(self.pending)).callback(None)
+        self.assertEqual(self.taken, list(range(10)))
+        self.assertEqual(self.successResultOf(d), ["one"] + [None] * 9)
+
+
+    def test_unordered(self):
+        """
+        When C{ordered} is false, results are delivered as soon as they are
+        available.
+        """
+        results = []
+        d = defer.parallel(range(3), self.slow, ordered=False,
+                           handleResult=results.append)
+        self.pending[2].callback("two")
+        self.pending[0].callback("zero")
+        self.assertEqual(results, ["two", "zero"])
+        self.pending[1].callback("one")
+        self.assertEqual(results, ["two", "zero", "one"])
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_ordered(self):
+        """
+        When C{ordered} is true, results are delivered in the order of their
+        elements, and results waiting for earlier ones count towards
+        C{concurrency}.
+        """
+        results = []
+        d = defer.parallel(self.elements(4), self.slow, concurrency=2,
+                           handleResult=results.append)
+        self.pending[1].callback("one")
+        self.assertEqual(results, [])
+        self.assertEqual(self.taken, [0, 1])
+        self.pending[0].callback("zero")
+        self.assertEqual(results, ["zero", "one"])
+        self.assertEqual(self.taken, [0, 1, 2, 3])
+        self.pending[3].callback("three")
+        self.pending[2].callback("two")
+        self.assertEqual(results, ["zero", "one", "two", "three"])
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_failure(self):
+        """
+        If a call fails, L{defer.parallel} takes no more elements, cancels the
+        unfinished calls and fails with a L{defer.FirstError} giving the index
+        of the element.
+        """
+        d = defer.parallel(self.elements(10), self.slow, concurrency=3)
+        self.pending[1].errback(GenericError("bang"))
+        error = self.failureResultOf(d, defer.FirstError).value
+        self.assertEqual(error.index, 1)
+        error.subFailure.trap(GenericError)
+        self.assertEqual(self.taken, [0, 1, 2])
+        self.assertEqual(sorted(self.cancelled), [0, 2])
+
+
+    def test_iteratorFailure(self):
+        """
+        If the iterable raises an exception, L{defer.parallel} fails with a
+        L{defer.FirstError} giving the index of the element it was
+        producing.
+        """
+        def elements():
+            yield 1
+            raise GenericError("bang")
+        d = defer.parallel(elements(), lambda x: x)
+        error = self.failureResultOf(d, defer.FirstError).value
+        self.assertEqual(error.index, 1)
+        error.subFailure.trap(GenericError)
+
+
+    def test_handleResultFailure(self):
+        """
+        If C{handleResult} raises an exception, L{defer.parallel} fails with
+        a L{defer.FirstError} giving the index of the element whose result it
+        was handling, and cancels the unfinished calls.
+        """
+        def handleResult(result):
+            if result == "bad":
+                raise GenericError("bang")
+        d = defer.parallel(range(3), self.slow, ordered=False,
+                           handleResult=handleResult)
+        self.pending[0].callback("good")
+        self.pending[2].callback("bad")
+        error = self.failureResultOf(d, defer.FirstError).value
+        self.assertEqual(error.index, 2)
+        error.subFailure.trap(GenericError)
+        self.assertEqual(self.cancelled, [1])
+
+
+    def test_cancel(self):
+        """
+        Cancelling the L{Deferred} returned by L{defer.parallel} cancels the
+        unfinished calls and takes no more elements from the iterable.
+        """
+        d = defer.parallel(self.elements(10), self.slow, concurrency=2)
+        d.cancel()
+        self.failureResultOf(d, defer.CancelledError)
+        self.assertEqual(sorted(self.cancelled), [0, 1])
+        self.assertEqual(self.taken, [0, 1])
+
+
+    def test_cancelFromHandleResult(self):
+        """
+        If C{handleResult} cancels the L{Deferred} returned by
+        L{defer.parallel}, no more results are delivered.
+        """
+        results = []
+        def handleResult(result):
+            results.append(result)
+            d.cancel()
+        d = defer.parallel(range(3), self.slow, handleResult=handleResult)
+        self.pending[1].callback("one")
+        self.pending[0].callback("zero")
+        self.assertEqual(results, ["zero"])
+        self.failureResultOf(d, defer.CancelledError)
+        self.assertEqual(self.cancelled, [2])
+
+
+    def test_manySynchronousResults(self):
+        """
+        L{defer.parallel} handles many calls which finish immediately without
+        recursing for each one.
+        """
+        count = []
+        d = defer.parallel(range(10000), defer.succeed,
+                           handleResult=count.append)
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(len(count), 10000)
+
+
+    def test_invalidConcurrency(self):
+        """
+        L{defer.parallel} raises L{ValueError} if C{concurrency} is less than
+        1.
+        """
+        self.assertRaises(ValueError, defer.parallel, [], lambda x: x, 0)
+
+
+
 class AlreadyCalledTests(unittest.SynchronousTestCase):
     def setUp(self):
         self._deferredWasDebugging = defer.getDebugging()
@@ -322,6 +322,78 @@ class InlineCallbacksTests(BaseDefgenTests, unittest.TestCase):
             str(self.assertRaises(TypeError, _noYield)))
 
 
+    def test_yieldFiredDeferred(self):
+        """
+        Yielding a L{Deferred} which already has a result gives that result
+        immediately, and leaves the L{Deferred} with a result of C{None}.
+        """
+        fired = defer.succeed("result")
+        results = []
+        def _yieldFired():
+            results.append((yield fired))
+        _yieldFired = inlineCallbacks(_yieldFired)
+
+        self.successResultOf(_yieldFired())
+        self.assertEqual(results, ["result"])
+        self.assertIsNone(self.successResultOf(fired))
+
+
+    def test_yieldFailedDeferred(self):
+        """
+        Yielding a L{Deferred} which has already failed raises its exception
+        in the generator, and the failure is not left behind to be reported
+        as unhandled when the L{Deferred} is garbage collected.
+        """
+        failed = defer.fail(TerminalException("failed"))
+        def _yieldFailed():
+            try:
+                yield failed
+            except TerminalException:
+                returnValue("handled")
+        _yieldFailed = inlineCallbacks(_yieldFailed)
+
+        self.assertEqual(self.successResultOf(_yieldFailed()), "handled")
+        self.assertIsNone(failed._debugInfo.failResult)
+        self.assertIsNone(self.successResultOf(failed))
+
+
+    def test_yieldPausedDeferred(self):
+        """
+        Yielding a L{Deferred} which has a result but is paused waits until
+        it is unpaused.
+        """
+        paused = defer.succeed("result")
+        paused.pause()
+        def _yieldPaused():
+            result = yield paused
+            returnValue(result)
+        _yieldPaused = inlineCallbacks(_yieldPaused)
+
+        d = _yieldPaused()
+        self.assertNoResult(d)
+        paused.unpause()
+        self.assertEqual(self.successResultOf(d), "result")
+
+
+    def test_yieldChainedDeferred(self):
+        """
+        Yielding a L{Deferred} which has fired but is waiting on the result of
+        another L{Deferred} waits for that result.
+        """
+        inner = Deferred()
+        outer = defer.succeed(None)
+        outer.addCallback(lambda ignored: inner)
+        def _yieldChained():
+            result = yield outer
+            returnValue(result)
+        _yieldChained = inlineCallbacks(_yieldChained)
+
+        d = _yieldChained()
+        self.assertNoResult(d)
+        inner.callback("result")
+        self.assertEqual(self.successResultOf(d), "result")
+
+
 
 class DeprecateDeferredGeneratorTests(unittest.SynchronousTestCase):
     """
@@ -804,6 +804,79 @@ class FormattableTracebackTests(SynchronousTestCase):
 
 
 
+class LazyFramesFailureTests(FailureTests):
+    """
+    The tests for L{failure.Failure}, run with C{lazyFrames} set, and tests
+    for what it changes.
+    """
+
+    def setUp(self):
+        self.patch(failure.Failure, 'lazyFrames', True)
+
+
+    def test_framesNotComputed(self):
+        """
+        A failure created with C{lazyFrames} set doesn't compute its stack,
+        frames or parents, even when it is trapped.
+        """
+        f = getDivisionFailure()
+        self.assertEqual(ZeroDivisionError, f.trap(ZeroDivisionError))
+        self.assertNotIn('frames', f.__dict__)
+        self.assertNotIn('stack', f.__dict__)
+
+
+    def test_framesComputed(self):
+        """
+        The stack and frames of a failure created with C{lazyFrames} set are
+        computed when first used, and are the same as those of a failure
+        computing them when it is created.
+        """
+        lazy = getDivisionFailure()
+        self.patch(failure.Failure, 'lazyFrames', False)
+        eager = getDivisionFailure()
+        self.assertEqual(eager.frames, lazy.frames)
+        self.assertEqual(eager.parents, lazy.parents)
+        self.assertEqual([frame[:2] for frame in eager.stack],
+                         [frame[:2] for frame in lazy.stack])
+        self.assertNotIn('_pendingFrames', lazy.__dict__)
+
+
+    def test_cleanFailure(self):
+        """
+        L{failure.Failure.cleanFailure} computes the frames of a failure
+        created with C{lazyFrames} set, and keeps no frame objects.
+        """
+        f = getDivisionFailure()
+        f.cleanFailure()
+        self.assertNotIn('_pendingFrames', f.__dict__)
+        self.assertIsNone(f.tb)
+        self.assertEqual(
+            'getDivisionFailure', f.frames[-1][0])
+        self.assertIn('1/0', f.getTraceback())
+
+
+    def test_captureVars(self):
+        """
+        A failure capturing locals and globals computes its stack and frames
+        when it is created, even if C{lazyFrames} is set.
+        """
+        f = getDivisionFailure(captureVars=True)
+        self.assertNotIn('_pendingFrames', f.__dict__)
+        self.assertIn('frames', f.__dict__)
+
+
+    def test_noStack(self):
+        """
+        The C{stack} of a failure which was not initialized is C{None}, and
+        other missing attributes raise L{AttributeError}.
+        """
+        f = getDivisionFailure()
+        del f.__dict__['_pendingFrames']
+        self.assertIsNone(f.stack)
+        self.assertRaises(AttributeError, getattr, f, 'frames')
+
+
+
 class FrameAttributesTests(SynchronousTestCase):
     """
     _Frame objects should possess some basic attributes that qualify them as
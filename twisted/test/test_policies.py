@@ -737,6 +737,68 @@ class TimeoutMixinTests(unittest.TestCase):
 
 
 
+class TimeoutGroupTester(TimeoutTester):
+    """
+    A L{TimeoutTester} which schedules its timeout with a
+    L{task.TimeoutGroup} rather than directly with a clock.
+    """
+    def __init__(self, group):
+        self.timeoutGroup = group
+
+
+    callLater = policies.TimeoutMixin.callLater
+
+
+
+class TimeoutMixinGroupTests(unittest.TestCase):
+    """
+    Tests for L{policies.TimeoutMixin} with C{timeoutGroup} set.
+    """
+    def setUp(self):
+        self.clock = task.Clock()
+        self.group = task.TimeoutGroup(slack=1.0, clock=self.clock)
+
+
+    def test_sharedDelayedCall(self):
+        """
+        The timeouts of many protocols sharing a group are scheduled with a
+        single delayed call on the clock, and each protocol times out.
+        """
+        protos = [TimeoutGroupTester(self.group) for i in range(10)]
+        for proto in protos:
+            proto.makeConnection(StringTransport())
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.clock.advance(3)
+        self.assertEqual([proto.timedOut for proto in protos], [True] * 10)
+
+
+    def test_noTimeout(self):
+        """
+        Receiving data delays the timeout of the connection.
+        """
+        proto = TimeoutGroupTester(self.group)
+        proto.makeConnection(StringTransport())
+        self.clock.pump([0, 1.0, 1.0])
+        proto.dataReceived(b'hello there')
+        self.clock.pump([0, 1.0, 1.0])
+        self.assertFalse(proto.timedOut)
+        self.clock.pump([0, 1.0, 1.0])
+        self.assertTrue(proto.timedOut)
+
+
+    def test_cancelTimeout(self):
+        """
+        Setting the timeout to C{None} cancels it.
+        """
+        proto = TimeoutGroupTester(self.group)
+        proto.makeConnection(StringTransport())
+        proto.setTimeout(None)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.clock.pump([0, 5, 5])
+        self.assertFalse(proto.timedOut)
+
+
+
 class LimitTotalConnectionsFactoryTests(unittest.TestCase):
     """Tests for policies.LimitTotalConnectionsFactory"""
     def testConnectionCounting(self):
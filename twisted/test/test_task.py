@@ -878,6 +878,151 @@ class ReactorLoopTests(unittest.TestCase):
 
 
 
+class TimeoutGroupTests(unittest.TestCase):
+    """
+    Tests for L{task.TimeoutGroup}.
+    """
+    def setUp(self):
+        self.clock = task.Clock()
+        self.group = task.TimeoutGroup(slack=1.0, clock=self.clock)
+
+
+    def test_delayedCall(self):
+        """
+        L{task.TimeoutGroup.callLater} returns a provider of
+        L{interfaces.IDelayedCall} whose C{getTime} is the scheduled time.
+        """
+        self.clock.advance(10)
+        call = self.group.callLater(2.5, lambda: None)
+        self.assertTrue(interfaces.IDelayedCall.providedBy(call))
+        self.assertEqual(call.getTime(), 12.5)
+        self.assertTrue(call.active())
+
+
+    def test_calledWithinSlack(self):
+        """
+        A call is made no earlier than its scheduled time and no later than
+        the slack after it, with the given arguments.
+        """
+        called = []
+        self.group.callLater(2.5, called.append, 1)
+        self.clock.advance(2.49)
+        self.assertEqual(called, [])
+        self.clock.advance(0.51)
+        self.assertEqual(called, [1])
+
+
+    def test_sharedDelayedCall(self):
+        """
+        Calls due in the same slack window share a single delayed call on the
+        clock, and are made in order of their scheduled time.
+        """
+        called = []
+        for delay in [0.9, 0.1, 0.5, 1.5]:
+            self.group.callLater(delay, called.append, delay)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 2)
+        self.clock.advance(1)
+        self.assertEqual(called, [0.1, 0.5, 0.9])
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+
+
+    def test_cancel(self):
+        """
+        A cancelled call is not made, and when every call due in a window has
+        been cancelled the delayed call for that window is cancelled too.
+        """
+        called = []
+        call = self.group.callLater(1, called.append, 1)
+        call.cancel()
+        self.assertFalse(call.active())
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.assertEqual(self.group.getDelayedCalls(), [])
+        self.assertRaises(error.AlreadyCancelled, call.cancel)
+        self.assertRaises(error.AlreadyCancelled, call.reset, 1)
+        self.clock.advance(2)
+        self.assertEqual(called, [])
+
+
+    def test_resetLater(self):
+        """
+        A call reset to a later time is made at its new time, without
+        scheduling anything new with the clock.
+        """
+        called = []
+        call = self.group.callLater(3, called.append, 1)
+        self.clock.advance(2)
+        call.reset(3)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.clock.advance(2)
+        self.assertEqual(called, [])
+        self.clock.advance(2)
+        self.assertEqual(called, [1])
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+
+    def test_resetSooner(self):
+        """
+        A call reset to an earlier time is made at its new time.
+        """
+        called = []
+        call = self.group.callLater(30, called.append, 1)
+        call.reset(2)
+        self.clock.advance(3)
+        self.assertEqual(called, [1])
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+
+    def test_delay(self):
+        """
+        L{IDelayedCall.delay} moves a call relative to its scheduled time.
+        """
+        called = []
+        call = self.group.callLater(3, called.append, 1)
+        call.delay(2)
+        self.assertEqual(call.getTime(), 5)
+        self.clock.advance(4)
+        self.assertEqual(called, [])
+        self.clock.advance(2)
+        self.assertEqual(called, [1])
+
+
+    def test_cancelledByEarlierCall(self):
+        """
+        A call cancelled by another call made in the same window is not made.
+        """
+        called = []
+        second = []
+        self.group.callLater(0.1, lambda: second[0].cancel())
+        second.append(self.group.callLater(0.2, called.append, 2))
+        self.clock.advance(1)
+        self.assertEqual(called, [])
+
+
+    def test_calledCall(self):
+        """
+        Once a call has been made it can no longer be cancelled or reset.
+        """
+        call = self.group.callLater(1, lambda: None)
+        self.clock.advance(1)
+        self.assertFalse(call.active())
+        self.assertRaises(error.AlreadyCalled, call.cancel)
+        self.assertRaises(error.AlreadyCalled, call.reset, 1)
+
+
+    def test_errorLogged(self):
+        """
+        An exception raised by a call is logged, and does not prevent the
+        other calls due in the same window from being made.
+        """
+        called = []
+        self.group.callLater(0.1, lambda: 1 // 0)
+        self.group.callLater(0.2, called.append, 2)
+        self.clock.advance(1)
+        self.assertEqual(called, [2])
+        self.assertEqual(len(self.flushLoggedErrors(ZeroDivisionError)), 1)
+
+
+
 class DeferLaterTests(unittest.TestCase):
     """
     Tests for L{task.deferLater}.
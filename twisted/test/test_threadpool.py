@@ -629,10 +629,14 @@ class MemoryPool(threadpool.ThreadPool):
             L{twisted._threads.IWorker} provider on each invocation.
         @type newWorker: 0-argument callable returning
             L{twisted._threads.IWorker}.
+
+        @param clock: (keyword only) a 0-argument callable returning the
+            current time, for the L{Team} underlying this threadpool.
         """
         self._coordinator = coordinator
         self._failTest = failTest
         self._newWorker = newWorker
+        self._clock = kwargs.pop("clock", time.time)
         threadpool.ThreadPool.__init__(self, *args, **kwargs)
 
 
@@ -660,7 +664,8 @@ class MemoryPool(threadpool.ThreadPool):
             return self._newWorker()
         team = Team(coordinator=self._coordinator,
                     createWorker=respectLimit,
-                    logException=self._failTest)
+                    logException=self._failTest,
+                    clock=self._clock)
         return team
 
 
@@ -711,6 +716,20 @@ class PoolHelper(object):
             pass
 
 
+    def performAllWork(self):
+        """
+        Perform all currently scheduled coordination and all the work given to
+        the workers, including any work which that leads to.
+        """
+        did = True
+        while did:
+            self.performAllCoordination()
+            did = False
+            for worker, performer in self.workers:
+                while performer():
+                    did = True
+
+
 
 class MemoryBackedTests(unittest.SynchronousTestCase):
     """
@@ -751,3 +770,97 @@ class MemoryBackedTests(unittest.SynchronousTestCase):
         helper.performAllCoordination()
         self.assertEqual(len(helper.workers), helper.threadpool.max)
 
+
+    def test_lanePriority(self):
+        """
+        When all the threads are busy, work given to a L{ThreadPool.lane} with
+        a higher priority is performed before work given to the threadpool
+        itself.
+        """
+        helper = PoolHelper(self, 0, 1)
+        helper.threadpool.start()
+        done = []
+        helper.threadpool.callInThread(done.append, "first")
+        helper.threadpool.callInThread(done.append, "low")
+        helper.threadpool.lane(5).callInThread(done.append, "high")
+        helper.performAllWork()
+        self.assertEqual(done, ["first", "high", "low"])
+
+
+    def test_laneCallInThreadWithCallback(self):
+        """
+        L{ThreadPool.lane} returns an object whose C{callInThreadWithCallback}
+        calls the function in a thread and passes the result to C{onResult}.
+        """
+        helper = PoolHelper(self, 0, 1)
+        helper.threadpool.start()
+        results = []
+        helper.threadpool.lane(5).callInThreadWithCallback(
+            lambda success, result: results.append((success, result)),
+            lambda a, b=None: (a, b), 1, b=2)
+        helper.performAllWork()
+        self.assertEqual(results, [(True, (1, 2))])
+
+
+    def test_statistics(self):
+        """
+        L{ThreadPool.statistics} returns the statistics of the threadpool's
+        L{Team}.
+        """
+        helper = PoolHelper(self, 0, 1)
+        helper.threadpool.start()
+        helper.threadpool.callInThread(lambda: None)
+        helper.threadpool.lane(3).callInThread(lambda: None)
+        helper.performAllCoordination()
+        stats = helper.threadpool.statistics()
+        self.assertEqual(stats.busyWorkerCount, 1)
+        self.assertEqual(stats.backloggedWorkByPriority, {3: 1})
+        helper.performAllWork()
+        self.assertEqual(helper.threadpool.statistics().completedWorkCount, 2)
+
+
+    def test_idleTimeout(self):
+        """
+        When L{ThreadPool.idleTimeout} is set, giving work to the threadpool
+        stops threads beyond L{ThreadPool.min} which have been idle that
+        long.
+        """
+        now = [0.0]
+        helper = PoolHelper(self, 1, 10, clock=lambda: now[0])
+        pool = helper.threadpool
+        pool.idleTimeout = 10
+        pool.start()
+        for i in range(3):
+            pool.callInThread(lambda: None)
+        helper.performAllWork()
+        self.assertEqual(pool.workers, 3)
+
+        now[0] = 5.0
+        pool.callInThread(lambda: None)
+        helper.performAllWork()
+        self.assertEqual(pool.workers, 3)
+
+        # The new work goes to the thread which was idle since 5 seconds, and
+        # the two idle since 0 seconds are stopped.
+        now[0] = 20.0
+        pool.callInThread(lambda: None)
+        helper.performAllCoordination()
+        self.assertEqual(pool.statistics().busyWorkerCount, 1)
+        self.assertEqual(pool.workers, 1)
+
+
+    def test_noIdleTimeout(self):
+        """
+        By default, L{ThreadPool} does not stop idle threads.
+        """
+        now = [0.0]
+        helper = PoolHelper(self, 0, 10, clock=lambda: now[0])
+        pool = helper.threadpool
+        pool.start()
+        for i in range(3):
+            pool.callInThread(lambda: None)
+        helper.performAllWork()
+        now[0] = 1000.0
+        pool.callInThread(lambda: None)
+        helper.performAllWork()
+        self.assertEqual(pool.workers, 3)
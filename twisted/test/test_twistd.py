@@ -321,6 +321,94 @@ class ServerOptionsTests(unittest.TestCase):
         test_defaultUmask.skip = test_umask.skip = test_invalidUmask.skip = msg
 
 
+    def test_defaultWorkers(self):
+        """
+        By default, twistd runs a single process.
+        """
+        config = twistd.ServerOptions()
+        config.parseOptions([])
+        self.assertEqual(config['workers'], 1)
+
+
+    def test_workers(self):
+        """
+        The value given for the C{workers} option is parsed as an integer.
+        """
+        config = twistd.ServerOptions()
+        config.parseOptions(['--workers', '4'])
+        self.assertEqual(config['workers'], 4)
+
+
+    def test_invalidWorkers(self):
+        """
+        If the value given for the C{workers} option is less than one,
+        L{UsageError} is raised by L{ServerOptions.parseOptions}.
+        """
+        config = twistd.ServerOptions()
+        self.assertRaises(UsageError, config.parseOptions,
+                          ['--workers', '0'])
+
+
+    def test_workersWithChroot(self):
+        """
+        The C{workers} option cannot be combined with C{chroot}, since the
+        workers are started by running twistd again.
+        """
+        config = twistd.ServerOptions()
+        self.assertRaises(UsageError, config.parseOptions,
+                          ['--workers', '2', '--chroot', '/foo'])
+
+
+    def test_workerOptions(self):
+        """
+        When the C{TWISTD_WORKER} environment variable is set, twistd runs as
+        one of the workers started by C{--workers}: it does not daemonize or
+        write a pidfile, and logs to a file named after its index.
+        """
+        self.patch(os, 'environ', {'TWISTD_WORKER': '2'})
+        config = twistd.ServerOptions()
+        config.parseOptions(['--workers', '4', '--pidfile', 'foo.pid'])
+        self.assertEqual(config['workers'], 1)
+        self.assertTrue(config['nodaemon'])
+        self.assertEqual(config['pidfile'], '')
+        self.assertEqual(config['logfile'], 'twistd-2.log')
+
+
+    def test_workerOptionsLogfile(self):
+        """
+        A worker logs to the given log file with its index added, or to stdout
+        if the workers are not daemonized and no log file is given.
+        """
+        self.patch(os, 'environ', {'TWISTD_WORKER': '3'})
+        config = twistd.ServerOptions()
+        config.parseOptions(['--workers', '4', '--logfile', 'web.log'])
+        self.assertEqual(config['logfile'], 'web-3.log')
+        config = twistd.ServerOptions()
+        config.parseOptions(['--workers', '4', '--nodaemon'])
+        self.assertIsNone(config['logfile'])
+
+
+    def test_workerOptionsStatusPipe(self):
+        """
+        A worker reports its startup status on the file descriptor given by
+        the C{TWISTD_WORKER_STATUS} environment variable.
+        """
+        readPipe, statusPipe = os.pipe()
+        self.addCleanup(os.close, readPipe)
+        self.addCleanup(os.close, statusPipe)
+        self.patch(os, 'environ', {'TWISTD_WORKER': '1',
+                                   'TWISTD_WORKER_STATUS': str(statusPipe)})
+        config = twistd.ServerOptions()
+        config.parseOptions(['--workers', '2'])
+        self.assertEqual(config['statusPipe'], statusPipe)
+
+    if _twistd_unix is None:
+        test_defaultWorkers.skip = test_workers.skip = msg
+        test_invalidWorkers.skip = test_workersWithChroot.skip = msg
+        test_workerOptions.skip = test_workerOptionsLogfile.skip = msg
+        test_workerOptionsStatusPipe.skip = msg
+
+
     def test_unimportableConfiguredLogObserver(self):
         """
         C{--logger} with an unimportable module raises a L{UsageError}.
@@ -792,6 +880,222 @@ class UnixApplicationRunnerStartApplicationTests(unittest.TestCase):
 
 
 
+class UnixApplicationRunnerWorkersTests(unittest.TestCase):
+    """
+    Tests for L{UnixApplicationRunner.runWorkers}.
+    """
+    if _twistd_unix is None:
+        skip = "twistd unix not available"
+
+    def setUp(self):
+        self.pidfile = os.path.abspath(self.mktemp())
+        options = twistd.ServerOptions()
+        options.parseOptions(
+            ['--nodaemon', '--workers', '3', '--pidfile', self.pidfile])
+        self.runner = UnixApplicationRunner(options)
+        self.spawned = []
+        self.running = []
+        self.statuses = {}
+        self.exitStatuses = []
+        self.duringWait = []
+        self.killed = []
+        self.slept = []
+        self.signals = {}
+        self.patch(signal, 'signal', self.signals.__setitem__)
+        self.patch(os, 'waitpid', self.waitpid)
+        self.patch(os, 'kill',
+                   lambda pid, signum: self.killed.append((pid, signum)))
+        self.patch(_twistd_unix.time, 'sleep', self.slept.append)
+        self.runner.spawnWorker = self.spawnWorker
+
+
+    def spawnWorker(self, index):
+        """
+        Record the worker being spawned and return a fake PID for it, and a
+        pipe from which the status given for it in C{self.statuses} (by
+        default, that it started) can be read.
+        """
+        self.spawned.append((index, os.path.exists(self.pidfile)))
+        pid = 100 * len(self.spawned) + index
+        self.running.append(pid)
+        readyPipe, statusPipe = os.pipe()
+        os.write(statusPipe, self.statuses.pop(index, b"0"))
+        os.close(statusPipe)
+        return pid, readyPipe
+
+
+    def waitpid(self, pid, options):
+        """
+        Report that the longest running worker has exited, with the first
+        status in C{self.exitStatuses} or, if there are none left, cleanly.
+        Any functions in C{self.duringWait} are called first.
+        """
+        self.assertEqual((pid, options), (-1, 0))
+        while self.duringWait:
+            self.duringWait.pop(0)()
+        status = self.exitStatuses.pop(0) if self.exitStatuses else 0
+        return self.running.pop(0), status
+
+
+    def daemonize(self):
+        """
+        Make the runner daemonize as though it had forked, reporting its
+        status on a pipe.
+
+        @return: The reading end of the pipe.
+        """
+        self.runner.config['nodaemon'] = False
+        readPipe, statusPipe = os.pipe()
+        self.addCleanup(os.close, readPipe)
+        self.runner.daemonize = lambda reactor: statusPipe
+        return readPipe
+
+
+    def test_run(self):
+        """
+        L{UnixApplicationRunner.run} supervises workers instead of running the
+        application if more than one worker was requested.
+        """
+        self.runner.run()
+        self.assertEqual(len(self.spawned), 3)
+
+
+    def test_spawnAndWait(self):
+        """
+        L{UnixApplicationRunner.runWorkers} writes the pidfile, spawns the
+        requested number of workers, waits for all of them to exit and then
+        removes the pidfile.  Workers which exit cleanly are not restarted.
+        """
+        self.runner.runWorkers()
+        self.assertEqual(self.spawned, [(1, True), (2, True), (3, True)])
+        self.assertEqual(self.running, [])
+        self.assertFalse(os.path.exists(self.pidfile))
+
+
+    def test_reportStarted(self):
+        """
+        When daemonized, L{UnixApplicationRunner.runWorkers} reports that it
+        started once all of the workers have.
+        """
+        readPipe = self.daemonize()
+        self.runner.runWorkers()
+        self.assertEqual(os.read(readPipe, 100), b"0")
+
+
+    def test_reportWorkerFailure(self):
+        """
+        When daemonized, if a worker fails to start its application,
+        L{UnixApplicationRunner.runWorkers} stops the other workers, reports
+        the failure, removes the pidfile and exits with an error.
+        """
+        readPipe = self.daemonize()
+        self.statuses[2] = b"1 Address already in use"
+        exc = self.assertRaises(SystemExit, self.runner.runWorkers)
+        self.assertIn("worker 2: Address already in use", str(exc))
+        self.assertEqual(os.read(readPipe, 100),
+                         b"1 worker 2: Address already in use")
+        self.assertEqual(
+            sorted(self.killed),
+            [(pid, signal.SIGTERM) for pid in (101, 202, 303)])
+        self.assertEqual(len(self.spawned), 3)
+        self.assertFalse(os.path.exists(self.pidfile))
+
+
+    def test_workerExitsDuringStartup(self):
+        """
+        A worker which exits without reporting whether it started is
+        reported as having failed to start.
+        """
+        self.statuses[1] = b""
+        exc = self.assertRaises(SystemExit, self.runner.runWorkers)
+        self.assertIn("worker 1: exited during startup", str(exc))
+
+
+    def test_forwardSignals(self):
+        """
+        L{UnixApplicationRunner.runWorkers} passes C{SIGINT}, C{SIGTERM},
+        C{SIGHUP} and C{SIGUSR1} on to the workers.
+        """
+        self.duringWait.append(
+            lambda: self.signals[signal.SIGTERM](signal.SIGTERM, None))
+        self.runner.runWorkers()
+        self.assertEqual(
+            sorted(self.killed),
+            [(101, signal.SIGTERM), (202, signal.SIGTERM),
+             (303, signal.SIGTERM)])
+        self.assertIn(signal.SIGINT, self.signals)
+        self.assertIn(signal.SIGHUP, self.signals)
+        self.assertIn(signal.SIGUSR1, self.signals)
+
+
+    def test_restartWorker(self):
+        """
+        A worker which exits with an error after starting is restarted, with
+        the same index, after C{workerRestartDelay} seconds.
+        """
+        self.exitStatuses.append(1 << 8)
+        self.runner.runWorkers()
+        self.assertEqual([index for index, _ in self.spawned], [1, 2, 3, 1])
+        self.assertEqual(self.slept, [self.runner.workerRestartDelay])
+        self.assertEqual(self.running, [])
+
+
+    def test_restartAfterHangup(self):
+        """
+        Passing on C{SIGHUP}, which twistd does not handle, to the workers
+        restarts them.
+        """
+        self.duringWait.append(
+            lambda: self.signals[signal.SIGHUP](signal.SIGHUP, None))
+        self.exitStatuses.append(signal.SIGHUP)
+        self.runner.runWorkers()
+        self.assertEqual(
+            sorted(self.killed),
+            [(101, signal.SIGHUP), (202, signal.SIGHUP),
+             (303, signal.SIGHUP)])
+        self.assertEqual([index for index, _ in self.spawned], [1, 2, 3, 1])
+
+
+    def test_noRestartWhenStopping(self):
+        """
+        Workers which exit after being asked to stop are not restarted, even
+        if they exit with an error.
+        """
+        self.duringWait.append(
+            lambda: self.signals[signal.SIGINT](signal.SIGINT, None))
+        self.exitStatuses.extend([signal.SIGINT] * 3)
+        self.runner.runWorkers()
+        self.assertEqual(len(self.spawned), 3)
+        self.assertEqual(self.slept, [])
+
+
+    def test_spawnWorker(self):
+        """
+        L{UnixApplicationRunner.spawnWorker} runs twistd again with the same
+        arguments, the worker's index in the environment and the writing end
+        of a pipe on which to report its status.  It returns the PID of the
+        worker and the reading end of that pipe.
+        """
+        calls = []
+        def spawnve(mode, path, args, env):
+            calls.append((mode, path, args, env))
+            return 1234
+        self.patch(os, 'spawnve', spawnve)
+        self.patch(sys, 'argv', ['twistd', '--workers', '3', 'web'])
+        runner = UnixApplicationRunner({})
+        pid, readyPipe = runner.spawnWorker(2)
+        self.addCleanup(os.close, readyPipe)
+        self.assertEqual(pid, 1234)
+        [(mode, path, args, env)] = calls
+        self.assertEqual(mode, os.P_NOWAIT)
+        self.assertEqual(args, [path, 'twistd', '--workers', '3', 'web'])
+        self.assertEqual(env['TWISTD_WORKER'], '2')
+        self.assertIn('TWISTD_WORKER_STATUS', env)
+        # The parent's copy of the writing end has been closed.
+        self.assertEqual(os.read(readyPipe, 100), b"")
+
+
+
 class UnixApplicationRunnerRemovePIDTests(unittest.TestCase):
     """
     Tests for L{UnixApplicationRunner.removePID}.
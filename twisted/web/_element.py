@@ -178,8 +178,17 @@ class Element(object):
         separately as the object to lookup renderers on and call
         L{Element.renderer} to look them up.  The resulting object from this
         method is not directly associated with this L{Element}.)
+
+        L{XMLString <twisted.web.template.XMLString>} and L{XMLFile
+        <twisted.web.template.XMLFile>} also keep a compiled copy of their
+        document, in which everything other than slots and tags with renderers
+        has already been flattened; that copy is used in place of the document
+        itself.
         """
         loader = self.loader
         if loader is None:
             raise MissingTemplateLoader(self)
+        loadCompiled = getattr(loader, '_loadCompiled', None)
+        if loadCompiled is not None:
+            return loadCompiled()
         return loader.load()
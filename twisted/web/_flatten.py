@@ -17,6 +17,7 @@ from traceback import extract_tb
 
 from twisted.internet.defer import Deferred
 from twisted.python.compat import unicode, nativeString, iteritems
+from twisted.python.failure import Failure
 from twisted.web._stan import Tag, slot, voidElements, Comment, CDATA, CharRef
 from twisted.web.error import UnfilledSlot, UnsupportedType, FlattenerError
 from twisted.web.iweb import IRenderable
@@ -180,6 +181,162 @@ def _getSlotValue(name, slotData, default=None):
 
 
 
+class _PreEscaped(object):
+    """
+    A chunk of markup which has already been flattened and escaped by
+    L{_compile}, and so is written out by L{_flattenElement} exactly as it is.
+
+    @ivar data: The flattened markup.
+    @type data: L{bytes}
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+    def __repr__(self):
+        return '_PreEscaped(%r)' % (self.data,)
+
+
+
+def _isStatic(root):
+    """
+    Determine whether C{root} will flatten to the same bytes every time,
+    regardless of the request, slot data or render factory it is flattened
+    with.
+
+    @param root: An object which could be passed to L{_flattenElement}.
+
+    @rtype: L{bool}
+    """
+    if isinstance(root, (bytes, unicode, Comment, CDATA, CharRef)):
+        return True
+    elif isinstance(root, Tag):
+        if root.render is not None or root.slotData:
+            return False
+        for value in root.attributes.values():
+            if not _isStatic(value):
+                return False
+        return _isStatic(root.children)
+    elif isinstance(root, (tuple, list)):
+        for element in root:
+            if not _isStatic(element):
+                return False
+        return True
+    return False
+
+
+
+def _flattenStatic(root):
+    """
+    Flatten an object for which L{_isStatic} is true.
+
+    @return: The flattened form of C{root}, as it would appear in the content
+        of a tag.
+    @rtype: L{bytes}
+    """
+    return b''.join(_flattenTree(None, root))
+
+
+
+def _appendPreEscaped(compiled, data):
+    """
+    Append some flattened markup to a list being built by L{_compileInto},
+    merging it with the preceding chunk where there is one.
+    """
+    if compiled and type(compiled[-1]) is _PreEscaped:
+        compiled[-1] = _PreEscaped(compiled[-1].data + data)
+    else:
+        compiled.append(_PreEscaped(data))
+
+
+
+def _compileInto(root, inContent, compiled):
+    """
+    Append the compiled form of C{root} to C{compiled}.  See L{_compile}.
+
+    @param inContent: C{True} if C{root} is known to be flattened as the
+        content of a tag, and so any strings it contains can be escaped now;
+        C{False} if it may also end up in an attribute, in which case strings
+        are left for L{_flattenElement} to escape.
+    """
+    if isinstance(root, (bytes, unicode)):
+        if inContent:
+            _appendPreEscaped(compiled, escapeForContent(root))
+        else:
+            compiled.append(root)
+    elif isinstance(root, (Comment, CDATA, CharRef)):
+        _appendPreEscaped(compiled, _flattenStatic(root))
+    elif isinstance(root, (tuple, list)):
+        for element in root:
+            _compileInto(element, inContent, compiled)
+    elif isinstance(root, Tag) and root.render is None and not root.slotData:
+        if not root.tagName:
+            _compileInto(root.children, inContent, compiled)
+            return
+
+        children = []
+        _compileInto(root.children, True, children)
+        attributesStatic = _isStatic(list(root.attributes.values()))
+
+        if not attributesStatic:
+            compiled.append(Tag(
+                root.tagName, attributes=root.attributes, children=children,
+                filename=root.filename, lineNumber=root.lineNumber,
+                columnNumber=root.columnNumber))
+        elif not children:
+            _appendPreEscaped(
+                compiled,
+                _flattenStatic(Tag(root.tagName, attributes=root.attributes)))
+        else:
+            # Flatten the tag around a single empty child, so that it gets an
+            # explicit end tag even if it is a void element, and then split
+            # that end tag off again.
+            tagName = root.tagName
+            if isinstance(tagName, unicode):
+                tagName = tagName.encode('ascii')
+            end = b'</' + tagName + b'>'
+            start = _flattenStatic(
+                Tag(root.tagName, attributes=root.attributes, children=['']))
+            _appendPreEscaped(compiled, start[:-len(end)])
+            for child in children:
+                if type(child) is _PreEscaped:
+                    _appendPreEscaped(compiled, child.data)
+                else:
+                    compiled.append(child)
+            _appendPreEscaped(compiled, end)
+    else:
+        # Slots, tags with renderers or slot data, and anything else which
+        # can only be flattened with a particular request.  The contents of a
+        # tag with a renderer are left alone, since the renderer is handed a
+        # clone of it and may well inspect or change its children.
+        compiled.append(root)
+
+
+
+def _compile(document):
+    """
+    Collapse the static parts of a loaded template document into pre-escaped
+    chunks of markup, so that flattening it again and again only has to visit
+    the slots, renderers and other dynamic parts.
+
+    C{document} itself is not modified; L{Tag}s which have a renderer are
+    shared between it and the compiled form.
+
+    @param document: A template document, as returned by
+        L{ITemplateLoader.load}.
+    @type document: L{list}
+
+    @return: A document which flattens to the same output as C{document}.
+    @rtype: L{list}
+    """
+    compiled = []
+    _compileInto(document, False, compiled)
+    return compiled
+
+
+
 def _flattenElement(request, root, slotData, renderFactory, dataEscaper):
     """
     Make C{root} slightly more flat by yielding all its immediate contents as
@@ -220,7 +377,9 @@ def _flattenElement(request, root, slotData, renderFactory, dataEscaper):
                   renderFactory=renderFactory):
         return _flattenElement(request, newRoot, slotData, renderFactory,
                                dataEscaper)
-    if isinstance(root, (bytes, unicode)):
+    if type(root) is _PreEscaped:
+        yield root.data
+    elif isinstance(root, (bytes, unicode)):
         yield dataEscaper(root)
     elif isinstance(root, slot):
         slotValue = _getSlotValue(root.name, slotData, root.default)
@@ -339,7 +498,7 @@ def _flattenTree(request, root):
                 stack.append(element)
 
 
-def _writeFlattenedData(state, write, result):
+def _writeFlattenedData(state, write, result, bufferSize=0):
     """
     Take strings from an iterator and pass them to a writer function.
 
@@ -355,29 +514,50 @@ def _writeFlattenedData(state, write, result):
         an exception in a generator passed to C{state} or an errback from a
         L{Deferred} from state occurs.
 
+    @param bufferSize: The number of bytes to collect from C{state} before
+        passing them to C{write} all at once.  Whatever has been collected is
+        also written before waiting on a L{Deferred}, and when C{state} is
+        exhausted or fails.  If C{0}, each string is written as soon as it is
+        produced.
+    @type bufferSize: L{int}
+
     @return: C{None}
     """
+    buffered = []
+    bufferedSize = 0
     while True:
         try:
             element = next(state)
         except StopIteration:
+            if buffered:
+                write(b''.join(buffered))
             result.callback(None)
         except:
-            result.errback()
+            failure = Failure()
+            if buffered:
+                write(b''.join(buffered))
+            result.errback(failure)
         else:
             if type(element) is bytes:
-                write(element)
+                buffered.append(element)
+                bufferedSize += len(element)
+                if bufferedSize >= bufferSize:
+                    write(b''.join(buffered))
+                    buffered = []
+                    bufferedSize = 0
                 continue
             else:
+                if buffered:
+                    write(b''.join(buffered))
                 def cby(original):
-                    _writeFlattenedData(state, write, result)
+                    _writeFlattenedData(state, write, result, bufferSize)
                     return original
                 element.addCallbacks(cby, result.errback)
         break
 
 
 
-def flatten(request, root, write):
+def flatten(request, root, write, bufferSize=65536):
     """
     Incrementally write out a string representation of C{root} using C{write}.
 
@@ -393,16 +573,23 @@ def flatten(request, root, write):
         L{list}, L{GeneratorType}, L{Deferred}, or something that provides
         L{IRenderable}.
 
-    @param write: A callable which will be invoked with each L{bytes} produced
+    @param write: A callable which will be invoked with the L{bytes} produced
         by flattening C{root}.
 
+    @param bufferSize: The number of bytes to collect before calling
+        C{write}, so that a page is written in a few large pieces rather than
+        a great many small ones.  Anything collected so far is always written
+        before waiting for a L{Deferred} in C{root} to fire.  Pass C{0} to
+        call C{write} with each piece as soon as it is produced.
+    @type bufferSize: L{int}
+
     @return: A L{Deferred} which will be called back when C{root} has been
         completely flattened into C{write} or which will be errbacked if an
         unexpected exception occurs.
     """
     result = Deferred()
     state = _flattenTree(request, root)
-    _writeFlattenedData(state, write, result)
+    _writeFlattenedData(state, write, result, bufferSize)
     return result
 
 
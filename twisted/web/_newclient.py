@@ -29,6 +29,8 @@ Various other classes in this module support this usage:
 from __future__ import division, absolute_import
 __metaclass__ = type
 
+from collections import deque
+
 from zope.interface import implementer
 
 from twisted.python import log
@@ -54,6 +56,11 @@ HEADER = u'HEADER'
 BODY = u'BODY'
 DONE = u'DONE'
 
+# Requests with these methods may be sent before the responses to earlier
+# requests have been received, and sent again if no response is received.
+_IDEMPOTENT_METHODS = frozenset([
+    b"GET", b"HEAD", b"OPTIONS", b"DELETE", b"TRACE"])
+
 
 class BadHeaders(Exception):
     """
@@ -1296,6 +1303,18 @@ class TransportProxyProducer:
 
 
 
+def _isPipelinable(request):
+    """
+    Determine whether C{request} may be sent before the responses to earlier
+    requests on the same connection have been received.
+
+    @type request: L{Request}
+    """
+    return (request.method in _IDEMPOTENT_METHODS and
+            request.bodyProducer is None and request.persistent)
+
+
+
 class HTTP11ClientProtocol(Protocol):
     """
     L{HTTP11ClientProtocol} is an implementation of the HTTP 1.1 client
@@ -1356,6 +1375,20 @@ class HTTP11ClientProtocol(Protocol):
 
     @ivar _abortDeferreds: A list of C{Deferred} instances that will fire when
         the connection is lost.
+
+    @ivar maxPipelineDepth: The maximum number of requests which may have
+        been sent without their responses having been received.  Above 1,
+        while the instance is I{WAITING} for the response to an idempotent
+        request without a body, L{request} sends further such requests
+        instead of failing with L{RequestNotSent}.  Their responses are
+        parsed in turn once the responses before them have been received.
+    @type maxPipelineDepth: C{int}
+
+    @ivar _pipeline: A C{deque} of C{(request, deferred)} pairs for the
+        requests which have been sent after the current request, and the
+        L{Deferred}s which L{request} returned for them.  A request whose
+        L{Deferred} has already fired was cancelled; its response is read and
+        discarded when its turn comes.
     """
     _state = 'QUIESCENT'
     _parser = None
@@ -1363,11 +1396,13 @@ class HTTP11ClientProtocol(Protocol):
     _currentRequest = None
     _transportProxy = None
     _responseDeferred = None
+    maxPipelineDepth = 1
 
 
     def __init__(self, quiescentCallback=lambda c: None):
         self._quiescentCallback = quiescentCallback
         self._abortDeferreds = []
+        self._pipeline = deque()
 
 
     @property
@@ -1395,6 +1430,8 @@ class HTTP11ClientProtocol(Protocol):
             any more requests using this L{HTTP11ClientProtocol}.
         """
         if self._state != 'QUIESCENT':
+            if self._canPipeline() and _isPipelinable(request):
+                return self._pipelineRequest(request)
             return fail(RequestNotSent())
 
         self._state = 'TRANSMITTING'
@@ -1440,6 +1477,85 @@ class HTTP11ClientProtocol(Protocol):
         return self._finishedRequest
 
 
+    def _canPipeline(self):
+        """
+        Determine whether another request may be sent before the response to
+        the current request has been received.
+        """
+        return (self._state == 'WAITING' and
+                len(self._pipeline) + 1 < self.maxPipelineDepth and
+                _isPipelinable(self._currentRequest))
+
+
+    def _pipelineRequest(self, request):
+        """
+        Send a request while earlier requests are still waiting for their
+        responses.
+
+        @param request: An idempotent L{Request} without a body, which is
+            written to the transport at once.
+
+        @return: A L{Deferred} which will fire with the L{Response} to
+            C{request} once the responses before it have been received.
+        """
+        try:
+            request.writeTo(self.transport)
+        except:
+            return fail(RequestGenerationFailed([Failure()]))
+
+        def cancelRequest(ign):
+            # Only the response being parsed can't be skipped.  A request
+            # which is still queued stays in the pipeline, as its response
+            # will arrive anyway, but its Deferred fails with CancelledError
+            # now, which marks its response to be discarded.
+            if self._finishedRequest is finished:
+                self.transport.abortConnection()
+                self._disconnectParser(Failure(CancelledError()))
+        finished = Deferred(cancelRequest)
+        self._pipeline.append((request, finished))
+        return finished
+
+
+    def _nextPipelinedResponse(self, rest):
+        """
+        Start parsing the response to the oldest pipelined request.  If that
+        request was cancelled, its response is parsed but its body is
+        discarded.
+
+        @param rest: Bytes received after the end of the previous response,
+            which are the beginning of this one.
+        """
+        request, finished = self._pipeline.popleft()
+        self._state = 'WAITING'
+        self._currentRequest = request
+        self._finishedRequest = finished
+        self._transportProxy = TransportProxyProducer(self.transport)
+        self._parser = HTTPClientParser(request, self._finishResponse)
+        self._parser.makeConnection(self._transportProxy)
+        self._responseDeferred = self._parser._responseDeferred
+        if finished.called:
+            self._responseDeferred.addCallbacks(
+                lambda response: response.deliverBody(Protocol()),
+                lambda reason: None)
+        else:
+            self._responseDeferred.chainDeferred(finished)
+        if rest:
+            self.dataReceived(rest)
+
+
+    def _failPipeline(self, reason):
+        """
+        Fail the L{Deferred}s of the pipelined requests, to which no response
+        will be received, with L{ResponseNeverReceived}.
+
+        @type reason: L{Failure}
+        """
+        pipeline, self._pipeline = self._pipeline, deque()
+        for request, finished in pipeline:
+            if not finished.called:
+                finished.errback(Failure(ResponseNeverReceived([reason])))
+
+
     def _finishResponse(self, rest):
         """
         Called by an L{HTTPClientParser} to indicate that it has parsed a
@@ -1453,9 +1569,9 @@ class HTTP11ClientProtocol(Protocol):
 
 
     def _finishResponse_WAITING(self, rest):
-        # Currently the rest parameter is ignored. Don't forget to use it if
-        # we ever add support for pipelining. And maybe check what trailers
-        # mean.
+        # The rest parameter is only used when there are pipelined requests,
+        # as it is the beginning of the next response.  Maybe check what
+        # trailers mean.
         if self._state == 'WAITING':
             self._state = 'QUIESCENT'
         else:
@@ -1478,6 +1594,11 @@ class HTTP11ClientProtocol(Protocol):
         if ((b'close' in connHeaders) or self._state != "QUIESCENT" or
             not self._currentRequest.persistent):
             self._giveUp(Failure(reason))
+            self._failPipeline(Failure(reason))
+        elif self._pipeline:
+            self.transport.resumeProducing()
+            self._disconnectParser(reason)
+            self._nextPipelinedResponse(rest)
         else:
             # Just in case we had paused the transport, resume it before
             # considering it quiescent again.
@@ -1598,6 +1719,7 @@ class HTTP11ClientProtocol(Protocol):
         """
         self._disconnectParser(reason)
         self._state = 'CONNECTION_LOST'
+        self._failPipeline(reason)
 
 
     def _connectionLost_ABORTING(self, reason):
@@ -1607,6 +1729,7 @@ class HTTP11ClientProtocol(Protocol):
         """
         self._disconnectParser(Failure(ConnectionAborted()))
         self._state = 'CONNECTION_LOST'
+        self._failPipeline(Failure(ConnectionAborted()))
         for d in self._abortDeferreds:
             d.callback(None)
         self._abortDeferreds = []
@@ -22,13 +22,15 @@ except ImportError:
         return result.encode("charmap")
 
 import zlib
+from collections import deque
 from functools import wraps
 
 from zope.interface import implementer
 
 from twisted.python import log
 from twisted.python.compat import _PY3, networkString
-from twisted.python.compat import nativeString, intToBytes, unicode, itervalues
+from twisted.python.compat import (
+    nativeString, intToBytes, unicode, iteritems, itervalues)
 from twisted.python.deprecate import deprecatedModuleAttribute
 from twisted.python.failure import Failure
 from twisted.python.versions import Version
@@ -778,6 +780,7 @@ from twisted.web._newclient import ResponseDone, ResponseFailed
 from twisted.web._newclient import RequestNotSent, RequestTransmissionFailed
 from twisted.web._newclient import (
     ResponseNeverReceived, PotentialDataLoss, _WrapperException)
+from twisted.web._newclient import _IDEMPOTENT_METHODS
 
 
 
@@ -1203,6 +1206,14 @@ class HTTPConnectionPool(object):
     @ivar retryAutomatically: C{boolean} indicating whether idempotent
         requests should be retried once if no response was received.
 
+    @ivar pipelining: C{boolean} indicating whether L{getPipelinedConnection}
+        may supply connections which are still waiting for responses to
+        earlier requests.  Pipelining is off by default.
+
+    @ivar maxPipelineDepth: The maximum number of requests waiting for their
+        responses on a connection when C{pipelining} is on.
+    @type maxPipelineDepth: C{int}
+
     @ivar _factory: The factory used to connect to the proxy.
 
     @ivar _connections: Map (scheme, host, port) to lists of
@@ -1211,6 +1222,10 @@ class HTTPConnectionPool(object):
     @ivar _timeouts: Map L{HTTP11ClientProtocol} instances to a
         C{IDelayedCall} instance of their timeout.
 
+    @ivar _pipelines: Map (scheme, host, port) to lists of the
+        L{HTTP11ClientProtocol} instances supplied by L{getPipelinedConnection}
+        which have not yet finished their requests.
+
     @since: 12.1
     """
 
@@ -1218,12 +1233,15 @@ class HTTPConnectionPool(object):
     maxPersistentPerHost = 2
     cachedConnectionTimeout = 240
     retryAutomatically = True
+    pipelining = False
+    maxPipelineDepth = 4
 
     def __init__(self, reactor, persistent=True):
         self._reactor = reactor
         self.persistent = persistent
         self._connections = {}
         self._timeouts = {}
+        self._pipelines = {}
 
 
     def getConnection(self, key, endpoint):
@@ -1264,6 +1282,51 @@ class HTTPConnectionPool(object):
         return self._newConnection(key, endpoint)
 
 
+    def getPipelinedConnection(self, key, endpoint):
+        """
+        Supply a connection to be used for one idempotent HTTP request without
+        a body, such as a I{GET}.
+
+        If C{pipelining} is on, this may be a connection which is still
+        waiting for the responses to earlier requests, so that the request is
+        sent without waiting for them.  If the connection is lost before the
+        response to the request is received, the request is retried once on
+        another connection, if C{retryAutomatically} is set.
+
+        Otherwise, this is the same as L{getConnection}.
+
+        @param key: A unique key identifying connections that can be used
+            interchangeably.
+
+        @param endpoint: An endpoint that can be used to open a new connection
+            if no connection is available.
+
+        @return: A C{Deferred} that will fire with a L{HTTP11ClientProtocol}
+           (or a wrapper) that can be used to send a single HTTP request.
+        """
+        if not (self.pipelining and self.persistent):
+            return self.getConnection(key, endpoint)
+
+        connections = self._pipelines.get(key, [])
+        for connection in connections[:]:
+            if connection.state not in ("TRANSMITTING", "WAITING"):
+                # The connection was lost, or is about to be.
+                connections.remove(connection)
+            elif connection._canPipeline():
+                if self.retryAutomatically:
+                    newConnection = lambda: self.getConnection(key, endpoint)
+                    connection = _RetryingHTTP11ClientProtocol(
+                        connection, newConnection)
+                return defer.succeed(connection)
+
+        def connected(connection):
+            protocol = getattr(connection, '_clientProtocol', connection)
+            protocol.maxPipelineDepth = self.maxPipelineDepth
+            self._pipelines.setdefault(key, []).append(protocol)
+            return connection
+        return self.getConnection(key, endpoint).addCallback(connected)
+
+
     def _newConnection(self, key, endpoint):
         """
         Create a new connection.
@@ -1298,6 +1361,11 @@ class HTTPConnectionPool(object):
             except:
                 log.err()
             return
+        pipelines = self._pipelines.get(key)
+        if pipelines and connection in pipelines:
+            pipelines.remove(connection)
+            if not pipelines:
+                del self._pipelines[key]
         connections = self._connections.setdefault(key, [])
         if len(connections) == self.maxPersistentPerHost:
             dropped = connections.pop(0)
@@ -1330,6 +1398,410 @@ class HTTPConnectionPool(object):
 
 
 
+class HTTPConnectionPoolStatistics(object):
+    """
+    Statistics about the connections and queued requests of a
+    L{BoundedHTTPConnectionPool}.
+
+    @ivar idleConnectionCount: The number of cached connections waiting to be
+        reused.
+    @type idleConnectionCount: L{int}
+
+    @ivar busyConnectionCount: The number of connections being used for a
+        request.
+    @type busyConnectionCount: L{int}
+
+    @ivar connectingCount: The number of new connections being opened.
+    @type connectingCount: L{int}
+
+    @ivar queuedRequestCount: The number of requests waiting for a
+        connection because the pool is at one of its limits.
+    @type queuedRequestCount: L{int}
+
+    @ivar waitedRequestCount: The number of requests which have been given a
+        connection after waiting in the queue.
+    @type waitedRequestCount: L{int}
+
+    @ivar totalWaitTime: The number of seconds those requests spent in the
+        queue, in total.
+    @type totalWaitTime: L{float}
+
+    @ivar timedOutRequestCount: The number of requests which gave up waiting
+        in the queue after C{queueTimeout} seconds.
+    @type timedOutRequestCount: L{int}
+    """
+
+    def __init__(self, idleConnectionCount, busyConnectionCount,
+                 connectingCount, queuedRequestCount, waitedRequestCount,
+                 totalWaitTime, timedOutRequestCount):
+        self.idleConnectionCount = idleConnectionCount
+        self.busyConnectionCount = busyConnectionCount
+        self.connectingCount = connectingCount
+        self.queuedRequestCount = queuedRequestCount
+        self.waitedRequestCount = waitedRequestCount
+        self.totalWaitTime = totalWaitTime
+        self.timedOutRequestCount = timedOutRequestCount
+
+
+
+class _PooledHTTP11ClientProtocol(HTTP11ClientProtocol):
+    """
+    An L{HTTP11ClientProtocol} which tells a L{BoundedHTTPConnectionPool}
+    when its connection is lost.
+
+    @ivar _lostCallback: Called with this protocol after its connection is
+        lost.
+    """
+
+    def __init__(self, quiescentCallback, lostCallback):
+        HTTP11ClientProtocol.__init__(self, quiescentCallback)
+        self._lostCallback = lostCallback
+
+
+    def connectionLost(self, reason):
+        HTTP11ClientProtocol.connectionLost(self, reason)
+        self._lostCallback(self)
+
+
+
+class _BoundedHTTP11ClientFactory(_HTTP11ClientFactory):
+    """
+    A factory for L{_PooledHTTP11ClientProtocol}, used by
+    L{BoundedHTTPConnectionPool}.
+
+    @ivar _lostCallback: The callback passed to protocol instances, used to
+        tell the pool that a connection was lost.
+    """
+
+    def __init__(self, quiescentCallback, lostCallback):
+        _HTTP11ClientFactory.__init__(self, quiescentCallback)
+        self._lostCallback = lostCallback
+
+
+    def buildProtocol(self, addr):
+        return _PooledHTTP11ClientProtocol(self._quiescentCallback,
+                                           self._lostCallback)
+
+
+
+class _QueuedRequest(object):
+    """
+    A call to L{BoundedHTTPConnectionPool.getConnection} waiting for a
+    connection.
+
+    @ivar key: The key passed to C{getConnection}.
+
+    @ivar endpoint: The endpoint passed to C{getConnection}.
+
+    @ivar order: The position of this request in the queue of the pool, used
+        to serve requests for different keys in the order they were made.
+    @type order: L{int}
+
+    @ivar queuedAt: When this request was queued.
+    @type queuedAt: L{float}
+
+    @ivar deferred: The L{defer.Deferred} returned by C{getConnection}.
+
+    @ivar timeoutCall: The C{IDelayedCall} which gives up waiting, or C{None}.
+
+    @ivar connecting: Once the request has left the queue, the
+        L{defer.Deferred} for the connection it is being given.
+    """
+
+    def __init__(self, key, endpoint, order, queuedAt):
+        self.key = key
+        self.endpoint = endpoint
+        self.order = order
+        self.queuedAt = queuedAt
+        self.deferred = None
+        self.timeoutCall = None
+        self.connecting = None
+
+
+
+class BoundedHTTPConnectionPool(HTTPConnectionPool):
+    """
+    An L{HTTPConnectionPool} which limits the number of connections it uses at
+    once.
+
+    L{HTTPConnectionPool} only limits the number of idle connections it
+    caches, and opens a new connection for every request which finds none.
+    This pool also limits the number of connections which are in use, or
+    being opened, for each key and in total.  When a request would go over
+    either limit, it waits in a queue until a connection is available.
+    Queued requests are given connections in the order they were made.
+
+    Idle connections are reused most recently used first, so the connections
+    which are kept open are the ones which are being used.  The idle
+    connections do not count towards the limits; there are at most
+    C{maxPersistentPerHost} of them for each key.
+
+    @ivar maxConnectionsPerHost: The maximum number of connections in use or
+        being opened for a key, or C{None} for no limit.
+    @type maxConnectionsPerHost: L{int} or C{None}
+
+    @ivar maxConnections: The maximum number of connections in use or being
+        opened for all keys, or C{None} for no limit.
+    @type maxConnections: L{int} or C{None}
+
+    @ivar queueTimeout: The number of seconds a request will wait in the
+        queue before its L{defer.Deferred} fails with
+        L{defer.TimeoutError}, or C{None} to wait indefinitely.
+    @type queueTimeout: L{float} or C{None}
+
+    @ivar _busy: Map L{HTTP11ClientProtocol} instances in use to their keys.
+
+    @ivar _inUse: Map keys to the number of connections in use or being
+        opened for them.
+
+    @ivar _inUseCount: The number of connections in use or being opened for
+        all keys.
+
+    @ivar _queued: Map keys to C{deque}s of the L{_QueuedRequest}s waiting
+        for a connection for them.
+
+    @ivar _queuedCount: The number of L{_QueuedRequest}s in C{_queued}.
+
+    @ivar _queueOrder: The C{order} of the next L{_QueuedRequest}.
+
+    @since: 16.2
+    """
+
+    _factory = _BoundedHTTP11ClientFactory
+    maxConnectionsPerHost = 8
+    maxConnections = None
+    queueTimeout = None
+
+    def __init__(self, reactor, persistent=True):
+        HTTPConnectionPool.__init__(self, reactor, persistent)
+        self._busy = {}
+        self._inUse = {}
+        self._inUseCount = 0
+        self._queued = {}
+        self._queuedCount = 0
+        self._queueOrder = 0
+        self._waitedCount = 0
+        self._totalWaitTime = 0.0
+        self._timedOutCount = 0
+
+
+    def getConnection(self, key, endpoint):
+        """
+        Supply a connection, reused from the pool or newly created, to be used
+        for one HTTP request, waiting if the pool is at one of its limits.
+
+        @see: L{HTTPConnectionPool.getConnection}
+        """
+        if not self._queued.get(key) and self._hasCapacity(key):
+            self._acquire(key)
+            return self._supply(key, endpoint)
+        return self._enqueue(key, endpoint)
+
+
+    def statistics(self):
+        """
+        Gather information on the current status of this pool.
+
+        @return: An L{HTTPConnectionPoolStatistics}.
+        """
+        idle = 0
+        for connections in itervalues(self._connections):
+            idle += len(connections)
+        return HTTPConnectionPoolStatistics(
+            idleConnectionCount=idle,
+            busyConnectionCount=len(self._busy),
+            connectingCount=self._inUseCount - len(self._busy),
+            queuedRequestCount=self._queuedCount,
+            waitedRequestCount=self._waitedCount,
+            totalWaitTime=self._totalWaitTime,
+            timedOutRequestCount=self._timedOutCount)
+
+
+    def _hasCapacity(self, key):
+        """
+        Determine whether another connection for C{key} may be used without
+        going over C{maxConnectionsPerHost} or C{maxConnections}.
+        """
+        if (self.maxConnections is not None and
+                self._inUseCount >= self.maxConnections):
+            return False
+        return (self.maxConnectionsPerHost is None or
+                self._inUse.get(key, 0) < self.maxConnectionsPerHost)
+
+
+    def _acquire(self, key):
+        """
+        Count a connection for C{key} as in use.
+        """
+        self._inUse[key] = self._inUse.get(key, 0) + 1
+        self._inUseCount += 1
+
+
+    def _release(self, key):
+        """
+        Stop counting a connection for C{key} as in use, and give the
+        capacity this frees to the requests waiting for it.
+        """
+        self._inUse[key] -= 1
+        if not self._inUse[key]:
+            del self._inUse[key]
+        self._inUseCount -= 1
+        self._dequeue()
+
+
+    def _supply(self, key, endpoint):
+        """
+        Supply a connection for a request which has been counted as in use,
+        preferring the most recently cached connection for C{key}.
+
+        @return: A L{defer.Deferred} which fires with the connection.
+        """
+        connections = self._connections.get(key)
+        while connections:
+            connection = connections.pop()
+            self._timeouts.pop(connection).cancel()
+            if connection.state == "QUIESCENT":
+                self._busy[connection] = key
+                if self.retryAutomatically:
+                    newConnection = lambda: self.getConnection(key, endpoint)
+                    connection = _RetryingHTTP11ClientProtocol(
+                        connection, newConnection)
+                return defer.succeed(connection)
+
+        def connected(connection):
+            self._busy[connection] = key
+            return connection
+
+        def failed(reason):
+            self._release(key)
+            return reason
+
+        return self._newConnection(key, endpoint).addCallbacks(
+            connected, failed)
+
+
+    def _newConnection(self, key, endpoint):
+        """
+        Create a new connection which tells this pool when it is lost.
+        """
+        def quiescentCallback(protocol):
+            self._putConnection(key, protocol)
+        def lostCallback(protocol):
+            self._connectionLost(key, protocol)
+        factory = self._factory(quiescentCallback, lostCallback)
+        return endpoint.connect(factory)
+
+
+    def _putConnection(self, key, connection):
+        """
+        Return a connection which has finished its request to the pool, and
+        give it to the next request waiting for one.
+        """
+        HTTPConnectionPool._putConnection(self, key, connection)
+        if self._busy.pop(connection, None) is not None:
+            self._release(key)
+
+
+    def _connectionLost(self, key, connection):
+        """
+        Forget a connection which has been lost, whether it was in use or
+        cached.
+        """
+        if self._busy.pop(connection, None) is not None:
+            self._release(key)
+        elif connection in self._timeouts:
+            self._connections[key].remove(connection)
+            self._timeouts.pop(connection).cancel()
+
+
+    def _enqueue(self, key, endpoint):
+        """
+        Queue a request for a connection.
+
+        @return: A L{defer.Deferred} which fires with the connection once
+            there is capacity for it.
+        """
+        queued = _QueuedRequest(key, endpoint, self._queueOrder,
+                                self._reactor.seconds())
+        self._queueOrder += 1
+
+        def cancel(ignored):
+            if queued.connecting is not None:
+                queued.connecting.cancel()
+            else:
+                self._unqueue(queued)
+
+        queued.deferred = defer.Deferred(cancel)
+        if self.queueTimeout is not None:
+            queued.timeoutCall = self._reactor.callLater(
+                self.queueTimeout, self._timeOut, queued)
+        self._queued.setdefault(key, deque()).append(queued)
+        self._queuedCount += 1
+        return queued.deferred
+
+
+    def _unqueue(self, queued):
+        """
+        Remove a request from the queue.
+        """
+        requests = self._queued[queued.key]
+        requests.remove(queued)
+        if not requests:
+            del self._queued[queued.key]
+        self._queuedCount -= 1
+        if queued.timeoutCall is not None and queued.timeoutCall.active():
+            queued.timeoutCall.cancel()
+
+
+    def _timeOut(self, queued):
+        """
+        Fail a request which has waited C{queueTimeout} seconds.
+        """
+        self._unqueue(queued)
+        self._timedOutCount += 1
+        queued.deferred.errback(defer.TimeoutError(
+            "No connection for %r after waiting %s seconds." % (
+                queued.key, self.queueTimeout)))
+
+
+    def _dequeue(self):
+        """
+        Give connections to queued requests, oldest first, while the pool is
+        below its limits.
+        """
+        while self._queuedCount:
+            if (self.maxConnections is not None and
+                    self._inUseCount >= self.maxConnections):
+                return
+            oldest = None
+            for key, requests in iteritems(self._queued):
+                if ((oldest is None or requests[0].order < oldest.order) and
+                        self._hasCapacity(key)):
+                    oldest = requests[0]
+            if oldest is None:
+                return
+            self._unqueue(oldest)
+            self._waitedCount += 1
+            self._totalWaitTime += self._reactor.seconds() - oldest.queuedAt
+            self._acquire(oldest.key)
+            oldest.connecting = self._supply(oldest.key, oldest.endpoint)
+            oldest.connecting.addBoth(self._supplied, oldest)
+
+
+    def _supplied(self, result, queued):
+        """
+        Fire the L{defer.Deferred} of a request which has left the queue with
+        its connection, unless the request was cancelled meanwhile, in which
+        case the connection goes back to the pool.
+        """
+        if not queued.deferred.called:
+            queued.deferred.callback(result)
+        elif not isinstance(result, Failure):
+            connection = getattr(result, '_clientProtocol', result)
+            self._putConnection(queued.key, connection)
+
+
+
 class _AgentBase(object):
     """
     Base class offering common facilities for L{Agent}-type classes.
@@ -1373,7 +1845,11 @@ class _AgentBase(object):
                                                 parsedURI.host,
                                                 parsedURI.port))
 
-        d = self._pool.getConnection(key, endpoint)
+        if (bodyProducer is None and method in _IDEMPOTENT_METHODS and
+                getattr(self._pool, 'pipelining', False)):
+            d = self._pool.getPipelinedConnection(key, endpoint)
+        else:
+            d = self._pool.getConnection(key, endpoint)
         def cbConnected(proto):
             return proto.request(
                 Request._construct(method, requestPath, headers, bodyProducer,
@@ -2167,4 +2643,6 @@ __all__ = [
     'HTTPClientFactory', 'HTTPDownloader', 'getPage', 'downloadPage',
     'ResponseDone', 'Response', 'ResponseFailed', 'Agent', 'CookieAgent',
     'ProxyAgent', 'ContentDecoderAgent', 'GzipDecoder', 'RedirectAgent',
-    'HTTPConnectionPool', 'readBody', 'BrowserLikeRedirectAgent', 'URI']
+    'HTTPConnectionPool', 'BoundedHTTPConnectionPool',
+    'HTTPConnectionPoolStatistics', 'readBody', 'BrowserLikeRedirectAgent',
+    'URI']
@@ -51,7 +51,7 @@ __all__ = [
     'stringToDatetime', 'toChunk', 'fromChunk', 'parseContentRange',
 
     'StringTransport', 'HTTPClient', 'NO_BODY_CODES', 'Request',
-    'PotentialDataLoss', 'HTTPChannel', 'HTTPFactory',
+    'PotentialDataLoss', 'HTTPChannel', 'HTTPFactory', 'ThreadedAccessLog',
     ]
 
 
@@ -64,6 +64,8 @@ import time
 import calendar
 import warnings
 import os
+import threading
+from functools import partial
 from io import BytesIO as StringIO
 
 try:
@@ -94,6 +96,7 @@ from twisted.python.compat import (
 from twisted.python.constants import NamedConstant, Names
 from twisted.python.deprecate import deprecated
 from twisted.python import log
+from twisted.logger import Logger
 from twisted.python.versions import Version
 from twisted.python.components import proxyForInterface
 from twisted.internet import interfaces, protocol, address
@@ -535,6 +538,28 @@ class HTTPClient(basic.LineReceiver):
 NO_BODY_CODES = (204, 304)
 
 
+
+class _LazyArgs(object):
+    """
+    The C{args} attribute of a L{Request} which has not set it.
+
+    This is C{None}, as C{args} is until a request has been received, except
+    for a request received by an L{HTTPChannel} with C{bulkHeadParsing} set,
+    which only parses its query string when C{args} is first used.  The
+    result is then kept in the request's C{__dict__}, which takes precedence
+    over this from then on.
+    """
+
+    def __get__(self, request, cls=None):
+        if request is None:
+            return None
+        queryString = request.__dict__.pop('_queryString', None)
+        if queryString is None:
+            return None
+        args = request.__dict__['args'] = parse_qs(queryString, 1)
+        return args
+
+
 @implementer(interfaces.IConsumer)
 class Request:
     """
@@ -579,6 +604,24 @@ class Request:
 
     @ivar _send100: Whether to send a 100-Continue response when unqueued.
     @type _send100: L{bool}
+
+    @ivar _parseArgsLazily: Whether the query string is only parsed into
+        C{args} when C{args} is first used.  This is set for requests created
+        by an L{HTTPChannel} with C{bulkHeadParsing} set, which likewise leave
+        the parsing of C{received_cookies} until they are first used.
+    @type _parseArgsLazily: L{bool}
+
+    @ivar _startedAt: When this request was created, which is when its
+        request line was received.  See L{_currentTime}.
+    @type _startedAt: L{float}
+
+    @ivar _firstByteAt: When the status line and headers of the response
+        were written, or C{None} if they have not been yet.
+    @type _firstByteAt: L{float} or C{None}
+
+    @ivar _finishedAt: When L{finish} was called, or C{None} if it has not
+        been yet.
+    @type _finishedAt: L{float} or C{None}
     """
     producer = None
     finished = 0
@@ -592,13 +635,16 @@ class Request:
     sentLength = 0 # content-length of response, or total bytes sent via chunking
     etag = None
     lastModified = None
-    args = None
+    args = _LazyArgs()
     path = None
     content = None
     _forceSSL = 0
     _disconnected = False
     _queuedHeaders = None
     _send100 = False
+    _parseArgsLazily = False
+    _firstByteAt = None
+    _finishedAt = None
 
     def __init__(self, channel, queued):
         """
@@ -610,9 +656,14 @@ class Request:
         self._channel = channel
         self.queued = queued
         self.requestHeaders = Headers()
-        self.received_cookies = {}
+        if getattr(channel, 'bulkHeadParsing', False):
+            # received_cookies is computed by __getattr__ when first used.
+            self._parseArgsLazily = True
+        else:
+            self.received_cookies = {}
         self.responseHeaders = Headers()
         self.cookies = [] # outgoing cookies
+        self._startedAt = self._currentTime()
 
         if queued:
             self._transport = StringTransport()
@@ -638,6 +689,10 @@ class Request:
                 stacklevel=2
             )
             attr = '_channel'
+        elif attr == 'received_cookies':
+            self.received_cookies = {}
+            self.parseCookies()
+            return self.received_cookies
 
         try:
             return self.__dict__[attr]
@@ -787,7 +842,6 @@ class Request:
         @param version: The HTTP version of this request.
         """
         self.content.seek(0,0)
-        self.args = {}
 
         self.method, self.uri = command, path
         self.clientproto = version
@@ -795,9 +849,13 @@ class Request:
 
         if len(x) == 1:
             self.path = self.uri
+            self.args = {}
         else:
             self.path, argstring = x
-            self.args = parse_qs(argstring, 1)
+            if self._parseArgsLazily:
+                self._queryString = argstring
+            else:
+                self.args = parse_qs(argstring, 1)
 
         # cache the client and server information, we'll need this later to be
         # serialized and sent with the request so CGIs will work remotely
@@ -805,12 +863,12 @@ class Request:
         self.host = self._channel.getHost()
 
         # Argument processing
-        args = self.args
         ctype = self.requestHeaders.getRawHeaders(b'content-type')
         if ctype is not None:
             ctype = ctype[0]
 
         if self.method == b"POST" and ctype:
+            args = self.args
             mfd = b'multipart/form-data'
             key, pdict = _parseHeader(ctype)
             if key == b'application/x-www-form-urlencoded':
@@ -930,6 +988,49 @@ class Request:
         return self.notifications[-1]
 
 
+    def _currentTime(self):
+        """
+        Get the current time, for timing this request.
+
+        @return: The time according to the reactor of the factory of the
+            channel this request was received on, or according to
+            L{time.time} if there is no such factory.
+        @rtype: L{float}
+        """
+        try:
+            return self._channel.factory._reactor.seconds()
+        except AttributeError:
+            return time.time()
+
+
+    def getTimeToFirstByte(self):
+        """
+        Get how long it took to start responding to this request.
+
+        @return: The number of seconds between receiving the request line and
+            writing the status line and headers of the response, or C{None}
+            if they have not been written yet.
+        @rtype: L{float} or C{None}
+        """
+        if self._firstByteAt is None:
+            return None
+        return self._firstByteAt - self._startedAt
+
+
+    def getDuration(self):
+        """
+        Get how long it took to respond to this request.
+
+        @return: The number of seconds between receiving the request line and
+            the response being finished, or C{None} if it has not been
+            finished yet.
+        @rtype: L{float} or C{None}
+        """
+        if self._finishedAt is None:
+            return None
+        return self._finishedAt - self._startedAt
+
+
     def finish(self):
         """
         Indicate that all response data has been written to this L{Request}.
@@ -950,6 +1051,8 @@ class Request:
             # write last chunk and closing CRLF
             self._transport.write(b"0\r\n\r\n")
 
+        self._finishedAt = self._currentTime()
+
         # log request
         if hasattr(self._channel, "factory"):
             self._channel.factory.log(self)
@@ -972,6 +1075,7 @@ class Request:
                                'Request.finish was called.')
         if not self.startedWriting:
             self.startedWriting = 1
+            self._firstByteAt = self._currentTime()
             version = self.clientproto
             code = intToBytes(self.code)
             reason = self.code_message
@@ -1035,6 +1139,47 @@ class Request:
             else:
                 self._transport.write(data)
 
+
+    def _sendFile(self, fileObject, offset, count):
+        """
+        Write part of a file as response data with the transport's
+        C{_sendFile} (see L{twisted.internet.tcp.Connection._sendFile}), so
+        that it is never read into memory.
+
+        The response headers are written first if necessary, as by L{write}.
+
+        @param fileObject: A file opened for reading, which has a C{fileno}
+            method.  It must not be closed until the returned L{Deferred}
+            fires.
+
+        @param offset: The offset in the file of the first byte to write.
+        @type offset: C{int}
+
+        @param count: The number of bytes to write.
+        @type count: C{int}
+
+        @return: A L{Deferred} which fires once the data has been written, or
+            C{None} if the response can't be written this way (for example
+            because it is queued behind another response, chunked, or the
+            transport doesn't support it), in which case the data must be
+            written with L{write} instead.
+        """
+        if self.queued or self.finished:
+            return None
+        self.write(b"")
+        if (self.chunked or self.method == b"HEAD" or
+                self.code in NO_BODY_CODES):
+            return None
+        sendFile = getattr(self._channel, "_sendFile", None)
+        if sendFile is None:
+            return None
+        d = sendFile(fileObject, offset, count)
+        if d is None:
+            return None
+        def sent(ignored):
+            self.sentLength += count
+        return d.addCallback(sent)
+
     def addCookie(self, k, v, expires=None, domain=None, path=None,
                   max_age=None, comment=None, secure=None, httpOnly=False):
         """
@@ -1712,10 +1857,30 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
 
     @ivar _receivedHeaderSize: Bytes received so far for the header.
     @type _receivedHeaderSize: C{int}
+
+    @ivar maxPipelineDepth: Maximum number of pipelined requests which may be
+        outstanding at once: received, but not yet completely responded to.
+        Later requests are dispatched while earlier ones are still being
+        rendered, and their responses are buffered until it is their turn to
+        be written.  Once this many are outstanding, no more data is read
+        from the transport until one of them is finished.
+    @type maxPipelineDepth: C{int}
+
+    @ivar _pipelinePaused: Whether reading from the transport has been paused
+        because C{maxPipelineDepth} requests are outstanding.
+    @type _pipelinePaused: C{bool}
+
+    @ivar bulkHeadParsing: If C{True}, the head of each request is parsed
+        all at once when the blank line ending it has been received, rather
+        than a line at a time through L{lineReceived} and L{headerReceived},
+        which are then not called.  The query arguments and cookies of the
+        request are also only parsed when they are first used.
+    @type bulkHeadParsing: C{bool}
     """
 
     maxHeaders = 500
     totalHeadersSize = 16384
+    maxPipelineDepth = 16
 
     length = 0
     persistent = 1
@@ -1729,6 +1894,8 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
     _savedTimeOut = None
     _receivedHeaderCount = 0
     _receivedHeaderSize = 0
+    _pipelinePaused = False
+    bulkHeadParsing = False
 
     def __init__(self):
         # the request queue
@@ -1741,6 +1908,144 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         self.setTimeout(self.timeOut)
 
 
+    def dataReceived(self, data):
+        """
+        Parse requests from C{data}, a line at a time or, if
+        C{bulkHeadParsing} is set, a head at a time.
+        """
+        if not self.bulkHeadParsing:
+            return basic.LineReceiver.dataReceived(self, data)
+
+        if self._busyReceiving:
+            self._buffer += data
+            return
+
+        self.resetTimeout()
+        try:
+            self._busyReceiving = True
+            self._buffer += data
+            while self._buffer and not self.paused:
+                if self.line_mode:
+                    # Ignore empty lines before the request line, as
+                    # allowed by RFC 7230, section 3.5.
+                    if self._buffer.startswith(b"\r\n"):
+                        self._buffer = self._buffer.lstrip(b"\r\n")
+                        continue
+                    end = self._buffer.find(b"\r\n\r\n")
+                    if end == -1:
+                        # Reject requests without a version, such as HTTP/0.9
+                        # ones, without waiting for headers which won't come.
+                        lineEnd = self._buffer.find(b"\r\n")
+                        if (len(self._buffer) > self.totalHeadersSize or
+                                lineEnd != -1 and
+                                len(self._buffer[:lineEnd].split()) != 3):
+                            self._respondToBadRequestAndDisconnect()
+                        return
+                    head = self._buffer[:end]
+                    self._buffer = self._buffer[end + 4:]
+                    self._headReceived(head)
+                    if self.transport.disconnecting:
+                        return
+                else:
+                    data = self._buffer
+                    self._buffer = b''
+                    self.rawDataReceived(data)
+        finally:
+            self._busyReceiving = False
+
+
+    def _headReceived(self, head):
+        """
+        Parse the complete head of a request, and either dispatch the request
+        or start receiving its body.
+
+        @param head: The request line and headers, without the blank line
+            which ended them.
+        @type head: C{bytes}
+        """
+        if not self.persistent:
+            # As in lineReceived, drop any data which the client (illegally)
+            # sent after the last request.
+            self.dataReceived = self.lineReceived = lambda *args: None
+            self._buffer = b''
+            return
+
+        if len(head) > self.totalHeadersSize:
+            self._respondToBadRequestAndDisconnect()
+            return
+
+        request = self.requestFactory(self, len(self.requests))
+        self.requests.append(request)
+
+        lines = head.split(b"\r\n")
+        parts = lines[0].split()
+        if len(parts) != 3:
+            self._respondToBadRequestAndDisconnect()
+            return
+        command, path, version = parts
+        try:
+            command.decode("ascii")
+        except UnicodeDecodeError:
+            self._respondToBadRequestAndDisconnect()
+            return
+        self._command = command
+        self._path = path
+        self._version = version
+
+        if len(lines) > self.maxHeaders + 1:
+            self._respondToBadRequestAndDisconnect()
+            return
+        rawHeaders = {}
+        values = None
+        for i in range(1, len(lines)):
+            line = lines[i]
+            if line[:1] in (b' ', b'\t'):
+                # Keep obsolete line folding as lineReceived does: join the
+                # continuation to the header line with a newline, and only
+                # strip the ends of the whole value.
+                if values is None:
+                    self._respondToBadRequestAndDisconnect()
+                    return
+                header = header + b'\n' + line
+                values[-1] = header.partition(b':')[2].strip()
+                continue
+            header = line
+            name, sep, value = line.partition(b':')
+            if not sep:
+                self._respondToBadRequestAndDisconnect()
+                return
+            name = name.lower()
+            values = rawHeaders.get(name)
+            if values is None:
+                values = rawHeaders[name] = []
+            values.append(value.strip())
+        request.requestHeaders._rawHeaders.update(rawHeaders)
+
+        transferEncoding = rawHeaders.get(b'transfer-encoding')
+        contentLength = rawHeaders.get(b'content-length')
+        if (transferEncoding is not None and
+                transferEncoding[-1].lower() == b'chunked'):
+            self.length = None
+            self._transferDecoder = _ChunkedTransferDecoder(
+                request.handleContentChunk, self._finishRequestBody)
+        elif contentLength is not None:
+            try:
+                self.length = int(contentLength[-1])
+            except ValueError:
+                self._respondToBadRequestAndDisconnect()
+                self.length = None
+                return
+            self._transferDecoder = _IdentityTransferDecoder(
+                self.length, request.handleContentChunk,
+                self._finishRequestBody)
+
+        self.allHeadersReceived()
+        if self.length == 0:
+            self.allContentReceived()
+        else:
+            self.setRawMode()
+
+
     def lineReceived(self, line):
         """
         Called for each line from request until the end of headers when
@@ -1874,6 +2179,13 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         req = self.requests[-1]
         req.requestReceived(command, path, version)
 
+        if (len(self.requests) >= self.maxPipelineDepth and
+                not self._pipelinePaused):
+            # Stop parsing buffered requests and reading new ones until a
+            # response is finished.
+            self._pipelinePaused = True
+            self.pauseProducing()
+
 
     def rawDataReceived(self, data):
         self.resetTimeout()
@@ -1885,7 +2197,8 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
 
     def allHeadersReceived(self):
         req = self.requests[-1]
-        req.parseCookies()
+        if not self.bulkHeadParsing:
+            req.parseCookies()
         self.persistent = self.checkPersistence(req, self._version)
         req.gotLength(self.length)
         # Handle 'Expect: 100-continue' with automated 100 response code,
@@ -1956,6 +2269,11 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             else:
                 if self._savedTimeOut:
                     self.setTimeout(self._savedTimeOut)
+
+            if (self._pipelinePaused and
+                    len(self.requests) < self.maxPipelineDepth):
+                self._pipelinePaused = False
+                self.resumeProducing()
         else:
             self.transport.loseConnection()
 
@@ -2064,6 +2382,28 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         self.transport.writeSequence(iovec)
 
 
+    def _sendFile(self, fileObject, offset, count):
+        """
+        Called by L{Request} objects to write part of a file as response data,
+        if the transport can.
+
+        The transport's C{_sendFile} is looked up on its class, so that a
+        wrapping transport which forwards unknown attributes to the transport
+        it wraps, such as a L{twisted.protocols.policies.ProtocolWrapper},
+        is never bypassed.
+
+        @see: L{twisted.internet.tcp.Connection._sendFile}
+
+        @return: The L{Deferred} returned by the transport's C{_sendFile}, or
+            C{None} if the transport can't write files.
+        """
+        sendFile = getattr(self.transport.__class__, "_sendFile", None)
+        if sendFile is None:
+            return None
+        assert self._sendState == _ChannelSendState.SENT_HEADERS
+        return sendFile(self.transport, fileObject, offset, count)
+
+
     def getPeer(self):
         """
         Get the remote address of this connection.
@@ -2148,6 +2488,41 @@ def _escape(s):
 
 
 
+def _formatCombinedLogLine(ip, timestamp, method, uri, protocol, code,
+                           length, referrer, agent):
+    """
+    Format the fields of a I{combined log format} line.
+
+    @param ip: The client's address, or C{None}.
+    @param timestamp: The time of the request, formatted for the log.
+    @param method: The request method.
+    @param uri: The request URI.
+    @param protocol: The protocol version of the request.
+    @param code: The response code.
+    @param length: The number of bytes sent in the response body, or C{0} or
+        C{None} if none were.
+    @param referrer: The value of the I{Referer} header, or C{None}.
+    @param agent: The value of the I{User-Agent} header, or C{None}.
+
+    @return: A combined log formatted log line.
+    @rtype: L{unicode}
+    """
+    return (
+        u'"%(ip)s" - - %(timestamp)s "%(method)s %(uri)s %(protocol)s" '
+        u'%(code)d %(length)s "%(referrer)s" "%(agent)s"' % dict(
+            ip=_escape(ip or b"-"),
+            timestamp=timestamp,
+            method=_escape(method),
+            uri=_escape(uri),
+            protocol=_escape(protocol),
+            code=code,
+            length=length or u"-",
+            referrer=_escape(referrer or b"-"),
+            agent=_escape(agent or b"-"),
+            ))
+
+
+
 @provider(IAccessLogFormatter)
 def combinedLogFormatter(timestamp, request):
     """
@@ -2155,22 +2530,10 @@ def combinedLogFormatter(timestamp, request):
 
     @see: L{IAccessLogFormatter}
     """
-    referrer = _escape(request.getHeader(b"referer") or b"-")
-    agent = _escape(request.getHeader(b"user-agent") or b"-")
-    line = (
-        u'"%(ip)s" - - %(timestamp)s "%(method)s %(uri)s %(protocol)s" '
-        u'%(code)d %(length)s "%(referrer)s" "%(agent)s"' % dict(
-            ip=_escape(request.getClientIP() or b"-"),
-            timestamp=timestamp,
-            method=_escape(request.method),
-            uri=_escape(request.uri),
-            protocol=_escape(request.clientproto),
-            code=request.code,
-            length=request.sentLength or u"-",
-            referrer=referrer,
-            agent=agent,
-            ))
-    return line
+    return _formatCombinedLogLine(
+        request.getClientIP(), timestamp, request.method, request.uri,
+        request.clientproto, request.code, request.sentLength,
+        request.getHeader(b"referer"), request.getHeader(b"user-agent"))
 
 
 
@@ -2267,6 +2630,16 @@ class _GenericHTTPChannelProtocol(proxyForInterface(IProtocol, "_channel")):
         self._channel.requestFactory = value
 
 
+    @property
+    def bulkHeadParsing(self):
+        return self._channel.bulkHeadParsing
+
+
+    @bulkHeadParsing.setter
+    def bulkHeadParsing(self, value):
+        self._channel.bulkHeadParsing = value
+
+
     @property
     def site(self):
         return self._channel.site
@@ -2314,6 +2687,184 @@ def _genericHTTPChannelProtocolFactory(self):
 
 
 
+class ThreadedAccessLog(object):
+    """
+    A file-like wrapper around an access log file which takes the writing of
+    log lines off of the reactor thread.
+
+    Lines passed to L{write} are kept in memory and written to the wrapped
+    file in batches by a dedicated thread, so that a slow disk delays only the
+    access log rather than every connection served by the reactor.  Each batch
+    holds all of the lines logged since the previous one began to be written.
+
+    The number of lines kept in memory is bounded by C{maxPending}.  What
+    happens to further lines depends on C{dropWhenFull}: either they are
+    discarded and counted in L{dropped}, or the reactor thread waits for the
+    lines already pending to be written and then writes the new line itself.
+
+    @ivar dropped: The number of lines which have been discarded because too
+        many were already waiting to be written.
+    @type dropped: C{int}
+
+    @ivar _logFile: The wrapped log file.
+
+    @ivar _worker: The L{IExclusiveWorker
+        <twisted._threads._ithreads.IExclusiveWorker>} which writes batches.
+
+    @ivar _thread: The thread started for C{_worker}, or C{None} if a worker
+        was supplied.
+
+    @ivar _pending: The lines waiting to be written.
+    @type _pending: C{list} of C{bytes}
+
+    @ivar _scheduled: Whether a batch has been given to C{_worker} and has
+        not yet taken the lines in C{_pending}.
+    @type _scheduled: C{bool}
+
+    @ivar _pendingLock: Protects C{_pending}, C{_scheduled} and C{_dropping}.
+
+    @ivar _writeLock: Held while lines are taken from C{_pending} and written
+        to C{_logFile}, so that they are written in the order they were
+        logged whichever thread writes them.
+
+    @ivar _dropping: Whether lines have been dropped since the last batch was
+        written, so that this is only reported once for each burst.
+    @type _dropping: C{bool}
+    """
+    dropped = 0
+
+    def __init__(self, logFile, maxPending=10000, dropWhenFull=True,
+                 worker=None):
+        """
+        @param logFile: The file to write lines to.  It will only be written
+            to, flushed and closed by one thread at a time.
+        @type logFile: A file-like object, such as a
+            L{twisted.python.logfile.LogFile}.
+
+        @param maxPending: The largest number of lines to keep in memory while
+            they wait to be written.
+        @type maxPending: C{int}
+
+        @param dropWhenFull: If C{True}, lines logged while C{maxPending} lines
+            are waiting are discarded.  If C{False}, they are written from the
+            thread calling L{write} once the lines before them have been.
+        @type dropWhenFull: C{bool}
+
+        @param worker: The L{IExclusiveWorker
+            <twisted._threads._ithreads.IExclusiveWorker>} to write lines with,
+            or C{None} to start a new thread for this.
+        """
+        self._logFile = logFile
+        self.maxPending = maxPending
+        self.dropWhenFull = dropWhenFull
+        self._pending = []
+        self._scheduled = False
+        self._dropping = False
+        self._pendingLock = threading.Lock()
+        self._writeLock = threading.Lock()
+        self._thread = None
+
+        if worker is None:
+            from twisted._threads import ThreadWorker
+            try:
+                from Queue import Queue
+            except ImportError:
+                from queue import Queue
+
+            def startThread(target):
+                self._thread = threading.Thread(
+                    target=target, name="twisted.web.http access log")
+                self._thread.daemon = True
+                self._thread.start()
+
+            worker = ThreadWorker(startThread, Queue())
+        self._worker = worker
+
+
+    def write(self, line):
+        """
+        Arrange for a line to be written to the log file.
+
+        @param line: The line, including its line ending.
+        @type line: C{bytes}
+        """
+        with self._pendingLock:
+            if len(self._pending) < self.maxPending:
+                self._pending.append(line)
+                schedule, self._scheduled = not self._scheduled, True
+                full = reportDropping = False
+            else:
+                full, schedule = True, False
+                if self.dropWhenFull:
+                    self.dropped += 1
+                    reportDropping = not self._dropping
+                    self._dropping = True
+
+        if schedule:
+            self._worker.do(self._writePending)
+        elif full and self.dropWhenFull:
+            if reportDropping:
+                log.msg(
+                    format="Access log is falling behind; "
+                           "dropping lines until it catches up.")
+        elif full:
+            with self._writeLock:
+                self._writeBatch([line])
+
+
+    def _writePending(self):
+        """
+        Write all of the lines which are waiting to be written.
+        """
+        with self._writeLock:
+            self._writeBatch([])
+
+
+    def _writeBatch(self, extra):
+        """
+        Write all of the lines which are waiting to be written, followed by
+        some more, as a single batch, and flush the log file.  C{_writeLock}
+        must be held by the caller.
+
+        @param extra: Lines to write after the pending ones.
+        @type extra: C{list} of C{bytes}
+        """
+        with self._pendingLock:
+            batch, self._pending = self._pending, []
+            self._scheduled = False
+            self._dropping = False
+        batch.extend(extra)
+        if batch:
+            self._logFile.write(b"".join(batch))
+            self._logFile.flush()
+
+
+    def flush(self):
+        """
+        Arrange for the lines logged so far to be written and the log file
+        flushed.  They are written in the background, like any other batch.
+        """
+        with self._pendingLock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._worker.do(self._writePending)
+
+
+    def close(self):
+        """
+        Write any lines which are waiting to be written, close the log file
+        and stop the writing thread, waiting for it to finish if this
+        L{ThreadedAccessLog} started it.
+        """
+        self._worker.do(self._writePending)
+        self._worker.do(self._logFile.close)
+        self._worker.quit()
+        if self._thread is not None:
+            self._thread.join()
+
+
+
 class HTTPFactory(protocol.ServerFactory):
     """
     Factory for HTTP server.
@@ -2335,6 +2886,16 @@ class HTTPFactory(protocol.ServerFactory):
 
     @ivar _reactor: An L{IReactorTime} provider used to compute logging
         timestamps.
+
+    @ivar bulkHeadParsing: See the C{bulkHeadParsing} parameter to
+        L{__init__}.
+
+    @ivar threadedLog: See the C{threadedLog} parameter to L{__init__}.
+
+    @ivar structuredLog: See the C{structuredLog} parameter to L{__init__}.
+
+    @ivar _log: The L{Logger} which structured access log events are emitted
+        with.
     """
 
     protocol = _genericHTTPChannelProtocolFactory
@@ -2343,8 +2904,17 @@ class HTTPFactory(protocol.ServerFactory):
 
     timeOut = 60 * 60 * 12
 
+    bulkHeadParsing = False
+
+    threadedLog = False
+
+    structuredLog = False
+
+    _log = Logger()
+
     def __init__(self, logPath=None, timeout=60*60*12, logFormatter=None,
-                 reactor=None):
+                 reactor=None, bulkHeadParsing=False, threadedLog=False,
+                 structuredLog=False):
         """
         @param logFormatter: An object to format requests into log lines for
             the access log.
@@ -2352,6 +2922,26 @@ class HTTPFactory(protocol.ServerFactory):
 
         @param reactor: A L{IReactorTime} provider used to compute logging
             timestamps.
+
+        @param bulkHeadParsing: Whether the channels built by this factory
+            parse the head of each request all at once.  See
+            L{HTTPChannel.bulkHeadParsing}.
+        @type bulkHeadParsing: C{bool}
+
+        @param threadedLog: Whether the access log file opened for C{logPath}
+            is written to from a separate thread, by wrapping it in a
+            L{ThreadedAccessLog}, rather than from the reactor thread.
+        @type threadedLog: C{bool}
+
+        @param structuredLog: Whether requests are logged as events emitted
+            with L{twisted.logger} instead of as lines written to the access
+            log.  Each event has the fields C{method}, C{uri}, C{protocol},
+            C{status}, C{length}, C{peer}, C{referrer}, C{userAgent},
+            C{timeToFirstByte} and C{duration}, taken from the request as they
+            are, and is only formatted as a I{combined log format} line if an
+            observer formats it as text.  C{logPath} and C{logFormatter} are
+            not used.
+        @type structuredLog: C{bool}
         """
         if not reactor:
             from twisted.internet import reactor
@@ -2361,6 +2951,9 @@ class HTTPFactory(protocol.ServerFactory):
             logPath = os.path.abspath(logPath)
         self.logPath = logPath
         self.timeOut = timeout
+        self.bulkHeadParsing = bulkHeadParsing
+        self.threadedLog = threadedLog
+        self.structuredLog = structuredLog
         if logFormatter is None:
             logFormatter = combinedLogFormatter
         self._logFormatter = logFormatter
@@ -2383,6 +2976,8 @@ class HTTPFactory(protocol.ServerFactory):
         # timeOut needs to be on the Protocol instance cause
         # TimeoutMixin expects it there
         p.timeOut = self.timeOut
+        if self.bulkHeadParsing:
+            p.bulkHeadParsing = True
         return p
 
 
@@ -2393,9 +2988,11 @@ class HTTPFactory(protocol.ServerFactory):
         if self._logDateTimeCall is None:
             self._updateLogDateTime()
 
-        if self.logPath:
+        if self.logPath and not self.structuredLog:
             self._nativeize = False
             self.logFile = self._openLogFile(self.logPath)
+            if self.threadedLog:
+                self.logFile = ThreadedAccessLog(self.logFile)
         else:
             self._nativeize = True
             self.logFile = log.logfile
@@ -2424,9 +3021,29 @@ class HTTPFactory(protocol.ServerFactory):
         """
         Write a line representing C{request} to the access log file.
 
+        If C{structuredLog} is set, emit an event about C{request} instead.
+
         @param request: The request object about which to log.
         @type request: L{Request}
         """
+        if self.structuredLog:
+            peer = request.getClientIP()
+            referrer = request.getHeader(b"referer")
+            userAgent = request.getHeader(b"user-agent")
+            self._log.info(
+                u"{accessLine()}",
+                method=request.method, uri=request.uri,
+                protocol=request.clientproto, status=request.code,
+                length=request.sentLength, peer=peer, referrer=referrer,
+                userAgent=userAgent,
+                timeToFirstByte=request.getTimeToFirstByte(),
+                duration=request.getDuration(),
+                accessLine=partial(
+                    _formatCombinedLogLine, peer, self._logDateTime,
+                    request.method, request.uri, request.clientproto,
+                    request.code, request.sentLength, referrer, userAgent))
+            return
+
         try:
             logFile = self.logFile
         except AttributeError:
@@ -20,12 +20,22 @@ ReverseProxy is used on the server end.
 """
 from __future__ import absolute_import, division
 
-from twisted.python.compat import urllib_parse, urlquote
+from twisted.python import log
+from twisted.python.compat import urllib_parse, urlquote, intToBytes
 from twisted.internet import reactor
-from twisted.internet.protocol import ClientFactory
+from twisted.internet.protocol import ClientFactory, Protocol
 from twisted.web.resource import Resource
 from twisted.web.server import NOT_DONE_YET
 from twisted.web.http import HTTPClient, Request, HTTPChannel
+from twisted.web.http import NO_CONTENT, NOT_MODIFIED, PotentialDataLoss
+from twisted.web.http_headers import Headers
+from twisted.web.iweb import UNKNOWN_LENGTH
+from twisted.web.client import (
+    Agent, HTTPConnectionPool, FileBodyProducer, ResponseDone)
+
+
+# Responses with these codes never have a body.
+_NO_BODY_CODES = (NO_CONTENT, NOT_MODIFIED)
 
 
 
@@ -301,3 +311,187 @@ class ReverseProxyResource(Resource):
             request.getAllHeaders(), request.content.read(), request)
         self.reactor.connectTCP(self.host, self.port, clientFactory)
         return NOT_DONE_YET
+
+
+
+class _ProxyResponseBody(Protocol):
+    """
+    Write the body of a response from the proxied server to the request it
+    answers.
+
+    The connection to the proxied server is registered as the producer of
+    the request, so that it is paused while the client is not reading the
+    response.
+
+    @ivar request: The request which is being answered.
+    @type request: L{twisted.web.server.Request}
+
+    @ivar clientGone: Whether the client disconnected before the response was
+        finished.
+    """
+    clientGone = False
+
+    def __init__(self, request):
+        self.request = request
+
+
+    def connectionMade(self):
+        self.request.registerProducer(self.transport, True)
+
+
+    def dataReceived(self, data):
+        self.request.write(data)
+
+
+    def connectionLost(self, reason):
+        """
+        Finish the request when the whole response has been received.  If the
+        response was cut short, close the connection to the client, as that
+        is the only way to tell it.
+        """
+        if self.clientGone:
+            return
+        self.request.unregisterProducer()
+        if reason.check(ResponseDone, PotentialDataLoss):
+            self.request.finish()
+        else:
+            self.request.loseConnection()
+
+
+
+class AgentReverseProxyResource(Resource):
+    """
+    Resource that renders the results gotten from another server, using an
+    L{Agent} and its persistent connections.
+
+    This behaves like L{ReverseProxyResource}, but instead of opening a new
+    connection for each request, connections to the proxied server are kept
+    open and reused.  The bodies of requests and responses are streamed
+    rather than read into memory: a request body is read from the file in
+    which the request stored it as the proxied server consumes it, and the
+    proxied server is paused while the client is not reading the response.
+
+    @ivar agent: The L{IAgent} which makes requests to the proxied server.
+        All the children of this resource share it.
+
+    @ivar reactor: the reactor used to create connections.
+    @type reactor: object providing L{twisted.internet.interfaces.IReactorTCP}
+
+    @since: 16.2
+    """
+
+    # These headers describe the connection between two peers, rather than
+    # the request or the response, so they are not forwarded.  The agent sets
+    # content-length itself.
+    hopByHopHeaders = frozenset([
+        b'connection', b'keep-alive', b'proxy-authenticate',
+        b'proxy-authorization', b'proxy-connection', b'te', b'trailer',
+        b'trailers', b'transfer-encoding', b'upgrade', b'content-length'])
+
+    def __init__(self, host, port, path, reactor=reactor, agent=None):
+        """
+        @param host: the host of the web server to proxy.
+        @type host: C{str}
+
+        @param port: the port of the web server to proxy.
+        @type port: C{port}
+
+        @param path: the base path to fetch data from.  See
+            L{ReverseProxyResource.__init__}.
+        @type path: C{bytes}
+
+        @param agent: The L{IAgent} to make requests with, or C{None} to
+            create an L{Agent} with a persistent L{HTTPConnectionPool}.
+        """
+        Resource.__init__(self)
+        self.host = host
+        self.port = port
+        self.path = path
+        self.reactor = reactor
+        if agent is None:
+            agent = Agent(reactor, pool=HTTPConnectionPool(reactor))
+        self.agent = agent
+
+
+    def getChild(self, path, request):
+        """
+        Create and return a proxy resource with the same proxy configuration
+        and agent as this one, except that its path also contains the segment
+        given by C{path} at the end.
+        """
+        return AgentReverseProxyResource(
+            self.host, self.port,
+            self.path + b'/' + urlquote(path, safe=b"").encode('utf-8'),
+            self.reactor, self.agent)
+
+
+    def render(self, request):
+        """
+        Render a request by forwarding it to the proxied server.
+        """
+        # RFC 2616 tells us that we can omit the port if it's the default port,
+        # but we have to provide it otherwise
+        if self.port == 80:
+            host = self.host
+        else:
+            host = self.host + u":" + str(self.port)
+        qs = urllib_parse.urlparse(request.uri)[4]
+        if qs:
+            rest = self.path + b'?' + qs
+        else:
+            rest = self.path
+        url = b'http://' + host.encode('ascii') + rest
+
+        headers = Headers()
+        for name, values in request.requestHeaders.getAllRawHeaders():
+            if name.lower() not in self.hopByHopHeaders:
+                headers.setRawHeaders(name, values)
+        headers.setRawHeaders(b"host", [host.encode('ascii')])
+
+        request.content.seek(0, 0)
+        bodyProducer = FileBodyProducer(request.content)
+        if not bodyProducer.length:
+            bodyProducer = None
+
+        body = _ProxyResponseBody(request)
+        d = self.agent.request(request.method, url, headers, bodyProducer)
+
+        def clientGone(reason):
+            body.clientGone = True
+            if not d.called:
+                d.cancel()
+            elif body.transport is not None:
+                body.transport.stopProducing()
+        request.notifyFinish().addErrback(clientGone)
+
+        def cbResponse(response):
+            if body.clientGone:
+                return
+            request.setResponseCode(response.code, response.phrase)
+            # The agent has already decoded the body, which is framed afresh
+            # for the client, so only an upstream content-length, which the
+            # response to a HEAD request still needs, is kept.
+            for name, values in response.headers.getAllRawHeaders():
+                lowerName = name.lower()
+                if (lowerName not in self.hopByHopHeaders or
+                        lowerName == b'content-length'):
+                    request.responseHeaders.setRawHeaders(name, values)
+            if (response.length is not UNKNOWN_LENGTH and
+                    request.method != b"HEAD" and
+                    response.code not in _NO_BODY_CODES):
+                request.setHeader(b"content-length",
+                                  intToBytes(response.length))
+            response.deliverBody(body)
+
+        def ebResponse(reason):
+            if body.clientGone:
+                return
+            log.err(reason, "Error proxying %r" % (url,))
+            request.setResponseCode(501, b"Gateway error")
+            request.responseHeaders.setRawHeaders(
+                b"Content-Type", [b"text/html"])
+            request.write(b"<H1>Could not connect</H1>")
+            request.finish()
+
+        d.addCallbacks(cbResponse, ebResponse)
+        return NOT_DONE_YET
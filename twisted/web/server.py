@@ -11,6 +11,7 @@ from __future__ import division, absolute_import
 
 import copy
 import os
+import warnings
 try:
     from urllib import quote
 except ImportError:
@@ -49,6 +50,7 @@ NOT_DONE_YET = 1
 __all__ = [
     'supportedMethods',
     'Request',
+    'SlimRequest',
     'Session',
     'Site',
     'version',
@@ -109,7 +111,10 @@ class Request(Copyable, http.Request, components.Componentized):
 
 
     def getStateToCopyFor(self, issuer):
-        x = self.__dict__.copy()
+        # Make sure attributes which are computed when first used are present.
+        self.args
+        self.received_cookies
+        x = self._getState()
         del x['_transport']
         # XXX refactor this attribute out; it's from protocol
         # del x['server']
@@ -129,6 +134,16 @@ class Request(Copyable, http.Request, components.Componentized):
 
         return x
 
+
+    def _getState(self):
+        """
+        Get the attributes of this request for L{getStateToCopyFor}.
+
+        @return: a copy of the instance dictionary.
+        @rtype: L{dict}
+        """
+        return self.__dict__.copy()
+
     # HTML generation helpers
 
 
@@ -213,6 +228,16 @@ class Request(Copyable, http.Request, components.Componentized):
             http.Request.write(self, data)
 
 
+    def _sendFile(self, fileObject, offset, count):
+        """
+        Override C{http.Request._sendFile} to refuse if the response is encoded
+        or is being generated for a HEAD request.
+        """
+        if self._encoder or self._inFakeHead:
+            return None
+        return http.Request._sendFile(self, fileObject, offset, count)
+
+
     def finish(self):
         """
         Override C{http.Request.finish} for possible encoding.
@@ -453,36 +478,205 @@ class Request(Copyable, http.Request, components.Componentized):
 
 
 
+def _deprecatedRequestAttribute(name):
+    """
+    Make a property for one of the deprecated attributes of a request, which
+    warns when it is used and otherwise gets and sets the private attribute
+    of the same name.
+
+    @param name: The name of the deprecated attribute, C{"transport"} or
+        C{"channel"}.
+    @type name: L{str}
+
+    @return: the property.
+    @rtype: L{property}
+    """
+    message = (
+        "twisted.web.http.Request.%s was deprecated in Twisted 16.2.0. "
+        "Call directly into the Request object instead." % (name,))
+    privateName = "_" + name
+
+    def get(self):
+        warnings.warn(message, category=DeprecationWarning, stacklevel=2)
+        return getattr(self, privateName)
+
+    def set(self, value):
+        warnings.warn(message, category=DeprecationWarning, stacklevel=2)
+        setattr(self, privateName, value)
+
+    return property(get, set)
+
+
+
+class SlimRequest(Request, object):
+    """
+    A L{Request} which is cheaper to create and to set attributes on.
+
+    L{http.Request} implements the deprecated C{transport} and C{channel}
+    attributes with C{__getattr__} and C{__setattr__}, so every attribute set
+    on a L{Request}, and there are dozens for each request received, calls a
+    Python method.  L{SlimRequest} implements them as properties instead.
+
+    It also keeps the attributes which every request sets in slots.  Its base
+    classes do not define C{__slots__}, so a L{SlimRequest} still has a
+    C{__dict__}; the slots only keep that dictionary small, holding just the
+    attributes which are not set on every request.  Otherwise it behaves just
+    as L{Request} does.
+
+    Use it by passing it as the C{requestFactory} of a L{Site}.
+    """
+    __slots__ = (
+        'notifications', '_channel', 'queued', 'requestHeaders',
+        'responseHeaders', 'cookies', '_transport', '_startedAt',
+        '_adapterCache', 'client', 'host', 'prepath', 'postpath', 'sitepath',
+        'method', 'uri', 'clientproto', 'path', 'content', 'site',
+        'finished', 'startedWriting', 'chunked', 'sentLength', '_firstByteAt',
+        '_finishedAt',
+        )
+
+    # Request.__getattr__ is still used, to compute received_cookies when it
+    # is first needed, but is never asked for transport or channel.
+    __setattr__ = object.__setattr__
+
+    transport = _deprecatedRequestAttribute("transport")
+    channel = _deprecatedRequestAttribute("channel")
+
+    def __init__(self, *args, **kw):
+        # Slots hide the class attributes of the same names which provide
+        # the defaults for a Request, so set those defaults here.
+        self.method = "(no method yet)"
+        self.uri = "(no uri yet)"
+        self.clientproto = b"(no clientproto yet)"
+        self.path = self.content = self.site = None
+        self.finished = self.startedWriting = self.chunked = 0
+        self.sentLength = 0
+        self._firstByteAt = self._finishedAt = None
+        Request.__init__(self, *args, **kw)
+
+
+    def _getState(self):
+        """
+        Include the attributes kept in slots in the state returned by
+        L{Request._getState}.
+        """
+        state = Request._getState(self)
+        for name in SlimRequest.__slots__:
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        return state
+
+
+
+def _acceptsGzip(request):
+    """
+    Determine whether the client making a request accepts responses encoded
+    with gzip.
+
+    @param request: The request to check.
+    @type request: L{twisted.web.iweb.IRequest}
+
+    @return: C{True} if the I{Accept-Encoding} headers of C{request} name gzip
+        with a non-zero quality.
+    @rtype: L{bool}
+    """
+    acceptHeaders = request.requestHeaders.getRawHeaders(
+        b'accept-encoding', [])
+    for coding in b','.join(acceptHeaders).split(b','):
+        params = coding.split(b';')
+        if params[0].strip().lower() != b'gzip':
+            continue
+        for param in params[1:]:
+            name, _, value = param.partition(b'=')
+            if name.strip() == b'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+
+def _gzip(data, compressLevel=9):
+    """
+    Compress some bytes all at once with gzip.
+
+    @param data: The bytes to compress.
+    @type data: L{bytes}
+
+    @param compressLevel: The zlib compression level.
+    @type compressLevel: L{int}
+
+    @return: C{data} in the gzip format.
+    @rtype: L{bytes}
+    """
+    compressor = zlib.compressobj(
+        compressLevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+
+def _isCompressible(contentType, uncompressibleTypes):
+    """
+    Determine whether a response with the given content type is worth
+    compressing.
+
+    @param contentType: The value of the I{Content-Type} header of the
+        response, or C{None}.
+    @type contentType: L{bytes} or native L{str}
+
+    @param uncompressibleTypes: Prefixes of the content types of formats
+        which are compressed already.
+    @type uncompressibleTypes: L{tuple} of L{bytes}
+
+    @rtype: L{bool}
+    """
+    if not contentType:
+        return True
+    if not isinstance(contentType, bytes):
+        contentType = contentType.encode('ascii')
+    contentType = contentType.split(b';', 1)[0].strip().lower()
+    return not contentType.startswith(uncompressibleTypes)
+
+
+
 @implementer(iweb._IRequestEncoderFactory)
 class GzipEncoderFactory(object):
     """
     @cvar compressLevel: The compression level used by the compressor, default
         to 9 (highest).
 
+    @cvar minimumLength: Responses whose I{Content-Length} is known to be
+        less than this many bytes when their body starts being written are not
+        compressed, since the gzip header and the CPU spent would outweigh
+        what is saved.  Defaults to 0, compressing every response.
+
+    @cvar uncompressibleTypes: Prefixes of content types which are already
+        compressed, such as most images, audio and video.  Responses with
+        such types are not compressed again.
+
     @since: 12.3
     """
 
     compressLevel = 9
+    minimumLength = 0
+    uncompressibleTypes = (
+        b'image/gif', b'image/jpeg', b'image/png', b'image/webp',
+        b'audio/', b'video/', b'font/woff', b'application/font-woff',
+        b'application/gzip', b'application/x-gzip', b'application/zip',
+        b'application/x-bzip2', b'application/x-xz',
+        b'application/x-7z-compressed', b'application/x-rar-compressed')
 
     def encoderForRequest(self, request):
         """
         Check the headers if the client accepts gzip encoding, and encodes the
         request if so.
         """
-        acceptHeaders = request.requestHeaders.getRawHeaders(
-            'accept-encoding', [])
-        supported = ','.join(acceptHeaders).split(',')
-        if 'gzip' in supported:
-            encoding = request.responseHeaders.getRawHeaders(
-                'content-encoding')
-            if encoding:
-                encoding = '%s,gzip' % ','.join(encoding)
-            else:
-                encoding = 'gzip'
-
-            request.responseHeaders.setRawHeaders('content-encoding',
-                                                  [encoding])
-            return _GzipEncoder(self.compressLevel, request)
+        if _acceptsGzip(request):
+            return _GzipEncoder(self.compressLevel, request,
+                                self.minimumLength, self.uncompressibleTypes)
 
 
 
@@ -491,30 +685,78 @@ class _GzipEncoder(object):
     """
     An encoder which supports gzip.
 
+    Whether to compress is decided when the response body starts being
+    written, once the resource has set the response headers: responses which
+    are already gzipped, whose content type is in C{uncompressibleTypes}, or
+    which are known to be shorter than C{minimumLength} are passed through
+    unchanged.
+
     @ivar _zlibCompressor: The zlib compressor instance used to compress the
         stream.
 
     @ivar _request: A reference to the originating request.
 
+    @ivar _compressing: Whether the response is being compressed, or C{None}
+        until that is decided.
+
     @since: 12.3
     """
 
     _zlibCompressor = None
+    _compressing = None
 
-    def __init__(self, compressLevel, request):
-        self._zlibCompressor = zlib.compressobj(
-            compressLevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    def __init__(self, compressLevel, request, minimumLength=0,
+                 uncompressibleTypes=()):
+        self._compressLevel = compressLevel
         self._request = request
+        self._minimumLength = minimumLength
+        self._uncompressibleTypes = uncompressibleTypes
+
+
+    def _shouldCompress(self):
+        """
+        Decide from the response headers whether to compress the response,
+        and if so, set them up for it.
+
+        @rtype: L{bool}
+        """
+        headers = self._request.responseHeaders
+        encoding = headers.getRawHeaders(b'content-encoding')
+        if encoding and b'gzip' in b','.join(encoding).lower():
+            return False
+        contentType = headers.getRawHeaders(b'content-type', [None])[0]
+        if not _isCompressible(contentType, self._uncompressibleTypes):
+            return False
+        length = headers.getRawHeaders(b'content-length')
+        if length and self._minimumLength:
+            try:
+                if int(length[0]) < self._minimumLength:
+                    return False
+            except ValueError:
+                pass
+
+        if encoding:
+            encoding = b','.join(encoding) + b',gzip'
+        else:
+            encoding = b'gzip'
+        headers.setRawHeaders(b'content-encoding', [encoding])
+        headers.addRawHeader(b'vary', b'Accept-Encoding')
+        # Remove the content-length header, we can't honor it because we
+        # compress on the fly.
+        headers.removeHeader(b'content-length')
+        self._zlibCompressor = zlib.compressobj(
+            self._compressLevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return True
 
 
     def encode(self, data):
         """
         Write to the request, automatically compressing data on the fly.
         """
-        if not self._request.startedWriting:
-            # Remove the content-length header, we can't honor it
-            # because we compress on the fly.
-            self._request.responseHeaders.removeHeader(b'content-length')
+        if self._compressing is None:
+            self._compressing = self._shouldCompress()
+        if not self._compressing:
+            return data
         return self._zlibCompressor.compress(data)
 
 
@@ -523,6 +765,10 @@ class _GzipEncoder(object):
         Finish handling the request request, flushing any data from the zlib
         buffer.
         """
+        if self._compressing is None:
+            self._compressing = self._shouldCompress()
+        if not self._compressing:
+            return b''
         remain = self._zlibCompressor.flush()
         self._zlibCompressor = None
         return remain
@@ -9,12 +9,14 @@ Static resources for L{twisted.web}.
 from __future__ import division, absolute_import
 
 import os
+import collections
 import warnings
 import itertools
 import time
 import errno
 import mimetypes
 
+from io import BytesIO
 from zope.interface import implementer
 
 from twisted.web import server
@@ -26,9 +28,9 @@ from twisted.python.compat import networkString, intToBytes, nativeString, _PY3
 from twisted.python.compat import escape
 
 from twisted.python import components, filepath, log
-from twisted.internet import abstract, interfaces
+from twisted.internet import abstract, error, interfaces
 from twisted.python.util import InsensitiveDict
-from twisted.python.runtime import platformType
+from twisted.python.runtime import platform, platformType
 from twisted.python.url import URL
 from twisted.python.versions import Version
 from twisted.python.deprecate import deprecated
@@ -47,20 +49,59 @@ def isDangerous(path):
 class Data(resource.Resource):
     """
     This is a static, in-memory resource.
+
+    @ivar gzip: Whether to send the data compressed with gzip to clients which
+        accept it.  The data is compressed once, when first requested, and
+        the result kept for later requests; if compression doesn't make the
+        data smaller, it is sent as it is.
+    @type gzip: L{bool}
+
+    @ivar _compressed: A C{tuple} of the data last compressed and the result,
+        or C{None} if compressing it didn't make it smaller.
     """
 
+    gzip = False
+    _compressed = (None, None)
+
     def __init__(self, data, type):
         resource.Resource.__init__(self)
         self.data = data
         self.type = type
 
 
+    def _getCompressed(self):
+        """
+        Get C{data} compressed with gzip, compressing it if it has not been
+        already.
+
+        @return: The compressed data, or C{None} if compressing the data
+            doesn't make it smaller.
+        @rtype: L{bytes} or L{NoneType}
+        """
+        data, compressed = self._compressed
+        if data is not self.data:
+            data = self.data
+            compressed = server._gzip(data)
+            if len(compressed) >= len(data):
+                compressed = None
+            self._compressed = (data, compressed)
+        return compressed
+
+
     def render_GET(self, request):
         request.setHeader(b"content-type", networkString(self.type))
-        request.setHeader(b"content-length", intToBytes(len(self.data)))
+        data = self.data
+        if self.gzip:
+            request.setHeader(b"vary", b"Accept-Encoding")
+            if server._acceptsGzip(request):
+                compressed = self._getCompressed()
+                if compressed is not None:
+                    data = compressed
+                    request.setHeader(b"content-encoding", b"gzip")
+        request.setHeader(b"content-length", intToBytes(len(data)))
         if request.method == b"HEAD":
             return b''
-        return self.data
+        return data
     render_HEAD = render_GET
 
 
@@ -167,6 +208,291 @@ def getTypeAndEncoding(filename, types, encodings, defaultType):
 
 
 
+class _FileCacheEntry(object):
+    """
+    What a L{FileCache} knows about one path.
+
+    @ivar path: The path this entry describes.
+    @type path: C{str}
+
+    @ivar statinfo: The result of C{os.stat} for C{path}.
+
+    @ivar checked: When C{statinfo} was last known to be current.
+    @type checked: C{float}
+
+    @ivar watched: Whether C{path} is being watched for changes, in which case
+        C{statinfo} is current until the entry is discarded.
+    @type watched: C{bool}
+
+    @ivar type: The content type to serve the file with, or C{None}.
+    @ivar encoding: The content encoding to serve the file with, or C{None}.
+
+    @ivar etag: The entity tag of the file.
+    @type etag: C{bytes}
+
+    @ivar body: The contents of the file, if it is small enough to keep in
+        memory, otherwise C{None}.
+    @type body: C{bytes} or C{NoneType}
+
+    @ivar compressedBody: C{body} compressed with gzip, once it has been
+        requested by L{FileCache.getCompressedBody}, otherwise C{None}.  If
+        compressing C{body} doesn't make it smaller, this is C{body}.
+    @type compressedBody: C{bytes} or C{NoneType}
+
+    @ivar children: A C{dict} mapping path segments to the L{File} resources
+        they have been resolved to, if C{path} is a directory.
+    """
+    watched = False
+
+    def __init__(self, path, statinfo, checked):
+        self.path = path
+        self.statinfo = statinfo
+        self.checked = checked
+        self.type = None
+        self.encoding = None
+        self.etag = networkString('"%x-%x"' % (
+            statinfo.st_size, int(statinfo.st_mtime * 1000000)))
+        self.body = None
+        self.compressedBody = None
+        self.children = {}
+
+
+    def isCurrent(self, statinfo):
+        """
+        Is C{statinfo} for the same version of the file as C{self.statinfo}?
+        """
+        old = self.statinfo
+        return (statinfo.st_mtime == old.st_mtime and
+                statinfo.st_size == old.st_size and
+                statinfo.st_ino == old.st_ino)
+
+
+
+class FileCache(object):
+    """
+    A bounded, least recently used cache of what L{File} resources learn from
+    the filesystem: the results of C{stat}, content types, entity tags,
+    resolved children and the contents of small files.
+
+    A L{File} uses a cache only if one is passed to it; the L{File}s it
+    creates for its children share it.  On platforms supporting inotify,
+    cached paths are watched and their entries discarded when they change.
+    Otherwise each entry is checked against the filesystem with C{stat} at
+    most once every C{validFor} seconds, so changes may go unnoticed for that
+    long.
+
+    @ivar maxEntries: The maximum number of paths to keep entries for.
+    @type maxEntries: C{int}
+
+    @ivar maxFileSize: The size of the largest file whose contents are kept.
+    @type maxFileSize: C{int}
+
+    @ivar maxBytes: The maximum total size of the contents kept.
+    @type maxBytes: C{int}
+
+    @ivar validFor: How long, in seconds, an entry which is not being watched
+        is used before being checked again.
+    @type validFor: C{float}
+
+    @ivar _entries: The L{_FileCacheEntry}s, from least to most recently used,
+        keyed by path as text, since L{File}s may have either text or bytes
+        paths.
+    @type _entries: L{collections.OrderedDict}
+
+    @ivar _size: The total size of the contents kept.
+    @type _size: C{int}
+
+    @ivar _notifier: An L{INotify<twisted.internet.inotify.INotify>}, or
+        C{None} if paths are not watched.
+    """
+
+    def __init__(self, maxEntries=1000, maxFileSize=64 * 1024,
+                 maxBytes=16 * 1024 * 1024, validFor=1.0, reactor=None,
+                 notifier=None):
+        """
+        @param reactor: The reactor used to tell the time and to watch for
+            changes to files.  If C{None}, the global reactor is used.
+        @type reactor: L{IReactorTime}
+
+        @param notifier: An object like
+            L{INotify<twisted.internet.inotify.INotify>} with which to watch
+            cached paths.  If C{None}, one is created if inotify is
+            supported.
+        """
+        if reactor is None:
+            from twisted.internet import reactor
+        self.maxEntries = maxEntries
+        self.maxFileSize = maxFileSize
+        self.maxBytes = maxBytes
+        self.validFor = validFor
+        self._reactor = reactor
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        if notifier is None:
+            notifier = self._makeNotifier()
+        self._notifier = notifier
+
+
+    def _makeNotifier(self):
+        """
+        Make an L{INotify<twisted.internet.inotify.INotify>} to watch cached
+        paths with, if possible.
+
+        @return: The notifier, or C{None}.
+        """
+        if _PY3 or not platform.supportsINotify():
+            return None
+        from twisted.internet import inotify
+        notifier = inotify.INotify(self._reactor)
+        notifier.startReading()
+        return notifier
+
+
+    def getEntry(self, fileResource):
+        """
+        Get the entry for the path of a L{File}, making it if necessary.
+
+        @type fileResource: L{File}
+
+        @return: The current L{_FileCacheEntry} for the path, or C{None} if
+            nothing exists there.
+        """
+        path = fileResource.path
+        key = filepath._asFilesystemText(path)
+        now = self._reactor.seconds()
+        entry = self._entries.pop(key, None)
+        if (entry is not None and not entry.watched and
+                now - entry.checked >= self.validFor):
+            try:
+                statinfo = os.stat(path)
+            except OSError:
+                statinfo = None
+            if statinfo is not None and entry.isCurrent(statinfo):
+                entry.checked = now
+            else:
+                self._discard(entry)
+                entry = None
+        if entry is None:
+            entry = self._makeEntry(fileResource, now)
+            if entry is None:
+                return None
+        self._entries[key] = entry
+        while (len(self._entries) > self.maxEntries or
+               self._size > self.maxBytes):
+            self._discard(self._entries.popitem(last=False)[1])
+        return entry
+
+
+    def getCompressedBody(self, entry):
+        """
+        Get the contents kept for an entry compressed with gzip, compressing
+        them if they have not been already.
+
+        @type entry: L{_FileCacheEntry}
+
+        @return: The compressed contents, or C{None} if no contents are kept
+            for C{entry} or compressing them doesn't make them smaller.
+        @rtype: C{bytes} or C{NoneType}
+        """
+        if entry.body is None:
+            return None
+        if entry.compressedBody is None:
+            compressed = server._gzip(entry.body)
+            if len(compressed) >= len(entry.body):
+                compressed = entry.body
+            entry.compressedBody = compressed
+            if compressed is not entry.body:
+                self._size += len(compressed)
+        if entry.compressedBody is entry.body:
+            return None
+        return entry.compressedBody
+
+
+    def invalidate(self, path):
+        """
+        Discard the entry for a path, if there is one.
+
+        @param path: The path which has changed.
+        @type path: C{bytes} or C{unicode}
+        """
+        entry = self._entries.pop(filepath._asFilesystemText(path), None)
+        if entry is not None:
+            self._discard(entry)
+
+
+    def _makeEntry(self, fileResource, now):
+        """
+        Make an entry for the path of a L{File} from the filesystem.
+
+        @return: A L{_FileCacheEntry}, or C{None} if nothing exists at the
+            path.
+        """
+        fileResource.restat(False)
+        statinfo = fileResource._statinfo
+        if not statinfo:
+            return None
+        entry = _FileCacheEntry(fileResource.path, statinfo, now)
+        entry.type, entry.encoding = getTypeAndEncoding(
+            fileResource.basename(), fileResource.contentTypes,
+            fileResource.contentEncodings, fileResource.defaultType)
+        if fileResource.isfile() and statinfo.st_size <= self.maxFileSize:
+            try:
+                fileObject = fileResource.openForReading()
+            except IOError:
+                pass
+            else:
+                try:
+                    body = fileObject.read(statinfo.st_size + 1)
+                finally:
+                    fileObject.close()
+                # Only keep the contents if the file didn't change while it
+                # was being read.
+                if len(body) == statinfo.st_size:
+                    entry.body = body
+                    self._size += len(body)
+        if self._notifier is not None:
+            self._watch(entry)
+        return entry
+
+
+    def _watch(self, entry):
+        """
+        Watch the path of an entry so it is discarded when the path changes.
+        """
+        try:
+            self._notifier.watch(
+                filepath.FilePath(entry.path), callbacks=[self._changed])
+        except Exception:
+            log.err(None, "Could not watch %r for changes" % (entry.path,))
+        else:
+            entry.watched = True
+
+
+    def _changed(self, ignored, path, mask):
+        """
+        Discard the entries which may be affected by a change to C{path}: its
+        own, and that of its parent directory.
+        """
+        self.invalidate(path.path)
+        self.invalidate(path.dirname())
+
+
+    def _discard(self, entry):
+        """
+        Forget about an entry which has been removed from C{_entries}.
+        """
+        if entry.body is not None:
+            self._size -= len(entry.body)
+        if (entry.compressedBody is not None and
+                entry.compressedBody is not entry.body):
+            self._size -= len(entry.compressedBody)
+        if entry.watched:
+            try:
+                self._notifier.ignore(filepath.FilePath(entry.path))
+            except KeyError:
+                pass
+
+
 class File(resource.Resource, filepath.FilePath):
     """
     File is a resource that represents a plain non-interpreted file
@@ -186,6 +512,20 @@ class File(resource.Resource, filepath.FilePath):
 
     @cvar childNotFound: L{Resource} used to render 404 Not Found error pages.
     @cvar forbidden: L{Resource} used to render 403 Forbidden error pages.
+
+    @ivar cache: The L{FileCache} this resource and its children use to avoid
+        touching the filesystem, or C{None} if they don't use one.
+
+    @ivar gzip: Whether to send files compressed with gzip to clients which
+        accept it, without compressing them for each request.  If a file
+        named like this one with C{.gz} appended exists, it is sent instead.
+        Otherwise, if this resource has a C{cache} which keeps the file's
+        contents, they are compressed once and the result is kept there too.
+        Files whose type is in
+        L{GzipEncoderFactory.uncompressibleTypes
+        <twisted.web.server.GzipEncoderFactory.uncompressibleTypes>} are
+        always sent as they are.
+    @type gzip: L{bool}
     """
 
     contentTypes = loadMimeTypes()
@@ -200,8 +540,10 @@ class File(resource.Resource, filepath.FilePath):
     indexNames = ["index", "index.html", "index.htm", "index.rpy"]
 
     type = None
+    cache = None
+    gzip = False
 
-    def __init__(self, path, defaultType="text/html", ignoredExts=(), registry=None, allowExt=0):
+    def __init__(self, path, defaultType="text/html", ignoredExts=(), registry=None, allowExt=0, cache=None):
         """
         Create a file with the given path.
 
@@ -228,6 +570,11 @@ class File(resource.Resource, filepath.FilePath):
 
         @param allowExt: Ignored parameter, only present for backwards
             compatibility.  Do not pass a value for this parameter.
+
+        @param cache: A cache of what is learned from the filesystem, shared
+            with the L{File}s created for children.  If C{None}, nothing is
+            cached.
+        @type cache: L{FileCache}
         """
         resource.Resource.__init__(self)
         filepath.FilePath.__init__(self, path)
@@ -241,6 +588,7 @@ class File(resource.Resource, filepath.FilePath):
         else:
             self.ignoredExts = list(ignoredExts)
         self.registry = registry or Registry()
+        self.cache = cache
 
 
     def ignoreExt(self, ext):
@@ -268,7 +616,16 @@ class File(resource.Resource, filepath.FilePath):
 
         If C{path} is the empty string, return a L{DirectoryLister} instead.
         """
-        self.restat(reraise=False)
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.getEntry(self)
+        if entry is None:
+            self.restat(reraise=False)
+        else:
+            child = entry.children.get(path)
+            if child is not None:
+                return child
+            self._statinfo = entry.statinfo
 
         if not self.isdir():
             return self.childNotFound
@@ -296,7 +653,10 @@ class File(resource.Resource, filepath.FilePath):
             processor = self.processors.get(fpath.splitext()[1])
         if processor:
             return resource.IResource(processor(fpath.path, self.registry))
-        return self.createSimilarFile(fpath.path)
+        child = self.createSimilarFile(fpath.path)
+        if entry is not None:
+            entry.children[path] = child
+        return child
 
 
     # methods to allow subclasses to e.g. decrypt files on the fly:
@@ -575,12 +935,60 @@ class File(resource.Resource, filepath.FilePath):
                 request, fileForReading, rangeInfo)
 
 
+    def _renderCompressed(self, request, entry):
+        """
+        Render this file compressed with gzip, if a compressed version of it
+        is available.
+
+        @param request: The L{Request} object.
+
+        @param entry: The L{_FileCacheEntry} for this file, or C{None}.
+
+        @return: The result of rendering, or C{None} if the file should be
+            rendered as it is.
+        """
+        if isinstance(self.path, bytes):
+            compressedPath = self.path + b'.gz'
+        else:
+            compressedPath = self.path + u'.gz'
+        compressedFile = self.createSimilarFile(compressedPath)
+        if compressedFile.isfile():
+            compressedFile.gzip = False
+            compressedFile.type = self.type
+            compressedFile.encoding = 'gzip'
+            return compressedFile.render_GET(request)
+
+        if entry is None or request.getHeader(b'range') is not None:
+            return None
+        body = self.cache.getCompressedBody(entry)
+        if body is None:
+            return None
+        if request.setETag(entry.etag[:-1] + b'-gzip"') is http.CACHED:
+            return b''
+        if request.setLastModified(self.getModificationTime()) is http.CACHED:
+            return b''
+        request.setHeader(b'content-type', networkString(self.type))
+        request.setHeader(b'content-encoding', b'gzip')
+        request.setHeader(b'content-length', intToBytes(len(body)))
+        if request.method == b'HEAD':
+            return b''
+        return body
+
+
     def render_GET(self, request):
         """
         Begin sending the contents of this L{File} (or a subset of the
         contents, based on the 'range' header) to the given request.
         """
-        self.restat(False)
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.getEntry(self)
+        if entry is None:
+            self.restat(False)
+        else:
+            self._statinfo = entry.statinfo
+            if self.type is None:
+                self.type, self.encoding = entry.type, entry.encoding
 
         if self.type is None:
             self.type, self.encoding = getTypeAndEncoding(self.basename(),
@@ -596,13 +1004,29 @@ class File(resource.Resource, filepath.FilePath):
 
         request.setHeader(b'accept-ranges', b'bytes')
 
-        try:
-            fileForReading = self.openForReading()
-        except IOError as e:
-            if e.errno == errno.EACCES:
-                return self.forbidden.render(request)
-            else:
-                raise
+        if (self.gzip and self.encoding is None and
+                server._isCompressible(
+                    self.type, server.GzipEncoderFactory.uncompressibleTypes)):
+            request.setHeader(b'vary', b'Accept-Encoding')
+            if server._acceptsGzip(request):
+                result = self._renderCompressed(request, entry)
+                if result is not None:
+                    return result
+
+        if entry is not None and entry.body is not None:
+            fileForReading = BytesIO(entry.body)
+        else:
+            try:
+                fileForReading = self.openForReading()
+            except IOError as e:
+                if e.errno == errno.EACCES:
+                    return self.forbidden.render(request)
+                else:
+                    raise
+
+        if entry is not None and request.setETag(entry.etag) is http.CACHED:
+            fileForReading.close()
+            return b''
 
         if request.setLastModified(self.getModificationTime()) is http.CACHED:
             # `setLastModified` also sets the response code for us, so if the
@@ -648,6 +1072,8 @@ class File(resource.Resource, filepath.FilePath):
         f.processors = self.processors
         f.indexNames = self.indexNames[:]
         f.childNotFound = self.childNotFound
+        f.cache = self.cache
+        f.gzip = self.gzip
         return f
 
 
@@ -692,6 +1118,50 @@ class StaticProducer(object):
         self.request = None
 
 
+    def _startSendFile(self, offset, size):
+        """
+        Try to have the request write part of the file with C{sendfile}, which
+        is possible for plain TCP connections on some platforms.
+
+        @param offset: The offset into the file of the data to write.
+        @param size: The size of the data to write.
+
+        @return: C{True} if the data is being written, after which the request
+            will be finished; C{False} if it must be produced as usual.
+        """
+        sendFile = getattr(self.request, '_sendFile', None)
+        if sendFile is None:
+            return False
+        try:
+            self.fileObject.fileno()
+        except (AttributeError, IOError, ValueError):
+            return False
+        d = sendFile(self.fileObject, offset, size)
+        if d is None:
+            return False
+        d.addCallbacks(self._fileSent, self._fileNotSent)
+        return True
+
+
+    def _fileSent(self, ignored):
+        """
+        Finish the request once C{sendfile} has written all of the data.
+        """
+        if self.request:
+            self.request.finish()
+            self.stopProducing()
+
+
+    def _fileNotSent(self, reason):
+        """
+        Clean up after the connection was lost before C{sendfile} could write
+        all of the data.
+        """
+        if not reason.check(error.ConnectionDone, error.ConnectionLost):
+            log.err(reason, "Error sending file")
+        self.stopProducing()
+
+
 
 class NoRangeStaticProducer(StaticProducer):
     """
@@ -699,7 +1169,12 @@ class NoRangeStaticProducer(StaticProducer):
     """
 
     def start(self):
-        self.request.registerProducer(self, False)
+        try:
+            size = os.fstat(self.fileObject.fileno()).st_size
+        except (AttributeError, IOError, OSError, ValueError):
+            size = None
+        if size is None or not self._startSendFile(0, size):
+            self.request.registerProducer(self, False)
 
 
     def resumeProducing(self):
@@ -737,6 +1212,8 @@ class SingleRangeStaticProducer(StaticProducer):
 
 
     def start(self):
+        if self._startSendFile(self.offset, self.size):
+            return
         self.fileObject.seek(self.offset)
         self.bytesWritten = 0
         self.request.registerProducer(self, 0)
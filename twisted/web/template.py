@@ -357,6 +357,45 @@ def _flatsaxParse(fl):
     return s.document
 
 
+class _CompilingLoader(object):
+    """
+    Base class for the L{ITemplateLoader}s in this module which parse their
+    document once, and so can keep a compiled copy of it for
+    L{Element.render <twisted.web.template.Element.render>} to flatten.
+
+    L{TagLoader} is not one of them: the tag it loads may be changed in place
+    at any time, which C{_loadCompiled} would not notice.
+
+    @ivar _compiledFrom: The elements of the document which
+        C{_compiledTemplate} was compiled from, or C{None}.
+    @type _compiledFrom: a C{list} of Stan objects, or C{None}.
+
+    @ivar _compiledTemplate: The document returned by L{load} with its static
+        parts collapsed into pre-escaped markup, or C{None}.
+    @type _compiledTemplate: a C{list}, or C{None}.
+    """
+    _compiledFrom = None
+    _compiledTemplate = None
+
+    def _loadCompiled(self):
+        """
+        Return the compiled form of the document returned by L{load},
+        compiling it again only if L{load} has returned something different
+        since the last call.
+
+        @return: the compiled document.
+        @rtype: a C{list}
+        """
+        document = self.load()
+        compiledFrom = self._compiledFrom
+        if (compiledFrom is None or len(compiledFrom) != len(document) or
+                any(a is not b for a, b in zip(compiledFrom, document))):
+            self._compiledTemplate = _compile(document)
+            self._compiledFrom = list(document)
+        return self._compiledTemplate
+
+
+
 @implementer(ITemplateLoader)
 class TagLoader(object):
     """
@@ -380,7 +419,7 @@ class TagLoader(object):
 
 
 @implementer(ITemplateLoader)
-class XMLString(object):
+class XMLString(_CompilingLoader):
     """
     An L{ITemplateLoader} that loads and parses XML from a string.
 
@@ -413,7 +452,7 @@ class XMLString(object):
 
 
 @implementer(ITemplateLoader)
-class XMLFile(object):
+class XMLFile(_CompilingLoader):
     """
     An L{ITemplateLoader} that loads and parses XML from a file.
 
@@ -543,8 +582,7 @@ def renderElement(request, element,
     @since: 12.1
     """
     if doctype is not None:
-        request.write(doctype)
-        request.write(b'\n')
+        request.write(doctype + b'\n')
 
     if _failElement is None:
         _failElement = twisted.web.util.FailureElement
@@ -570,5 +608,5 @@ def renderElement(request, element,
 
 
 from twisted.web._element import Element, renderer
-from twisted.web._flatten import flatten, flattenString
+from twisted.web._flatten import flatten, flattenString, _compile
 import twisted.web.util
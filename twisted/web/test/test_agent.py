@@ -29,7 +29,8 @@ from twisted.internet.defer import Deferred, succeed, CancelledError
 from twisted.internet.endpoints import TCP4ClientEndpoint, SSL4ClientEndpoint
 
 from twisted.web.client import (FileBodyProducer, Request, HTTPConnectionPool,
-                                ResponseDone, _HTTP11ClientFactory, URI)
+                                BoundedHTTPConnectionPool, ResponseDone,
+                                _HTTP11ClientFactory, URI)
 
 from twisted.web.iweb import (
     UNKNOWN_LENGTH, IAgent, IBodyProducer, IResponse, IAgentEndpointFactory,
@@ -698,6 +699,373 @@ class HTTPConnectionPoolTests(TestCase, FakeReactorAndConnectMixin):
 
 
 
+class RecordingEndpoint(object):
+    """
+    An endpoint which connects the protocols built by the factory passed to
+    its C{connect} method to a L{StringTransport}, and records them.
+
+    @ivar protocols: The protocols which have been connected.
+    """
+    def __init__(self):
+        self.protocols = []
+
+
+    def connect(self, factory):
+        protocol = factory.buildProtocol(None)
+        protocol.makeConnection(StringTransport())
+        self.protocols.append(protocol)
+        return succeed(protocol)
+
+
+
+class BoundedHTTPConnectionPoolTests(TestCase):
+    """
+    Tests for L{BoundedHTTPConnectionPool}.
+    """
+    def setUp(self):
+        self.reactor = MemoryReactorClock()
+        self.pool = BoundedHTTPConnectionPool(self.reactor)
+        self.pool.retryAutomatically = False
+        self.pool.maxConnectionsPerHost = 2
+        self.endpoint = RecordingEndpoint()
+        self.key = ("http", b"example.com", 80)
+
+
+    def getConnections(self, count, key=None):
+        """
+        Call C{getConnection} C{count} times.
+
+        @return: A L{list} of the L{Deferred}s it returned.
+        """
+        if key is None:
+            key = self.key
+        return [self.pool.getConnection(key, self.endpoint)
+                for i in range(count)]
+
+
+    def test_limitPerHost(self):
+        """
+        L{BoundedHTTPConnectionPool.getConnection} queues requests which would
+        use more than C{maxConnectionsPerHost} connections for a key, but not
+        requests for other keys.
+        """
+        first, second, third = self.getConnections(3)
+        self.assertIsInstance(self.successResultOf(first), HTTP11ClientProtocol)
+        self.successResultOf(second)
+        self.assertNoResult(third)
+        self.assertEqual(2, len(self.endpoint.protocols))
+
+        other, = self.getConnections(1, ("http", b"example.org", 80))
+        self.successResultOf(other)
+        self.assertEqual(3, len(self.endpoint.protocols))
+
+
+    def test_maxConnections(self):
+        """
+        L{BoundedHTTPConnectionPool.getConnection} queues requests which would
+        use more than C{maxConnections} connections in total.
+        """
+        self.pool.maxConnections = 2
+        first, second = self.getConnections(2)
+        self.successResultOf(first)
+        self.successResultOf(second)
+        third, = self.getConnections(1, ("http", b"example.org", 80))
+        self.assertNoResult(third)
+
+
+    def test_reuseReturnedConnection(self):
+        """
+        When a connection finishes its request, it is given to the next
+        queued request for its key.
+        """
+        first, second, third = self.getConnections(3)
+        protocol = self.successResultOf(first)
+        protocol._quiescentCallback(protocol)
+        self.assertIs(protocol, self.successResultOf(third))
+        self.assertEqual(2, len(self.endpoint.protocols))
+
+
+    def test_lostConnectionFreesCapacity(self):
+        """
+        When a connection in use is lost, a new connection is opened for the
+        next queued request.
+        """
+        first, second, third = self.getConnections(3)
+        protocol = self.successResultOf(first)
+        protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertIs(self.endpoint.protocols[2], self.successResultOf(third))
+
+
+    def test_failedConnectFreesCapacity(self):
+        """
+        When opening a connection fails, the next queued request may open a
+        connection.
+        """
+        attempts = []
+        class Endpoint(object):
+            def connect(self, factory):
+                attempts.append(Deferred())
+                return attempts[-1]
+
+        first, second, third = [self.pool.getConnection(self.key, Endpoint())
+                                for i in range(3)]
+        self.assertEqual(2, len(attempts))
+        attempts[0].errback(ConnectionRefusedError())
+        self.failureResultOf(first, ConnectionRefusedError)
+        self.assertEqual(3, len(attempts))
+        self.assertNoResult(third)
+
+
+    def test_queueOrder(self):
+        """
+        Queued requests are given connections in the order they were made,
+        whatever their keys.
+        """
+        self.pool.maxConnections = 1
+        otherKey = ("http", b"example.org", 80)
+        first, = self.getConnections(1)
+        second, = self.getConnections(1, otherKey)
+        third, = self.getConnections(1)
+        protocol = self.successResultOf(first)
+        protocol.connectionLost(Failure(ConnectionDone()))
+        self.successResultOf(second)
+        self.assertNoResult(third)
+
+
+    def test_reuseMostRecent(self):
+        """
+        The most recently returned idle connection is reused first.
+        """
+        first, second = self.getConnections(2)
+        older = self.successResultOf(first)
+        newer = self.successResultOf(second)
+        older._quiescentCallback(older)
+        newer._quiescentCallback(newer)
+        reused, = self.getConnections(1)
+        self.assertIs(newer, self.successResultOf(reused))
+
+
+    def test_lostIdleConnection(self):
+        """
+        An idle connection which is lost is removed from the pool.
+        """
+        first, = self.getConnections(1)
+        protocol = self.successResultOf(first)
+        protocol._quiescentCallback(protocol)
+        timeout = self.pool._timeouts[protocol]
+        protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual([], self.pool._connections[self.key])
+        self.assertEqual({}, self.pool._timeouts)
+        self.assertTrue(timeout.cancelled)
+
+
+    def test_queueTimeout(self):
+        """
+        A request which waits in the queue for C{queueTimeout} seconds fails
+        with L{defer.TimeoutError}.
+        """
+        self.pool.queueTimeout = 5
+        first, second, third = self.getConnections(3)
+        self.reactor.advance(4)
+        self.assertNoResult(third)
+        self.reactor.advance(1)
+        self.failureResultOf(third, defer.TimeoutError)
+        statistics = self.pool.statistics()
+        self.assertEqual(0, statistics.queuedRequestCount)
+        self.assertEqual(1, statistics.timedOutRequestCount)
+
+
+    def test_cancelQueued(self):
+        """
+        Cancelling a queued request removes it from the queue.
+        """
+        self.pool.queueTimeout = 5
+        first, second, third = self.getConnections(3)
+        third.cancel()
+        self.failureResultOf(third, CancelledError)
+        self.assertEqual(0, self.pool.statistics().queuedRequestCount)
+        self.assertEqual([], self.reactor.getDelayedCalls())
+
+
+    def test_cancelWhileConnecting(self):
+        """
+        Cancelling a request which has left the queue while its connection is
+        being opened cancels opening the connection and frees its capacity.
+        """
+        attempts = []
+        cancelled = []
+        class Endpoint(object):
+            def connect(self, factory):
+                attempts.append(Deferred(cancelled.append))
+                return attempts[-1]
+
+        self.pool.maxConnectionsPerHost = 1
+        first, second = [self.pool.getConnection(self.key, Endpoint())
+                         for i in range(2)]
+        attempts[0].errback(ConnectionRefusedError())
+        self.failureResultOf(first)
+        second.cancel()
+        self.failureResultOf(second, CancelledError)
+        self.assertEqual([attempts[1]], cancelled)
+        statistics = self.pool.statistics()
+        self.assertEqual(0, statistics.connectingCount)
+        self.assertEqual(0, statistics.busyConnectionCount)
+
+
+    def test_statistics(self):
+        """
+        L{BoundedHTTPConnectionPool.statistics} reports the number of idle and
+        busy connections, the number of queued requests and the time requests
+        have spent in the queue.
+        """
+        first, second, third, fourth = self.getConnections(4)
+        statistics = self.pool.statistics()
+        self.assertEqual(
+            (0, 2, 0, 2, 0),
+            (statistics.idleConnectionCount,
+             statistics.busyConnectionCount,
+             statistics.connectingCount,
+             statistics.queuedRequestCount,
+             statistics.waitedRequestCount))
+
+        self.reactor.advance(3)
+        protocol = self.successResultOf(first)
+        protocol._quiescentCallback(protocol)
+        self.successResultOf(third)
+        self.reactor.advance(1)
+        self.successResultOf(second).connectionLost(
+            Failure(ConnectionDone()))
+        self.successResultOf(fourth)._quiescentCallback(protocol)
+
+        statistics = self.pool.statistics()
+        self.assertEqual(
+            (1, 1, 0, 0, 2),
+            (statistics.idleConnectionCount,
+             statistics.busyConnectionCount,
+             statistics.connectingCount,
+             statistics.queuedRequestCount,
+             statistics.waitedRequestCount))
+        self.assertEqual(7, statistics.totalWaitTime)
+
+
+    def test_retryUsesPool(self):
+        """
+        When a request on a reused connection is retried, the new connection
+        is also subject to the pool's limits.
+        """
+        self.pool.retryAutomatically = True
+        self.pool.maxConnectionsPerHost = 1
+        first, = self.getConnections(1)
+        protocol = self.successResultOf(first)
+        protocol._quiescentCallback(protocol)
+        second, = self.getConnections(1)
+        retrying = self.successResultOf(second)
+        self.assertIsInstance(retrying, client._RetryingHTTP11ClientProtocol)
+        retry = retrying._newConnection()
+        self.assertNoResult(retry)
+        protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertIs(self.endpoint.protocols[1], self.successResultOf(retry))
+
+
+
+class HTTPConnectionPoolPipeliningTests(TestCase):
+    """
+    Tests for L{HTTPConnectionPool.getPipelinedConnection}.
+    """
+    def setUp(self):
+        self.reactor = MemoryReactorClock()
+        self.pool = HTTPConnectionPool(self.reactor)
+        self.pool.pipelining = True
+        self.endpoint = RecordingEndpoint()
+        self.key = ("http", b"example.com", 80)
+
+
+    def request(self, connection, path=b'/'):
+        """
+        Issue a persistent I{GET} request over C{connection}.
+
+        @return: The L{Deferred} returned by C{connection.request}.
+        """
+        return connection.request(
+            Request(b'GET', path, Headers({b'host': [b'example.com']}), None,
+                    persistent=True))
+
+
+    def getRequested(self):
+        """
+        Get a connection from C{getPipelinedConnection} and issue a request
+        over it.
+
+        @return: The L{Deferred} returned by the connection's C{request}.
+        """
+        d = self.pool.getPipelinedConnection(self.key, self.endpoint)
+        return self.request(self.successResultOf(d))
+
+
+    def test_notPipelining(self):
+        """
+        When C{pipelining} is off, L{HTTPConnectionPool.getPipelinedConnection}
+        does not supply connections which are waiting for responses.
+        """
+        self.pool.pipelining = False
+        self.getRequested()
+        self.getRequested()
+        self.assertEqual(2, len(self.endpoint.protocols))
+
+
+    def test_reuseWaitingConnection(self):
+        """
+        When C{pipelining} is on, L{HTTPConnectionPool.getPipelinedConnection}
+        supplies a connection which is waiting for responses, up to
+        C{maxPipelineDepth} requests at a time.
+        """
+        self.pool.maxPipelineDepth = 2
+        self.getRequested()
+        self.getRequested()
+        self.assertEqual(1, len(self.endpoint.protocols))
+        transport = self.endpoint.protocols[0].transport
+        self.assertEqual(2, transport.value().count(b'GET / HTTP/1.1'))
+
+        self.getRequested()
+        self.assertEqual(2, len(self.endpoint.protocols))
+
+
+    def test_quiescentConnectionCached(self):
+        """
+        Once the responses to all of its requests have been received, a
+        pipelined connection is cached like any other.
+        """
+        first = self.getRequested()
+        second = self.getRequested()
+        protocol, = self.endpoint.protocols
+        protocol.dataReceived(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n" * 2)
+        self.successResultOf(first)
+        self.successResultOf(second)
+        self.assertEqual([protocol], self.pool._connections[self.key])
+        self.assertEqual({}, self.pool._pipelines)
+
+
+    def test_retryUnanswered(self):
+        """
+        If a connection is lost before the response to a pipelined request is
+        received, the request is sent again on a new connection.
+        """
+        first = self.getRequested()
+        second = self.getRequested()
+        protocol, = self.endpoint.protocols
+        protocol.dataReceived(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+        self.successResultOf(first)
+        protocol.connectionLost(Failure(ConnectionDone()))
+
+        self.assertEqual(2, len(self.endpoint.protocols))
+        retried = self.endpoint.protocols[1]
+        self.assertEqual(1, retried.transport.value().count(b'GET / HTTP/1.1'))
+        retried.dataReceived(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+        self.assertEqual(200, self.successResultOf(second).code)
+
+
+
 class AgentTestsMixin(object):
     """
     Tests for any L{IAgent} implementation.
@@ -825,6 +1193,34 @@ class AgentTests(TestCase, FakeReactorAndConnectMixin, AgentTestsMixin):
         self.assertEqual(agent._pool.connected, True)
 
 
+    def test_pipelinedConnectionFromPool(self):
+        """
+        If its pool has C{pipelining} on, the Agent gets connections for
+        idempotent requests without bodies from the pool's
+        C{getPipelinedConnection} method, and connections for other requests
+        from its C{getConnection} method.
+        """
+        calls = []
+        class DummyPool(object):
+            persistent = True
+            pipelining = True
+            def getConnection(this, key, ep):
+                calls.append('getConnection')
+                return defer.succeed(StubHTTPProtocol())
+            def getPipelinedConnection(this, key, ep):
+                calls.append('getPipelinedConnection')
+                return defer.succeed(StubHTTPProtocol())
+
+        agent = client.Agent(self.reactor, pool=DummyPool())
+        agent._getEndpoint = lambda uri: DummyEndpoint()
+        agent.request(b'GET', b'http://foo/')
+        agent.request(b'GET', b'http://foo/', bodyProducer=object())
+        agent.request(b'POST', b'http://foo/')
+        self.assertEqual(
+            ['getPipelinedConnection', 'getConnection', 'getConnection'],
+            calls)
+
+
     def test_unsupportedScheme(self):
         """
         L{Agent.request} returns a L{Deferred} which fails with
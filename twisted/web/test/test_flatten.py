@@ -18,13 +18,15 @@ from zope.interface import implementer
 from twisted.trial.unittest import TestCase
 from twisted.test.testutils import XMLAssertionMixin
 
-from twisted.internet.defer import passthru, succeed, gatherResults
+from twisted.internet.defer import passthru, succeed, gatherResults, Deferred
 
 from twisted.web.iweb import IRenderable
 from twisted.web.error import UnfilledSlot, UnsupportedType, FlattenerError
 
 from twisted.web.template import tags, Tag, Comment, CDATA, CharRef, slot
-from twisted.web.template import Element, renderer, TagLoader, flattenString
+from twisted.web.template import (
+    Element, renderer, TagLoader, flatten, flattenString)
+from twisted.web._flatten import _compile, _PreEscaped
 
 from twisted.web.test._util import FlattenTestCase
 
@@ -392,6 +394,182 @@ class SerializationTests(FlattenTestCase, XMLAssertionMixin):
         return self.assertFlatteningRaises(None, UnsupportedType)
 
 
+class CompileTests(FlattenTestCase):
+    """
+    Tests for L{_compile}.
+    """
+    def assertCompilesTo(self, root, expected):
+        """
+        Assert that C{root} compiles to C{expected}, and that the compiled
+        form flattens to the same output as C{root} itself.
+        """
+        compiled = _compile([root])
+        self.assertEqual(
+            [c.data if isinstance(c, _PreEscaped) else c for c in compiled],
+            expected)
+        self.assertFlattensImmediately(
+            compiled, self.successResultOf(flattenString(None, root)))
+
+
+    def test_staticTag(self):
+        """
+        A tag with no slots or renderers in it is compiled to a single chunk
+        of markup, escaped as it would be when flattened.
+        """
+        self.assertCompilesTo(
+            tags.div(
+                tags.p('1 < 2 & 3', class_='"x"'), tags.br(),
+                Comment('c'), CDATA('d'), CharRef(0x2603)),
+            [b'<div><p class="&quot;x&quot;">1 &lt; 2 &amp; 3</p><br />'
+             b'<!--c--><![CDATA[d]]>&#9731;</div>'])
+
+
+    def test_slot(self):
+        """
+        The markup around a slot is compiled into chunks, but the slot itself
+        is left to be filled when the document is flattened.
+        """
+        s = slot('name')
+        root = tags.div(tags.p(s), tags.hr(), class_='x')
+        self.assertEqual(
+            [c.data if isinstance(c, _PreEscaped) else c
+             for c in _compile([root])],
+            [b'<div class="x"><p>', s, b'</p><hr /></div>'])
+        self.assertFlattensImmediately(
+            tags.div(_compile([root])).fillSlots(name='<n>'),
+            b'<div><div class="x"><p>&lt;n&gt;</p><hr /></div></div>')
+
+
+    def test_rendererLeftAlone(self):
+        """
+        A tag with a renderer is not compiled, nor are its children, since the
+        renderer may inspect or change them.
+        """
+        inner = tags.span(tags.b('x'), render='foo')
+        compiled = _compile([tags.div(inner)])
+        self.assertEqual(len(compiled), 3)
+        self.assertIs(compiled[1], inner)
+        self.assertEqual(inner.children[0].tagName, 'b')
+
+
+    def test_dynamicAttribute(self):
+        """
+        A tag with a slot in an attribute stays a L{Tag}, but its children are
+        compiled.
+        """
+        s = slot('href')
+        [tag] = _compile([tags.a(tags.b('x'), href=s)])
+        self.assertIsInstance(tag, Tag)
+        self.assertIs(tag.attributes['href'], s)
+        self.assertEqual(
+            [c.data for c in tag.children], [b'<b>x</b>'])
+
+
+    def test_slotData(self):
+        """
+        A tag with slot data is left alone, since flattening it makes that
+        slot data available to slots elsewhere.
+        """
+        tag = tags.div('x').fillSlots(x='y')
+        self.assertEqual(_compile([tag]), [tag])
+
+
+    def test_topLevelString(self):
+        """
+        A string outside of any tag is left unescaped, since the document may
+        be flattened in an attribute, where strings are escaped differently.
+        """
+        self.assertEqual(_compile(['a&b']), ['a&b'])
+        self.assertFlattensImmediately(
+            tags.a(href=_compile(['a&b', tags.i('c')])),
+            b'<a href="a&amp;b&lt;i&gt;c&lt;/i&gt;"></a>')
+
+
+    def test_documentNotModified(self):
+        """
+        Compiling a document does not change the document itself.
+        """
+        s = slot('x')
+        root = tags.div(tags.p(s), tags.i('y'))
+        _compile([root])
+        self.assertEqual(len(root.children), 2)
+        self.assertIs(root.children[0].children[0], s)
+
+
+
+class BufferingTests(TestCase):
+    """
+    Tests for the buffering of output by L{flatten}.
+    """
+    def flatten(self, root, **kw):
+        """
+        Flatten C{root}, recording each call to the write function.
+
+        @return: A two-tuple of the L{list} of written L{bytes} and the
+            L{Deferred} returned by L{flatten}.
+        """
+        written = []
+        return written, flatten(None, root, written.append, **kw)
+
+
+    def test_buffered(self):
+        """
+        By default, a document which can be flattened without waiting is
+        written all at once.
+        """
+        written, d = self.flatten(
+            tags.ul([tags.li(str(i), class_='item') for i in range(100)]))
+        self.successResultOf(d)
+        self.assertEqual(len(written), 1)
+        self.assertTrue(written[0].startswith(b'<ul><li class="item">0</li>'))
+
+
+    def test_bufferSize(self):
+        """
+        Once at least C{bufferSize} bytes have been collected, they are
+        written.
+        """
+        written, d = self.flatten(
+            [tags.b('x'), tags.b('y'), tags.b('z')], bufferSize=10)
+        self.successResultOf(d)
+        self.assertEqual(
+            written, [b'<b>x</b><b', b'>y</b><b>z', b'</b>'])
+
+
+    def test_unbuffered(self):
+        """
+        If C{bufferSize} is C{0}, each piece is written as it is produced.
+        """
+        written, d = self.flatten(tags.b('x'), bufferSize=0)
+        self.successResultOf(d)
+        self.assertEqual(written, [b'<', b'b', b'>', b'x', b'</b>'])
+
+
+    def test_writtenBeforeWaiting(self):
+        """
+        Everything collected so far is written before waiting for a
+        L{Deferred} to fire.
+        """
+        waiting = Deferred()
+        written, d = self.flatten(tags.p('a', waiting, 'c'))
+        self.assertEqual(written, [b'<p>a'])
+        self.assertNoResult(d)
+        waiting.callback('b')
+        self.successResultOf(d)
+        self.assertEqual(written, [b'<p>a', b'bc</p>'])
+
+
+    def test_writtenBeforeFailing(self):
+        """
+        Everything collected before flattening fails is written before the
+        L{Deferred} returned by L{flatten} fails.
+        """
+        written, d = self.flatten(tags.p('a', slot('missing')))
+        self.failureResultOf(d, FlattenerError)
+        self.assertEqual(written, [b'<p>a'])
+
+
+
 # Use the co_filename mechanism (instead of the __file__ mechanism) because
 # it is the mechanism traceback formatting uses.  The two do not necessarily
 # agree with each other.  This requires a code object compiled in this file.
@@ -16,14 +16,17 @@ except ImportError:
 
 from twisted.python.compat import _PY3, iterbytes, networkString, unicode, intToBytes
 from twisted.python.failure import Failure
+from twisted.python import log
 from twisted.trial import unittest
 from twisted.trial.unittest import TestCase
 from twisted.web import http, http_headers
 from twisted.web.http import PotentialDataLoss, _DataLoss
 from twisted.web.http import _IdentityTransferDecoder
 from twisted.internet.task import Clock
+from twisted.internet.defer import Deferred
 from twisted.internet.error import ConnectionLost
-from twisted.protocols import loopback
+from twisted._threads import createMemoryWorker, AlreadyQuit
+from twisted.protocols import loopback, policies
 from twisted.test.proto_helpers import StringTransport
 from twisted.test.test_internet import DummyProducer
 from twisted.web.test.requesthelper import DummyChannel
@@ -107,6 +110,8 @@ class ResponseTestMixin(object):
 
 
 class HTTP1_0Tests(unittest.TestCase, ResponseTestMixin):
+    bulkHeadParsing = False
+
     requests = (
         b"GET / HTTP/1.0\r\n"
         b"\r\n"
@@ -128,6 +133,7 @@ class HTTP1_0Tests(unittest.TestCase, ResponseTestMixin):
         """
         b = StringTransport()
         a = http.HTTPChannel()
+        a.bulkHeadParsing = self.bulkHeadParsing
         a.requestFactory = DummyHTTPHandler
         a.makeConnection(b)
         # one byte at a time, to stress it.
@@ -146,6 +152,7 @@ class HTTP1_0Tests(unittest.TestCase, ResponseTestMixin):
         clock = Clock()
         transport = StringTransport()
         protocol = http.HTTPChannel()
+        protocol.bulkHeadParsing = self.bulkHeadParsing
         protocol.timeOut = 100
         protocol.callLater = clock.callLater
         protocol.makeConnection(transport)
@@ -237,6 +244,226 @@ class HTTP0_9Tests(HTTP1_0Tests):
 
 
 
+class BulkHTTP1_0Tests(HTTP1_0Tests):
+    """
+    L{HTTP1_0Tests} with C{bulkHeadParsing} set.
+    """
+    bulkHeadParsing = True
+
+
+
+class BulkHTTP1_1Tests(HTTP1_1Tests):
+    """
+    L{HTTP1_1Tests} with C{bulkHeadParsing} set.
+    """
+    bulkHeadParsing = True
+
+
+
+class BulkHTTP1_1_close_Tests(HTTP1_1_close_Tests):
+    """
+    L{HTTP1_1_close_Tests} with C{bulkHeadParsing} set.
+    """
+    bulkHeadParsing = True
+
+
+
+class BulkHTTP0_9Tests(HTTP0_9Tests):
+    """
+    L{HTTP0_9Tests} with C{bulkHeadParsing} set.
+    """
+    bulkHeadParsing = True
+
+
+
+class BulkHeadParsingTests(unittest.TestCase):
+    """
+    Tests for L{http.HTTPChannel} with C{bulkHeadParsing} set.
+    """
+    def setUp(self):
+        self.requests = []
+        requests = self.requests
+
+        class RecordingRequest(http.Request):
+            def process(self):
+                requests.append(self)
+                self.body = self.content.read()
+                self.setHeader(b"content-length", b"0")
+                self.finish()
+
+        self.transport = StringTransport()
+        self.channel = http.HTTPChannel()
+        self.channel.bulkHeadParsing = True
+        self.channel.requestFactory = RecordingRequest
+        self.channel.makeConnection(self.transport)
+
+
+    def assertBadRequest(self):
+        """
+        Assert that a I{400} response was written and the connection closed.
+        """
+        self.assertEqual(
+            self.transport.value(), b"HTTP/1.1 400 Bad Request\r\n\r\n")
+        self.assertTrue(self.transport.disconnecting)
+
+
+    def test_headers(self):
+        """
+        The request line and headers are parsed into the request, with header
+        names made lower case and repeated headers kept in order.
+        """
+        self.channel.dataReceived(
+            b"GET /foo HTTP/1.1\r\n"
+            b"Host: example.com\r\n"
+            b"X-Multi: a\r\n"
+            b"x-multi:  b \r\n"
+            b"\r\n")
+        [request] = self.requests
+        self.assertEqual(
+            (request.method, request.uri, request.clientproto),
+            (b"GET", b"/foo", b"HTTP/1.1"))
+        self.assertEqual(
+            request.requestHeaders.getRawHeaders(b"host"), [b"example.com"])
+        self.assertEqual(
+            request.requestHeaders.getRawHeaders(b"X-Multi"), [b"a", b"b"])
+
+
+    def test_headersInPieces(self):
+        """
+        A request head received in several pieces is parsed once all of it
+        has been received.
+        """
+        for piece in [b"GET / HTTP/1.1\r\nHost: ex", b"ample.com\r\n\r",
+                      b"\n"]:
+            self.assertEqual(self.requests, [])
+            self.channel.dataReceived(piece)
+        [request] = self.requests
+        self.assertEqual(
+            request.requestHeaders.getRawHeaders(b"host"), [b"example.com"])
+
+
+    def test_foldedHeader(self):
+        """
+        A header value folded onto several lines is kept as
+        L{http.HTTPChannel.lineReceived} keeps it: the lines are joined with
+        newlines, and only the ends of the whole value are stripped.
+        """
+        self.channel.dataReceived(
+            b"GET / HTTP/1.1\r\nX-Folded:  a \r\n b \r\n\tc \r\n"
+            b"X-Other: d\r\n\r\n")
+        [request] = self.requests
+        self.assertEqual(
+            request.requestHeaders.getRawHeaders(b"x-folded"),
+            [b"a \n b \n\tc"])
+        self.assertEqual(
+            request.requestHeaders.getRawHeaders(b"x-other"), [b"d"])
+
+
+    def test_leadingEmptyLines(self):
+        """
+        Empty lines before the request line are ignored.
+        """
+        self.channel.dataReceived(b"\r\n\r\nGET / HTTP/1.1\r\n\r\n")
+        self.assertEqual(len(self.requests), 1)
+
+
+    def test_body(self):
+        """
+        The body of a request is delivered to it before it is dispatched, and
+        following requests are parsed after it.
+        """
+        self.channel.dataReceived(
+            b"POST / HTTP/1.1\r\nContent-Length: 3\r\n\r\nabc"
+            b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"2\r\nde\r\n0\r\n\r\n"
+            b"GET / HTTP/1.1\r\n\r\n")
+        self.assertEqual(
+            [request.body for request in self.requests],
+            [b"abc", b"de", b""])
+
+
+    def test_lazyArgsAndCookies(self):
+        """
+        The query arguments and cookies of a request are parsed when first
+        used.
+        """
+        self.channel.dataReceived(
+            b"GET /?a=1&b=2&a=3 HTTP/1.1\r\nCookie: foo=bar; baz=quux\r\n"
+            b"\r\n")
+        [request] = self.requests
+        self.assertNotIn("args", request.__dict__)
+        self.assertNotIn("received_cookies", request.__dict__)
+        self.assertEqual(request.args, {b"a": [b"1", b"3"], b"b": [b"2"]})
+        self.assertEqual(request.getCookie(b"baz"), b"quux")
+        self.assertEqual(
+            request.received_cookies, {b"foo": b"bar", b"baz": b"quux"})
+
+
+    def test_formArgs(self):
+        """
+        The arguments of a form submitted in the body of a request are
+        combined with those of the query string.
+        """
+        self.channel.dataReceived(
+            b"POST /?a=1 HTTP/1.1\r\n"
+            b"Content-Type: application/x-www-form-urlencoded\r\n"
+            b"Content-Length: 3\r\n"
+            b"\r\n"
+            b"b=2")
+        [request] = self.requests
+        self.assertEqual(request.args, {b"a": [b"1"], b"b": [b"2"]})
+
+
+    def test_malformedHeader(self):
+        """
+        A header line without a colon gets a I{400} response.
+        """
+        self.channel.dataReceived(b"GET / HTTP/1.1\r\nfoo\r\n\r\n")
+        self.assertBadRequest()
+
+
+    def test_invalidContentLength(self):
+        """
+        A I{Content-Length} header which is not an integer gets a I{400}
+        response.
+        """
+        self.channel.dataReceived(
+            b"GET / HTTP/1.1\r\nContent-Length: x\r\n\r\n")
+        self.assertBadRequest()
+
+
+    def test_tooManyHeaders(self):
+        """
+        A request with more than C{maxHeaders} headers gets a I{400}
+        response.
+        """
+        self.channel.maxHeaders = 2
+        self.channel.dataReceived(
+            b"GET / HTTP/1.1\r\na: 1\r\nb: 2\r\nc: 3\r\n\r\n")
+        self.assertBadRequest()
+
+
+    def test_headTooLarge(self):
+        """
+        A request head larger than C{totalHeadersSize} gets a I{400} response
+        without waiting for the rest of it.
+        """
+        self.channel.totalHeadersSize = 40
+        self.channel.dataReceived(b"GET / HTTP/1.1\r\nfoo: " + b"x" * 40)
+        self.assertBadRequest()
+
+
+    def test_factory(self):
+        """
+        L{http.HTTPFactory} builds channels which parse request heads in bulk
+        if C{bulkHeadParsing} is passed to it.
+        """
+        factory = http.HTTPFactory(bulkHeadParsing=True)
+        self.assertTrue(factory.buildProtocol(None).bulkHeadParsing)
+        self.assertFalse(http.HTTPFactory().buildProtocol(None).bulkHeadParsing)
+
+
+
 class ProtocolNegotiationTests(unittest.TestCase):
     requests = (
         b"GET / HTTP/1.1\r\n"
@@ -423,6 +650,90 @@ class ResponseWriteOrderingTests(unittest.TestCase):
 
 
 
+class PipeliningTests(unittest.TestCase):
+    """
+    Tests for the handling of pipelined requests by L{http.HTTPChannel}.
+    """
+    def setUp(self):
+        self.requests = []
+        requests = self.requests
+
+        class OutstandingRequest(http.Request):
+            def process(self):
+                requests.append(self)
+
+        self.transport = StringTransport()
+        self.channel = http.HTTPChannel()
+        self.channel.requestFactory = OutstandingRequest
+        self.channel.makeConnection(self.transport)
+
+
+    def _respond(self, request):
+        """
+        Respond to C{request} with its path.
+        """
+        request.setHeader(b"content-length", intToBytes(len(request.path)))
+        request.write(request.path)
+        request.finish()
+
+
+    def test_dispatchedBeforeEarlierFinished(self):
+        """
+        Pipelined requests are dispatched before the responses to earlier
+        requests are finished, and the responses are written in the order the
+        requests were received.
+        """
+        self.channel.dataReceived(
+            b"GET /a HTTP/1.1\r\n\r\n"
+            b"GET /b HTTP/1.1\r\n\r\n"
+            b"GET /c HTTP/1.1\r\n\r\n")
+        self.assertEqual(
+            [request.path for request in self.requests], [b"/a", b"/b", b"/c"])
+        for request in reversed(self.requests):
+            self._respond(request)
+        self.assertEqual(
+            self.transport.value(),
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n/a"
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n/b"
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n/c")
+
+
+    def test_maxPipelineDepth(self):
+        """
+        Once C{maxPipelineDepth} requests are outstanding, L{http.HTTPChannel}
+        stops dispatching requests and reading from its transport until one
+        of them is finished.
+        """
+        self.channel.maxPipelineDepth = 2
+        self.channel.dataReceived(
+            b"GET /a HTTP/1.1\r\n\r\n"
+            b"GET /b HTTP/1.1\r\n\r\n"
+            b"GET /c HTTP/1.1\r\n\r\n")
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.transport.producerState, "paused")
+        self._respond(self.requests[1])
+        self.assertEqual(len(self.requests), 2)
+        self._respond(self.requests[0])
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.requests[2].path, b"/c")
+        self.assertEqual(self.transport.producerState, "producing")
+
+
+    def test_maxPipelineDepthSynchronousResponses(self):
+        """
+        Requests which are finished as soon as they are dispatched don't count
+        towards C{maxPipelineDepth}.
+        """
+        self.channel.maxPipelineDepth = 1
+        self.channel.requestFactory = DummyHTTPHandler
+        self.channel.dataReceived(
+            b"GET /a HTTP/1.1\r\n\r\n"
+            b"GET /b HTTP/1.1\r\n\r\n")
+        self.assertEqual(self.transport.producerState, "producing")
+        self.assertEqual(self.transport.value().count(b"200 OK"), 2)
+
+
+
 class HTTPLoopbackTests(unittest.TestCase):
 
     expectedHeaders = {b'request': b'/foo/bar',
@@ -1928,6 +2239,23 @@ class RequestTests(unittest.TestCase, ResponseTestMixin):
         self.assertEqual(req.received_cookies, {})
 
 
+    def test_argsAndCookiesAttributes(self):
+        """
+        Unless it was created by a channel with C{bulkHeadParsing} set, a
+        L{http.Request} keeps C{received_cookies} in its C{__dict__} from the
+        start, and C{args} once the request has been received.  Until then,
+        C{args} is C{None}.
+        """
+        self.assertIsNone(http.Request.args)
+        req = http.Request(DummyChannel(), False)
+        self.assertIsNone(req.args)
+        self.assertEqual(vars(req)['received_cookies'], {})
+        self.assertNotIn('args', vars(req))
+        req.gotLength(0)
+        req.requestReceived(b'GET', b'/?a=b', b'HTTP/1.0')
+        self.assertEqual(vars(req)['args'], {b'a': [b'b']})
+
+
     def test_parseCookies(self):
         """
         L{http.Request.parseCookies} extracts cookies from C{requestHeaders}
@@ -2675,6 +3003,146 @@ class Expect100ContinueServerTests(unittest.TestCase, ResponseTestMixin):
 
 
 
+class SendFileTransport(StringTransport):
+    """
+    A L{StringTransport} which records the files it is asked to send.
+
+    @ivar sentFiles: A C{list} of the arguments passed to C{_sendFile}.
+
+    @ivar sendFileResult: The L{Deferred} to return from C{_sendFile}.
+    """
+
+    def __init__(self):
+        StringTransport.__init__(self)
+        self.sentFiles = []
+        self.sendFileResult = Deferred()
+
+
+    def _sendFile(self, fileObject, offset, count):
+        self.sentFiles.append((fileObject, offset, count))
+        return self.sendFileResult
+
+
+
+class SendFileTests(unittest.TestCase, ResponseTestMixin):
+    """
+    Tests for L{http.Request._sendFile}.
+    """
+
+    def setUp(self):
+        self.fileObject = object()
+        self.requests = []
+        requests = self.requests
+
+        class SendFileRequest(http.Request):
+            def process(self):
+                requests.append(self)
+
+        self.channel = http.HTTPChannel()
+        self.channel.requestFactory = SendFileRequest
+        self.transport = SendFileTransport()
+
+
+    def _sendFile(self, request, count=5):
+        """
+        Set the content length of the response to C{request} and try to send
+        C{count} bytes of C{self.fileObject}, starting at offset 2.
+
+        @return: The result of L{http.Request._sendFile}.
+        """
+        request.setHeader(b"content-length", intToBytes(count))
+        return request._sendFile(self.fileObject, 2, count)
+
+
+    def test_sendFile(self):
+        """
+        L{http.Request._sendFile} writes the response headers, then has the
+        transport send the file, and counts the bytes sent once it has.
+        """
+        self.channel.makeConnection(self.transport)
+        self.channel.dataReceived(b"GET / HTTP/1.0\r\n\r\n")
+        [request] = self.requests
+        d = self._sendFile(request)
+        self.assertResponseEquals(
+            self.transport.value(),
+            [(b"HTTP/1.0 200 OK", b"Content-Length: 5", b"")])
+        self.assertEqual(self.transport.sentFiles, [(self.fileObject, 2, 5)])
+        self.assertNoResult(d)
+        self.transport.sendFileResult.callback(None)
+        self.successResultOf(d)
+        self.assertEqual(request.sentLength, 5)
+
+
+    def test_chunked(self):
+        """
+        A response using chunked encoding is not sent with C{sendFile}.
+        """
+        self.channel.makeConnection(self.transport)
+        self.channel.dataReceived(b"GET / HTTP/1.1\r\n\r\n")
+        [request] = self.requests
+        self.assertIsNone(request._sendFile(self.fileObject, 2, 5))
+        self.assertEqual(self.transport.sentFiles, [])
+
+
+    def test_head(self):
+        """
+        A response to a I{HEAD} request is not sent with C{sendFile}.
+        """
+        self.channel.makeConnection(self.transport)
+        self.channel.dataReceived(b"HEAD / HTTP/1.0\r\n\r\n")
+        [request] = self.requests
+        self.assertIsNone(self._sendFile(request))
+        self.assertEqual(self.transport.sentFiles, [])
+
+
+    def test_queued(self):
+        """
+        A response which is queued behind the response to an earlier
+        pipelined request is not sent with C{sendFile}.
+        """
+        self.channel.makeConnection(self.transport)
+        self.channel.dataReceived(
+            b"GET / HTTP/1.1\r\n\r\nGET /2 HTTP/1.1\r\n\r\n")
+        [first, second] = self.requests
+        self.assertIsNone(self._sendFile(second))
+        self.assertEqual(self.transport.sentFiles, [])
+
+
+    def test_transportWithoutSendFile(self):
+        """
+        If the transport can't write files, L{http.Request._sendFile} returns
+        C{None} after writing the response headers.
+        """
+        transport = StringTransport()
+        self.transport = transport
+        self.channel.makeConnection(transport)
+        self.channel.dataReceived(b"GET / HTTP/1.0\r\n\r\n")
+        [request] = self.requests
+        self.assertIsNone(self._sendFile(request))
+        self.assertResponseEquals(
+            transport.value(),
+            [(b"HTTP/1.0 200 OK", b"Content-Length: 5", b"")])
+
+
+    def test_wrappedTransport(self):
+        """
+        A transport which wraps one that can write files, such as a
+        L{policies.ProtocolWrapper}, is not bypassed:
+        L{http.Request._sendFile} returns C{None} and the wrapped transport
+        is not asked to send anything.
+        """
+        wrapper = policies.ProtocolWrapper(
+            policies.WrappingFactory(None), self.channel)
+        wrapper.makeConnection(self.transport)
+        self.channel.dataReceived(b"GET / HTTP/1.0\r\n\r\n")
+        [request] = self.requests
+        self.assertIsNone(self._sendFile(request))
+        self.assertEqual(self.transport.sentFiles, [])
+        self.assertResponseEquals(
+            self.transport.value(),
+            [(b"HTTP/1.0 200 OK", b"Content-Length: 5", b"")])
+
+
 def sub(keys, d):
     """
     Create a new dict containing only a subset of the items of an existing
@@ -2718,3 +3186,235 @@ class DeprecatedRequestAttributesTests(unittest.TestCase):
                     "in Twisted 15.0.0; please use Twisted Names to "
                     "resolve hostnames instead")},
                          sub(["category", "message"], warnings[0]))
+
+
+
+class RecordingLogFile(object):
+    """
+    A log file which records what is done to it.
+
+    @ivar actions: The calls made to this file, as C{("write", data)},
+        C{("flush",)} and C{("close",)} tuples.
+    """
+    def __init__(self):
+        self.actions = []
+
+
+    def write(self, data):
+        self.actions.append(("write", data))
+
+
+    def flush(self):
+        self.actions.append(("flush",))
+
+
+    def close(self):
+        self.actions.append(("close",))
+
+
+
+class ThreadedAccessLogTests(unittest.TestCase):
+    """
+    Tests for L{http.ThreadedAccessLog}.
+    """
+    def setUp(self):
+        self.logFile = RecordingLogFile()
+        self.worker, self.perform = createMemoryWorker()
+
+
+    def accessLog(self, **kwargs):
+        """
+        Create a L{http.ThreadedAccessLog} wrapping C{self.logFile} and using
+        C{self.worker}.
+        """
+        return http.ThreadedAccessLog(
+            self.logFile, worker=self.worker, **kwargs)
+
+
+    def test_writeInWorker(self):
+        """
+        L{http.ThreadedAccessLog.write} does not write to the log file itself,
+        but has its worker write the line and flush the file.
+        """
+        accessLog = self.accessLog()
+        accessLog.write(b"one\n")
+        self.assertEqual(self.logFile.actions, [])
+        self.assertTrue(self.perform())
+        self.assertEqual(
+            self.logFile.actions, [("write", b"one\n"), ("flush",)])
+
+
+    def test_batch(self):
+        """
+        Lines written before the worker gets to them are written together in
+        a single batch.
+        """
+        accessLog = self.accessLog()
+        accessLog.write(b"one\n")
+        accessLog.write(b"two\n")
+        accessLog.write(b"three\n")
+        self.assertTrue(self.perform())
+        self.assertFalse(self.perform())
+        self.assertEqual(
+            self.logFile.actions,
+            [("write", b"one\ntwo\nthree\n"), ("flush",)])
+
+        accessLog.write(b"four\n")
+        self.assertTrue(self.perform())
+        self.assertEqual(
+            self.logFile.actions[2:], [("write", b"four\n"), ("flush",)])
+
+
+    def test_drop(self):
+        """
+        Lines written while C{maxPending} lines are already waiting are
+        discarded and counted, and a message is logged once for each burst of
+        discarded lines.
+        """
+        messages = []
+        log.addObserver(messages.append)
+        self.addCleanup(log.removeObserver, messages.append)
+
+        accessLog = self.accessLog(maxPending=2)
+        for line in [b"one\n", b"two\n", b"three\n", b"four\n"]:
+            accessLog.write(line)
+        self.assertEqual(accessLog.dropped, 2)
+        self.assertEqual(len(messages), 1)
+        self.assertIn("dropping lines", log.textFromEventDict(messages[0]))
+
+        self.perform()
+        accessLog.write(b"five\n")
+        self.perform()
+        self.assertEqual(
+            self.logFile.actions,
+            [("write", b"one\ntwo\n"), ("flush",),
+             ("write", b"five\n"), ("flush",)])
+
+
+    def test_block(self):
+        """
+        If C{dropWhenFull} is C{False}, a line written while C{maxPending}
+        lines are already waiting is written, after those lines, by the
+        caller of L{http.ThreadedAccessLog.write}.
+        """
+        accessLog = self.accessLog(maxPending=2, dropWhenFull=False)
+        for line in [b"one\n", b"two\n", b"three\n"]:
+            accessLog.write(line)
+        self.assertEqual(
+            self.logFile.actions,
+            [("write", b"one\ntwo\nthree\n"), ("flush",)])
+        self.assertEqual(accessLog.dropped, 0)
+
+        # The batch scheduled for the first line finds nothing left to write.
+        self.perform()
+        self.assertEqual(len(self.logFile.actions), 2)
+
+
+    def test_flush(self):
+        """
+        L{http.ThreadedAccessLog.flush} has the worker write any waiting lines
+        and flush the log file.
+        """
+        accessLog = self.accessLog()
+        accessLog.flush()
+        self.perform()
+        self.assertEqual(self.logFile.actions, [])
+        accessLog.write(b"one\n")
+        accessLog.flush()
+        self.perform()
+        self.assertFalse(self.perform())
+        self.assertEqual(
+            self.logFile.actions, [("write", b"one\n"), ("flush",)])
+
+
+    def test_close(self):
+        """
+        L{http.ThreadedAccessLog.close} has the worker write any waiting lines
+        and then close the log file, and stops the worker.
+        """
+        accessLog = self.accessLog()
+        accessLog.write(b"one\n")
+        accessLog.close()
+        while self.perform():
+            pass
+        self.assertEqual(
+            self.logFile.actions,
+            [("write", b"one\n"), ("flush",), ("close",)])
+        self.assertRaises(AlreadyQuit, accessLog.write, b"two\n")
+
+
+    def test_thread(self):
+        """
+        By default, L{http.ThreadedAccessLog} writes lines in a thread of its
+        own, which is stopped when it is closed.
+        """
+        accessLog = http.ThreadedAccessLog(self.logFile)
+        accessLog.write(b"one\n")
+        accessLog.close()
+        self.assertFalse(accessLog._thread.is_alive())
+        self.assertEqual(
+            self.logFile.actions,
+            [("write", b"one\n"), ("flush",), ("close",)])
+
+
+
+class RequestTimingTests(unittest.TestCase):
+    """
+    Tests for L{http.Request.getTimeToFirstByte} and
+    L{http.Request.getDuration}.
+    """
+    def setUp(self):
+        self.clock = Clock()
+        self.clock.advance(1000)
+        channel = DummyChannel()
+        channel.factory = http.HTTPFactory(reactor=self.clock)
+        self.request = http.Request(channel, False)
+        self.request.gotLength(0)
+
+
+    def test_notStarted(self):
+        """
+        Before a response has been started, there is no time to first byte
+        and no duration.
+        """
+        self.assertIsNone(self.request.getTimeToFirstByte())
+        self.assertIsNone(self.request.getDuration())
+
+
+    def test_timeToFirstByte(self):
+        """
+        L{http.Request.getTimeToFirstByte} returns the time from when the
+        request was created to when the response headers were written.
+        """
+        self.clock.advance(1.5)
+        self.request.write(b"hello")
+        self.clock.advance(2)
+        self.request.write(b"world")
+        self.assertEqual(self.request.getTimeToFirstByte(), 1.5)
+        self.assertIsNone(self.request.getDuration())
+
+
+    def test_duration(self):
+        """
+        L{http.Request.getDuration} returns the time from when the request
+        was created to when it was finished.
+        """
+        self.clock.advance(1.5)
+        self.request.write(b"hello")
+        self.clock.advance(2)
+        self.request.finish()
+        self.clock.advance(5)
+        self.assertEqual(self.request.getTimeToFirstByte(), 1.5)
+        self.assertEqual(self.request.getDuration(), 3.5)
+
+
+    def test_withoutFactory(self):
+        """
+        A request received on a channel without a factory is timed with
+        L{time.time}.
+        """
+        request = http.Request(DummyChannel(), False)
+        request.gotLength(0)
+        request.finish()
+        self.assertTrue(0 <= request.getDuration() < 60)
+
@@ -12,6 +12,7 @@ from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
 from twisted.python import log
+from twisted.python.compat import intToBytes
 from twisted.python.failure import Failure
 from twisted.internet.interfaces import IConsumer, IPushProducer
 from twisted.internet.error import ConnectionDone, ConnectionLost
@@ -1730,6 +1731,234 @@ class HTTP11ClientProtocolTests(TestCase):
 
 
 
+class HTTP11ClientProtocolPipeliningTests(TestCase):
+    """
+    Tests for pipelined requests on L{HTTP11ClientProtocol}.
+    """
+    def setUp(self):
+        """
+        Create an L{HTTP11ClientProtocol} which may have three requests
+        waiting for responses, connected to a fake transport.
+        """
+        self.quiescent = []
+        self.transport = StringTransport()
+        self.protocol = HTTP11ClientProtocol(self.quiescent.append)
+        self.protocol.maxPipelineDepth = 3
+        self.protocol.makeConnection(self.transport)
+
+
+    def request(self, method=b'GET', path=b'/', bodyProducer=None):
+        """
+        Issue a persistent request over C{self.protocol}.
+
+        @return: The L{Deferred} returned by C{self.protocol.request}.
+        """
+        return self.protocol.request(
+            Request(method, path, _boringHeaders, bodyProducer,
+                    persistent=True))
+
+
+    def response(self, body, headers=b""):
+        """
+        Make the bytes of a response with the given body.
+        """
+        return (b"HTTP/1.1 200 OK\r\n" + headers +
+                b"Content-Length: " + intToBytes(len(body)) + b"\r\n"
+                b"\r\n" + body)
+
+
+    def test_requestsSentAtOnce(self):
+        """
+        While the response to an idempotent request is awaited, further
+        idempotent requests are written to the transport at once, up to
+        C{maxPipelineDepth} requests in total.
+        """
+        self.request(path=b'/a')
+        self.request(path=b'/b')
+        self.request(path=b'/c')
+        value = self.transport.value()
+        self.assertIn(b'GET /a HTTP/1.1', value)
+        self.assertIn(b'GET /b HTTP/1.1', value)
+        self.assertIn(b'GET /c HTTP/1.1', value)
+        self.failureResultOf(self.request(path=b'/d'), RequestNotSent)
+
+
+    def test_responsesInOrder(self):
+        """
+        The responses to pipelined requests are given to their requests in
+        the order the requests were sent, even when they are received
+        together, and the protocol is quiescent once they all have been
+        received.
+        """
+        results = [self.request(path=path) for path in (b'/a', b'/b', b'/c')]
+        self.protocol.dataReceived(
+            self.response(b"a") + self.response(b"bb"))
+        self.assertEqual([], self.quiescent)
+        self.protocol.dataReceived(self.response(b"ccc"))
+        self.assertEqual([self.protocol], self.quiescent)
+
+        for result, body in zip(results, [b"a", b"bb", b"ccc"]):
+            response = self.successResultOf(result)
+            self.assertEqual(len(body), response.length)
+            protocol = AccumulatingProtocol()
+            response.deliverBody(protocol)
+            self.assertEqual(body, protocol.data)
+
+
+    def test_headResponses(self):
+        """
+        The response to a pipelined I{HEAD} request is parsed without a body,
+        and the response after it is parsed from the bytes which follow it.
+        """
+        head = self.request(method=b'HEAD')
+        get = self.request()
+        self.protocol.dataReceived(self.response(b"abc")[:-3] +
+                                   self.response(b"def"))
+        self.assertEqual(0, self.successResultOf(head).length)
+        self.assertEqual(3, self.successResultOf(get).length)
+
+
+    def test_notIdempotent(self):
+        """
+        Requests with methods which are not idempotent, and requests with
+        bodies, are not pipelined, nor are requests after them.
+        """
+        self.request(method=b'POST')
+        self.failureResultOf(self.request(), RequestNotSent)
+
+        protocol = HTTP11ClientProtocol()
+        protocol.maxPipelineDepth = 3
+        protocol.makeConnection(StringTransport())
+        protocol.request(Request(b'GET', b'/', _boringHeaders, None,
+                                 persistent=True))
+        self.failureResultOf(
+            protocol.request(Request(b'GET', b'/', _boringHeaders,
+                                     StringProducer(1), persistent=True)),
+            RequestNotSent)
+
+
+    def test_notPersistent(self):
+        """
+        Requests which are not persistent are not pipelined.
+        """
+        self.protocol.request(Request(b'GET', b'/', _boringHeaders, None,
+                                      persistent=False))
+        self.failureResultOf(self.request(), RequestNotSent)
+
+
+    def test_connectionLost(self):
+        """
+        If the connection is lost before the responses to pipelined requests
+        have been received, their L{Deferred}s fail with
+        L{ResponseNeverReceived}.
+        """
+        first = self.request()
+        second = self.request()
+        third = self.request()
+        self.protocol.dataReceived(self.response(b"a"))
+        self.successResultOf(first)
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        failure = self.failureResultOf(second, ResponseNeverReceived)
+        failure.value.reasons[0].trap(ConnectionDone)
+        self.failureResultOf(third, ResponseNeverReceived)
+
+
+    def test_connectionClose(self):
+        """
+        If a response says that the server will close the connection, the
+        L{Deferred}s of the pipelined requests after it fail with
+        L{ResponseNeverReceived}.
+        """
+        first = self.request()
+        second = self.request()
+        self.protocol.dataReceived(
+            self.response(b"a", b"Connection: close\r\n"))
+        self.successResultOf(first)
+        self.failureResultOf(second, ResponseNeverReceived)
+        self.assertTrue(self.transport.disconnecting)
+        self.assertEqual([], self.quiescent)
+
+
+    def test_cancelPipelined(self):
+        """
+        Cancelling the L{Deferred} of a pipelined request which is waiting
+        for the responses before its own leaves the connection open: the
+        other requests get their responses, and the response to the
+        cancelled request is read and discarded.
+        """
+        first = self.request(path=b'/a')
+        second = self.request(path=b'/b')
+        third = self.request(path=b'/c')
+        self.protocol.dataReceived(self.response(b"a")[:-1])
+        firstResponse = self.successResultOf(first)
+        firstBody = AccumulatingProtocol()
+        firstResponse.deliverBody(firstBody)
+
+        second.cancel()
+        self.failureResultOf(second, CancelledError)
+        self.assertFalse(self.transport.aborting)
+
+        self.protocol.dataReceived(
+            b"a" + self.response(b"bb") + self.response(b"ccc"))
+        self.assertEqual(b"a", firstBody.data)
+        firstBody.closedReason.trap(ResponseDone)
+        thirdBody = AccumulatingProtocol()
+        self.successResultOf(third).deliverBody(thirdBody)
+        self.assertEqual(b"ccc", thirdBody.data)
+        self.assertEqual([self.protocol], self.quiescent)
+
+
+    def test_cancelPipelinedConnectionLost(self):
+        """
+        If the connection is lost after a pipelined request was cancelled,
+        the L{Deferred}s of the other requests fail with
+        L{ResponseNeverReceived} and that of the cancelled request is not
+        fired again.
+        """
+        first = self.request()
+        second = self.request()
+        third = self.request()
+        second.cancel()
+        self.failureResultOf(second, CancelledError)
+
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        self.failureResultOf(first, ResponseNeverReceived)
+        self.failureResultOf(third, ResponseNeverReceived)
+
+
+    def test_cancelCurrentPipelined(self):
+        """
+        Cancelling the L{Deferred} of a pipelined request whose response is
+        being parsed aborts the connection, as that response can no longer be
+        skipped reliably.  As for a request which is not pipelined, its
+        L{Deferred} fails with L{ResponseFailed} wrapping L{CancelledError}.
+        """
+        first = self.request()
+        second = self.request()
+        self.protocol.dataReceived(self.response(b"a") + b"HTTP/1.1 200")
+        self.successResultOf(first)
+        second.cancel()
+        self.assertTrue(self.transport.aborting)
+        return assertWrapperExceptionTypes(
+            self, second, ResponseFailed, [CancelledError])
+
+
+
+    def test_badHeaders(self):
+        """
+        If a pipelined request cannot be written, its L{Deferred} fails with
+        L{RequestGenerationFailed} and nothing is written.
+        """
+        self.request()
+        written = self.transport.value()
+        result = self.protocol.request(
+            Request(b'GET', b'/', Headers(), None, persistent=True))
+        failure = self.failureResultOf(result, RequestGenerationFailed)
+        failure.value.reasons[0].trap(BadHeaders)
+        self.assertEqual(written, self.transport.value())
+
+
+
 @implementer(IBodyProducer)
 class StringProducer:
     """
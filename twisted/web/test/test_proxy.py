@@ -6,13 +6,21 @@ Test for L{twisted.web.proxy}.
 """
 
 from twisted.trial.unittest import TestCase
+from twisted.python.failure import Failure
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionDone, ConnectionRefusedError
 from twisted.test.proto_helpers import StringTransportWithDisconnection
-from twisted.test.proto_helpers import MemoryReactor
+from twisted.test.proto_helpers import StringTransport, MemoryReactor
+from twisted.test.proto_helpers import MemoryReactorClock
 
+from twisted.web.client import FileBodyProducer, ResponseFailed
+from twisted.web.http_headers import Headers
+from twisted.web._newclient import Response
 from twisted.web.resource import Resource
 from twisted.web.server import Site
 from twisted.web.proxy import ReverseProxyResource, ProxyClientFactory
 from twisted.web.proxy import ProxyClient, ProxyRequest, ReverseProxyRequest
+from twisted.web.proxy import AgentReverseProxyResource
 from twisted.web.test.test_web import DummyRequest
 
 
@@ -557,3 +565,269 @@ class ReverseProxyRequestTests(TestCase):
         factory = reactor.tcpClients[0][2]
         self.assertIsInstance(factory, ProxyClientFactory)
         self.assertEqual(factory.headers, {b'host': b'example.com'})
+
+
+
+class FakeAgent(object):
+    """
+    An L{IAgent} which records the requests made with it.
+
+    @ivar requests: A L{list} of C{(method, uri, headers, bodyProducer,
+        deferred)} tuples, one for each request, where C{deferred} is the
+        L{Deferred} returned for the request.
+
+    @ivar cancelled: A L{list} of the L{Deferred}s which were cancelled.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.cancelled = []
+
+
+    def request(self, method, uri, headers=None, bodyProducer=None):
+        d = Deferred(self.cancelled.append)
+        self.requests.append((method, uri, headers, bodyProducer, d))
+        return d
+
+
+
+class AgentReverseProxyResourceTests(TestCase):
+    """
+    Tests for L{AgentReverseProxyResource}.
+    """
+
+    def setUp(self):
+        self.agent = FakeAgent()
+        root = Resource()
+        root.putChild(b'index', AgentReverseProxyResource(
+            u"127.0.0.1", 1234, b"/path", MemoryReactor(), self.agent))
+        self.site = Site(root)
+        self.transport = StringTransportWithDisconnection()
+        self.channel = self.site.buildProtocol(None)
+        self.transport.protocol = self.channel
+        self.channel.makeConnection(self.transport)
+        self.addCleanup(
+            self.channel.connectionLost, Failure(ConnectionDone()))
+
+
+    def makeRequest(self, data=b"GET /index HTTP/1.1\r\nHost: a\r\n\r\n"):
+        """
+        Make a request to the proxy.
+
+        @return: The C{(method, uri, headers, bodyProducer, deferred)} tuple
+            recorded by the agent for the request to the proxied server.
+        """
+        self.channel.dataReceived(data)
+        self.assertEqual(1, len(self.agent.requests))
+        return self.agent.requests[0]
+
+
+    def makeResponse(self, code=200, phrase=b"OK", headers=None):
+        """
+        Make a response from the proxied server, delivered by a fake
+        transport.
+        """
+        if headers is None:
+            headers = Headers()
+        return Response((b'HTTP', 1, 1), code, phrase, headers,
+                        StringTransport())
+
+
+    def test_request(self):
+        """
+        L{AgentReverseProxyResource.render} makes a request to the proxied
+        server with the path and query string of the request and its headers,
+        with its I{Host} header set to the proxied server.
+        """
+        method, uri, headers, bodyProducer, d = self.makeRequest(
+            b"GET /index?foo=bar HTTP/1.1\r\n"
+            b"Host: a\r\n"
+            b"Accept: text/html\r\n"
+            b"Connection: keep-alive\r\n"
+            b"Proxy-Connection: keep-alive\r\n"
+            b"\r\n")
+        self.assertEqual(b"GET", method)
+        self.assertEqual(b"http://127.0.0.1:1234/path?foo=bar", uri)
+        self.assertEqual([b"127.0.0.1:1234"], headers.getRawHeaders(b"host"))
+        self.assertEqual([b"text/html"], headers.getRawHeaders(b"accept"))
+        self.assertFalse(headers.hasHeader(b"connection"))
+        self.assertFalse(headers.hasHeader(b"proxy-connection"))
+        self.assertIsNone(bodyProducer)
+
+
+    def test_requestBody(self):
+        """
+        The body of a request is read from its content by the body producer
+        of the request to the proxied server.
+        """
+        method, uri, headers, bodyProducer, d = self.makeRequest(
+            b"POST /index HTTP/1.1\r\n"
+            b"Host: a\r\n"
+            b"Content-Length: 3\r\n"
+            b"\r\n"
+            b"abc")
+        self.assertEqual(b"POST", method)
+        self.assertIsInstance(bodyProducer, FileBodyProducer)
+        self.assertEqual(3, bodyProducer.length)
+        self.assertFalse(headers.hasHeader(b"content-length"))
+
+
+    def test_response(self):
+        """
+        The status, headers and body of the response from the proxied server
+        are written as the response to the request.
+        """
+        d = self.makeRequest()[-1]
+        response = self.makeResponse(
+            404, b"Not Found",
+            Headers({b"x-foo": [b"bar"], b"server": [b"upstream"]}))
+        response.length = 5
+        d.callback(response)
+        response._bodyDataReceived(b"hello")
+        response._bodyDataFinished()
+
+        value = self.transport.value()
+        self.assertTrue(value.startswith(b"HTTP/1.1 404 Not Found\r\n"))
+        self.assertIn(b"\r\nX-Foo: bar\r\n", value)
+        self.assertIn(b"\r\nServer: upstream\r\n", value)
+        self.assertIn(b"\r\nContent-Length: 5\r\n", value)
+        self.assertTrue(value.endswith(b"\r\n\r\nhello"))
+
+
+    def test_chunkedResponse(self):
+        """
+        The hop-by-hop headers of the response from the proxied server, such
+        as I{Transfer-Encoding}, I{Connection} and I{Keep-Alive}, are not
+        copied to the response to the client, whose body is chunked by the
+        proxy itself.
+        """
+        d = self.makeRequest()[-1]
+        response = self.makeResponse(headers=Headers({
+            b"transfer-encoding": [b"chunked"],
+            b"connection": [b"keep-alive"],
+            b"keep-alive": [b"timeout=5"],
+            b"x-foo": [b"bar"]}))
+        d.callback(response)
+        response._bodyDataReceived(b"hello")
+        response._bodyDataFinished()
+
+        value = self.transport.value()
+        self.assertEqual(1, value.lower().count(b"\r\ntransfer-encoding:"))
+        self.assertNotIn(b"\r\nconnection:", value.lower())
+        self.assertNotIn(b"\r\nkeep-alive:", value.lower())
+        self.assertIn(b"\r\nX-Foo: bar\r\n", value)
+        self.assertTrue(value.endswith(b"\r\n\r\n5\r\nhello\r\n0\r\n\r\n"))
+
+
+    def test_chunkedResponseHTTP10(self):
+        """
+        A response from the proxied server which was chunked is sent to an
+        HTTP/1.0 client unchunked, without a I{Transfer-Encoding} header.
+        """
+        d = self.makeRequest(b"GET /index HTTP/1.0\r\nHost: a\r\n\r\n")[-1]
+        response = self.makeResponse(
+            headers=Headers({b"transfer-encoding": [b"chunked"]}))
+        d.callback(response)
+        response._bodyDataReceived(b"hello")
+        response._bodyDataFinished()
+
+        value = self.transport.value()
+        self.assertNotIn(b"\r\ntransfer-encoding:", value.lower())
+        self.assertTrue(value.endswith(b"\r\n\r\nhello"))
+
+
+    def test_backpressure(self):
+        """
+        The transport delivering the response from the proxied server is
+        registered as the producer of the response to the client until the
+        response is finished.
+        """
+        d = self.makeRequest()[-1]
+        response = self.makeResponse()
+        d.callback(response)
+        self.assertIs(response._transport, self.transport.producer)
+        response._bodyDataFinished()
+        self.assertIsNone(self.transport.producer)
+
+
+    def test_truncatedResponse(self):
+        """
+        If the response from the proxied server is cut short, the connection
+        to the client is closed.
+        """
+        d = self.makeRequest()[-1]
+        response = self.makeResponse()
+        response.length = 5
+        d.callback(response)
+        response._bodyDataReceived(b"hel")
+        response._bodyDataFinished(Failure(ResponseFailed([])))
+        self.assertFalse(self.transport.connected)
+
+
+    def test_connectionFailed(self):
+        """
+        If the request to the proxied server fails, an error is logged and
+        returned to the client.
+        """
+        d = self.makeRequest()[-1]
+        d.errback(ConnectionRefusedError())
+        self.assertEqual(1, len(self.flushLoggedErrors(ConnectionRefusedError)))
+        value = self.transport.value()
+        self.assertTrue(value.startswith(b"HTTP/1.1 501 Gateway error\r\n"))
+        self.assertIn(b"<H1>Could not connect</H1>", value)
+
+
+    def test_clientGoneBeforeResponse(self):
+        """
+        If the client disconnects before the response from the proxied server
+        is received, the request to the proxied server is cancelled.
+        """
+        d = self.makeRequest()[-1]
+        self.channel.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual([d], self.agent.cancelled)
+
+
+    def test_clientGoneDuringResponse(self):
+        """
+        If the client disconnects while the response is being received from
+        the proxied server, the proxied server's transport is stopped.
+        """
+        d = self.makeRequest()[-1]
+        response = self.makeResponse()
+        d.callback(response)
+        self.channel.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual('stopped', response._transport.producerState)
+        response._bodyDataFinished(Failure(ResponseFailed([])))
+
+
+    def test_getChild(self):
+        """
+        The children of an L{AgentReverseProxyResource} proxy the child paths
+        with the same agent.
+        """
+        resource = AgentReverseProxyResource(
+            u"127.0.0.1", 1234, b"/path", MemoryReactor(), self.agent)
+        child = resource.getChild(b'foo bar', None)
+        self.assertEqual(b"/path/foo%20bar", child.path)
+        self.assertIs(self.agent, child.agent)
+
+
+    def test_persistentConnections(self):
+        """
+        By default, L{AgentReverseProxyResource} reuses connections to the
+        proxied server.
+        """
+        reactor = MemoryReactorClock()
+        resource = AgentReverseProxyResource(
+            u"127.0.0.1", 1234, b"/path", reactor)
+        self.site.resource.putChild(b'pooled', resource)
+        for i in range(2):
+            self.channel.dataReceived(
+                b"GET /pooled HTTP/1.1\r\nHost: a\r\n\r\n")
+            self.assertEqual(1, len(reactor.tcpClients))
+            if i == 0:
+                upstream = reactor.tcpClients[0][2].buildProtocol(None)
+                upstream.makeConnection(StringTransport())
+            upstream.dataReceived(
+                b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        self.assertEqual(2, self.transport.value().count(b"\r\n\r\nok"))
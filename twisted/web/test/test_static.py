@@ -9,6 +9,7 @@ import inspect
 import mimetypes
 import os
 import re
+import zlib
 
 
 from io import BytesIO as StringIO
@@ -16,12 +17,15 @@ from io import BytesIO as StringIO
 from zope.interface.verify import verifyObject
 
 from twisted.internet import abstract, interfaces
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionLost
+from twisted.internet.task import Clock
 from twisted.python.runtime import platform
 from twisted.python.filepath import FilePath
 from twisted.python import log
 from twisted.python.compat import intToBytes, networkString
 from twisted.trial.unittest import TestCase
-from twisted.web import static, http, script, resource
+from twisted.web import static, http, script, resource, server
 from twisted.web.server import UnsupportedMethod
 from twisted.web.test.requesthelper import DummyRequest
 from twisted.web.test._util import _render
@@ -57,6 +61,83 @@ class StaticDataTests(TestCase):
         self.assertRaises(UnsupportedMethod, data.render, request)
 
 
+    def test_gzip(self):
+        """
+        If C{gzip} is set, L{Data.render} sends the data compressed with gzip
+        to a client which accepts it, compressing it only once.
+        """
+        compressed = []
+        originalGzip = server._gzip
+        def gzip(data):
+            compressed.append(data)
+            return originalGzip(data)
+        self.patch(server, '_gzip', gzip)
+        data = static.Data(b"foo" * 100, "text/plain")
+        data.gzip = True
+        for i in range(2):
+            request = DummyRequest([b''])
+            request.requestHeaders.setRawHeaders(
+                b"accept-encoding", [b"deflate, gzip"])
+            self.successResultOf(_render(data, request))
+            body = b"".join(request.written)
+            self.assertEqual(
+                b"foo" * 100, zlib.decompress(body, 16 + zlib.MAX_WBITS))
+            self.assertEqual(
+                [b"gzip"],
+                request.responseHeaders.getRawHeaders(b"content-encoding"))
+            self.assertEqual(
+                [intToBytes(len(body))],
+                request.responseHeaders.getRawHeaders(b"content-length"))
+            self.assertEqual(
+                [b"Accept-Encoding"],
+                request.responseHeaders.getRawHeaders(b"vary"))
+        self.assertEqual([b"foo" * 100], compressed)
+
+
+    def test_gzipDataChanged(self):
+        """
+        If the data of a L{Data} changes, it is compressed again.
+        """
+        data = static.Data(b"foo" * 100, "text/plain")
+        data.gzip = True
+        data._getCompressed()
+        data.data = b"bar" * 100
+        self.assertEqual(
+            b"bar" * 100,
+            zlib.decompress(data._getCompressed(), 16 + zlib.MAX_WBITS))
+
+
+    def test_gzipNotAccepted(self):
+        """
+        If C{gzip} is set, L{Data.render} sends the data as it is to a client
+        which doesn't accept gzip.
+        """
+        data = static.Data(b"foo" * 100, "text/plain")
+        data.gzip = True
+        request = DummyRequest([b''])
+        request.requestHeaders.setRawHeaders(
+            b"accept-encoding", [b"gzip;q=0, deflate"])
+        self.successResultOf(_render(data, request))
+        self.assertEqual(b"foo" * 100, b"".join(request.written))
+        self.assertFalse(request.responseHeaders.hasHeader(b"content-encoding"))
+        self.assertEqual(
+            [b"Accept-Encoding"], request.responseHeaders.getRawHeaders(b"vary"))
+
+
+    def test_gzipNotSmaller(self):
+        """
+        If compressing the data doesn't make it smaller, L{Data.render} sends
+        it as it is.
+        """
+        data = static.Data(b"foo", "text/plain")
+        data.gzip = True
+        request = DummyRequest([b''])
+        request.requestHeaders.setRawHeaders(b"accept-encoding", [b"gzip"])
+        self.successResultOf(_render(data, request))
+        self.assertEqual(b"foo", b"".join(request.written))
+        self.assertFalse(request.responseHeaders.hasHeader(b"content-encoding"))
+
+
 
 class StaticFileTests(TestCase):
     """
@@ -447,6 +528,371 @@ class StaticFileTests(TestCase):
 
 
 
+class FakeNotifier(object):
+    """
+    A fake L{INotify<twisted.internet.inotify.INotify>} which records the
+    paths it is asked to watch.
+
+    @ivar watches: A C{dict} mapping the paths being watched to the callbacks
+        for them.
+    """
+
+    def __init__(self):
+        self.watches = {}
+
+
+    def watch(self, path, mask=None, autoAdd=False, callbacks=None,
+              recursive=False):
+        self.watches[path.path] = callbacks
+
+
+    def ignore(self, path):
+        del self.watches[path.path]
+
+
+
+class FileCacheTests(TestCase):
+    """
+    Tests for L{File} resources using a L{static.FileCache}.
+    """
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = static.FileCache(
+            validFor=5, reactor=self.clock, notifier=FakeNotifier())
+        # Check entries after validFor seconds, as where inotify is missing.
+        self.cache._notifier = None
+        self.base = FilePath(self.mktemp())
+        self.base.makedirs()
+        self.base.child("foo.txt").setContent(b"foo")
+        self.root = static.File(self.base.path, cache=self.cache)
+
+
+    def _get(self, name=b"foo.txt"):
+        """
+        Look up and render a child of C{self.root}.
+
+        @return: The L{DummyRequest} it was rendered for.
+        """
+        request = DummyRequest([name])
+        child = resource.getChildForRequest(self.root, request)
+        self.successResultOf(_render(child, request))
+        return request
+
+
+    def test_childrenShareCache(self):
+        """
+        The L{File}s created for the children of a L{File} with a cache use
+        the same cache.
+        """
+        child = self.root.getChild(b"foo.txt", DummyRequest([]))
+        self.assertIs(child.cache, self.cache)
+
+
+    def test_childCached(self):
+        """
+        The L{File} a child is resolved to is kept in the cache and returned
+        for later requests.
+        """
+        first = self.root.getChild(b"foo.txt", DummyRequest([]))
+        second = self.root.getChild(b"foo.txt", DummyRequest([]))
+        self.assertIs(first, second)
+
+
+    def test_smallFileContentsCached(self):
+        """
+        The contents of a file no larger than C{maxFileSize} are read once and
+        then served from memory.
+        """
+        child = self.root.getChild(b"foo.txt", DummyRequest([]))
+        opened = []
+        openForReading = child.openForReading
+        def countingOpen():
+            opened.append(True)
+            return openForReading()
+        child.openForReading = countingOpen
+        self.assertEqual(b"".join(self._get().written), b"foo")
+        self.assertEqual(b"".join(self._get().written), b"foo")
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(self.cache._size, 3)
+
+
+    def test_largeFileContentsNotCached(self):
+        """
+        The contents of a file larger than C{maxFileSize} are not kept.
+        """
+        self.cache.maxFileSize = 2
+        self.assertEqual(b"".join(self._get().written), b"foo")
+        self.assertIs(self.cache._entries[self.base.child("foo.txt").path].body,
+                      None)
+        self.assertEqual(self.cache._size, 0)
+
+
+    def test_changesNoticedAfterValidFor(self):
+        """
+        Changes to a file are not noticed until C{validFor} seconds after the
+        file was last checked.
+        """
+        self._get()
+        self.base.child("foo.txt").setContent(b"quux")
+        self.assertEqual(b"".join(self._get().written), b"foo")
+        self.clock.advance(5)
+        request = self._get()
+        self.assertEqual(b"".join(request.written), b"quux")
+        self.assertEqual(
+            request.responseHeaders.getRawHeaders(b"content-length"), [b"4"])
+
+
+    def test_deletedFileNotFound(self):
+        """
+        Once a deleted file is checked again, it is not found.
+        """
+        self._get()
+        self.base.child("foo.txt").remove()
+        self.clock.advance(5)
+        self.assertEqual(self._get().responseCode, 404)
+
+
+    def test_newChildFound(self):
+        """
+        A child created in a directory is found once the directory is checked
+        again.
+        """
+        self._get()
+        self.base.child("bar.txt").setContent(b"bar")
+        self.clock.advance(5)
+        self.assertEqual(b"".join(self._get(b"bar.txt").written), b"bar")
+
+
+    def test_entityTag(self):
+        """
+        The response to a request for a cached file has an entity tag, and
+        nothing is written if the request is conditional on it.
+        """
+        tags = []
+        request = DummyRequest([b"foo.txt"])
+        def setETag(tag):
+            tags.append(tag)
+            return http.CACHED
+        request.setETag = setETag
+        child = resource.getChildForRequest(self.root, request)
+        self.successResultOf(_render(child, request))
+        self.assertEqual(b"".join(request.written), b"")
+        self.assertEqual(len(tags), 1)
+        self.assertIsInstance(tags[0], bytes)
+
+
+    def test_maxEntries(self):
+        """
+        When there are more than C{maxEntries} entries, the least recently
+        used are discarded.
+        """
+        self.cache.maxEntries = 2
+        self.base.child("bar.txt").setContent(b"bar")
+        self._get()
+        self._get(b"bar.txt")
+        self.assertEqual(
+            list(self.cache._entries),
+            [self.base.path, self.base.child("bar.txt").path])
+        self.assertEqual(self.cache._size, 3)
+
+
+    def test_maxBytes(self):
+        """
+        When the total size of the contents kept is more than C{maxBytes},
+        the least recently used entries are discarded.
+        """
+        self.cache.maxBytes = 5
+        self.base.child("bar.txt").setContent(b"bar")
+        self._get()
+        self._get(b"bar.txt")
+        self.assertNotIn(self.base.child("foo.txt").path, self.cache._entries)
+        self.assertIn(self.base.child("bar.txt").path, self.cache._entries)
+        self.assertEqual(self.cache._size, 3)
+
+
+
+class FileGzipTests(TestCase):
+    """
+    Tests for L{File} resources with C{gzip} set.
+    """
+    def setUp(self):
+        self.base = FilePath(self.mktemp())
+        self.base.makedirs()
+        self.content = b"foo" * 100
+        self.base.child("foo.txt").setContent(self.content)
+        self.root = static.File(self.base.path)
+        self.root.gzip = True
+
+
+    def _get(self, name=b"foo.txt", acceptEncoding=b"gzip"):
+        """
+        Look up and render a child of C{self.root}.
+
+        @return: The L{DummyRequest} it was rendered for.
+        """
+        request = DummyRequest([name])
+        if acceptEncoding is not None:
+            request.requestHeaders.setRawHeaders(
+                b"accept-encoding", [acceptEncoding])
+        child = resource.getChildForRequest(self.root, request)
+        self.successResultOf(_render(child, request))
+        return request
+
+
+    def test_precompressed(self):
+        """
+        If a file named like the requested one with C{.gz} appended exists, it
+        is sent with the content type of the requested file and a gzip content
+        encoding.
+        """
+        self.base.child("foo.txt.gz").setContent(b"compressed foo")
+        request = self._get()
+        self.assertEqual(b"compressed foo", b"".join(request.written))
+        headers = request.responseHeaders
+        self.assertEqual([b"gzip"], headers.getRawHeaders(b"content-encoding"))
+        self.assertEqual([b"text/plain"], headers.getRawHeaders(b"content-type"))
+        self.assertEqual([b"14"], headers.getRawHeaders(b"content-length"))
+        self.assertEqual([b"Accept-Encoding"], headers.getRawHeaders(b"vary"))
+
+
+    def test_precompressedNotAccepted(self):
+        """
+        A client which doesn't accept gzip is sent the requested file.
+        """
+        self.base.child("foo.txt.gz").setContent(b"compressed foo")
+        request = self._get(acceptEncoding=None)
+        self.assertEqual(self.content, b"".join(request.written))
+        headers = request.responseHeaders
+        self.assertFalse(headers.hasHeader(b"content-encoding"))
+        self.assertEqual([b"Accept-Encoding"], headers.getRawHeaders(b"vary"))
+
+
+    def test_notCompressed(self):
+        """
+        Without a C{.gz} file or a cache, the requested file is sent as it is.
+        """
+        request = self._get()
+        self.assertEqual(self.content, b"".join(request.written))
+        self.assertFalse(
+            request.responseHeaders.hasHeader(b"content-encoding"))
+
+
+    def test_uncompressibleType(self):
+        """
+        Files with a type which is already compressed are sent as they are,
+        and the response doesn't vary with I{Accept-Encoding}.
+        """
+        self.base.child("foo.png").setContent(b"png")
+        self.base.child("foo.png.gz").setContent(b"compressed png")
+        request = self._get(b"foo.png")
+        self.assertEqual(b"png", b"".join(request.written))
+        self.assertFalse(request.responseHeaders.hasHeader(b"vary"))
+
+
+    def test_cached(self):
+        """
+        If the contents of a file are kept in a L{FileCache}, they are
+        compressed once and the result kept in the cache as well.
+        """
+        cache = static.FileCache(
+            reactor=Clock(), notifier=FakeNotifier())
+        cache._notifier = None
+        self.root = static.File(self.base.path, cache=cache)
+        self.root.gzip = True
+        compressed = []
+        originalGzip = server._gzip
+        def gzip(data):
+            compressed.append(data)
+            return originalGzip(data)
+        self.patch(server, '_gzip', gzip)
+
+        for i in range(2):
+            request = self._get()
+            body = b"".join(request.written)
+            self.assertEqual(
+                self.content, zlib.decompress(body, 16 + zlib.MAX_WBITS))
+            headers = request.responseHeaders
+            self.assertEqual(
+                [b"gzip"], headers.getRawHeaders(b"content-encoding"))
+            self.assertEqual(
+                [intToBytes(len(body))], headers.getRawHeaders(b"content-length"))
+        self.assertEqual([self.content], compressed)
+        self.assertEqual(len(self.content) + len(body), cache._size)
+
+        cache.invalidate(self.base.child("foo.txt").path)
+        self.assertEqual(0, cache._size)
+
+
+    def test_cachedRange(self):
+        """
+        A request for a range of a file is answered from the file as it is,
+        rather than from its compressed contents.
+        """
+        self.root.cache = static.FileCache(
+            reactor=Clock(), notifier=FakeNotifier())
+        request = DummyRequest([b"foo.txt"])
+        request.requestHeaders.setRawHeaders(b"accept-encoding", [b"gzip"])
+        request.requestHeaders.setRawHeaders(b"range", [b"bytes=0-2"])
+        child = resource.getChildForRequest(self.root, request)
+        self.successResultOf(_render(child, request))
+        self.assertEqual(b"foo", b"".join(request.written))
+
+
+    def test_childrenInheritGzip(self):
+        """
+        The L{File}s created for the children of a L{File} have the same
+        C{gzip} setting.
+        """
+        child = self.root.getChild(b"foo.txt", DummyRequest([]))
+        self.assertTrue(child.gzip)
+
+
+
+class FileCacheNotifierTests(TestCase):
+    """
+    Tests for L{static.FileCache} watching the paths it caches.
+    """
+    def setUp(self):
+        self.clock = Clock()
+        self.notifier = FakeNotifier()
+        self.cache = static.FileCache(
+            validFor=5, reactor=self.clock, notifier=self.notifier)
+        self.base = FilePath(self.mktemp())
+        self.base.makedirs()
+        self.path = self.base.child(b"foo.txt")
+        self.path.setContent(b"foo")
+        self.root = static.File(self.base.path, cache=self.cache)
+
+
+    def test_watched(self):
+        """
+        Paths are watched while they have entries, and their entries are not
+        checked again after C{validFor} seconds.
+        """
+        child = self.root.getChild(b"foo.txt", DummyRequest([]))
+        entry = self.cache.getEntry(child)
+        self.assertEqual(
+            set(self.notifier.watches), set([self.base.path, self.path.path]))
+        self.path.setContent(b"quux")
+        self.clock.advance(5)
+        self.assertIs(self.cache.getEntry(child), entry)
+
+
+    def test_changed(self):
+        """
+        When a watched path changes, its entry and that of its parent
+        directory are discarded and the paths are no longer watched.
+        """
+        child = self.root.getChild(b"foo.txt", DummyRequest([]))
+        entry = self.cache.getEntry(child)
+        [callback] = self.notifier.watches[self.path.path]
+        callback(None, self.path, 0)
+        self.assertEqual(self.notifier.watches, {})
+        self.assertEqual(self.cache._entries, {})
+        self.assertIsNot(self.cache.getEntry(child), entry)
+
+
+
 class StaticMakeProducerTests(TestCase):
     """
     Tests for L{File.makeProducer}.
@@ -927,6 +1373,106 @@ class SingleRangeStaticProducerTests(TestCase):
 
 
 
+class SendFileRequest(DummyRequest):
+    """
+    A L{DummyRequest} which can write files as if with C{sendfile}.
+
+    @ivar sentFiles: A C{list} of the arguments passed to C{_sendFile}.
+
+    @ivar sendFileResult: The L{Deferred} to return from C{_sendFile}.
+    """
+
+    def __init__(self, postpath):
+        DummyRequest.__init__(self, postpath)
+        self.sentFiles = []
+        self.sendFileResult = Deferred()
+
+
+    def _sendFile(self, fileObject, offset, count):
+        self.sentFiles.append((fileObject, offset, count))
+        return self.sendFileResult
+
+
+
+class SendFileStaticProducerTests(TestCase):
+    """
+    Tests for L{NoRangeStaticProducer} and L{SingleRangeStaticProducer} when
+    the request can write files with C{sendfile}.
+    """
+
+    def setUp(self):
+        path = FilePath(self.mktemp())
+        path.setContent(b'abcdef')
+        self.fileObject = path.open()
+        self.addCleanup(self.fileObject.close)
+        self.request = SendFileRequest([])
+
+
+    def test_noRange(self):
+        """
+        L{NoRangeStaticProducer.start} has the request send the whole file,
+        and finishes the request and closes the file once it has been sent.
+        """
+        producer = static.NoRangeStaticProducer(self.request, self.fileObject)
+        producer.start()
+        self.assertEqual(self.request.sentFiles, [(self.fileObject, 0, 6)])
+        self.assertEqual(self.request.finished, 0)
+        self.request.sendFileResult.callback(None)
+        self.assertEqual(self.request.finished, 1)
+        self.assertTrue(self.fileObject.closed)
+        self.assertEqual(self.request.written, [])
+
+
+    def test_singleRange(self):
+        """
+        L{SingleRangeStaticProducer.start} has the request send the range of
+        the file, and finishes the request once it has been sent.
+        """
+        producer = static.SingleRangeStaticProducer(
+            self.request, self.fileObject, 2, 3)
+        producer.start()
+        self.assertEqual(self.request.sentFiles, [(self.fileObject, 2, 3)])
+        self.request.sendFileResult.callback(None)
+        self.assertEqual(self.request.finished, 1)
+
+
+    def test_connectionLost(self):
+        """
+        If the file can't be sent because the connection was lost, the file
+        is closed and the request isn't finished.
+        """
+        producer = static.NoRangeStaticProducer(self.request, self.fileObject)
+        producer.start()
+        self.request.sendFileResult.errback(ConnectionLost())
+        self.assertEqual(self.request.finished, 0)
+        self.assertTrue(self.fileObject.closed)
+        self.assertEqual(self.flushLoggedErrors(), [])
+
+
+    def test_sendFileRefused(self):
+        """
+        If the request's C{_sendFile} returns C{None}, the file is produced
+        as usual.
+        """
+        self.request.sendFileResult = None
+        producer = static.NoRangeStaticProducer(self.request, self.fileObject)
+        producer.start()
+        self.assertEqual(b''.join(self.request.written), b'abcdef')
+        self.assertEqual(self.request.finished, 1)
+
+
+    def test_noFileDescriptor(self):
+        """
+        A file object without a file descriptor is produced as usual.
+        """
+        producer = static.NoRangeStaticProducer(
+            self.request, StringIO(b'abcdef'))
+        producer.start()
+        self.assertEqual(self.request.sentFiles, [])
+        self.assertEqual(b''.join(self.request.written), b'abcdef')
+
+
+
 class MultipleRangeStaticProducerTests(TestCase):
     """
     Tests for L{MultipleRangeStaticProducer}.
@@ -7,6 +7,7 @@ Tests for L{twisted.web.template}
 
 from __future__ import division, absolute_import
 
+from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
 from twisted.internet.defer import succeed, gatherResults
@@ -14,7 +15,7 @@ from twisted.python.filepath import FilePath
 from twisted.trial.unittest import TestCase
 from twisted.trial.util import suppress as SUPPRESS
 from twisted.web.template import (
-    Element, TagLoader, renderer, tags, XMLFile, XMLString)
+    Element, TagLoader, renderer, tags, XMLFile, XMLString, Tag)
 from twisted.web.iweb import ITemplateLoader
 
 from twisted.web.error import (FlattenerError, MissingTemplateLoader,
@@ -633,6 +634,77 @@ class TagLoaderTests(FlattenTestCase):
 
 
 
+class CompiledTemplateTests(FlattenTestCase):
+    """
+    Tests for the compiled documents which L{Element.render} gets from the
+    loaders in L{twisted.web.template}.
+    """
+    def test_compiledOnce(self):
+        """
+        The document is compiled the first time the element is rendered, and
+        the compiled document is reused after that.
+        """
+        loader = XMLString('<p><b>static</b></p>')
+        first = Element(loader).render(None)
+        self.assertIs(Element(loader).render(None), first)
+        self.assertFlattensImmediately(first, b'<p><b>static</b></p>')
+
+
+    def test_loadUnchanged(self):
+        """
+        Compiling the document leaves the result of C{load} as it was.
+        """
+        loader = XMLString('<p><b>static</b></p>')
+        Element(loader).render(None)
+        [p] = loader.load()
+        self.assertIsInstance(p, Tag)
+        self.assertEqual(p.children[0].tagName, 'b')
+
+
+    def test_recompiledWhenLoadChanges(self):
+        """
+        If C{load} returns a different document, as a subclass which reloads
+        its template might, the new document is compiled.
+        """
+        class ReloadingLoader(XMLString):
+            def load(self):
+                return [self.tag]
+        loader = ReloadingLoader('<i>ignored</i>')
+        loader.tag = tags.i('one')
+        self.assertFlattensImmediately(Element(loader), b'<i>one</i>')
+        loader.tag = tags.i('two')
+        self.assertFlattensImmediately(Element(loader), b'<i>two</i>')
+
+
+    def test_tagLoaderChangedInPlace(self):
+        """
+        Changes made in place to the tag loaded by a L{TagLoader} show up the
+        next time an element using it is rendered.
+        """
+        tag = tags.p(tags.b('one'))
+        loader = TagLoader(tag)
+        self.assertFlattensImmediately(
+            Element(loader), b'<p><b>one</b></p>')
+        tag.children[0].children[:] = ['two']
+        tag(tags.i('three'))
+        self.assertFlattensImmediately(
+            Element(loader), b'<p><b>two</b><i>three</i></p>')
+
+
+    def test_otherLoader(self):
+        """
+        A loader which does not compile its document is still loaded with
+        C{load}.
+        """
+        @implementer(ITemplateLoader)
+        class SimpleLoader(object):
+            def load(self):
+                return [tags.i('simple')]
+        self.assertFlattensImmediately(
+            Element(SimpleLoader()), b'<i>simple</i>')
+
+
+
 class TestElement(Element):
     """
     An L{Element} that can be rendered successfully.
@@ -715,6 +787,19 @@ class RenderElementTests(TestCase):
         return d
 
 
+    def test_largeWrites(self):
+        """
+        L{renderElement} writes the flattened L{Element} to the request in a
+        single piece, rather than writing each piece of markup separately.
+        """
+        element = Element(TagLoader(
+            tags.ul([tags.li(str(i)) for i in range(100)])))
+        renderElement(self.request, element)
+        self.assertEqual(len(self.request.written), 2)
+        self.assertEqual(self.request.written[0], b"<!DOCTYPE html>\n")
+        self.assertTrue(self.request.finished)
+
+
     def test_simpleFailure(self):
         """
         L{renderElement} handles failures by writing a minimal
@@ -18,6 +18,8 @@ from twisted.trial import unittest
 from twisted.internet import reactor
 from twisted.internet.address import IPv4Address
 from twisted.internet.task import Clock
+from twisted.test.proto_helpers import StringTransport
+from twisted.logger import Logger, LogLevel, formatEvent
 from twisted.web import server, resource
 from twisted.web import iweb, http, error
 
@@ -602,6 +604,164 @@ class RequestTests(unittest.TestCase):
 
 
 
+class SlimRequestTests(unittest.TestCase):
+    """
+    Tests for L{server.SlimRequest}.
+    """
+
+    def test_interface(self):
+        """
+        L{server.SlimRequest} instances provide L{iweb.IRequest}.
+        """
+        self.assertTrue(
+            verifyObject(iweb.IRequest,
+                         server.SlimRequest(DummyChannel(), True)))
+
+
+    def test_defaults(self):
+        """
+        A new L{server.SlimRequest} has the same defaults for its request line
+        and response state as a L{server.Request}.
+        """
+        slim = server.SlimRequest(DummyChannel(), False)
+        request = server.Request(DummyChannel(), False)
+        for name in ('method', 'uri', 'clientproto', 'path', 'content',
+                     'site', 'finished', 'startedWriting', 'chunked',
+                     'sentLength'):
+            self.assertEqual(getattr(request, name), getattr(slim, name))
+        self.assertIsNone(slim.getTimeToFirstByte())
+        self.assertIsNone(slim.getDuration())
+
+
+    def test_slots(self):
+        """
+        The attributes set on every request by L{server.SlimRequest.__init__}
+        and L{server.SlimRequest.requestReceived} are kept in slots rather
+        than in the instance dictionary.
+        """
+        request = server.SlimRequest(DummyChannel(), False)
+        request.gotLength(0)
+        request.requestReceived(b'GET', b'/foo?bar=baz', b'HTTP/1.0')
+        for name in ('method', 'uri', 'path', 'client', 'host',
+                     'prepath', 'postpath', '_channel', '_transport'):
+            self.assertNotIn(name, request.__dict__)
+        self.assertEqual(b'/foo', request.path)
+        self.assertEqual({b'bar': [b'baz']}, request.args)
+
+
+    def test_transportDeprecated(self):
+        """
+        Getting and setting L{server.SlimRequest.transport} emits a
+        L{DeprecationWarning} and uses the request's C{_transport}.
+        """
+        request = server.SlimRequest(DummyChannel(), False)
+        transport = request.transport
+        self.assertIs(request._transport, transport)
+        request.transport = None
+        self.assertIsNone(request._transport)
+
+        warnings = self.flushWarnings([self.test_transportDeprecated])
+        self.assertEqual(2, len(warnings))
+        for warning in warnings:
+            self.assertEqual(DeprecationWarning, warning['category'])
+            self.assertEqual(
+                "twisted.web.http.Request.transport was deprecated in "
+                "Twisted 16.2.0. Call directly into the Request object "
+                "instead.", warning['message'])
+
+
+    def test_channelDeprecated(self):
+        """
+        Getting and setting L{server.SlimRequest.channel} emits a
+        L{DeprecationWarning} and uses the request's C{_channel}.
+        """
+        request = server.SlimRequest(DummyChannel(), False)
+        channel = request.channel
+        self.assertIs(request._channel, channel)
+        request.channel = None
+        self.assertIsNone(request._channel)
+
+        warnings = self.flushWarnings([self.test_channelDeprecated])
+        self.assertEqual(2, len(warnings))
+        for warning in warnings:
+            self.assertEqual(DeprecationWarning, warning['category'])
+            self.assertEqual(
+                "twisted.web.http.Request.channel was deprecated in "
+                "Twisted 16.2.0. Call directly into the Request object "
+                "instead.", warning['message'])
+
+
+    def test_lazyArgumentsAndCookies(self):
+        """
+        The query arguments and cookies of a L{server.SlimRequest} received
+        with C{bulkHeadParsing} are parsed when they are first used.
+        """
+        channel = DummyChannel()
+        channel.bulkHeadParsing = True
+        request = server.SlimRequest(channel, False)
+        request.requestHeaders.setRawHeaders(b'cookie', [b'a=b; c=d'])
+        request.gotLength(0)
+        request.requestReceived(b'GET', b'/foo?bar=baz', b'HTTP/1.0')
+        self.assertEqual({b'bar': [b'baz']}, request.args)
+        self.assertEqual({b'a': b'b', b'c': b'd'}, request.received_cookies)
+        self.assertEqual(b'b', request.getCookie(b'a'))
+
+
+    def test_unknownAttribute(self):
+        """
+        Getting an attribute which a L{server.SlimRequest} does not have
+        raises L{AttributeError}.
+        """
+        request = server.SlimRequest(DummyChannel(), False)
+        self.assertRaises(AttributeError, getattr, request, 'nonexistent')
+
+
+    def test_render(self):
+        """
+        A L{server.Site} with L{server.SlimRequest} as its C{requestFactory}
+        renders resources just as it does with L{server.Request}.
+        """
+        root = resource.Resource()
+        root.putChild(b'foo', Data(b'hello', 'text/plain'))
+        site = server.Site(root, requestFactory=server.SlimRequest)
+        channel = site.buildProtocol(None)
+        transport = StringTransport()
+        channel.makeConnection(transport)
+        channel.dataReceived(
+            b'GET /foo HTTP/1.1\r\nHost: example.com\r\n\r\n')
+        response = transport.value()
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK\r\n'))
+        self.assertTrue(response.endswith(b'\r\n\r\nhello'))
+
+
+    def test_getStateToCopyFor(self):
+        """
+        L{server.SlimRequest.getStateToCopyFor} includes the attributes kept
+        in slots in the state it returns, without copying them into the
+        request's own C{__dict__}.
+        """
+        request = server.SlimRequest(DummyChannel(), False)
+        request.gotLength(0)
+        request.method = b'GET'
+        request.uri = b'/foo'
+        request.client = IPv4Address('TCP', '10.0.0.1', 12345)
+        request.host = IPv4Address('TCP', '10.0.0.2', 80)
+        state = request.getStateToCopyFor(None)
+        self.assertEqual(b'GET', state['method'])
+        self.assertEqual(b'/foo', state['uri'])
+        self.assertEqual({}, state['received_cookies'])
+        for name in server.SlimRequest.__slots__:
+            self.assertNotIn(name, request.__dict__)
+        request.method = b'POST'
+        self.assertEqual(b'POST', request.method)
+
+    if _PY3:
+        test_getStateToCopyFor.skip = (
+            "Request.getStateToCopyFor depends on twisted.spread, which is "
+            "not ported to Python 3 yet.")
+
+
+
 class GzipEncoderTests(unittest.TestCase):
 
     if _PY3:
@@ -728,6 +888,92 @@ class GzipEncoderTests(unittest.TestCase):
                          zlib.decompress(body, 16 + zlib.MAX_WBITS))
 
 
+    def _getWith(self, acceptEncoding, path=b'/foo'):
+        """
+        Request C{path} with the given I{Accept-Encoding} header.
+
+        @return: The response headers and body.
+        """
+        request = server.Request(self.channel, False)
+        request.gotLength(0)
+        request.requestHeaders.setRawHeaders(b"Accept-Encoding",
+                                             [acceptEncoding])
+        request.requestReceived(b'GET', path, b'HTTP/1.0')
+        data = self.channel.transport.written.getvalue()
+        return data.split(b"\r\n\r\n", 1)
+
+
+    def test_vary(self):
+        """
+        A compressed response has a I{Vary} header naming
+        I{Accept-Encoding}.
+        """
+        headers, body = self._getWith(b"gzip")
+        self.assertIn(b"\r\nVary: Accept-Encoding", headers)
+
+
+    def test_acceptWithParameters(self):
+        """
+        L{server.GzipEncoderFactory} recognizes gzip in an I{Accept-Encoding}
+        header with whitespace and quality values, and doesn't compress if the
+        quality of gzip is 0.
+        """
+        headers, body = self._getWith(b"deflate, gzip;q=0.5")
+        self.assertIn(b"Content-Encoding: gzip\r\n", headers)
+
+        self.channel.transport.written.seek(0)
+        self.channel.transport.written.truncate()
+        headers, body = self._getWith(b"deflate, gzip;q=0")
+        self.assertNotIn(b"Content-Encoding", headers)
+        self.assertEqual(b"Some data", body)
+
+
+    def test_uncompressibleType(self):
+        """
+        A response whose content type is in C{uncompressibleTypes} is not
+        compressed.
+        """
+        self.channel.site.resource.putChild(
+            b"image", resource.EncodingResourceWrapper(
+                Data(b"Some data", "image/png; x=y"),
+                [server.GzipEncoderFactory()]))
+        headers, body = self._getWith(b"gzip", b"/image")
+        self.assertNotIn(b"Content-Encoding", headers)
+        self.assertIn(b"Content-Length: 9", headers)
+        self.assertEqual(b"Some data", body)
+
+
+    def test_minimumLength(self):
+        """
+        A response whose I{Content-Length} is less than C{minimumLength} is not
+        compressed.
+        """
+        factory = server.GzipEncoderFactory()
+        factory.minimumLength = 10
+        self.channel.site.resource.putChild(
+            b"short", resource.EncodingResourceWrapper(
+                Data(b"Some data", "text/plain"), [factory]))
+        headers, body = self._getWith(b"gzip", b"/short")
+        self.assertNotIn(b"Content-Encoding", headers)
+        self.assertIn(b"Content-Length: 9", headers)
+        self.assertEqual(b"Some data", body)
+
+
+    def test_alreadyGzipped(self):
+        """
+        A response which is already gzipped is not compressed again.
+        """
+        data = Data(b"Some data" * 10, "text/plain")
+        data.gzip = True
+        self.channel.site.resource.putChild(
+            b"gzipped", resource.EncodingResourceWrapper(
+                data, [server.GzipEncoderFactory()]))
+        headers, body = self._getWith(b"gzip", b"/gzipped")
+        self.assertIn(b"Content-Encoding: gzip\r\n", headers)
+        self.assertEqual(b"Some data" * 10,
+                         zlib.decompress(body, 16 + zlib.MAX_WBITS))
+
+
 
 class RootResource(resource.Resource):
     isLeaf=0
@@ -1111,6 +1357,107 @@ class HTTPFactoryAccessLogTests(AccessLogTestsMixin, unittest.TestCase):
 
 
 
+class ThreadedHTTPFactoryAccessLogTests(AccessLogTestsMixin,
+                                        unittest.TestCase):
+    """
+    Tests for L{http.HTTPFactory.log} with C{threadedLog} enabled.
+    """
+    linesep = b"\n"
+
+    def factory(self, *args, **kwargs):
+        kwargs["threadedLog"] = True
+        return http.HTTPFactory(*args, **kwargs)
+
+
+    def test_threadedLogFile(self):
+        """
+        If C{threadedLog} is C{True}, the log file opened for the factory's
+        C{logPath} is wrapped in a L{http.ThreadedAccessLog}.
+        """
+        factory = self.factory(logPath=self.mktemp())
+        factory.startFactory()
+        self.addCleanup(factory.stopFactory)
+        self.assertIsInstance(factory.logFile, http.ThreadedAccessLog)
+
+
+
+class StructuredAccessLogTests(unittest.TestCase):
+    """
+    Tests for L{http.HTTPFactory.log} with C{structuredLog} enabled.
+    """
+    def setUp(self):
+        self.events = []
+        self.patch(http.HTTPFactory, "_log", Logger(
+            observer=self.events.append))
+
+        self.clock = Clock()
+        self.clock.advance(1234567890)
+        self.logPath = self.mktemp()
+        self.factory = http.HTTPFactory(
+            logPath=self.logPath, reactor=self.clock, structuredLog=True)
+        self.factory.startFactory()
+        self.addCleanup(self.factory.stopFactory)
+
+        channel = DummyChannel()
+        channel.factory = self.factory
+        self.request = http.Request(channel, False)
+        self.request.gotLength(0)
+        self.request.requestReceived(b'GET', b'/dummy?x=1', b'HTTP/1.0')
+
+
+    def finishRequest(self):
+        """
+        Respond to C{self.request} and return the event logged about it.
+        """
+        self.request.requestHeaders.setRawHeaders(
+            b"user-agent", [b"Agent/1.0"])
+        self.clock.advance(0.25)
+        self.request.write(b"hello")
+        self.clock.advance(0.5)
+        self.request.finish()
+        [event] = self.events
+        return event
+
+
+    def test_fields(self):
+        """
+        The event emitted for a request has the raw values of the request's
+        fields and its timing.
+        """
+        event = self.finishRequest()
+        self.assertEqual(event["method"], b"GET")
+        self.assertEqual(event["uri"], b"/dummy?x=1")
+        self.assertEqual(event["protocol"], b"HTTP/1.0")
+        self.assertEqual(event["status"], 200)
+        self.assertEqual(event["length"], 5)
+        self.assertEqual(event["peer"], "192.168.1.1")
+        self.assertIsNone(event["referrer"])
+        self.assertEqual(event["userAgent"], b"Agent/1.0")
+        self.assertEqual(event["timeToFirstByte"], 0.25)
+        self.assertEqual(event["duration"], 0.75)
+        self.assertEqual(event["log_level"], LogLevel.info)
+
+
+    def test_format(self):
+        """
+        The event is formatted as a I{combined log format} line.
+        """
+        event = self.finishRequest()
+        self.assertEqual(
+            formatEvent(event),
+            u'"192.168.1.1" - - [13/Feb/2009:23:31:30 +0000] '
+            u'"GET /dummy?x=1 HTTP/1.0" 200 5 "-" "Agent/1.0"')
+
+
+    def test_noLogFile(self):
+        """
+        Requests are not written to the file at C{logPath}.
+        """
+        self.finishRequest()
+        self.assertFalse(FilePath(self.logPath).exists())
+
+
+
 class SiteAccessLogTests(AccessLogTestsMixin, unittest.TestCase):
     """
     Tests for L{server.Site.log}.
@@ -26,7 +26,7 @@ from twisted.trial.unittest import TestCase, SkipTest
 from twisted.web import http
 from twisted.web.resource import IResource, Resource
 from twisted.web.server import Request, Site, version
-from twisted.web.wsgi import WSGIResource
+from twisted.web.wsgi import WSGIResource, WSGIResourceStatistics
 from twisted.web.test.test_web import DummyChannel
 
 
@@ -2094,3 +2094,224 @@ class ApplicationTests(WSGITestsMixin, TestCase):
                 raise RuntimeError("This application had some error.")
 
         return self._connectionClosedTest(Application, responseContent)
+
+
+
+class OutputBufferingTests(WSGITestsMixin, TestCase):
+    """
+    Tests for the collection of small strings of application output before
+    they are written, enabled by L{WSGIResource.outputBufferSize}.
+    """
+    def setUp(self):
+        WSGITestsMixin.setUp(self)
+        self.patch(WSGIResource, 'outputBufferSize', 4)
+        self.written = []
+        written = self.written
+
+        class RecordingRequest(Request):
+            def write(self, data):
+                written.append(data)
+                return Request.write(self, data)
+
+        self.requestClass = RecordingRequest
+
+
+    def renderApplication(self, application):
+        """
+        Render a request with C{application}.
+
+        @return: A L{Deferred} which fires when the request is finished.
+        """
+        d, requestFactory = self.requestFactoryFactory(self.requestClass)
+        self.lowLevelRender(
+            requestFactory, lambda: application, DummyChannel,
+            'GET', '1.1', [], [''])
+        return d
+
+
+    def test_coalesced(self):
+        """
+        Strings produced by the application are written to the request
+        together once their total length reaches C{outputBufferSize}, and the
+        rest are written when the application finishes.
+        """
+        def application(environ, startResponse):
+            startResponse('200 OK', [])
+            return iter([b'a', b'b', b'c', b'dddd', b'e'])
+
+        d = self.renderApplication(application)
+        d.addCallback(
+            lambda ignored: self.assertEqual([b'abcdddd', b'e'], self.written))
+        return d
+
+
+    def test_flushedBeforeWrite(self):
+        """
+        Output collected from the iterator is written before data given to the
+        I{write} callable, keeping the response in order.
+        """
+        def application(environ, startResponse):
+            write = startResponse('200 OK', [])
+            yield b'a'
+            write(b'b')
+            yield b'c'
+
+        d = self.renderApplication(application)
+        d.addCallback(
+            lambda ignored: self.assertEqual([b'ab', b'c'], self.written))
+        return d
+
+
+    def test_discardedOnError(self):
+        """
+        If the application raises an exception before enough output has been
+        collected to be written, the output is discarded and the response
+        status is I{500}.
+        """
+        channel = DummyChannel()
+
+        def application(environ, startResponse):
+            startResponse('200 OK', [])
+            yield b'a'
+            raise RuntimeError("This application had some error.")
+
+        d, requestFactory = self.requestFactoryFactory()
+        def cbRendered(ignored):
+            self.assertEqual(1, len(self.flushLoggedErrors(RuntimeError)))
+            self.assertTrue(
+                channel.transport.written.getvalue().startswith(
+                    b'HTTP/1.1 500 Internal Server Error'))
+        d.addCallback(cbRendered)
+        self.lowLevelRender(
+            requestFactory, lambda: application, lambda: channel,
+            'GET', '1.1', [], [''])
+        return d
+
+
+    def test_onlyBytes(self):
+        """
+        The application may only produce byte strings.
+        """
+        def application(environ, startResponse):
+            startResponse('200 OK', [])
+            return iter([u'a'])
+
+        d, requestFactory = self.requestFactoryFactory()
+        def cbRendered(ignored):
+            self.assertEqual(1, len(self.flushLoggedErrors(TypeError)))
+        d.addCallback(cbRendered)
+        self.lowLevelRender(
+            requestFactory, lambda: application, DummyChannel,
+            'GET', '1.1', [], [''])
+        return d
+
+
+
+class QueueingThreadPool:
+    """
+    A fake L{ThreadPool} which keeps the functions it is given to call until
+    they are run with L{QueueingThreadPool.runNext}.
+    """
+    def __init__(self):
+        self.queue = []
+
+
+    def callInThread(self, f, *a, **kw):
+        self.queue.append((f, a, kw))
+
+
+    def runNext(self):
+        f, a, kw = self.queue.pop(0)
+        f(*a, **kw)
+
+
+
+class StatisticsTests(WSGITestsMixin, TestCase):
+    """
+    Tests for L{WSGIResource.statistics}.
+    """
+    def test_counts(self):
+        """
+        L{WSGIResource.statistics} counts the requests waiting for a thread,
+        the requests the application is handling, and those it has finished
+        handling.
+        """
+        self.threadpool = QueueingThreadPool()
+        running = []
+
+        def application(environ, startResponse):
+            running.append(resource.statistics())
+            startResponse('200 OK', [])
+            return iter(())
+
+        resource = WSGIResource(
+            self.reactor, self.threadpool, application)
+        for i in range(2):
+            channel = DummyChannel()
+            channel.site = Site(resource)
+            request = Request(channel, False)
+            request.gotLength(0)
+            request.requestReceived(b'GET', b'/', b'HTTP/1.1')
+
+        stats = resource.statistics()
+        self.assertIsInstance(stats, WSGIResourceStatistics)
+        self.assertEqual((2, 0, 0), (
+            stats.queuedRequestCount, stats.activeRequestCount,
+            stats.completedRequestCount))
+
+        self.threadpool.runNext()
+        self.assertEqual((1, 1, 0), (
+            running[0].queuedRequestCount, running[0].activeRequestCount,
+            running[0].completedRequestCount))
+
+        self.threadpool.runNext()
+        stats = resource.statistics()
+        self.assertEqual((0, 0, 2), (
+            stats.queuedRequestCount, stats.activeRequestCount,
+            stats.completedRequestCount))
+
+
+    def test_repr(self):
+        """
+        The representation of L{WSGIResourceStatistics} includes its counts.
+        """
+        self.assertEqual(
+            "<WSGIResourceStatistics queued=1 active=2 completed=3>",
+            repr(WSGIResourceStatistics(1, 2, 3)))
+
+
+
+class WithThreadPoolTests(TestCase):
+    """
+    Tests for L{WSGIResource.withThreadPool}.
+    """
+    def test_withThreadPool(self):
+        """
+        L{WSGIResource.withThreadPool} creates a resource with a threadpool of
+        the given size which is started when the reactor runs and stopped
+        after it shuts down.
+        """
+        class FakeReactor:
+            def __init__(self):
+                self.whenRunning = []
+                self.triggers = []
+
+            def callWhenRunning(self, f, *a, **kw):
+                self.whenRunning.append(f)
+
+            def addSystemEventTrigger(self, phase, eventType, f, *a, **kw):
+                self.triggers.append((phase, eventType, f))
+
+        fakeReactor = FakeReactor()
+        application = lambda environ, startResponse: iter(())
+        resource = WSGIResource.withThreadPool(
+            fakeReactor, application, 2, 3, "wsgi")
+        threadpool = resource._threadpool
+        self.assertIsInstance(threadpool, ThreadPool)
+        self.assertEqual((2, 3, "wsgi"),
+                         (threadpool.min, threadpool.max, threadpool.name))
+        self.assertIs(fakeReactor, resource._reactor)
+        self.assertIs(application, resource._application)
+        self.assertEqual([threadpool.start], fakeReactor.whenRunning)
+        self.assertEqual([('after', 'shutdown', threadpool.stop)],
+                         fakeReactor.triggers)
@@ -10,6 +10,7 @@ __metaclass__ = type
 
 from collections import Sequence
 from sys import exc_info
+from threading import Lock
 from warnings import warn
 
 from zope.interface import implementer
@@ -18,6 +19,7 @@ from twisted.internet.threads import blockingCallFromThread
 from twisted.python.compat import reraise
 from twisted.python.log import msg, err
 from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
 from twisted.web.resource import IResource
 from twisted.web.server import NOT_DONE_YET
 from twisted.web.http import INTERNAL_SERVER_ERROR
@@ -258,12 +260,29 @@ class _WSGIResponse:
     @ivar _requestFinished: A flag which indicates whether it is possible to
         generate more response data or not.  This is C{False} until
         L{Request.notifyFinish} tells us the request is done, then C{True}.
+
+    @ivar bufferSize: The number of bytes of the application's output to
+        collect before writing it to the request, or C{0} to write each
+        string the application produces as soon as it is produced.
+
+    @ivar resource: The L{WSGIResource} which is counting this response in
+        its statistics, or C{None}.
+
+    @ivar _buffer: A C{list} of byte strings produced by the application
+        which have not been written to the request yet.  This may only be
+        used in the WSGI application thread.
+
+    @ivar _bufferedBytes: The total length of the strings in C{_buffer}.
     """
 
     _requestFinished = False
+    bufferSize = 0
+    resource = None
 
     def __init__(self, reactor, threadpool, application, request):
         self.started = False
+        self._buffer = []
+        self._bufferedBytes = 0
         self.reactor = reactor
         self.threadpool = threadpool
         self.application = application
@@ -443,6 +462,8 @@ class _WSGIResponse:
         #
         # However, providing some back-pressure may nevertheless be a Good
         # Thing at some point in the future.
+        if self._buffer:
+            data = self._takeBuffer(data)
 
         def wsgiWrite(started):
             if not started:
@@ -456,6 +477,43 @@ class _WSGIResponse:
             self.started = True
 
 
+    def _bufferedWrite(self, data):
+        """
+        Collect C{data} to be written to the response body, writing everything
+        collected so far once at least C{bufferSize} bytes have been
+        collected.
+
+        This reduces the number of round trips to the I/O thread for
+        applications which produce their output as many small strings.  It
+        will be called in a non-I/O thread.
+        """
+        if not isinstance(data, bytes):
+            raise TypeError(
+                "Can only write bytes to a transport, not %r" % (data,))
+        self._buffer.append(data)
+        self._bufferedBytes += len(data)
+        if self._bufferedBytes >= self.bufferSize:
+            self.write(self._takeBuffer())
+
+
+    def _takeBuffer(self, data=b''):
+        """
+        Empty the buffer of output which has not been written yet.
+
+        This will be called in a non-I/O thread.
+
+        @param data: Bytes to append to the buffered output.
+
+        @return: The buffered output followed by C{data}.
+        @rtype: L{bytes}
+        """
+        self._buffer.append(data)
+        data = b''.join(self._buffer)
+        self._buffer = []
+        self._bufferedBytes = 0
+        return data
+
+
     def _sendResponseHeaders(self):
         """
         Set the response code and response headers on the request object, but
@@ -482,6 +540,8 @@ class _WSGIResponse:
 
         This must be called in the I/O thread.
         """
+        if self.resource is not None:
+            self.resource._requestQueued()
         self.threadpool.callInThread(self.run)
 
 
@@ -492,11 +552,17 @@ class _WSGIResponse:
         This must be called in a non-I/O thread (ie, a WSGI application
         thread).
         """
+        if self.resource is not None:
+            self.resource._requestStarted()
+        if self.bufferSize:
+            write = self._bufferedWrite
+        else:
+            write = self.write
         try:
             appIterator = self.application(self.environ, self.startResponse)
             for elem in appIterator:
                 if elem:
-                    self.write(elem)
+                    write(elem)
                 if self._requestFinished:
                     break
             close = getattr(appIterator, 'close', None)
@@ -512,13 +578,51 @@ class _WSGIResponse:
                     self.request.finish()
             self.reactor.callFromThread(wsgiError, self.started, *exc_info())
         else:
-            def wsgiFinish(started):
+            def wsgiFinish(started, data):
                 if not self._requestFinished:
                     if not started:
                         self._sendResponseHeaders()
+                    if data:
+                        self.request.write(data)
                     self.request.finish()
-            self.reactor.callFromThread(wsgiFinish, self.started)
+            # Any output still buffered is written along with finishing the
+            # request, in a single trip to the I/O thread.
+            self.reactor.callFromThread(
+                wsgiFinish, self.started, self._takeBuffer())
         self.started = True
+        if self.resource is not None:
+            self.resource._requestCompleted()
+
+
+
+class WSGIResourceStatistics:
+    """
+    Statistics about the requests handled by a L{WSGIResource}.
+
+    @ivar queuedRequestCount: The number of requests waiting for a thread of
+        the threadpool to run the application.
+    @type queuedRequestCount: L{int}
+
+    @ivar activeRequestCount: The number of requests for which the
+        application is running.
+    @type activeRequestCount: L{int}
+
+    @ivar completedRequestCount: The number of requests for which the
+        application has finished running.
+    @type completedRequestCount: L{int}
+    """
+
+    def __init__(self, queuedRequestCount, activeRequestCount,
+                 completedRequestCount):
+        self.queuedRequestCount = queuedRequestCount
+        self.activeRequestCount = activeRequestCount
+        self.completedRequestCount = completedRequestCount
+
+
+    def __repr__(self):
+        return "<WSGIResourceStatistics queued=%d active=%d completed=%d>" % (
+            self.queuedRequestCount, self.activeRequestCount,
+            self.completedRequestCount)
 
 
 
@@ -535,16 +639,111 @@ class WSGIResource:
         L{_WSGIResponse} to run the WSGI application object.
 
     @ivar _application: The WSGI application object.
+
+    @ivar outputBufferSize: The number of bytes of output from the
+        application to collect before writing them to the request.  PEP 3333
+        asks for each string the application produces to be sent to the
+        client before the next one is requested, and so this defaults to C{0},
+        which writes each string as soon as the application produces it.
+        Setting it higher saves a trip to the I/O thread, and the time the
+        application thread spends blocked waiting for it, for each small
+        string produced by applications which produce many of them.  The
+        remaining output is always written when the application finishes.
+    @type outputBufferSize: L{int}
+
+    @ivar _lock: A L{Lock} protecting the request counts, which are updated
+        from both the I/O thread and the application threads.
     """
 
     # Further resource segments are left up to the WSGI application object to
     # handle.
     isLeaf = True
 
+    outputBufferSize = 0
+
     def __init__(self, reactor, threadpool, application):
         self._reactor = reactor
         self._threadpool = threadpool
         self._application = application
+        self._lock = Lock()
+        self._queuedRequestCount = 0
+        self._activeRequestCount = 0
+        self._completedRequestCount = 0
+
+
+    @classmethod
+    def withThreadPool(cls, reactor, application, minThreads=5, maxThreads=20,
+                       name=None):
+        """
+        Create a L{WSGIResource} which runs C{application} in a threadpool of
+        its own, rather than sharing one with other resources.
+
+        The threadpool is started when the reactor starts and stopped after it
+        shuts down.  A dedicated threadpool keeps a slow application from
+        delaying other users of threads, and its size bounds the number of
+        requests the application handles at once; any others wait in the
+        threadpool's queue, which L{WSGIResource.statistics} reports on.
+
+        @param reactor: An L{IReactorThreads} provider which will be used to
+            call methods on the request in the I/O thread.
+
+        @param application: The WSGI application object.
+
+        @param minThreads: The minimum number of threads in the threadpool.
+        @type minThreads: L{int}
+
+        @param maxThreads: The maximum number of threads in the threadpool,
+            and so the number of requests handled at once.
+        @type maxThreads: L{int}
+
+        @param name: The name of the threadpool, visible in log messages.
+        @type name: native L{str}
+
+        @return: The new resource.  The threadpool is its C{_threadpool}.
+        @rtype: L{WSGIResource}
+        """
+        threadpool = ThreadPool(minThreads, maxThreads, name)
+        reactor.callWhenRunning(threadpool.start)
+        reactor.addSystemEventTrigger('after', 'shutdown', threadpool.stop)
+        return cls(reactor, threadpool, application)
+
+
+    def statistics(self):
+        """
+        Get statistics about the requests this resource is handling.
+
+        @rtype: L{WSGIResourceStatistics}
+        """
+        with self._lock:
+            return WSGIResourceStatistics(
+                self._queuedRequestCount, self._activeRequestCount,
+                self._completedRequestCount)
+
+
+    def _requestQueued(self):
+        """
+        Count a request which is waiting for a thread.
+        """
+        with self._lock:
+            self._queuedRequestCount += 1
+
+
+    def _requestStarted(self):
+        """
+        Count a request for which the application has started running.
+        """
+        with self._lock:
+            self._queuedRequestCount -= 1
+            self._activeRequestCount += 1
+
+
+    def _requestCompleted(self):
+        """
+        Count a request for which the application has finished running.
+        """
+        with self._lock:
+            self._activeRequestCount -= 1
+            self._completedRequestCount += 1
 
 
     def render(self, request):
@@ -559,6 +758,8 @@ class WSGIResource:
         """
         response = _WSGIResponse(
             self._reactor, self._threadpool, self._application, request)
+        response.bufferSize = self.outputBufferSize
+        response.resource = self
         response.start()
         return NOT_DONE_YET
 
@@ -581,4 +782,4 @@ class WSGIResource:
         raise RuntimeError("Cannot put IResource children under WSGIResource")
 
 
-__all__ = ['WSGIResource']
+__all__ = ['WSGIResource', 'WSGIResourceStatistics']